@@ -0,0 +1,116 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Bring in all of the public TensorFlow interface into this module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Nothing under tensorflow.python may be imported here: importing any of its
+# modules imports the whole tensorflow.python package, which is what this
+# module defers until the API is first used.
+import imp as _imp
+import importlib as _importlib
+import os as _os
+import sys as _sys
+import types as _types
+
+# The generated API modules resolve their attributes with the lazy loader. It
+# is loaded from its file, as importing it by name would import the whole
+# tensorflow.python package first.
+_api_lazy_loader = _imp.load_source(
+    __name__ + '._api_lazy_loader',
+    _os.path.join(_os.path.dirname(__file__), 'python', 'util',
+                  'lazy_loader.py'))
+
+# API IMPORTS PLACEHOLDER
+
+_LAZY_ATTRS['contrib'] = ('', 'tensorflow.contrib')
+
+# Add `estimator` attribute to allow access to estimator APIs via
+# "tf.estimator...", and add it to the __path__ to allow
+# "from tensorflow.estimator..." style imports.
+_estimator_api_dir = _os.path.join(
+    _os.path.dirname(__file__), 'python', 'estimator', 'api')
+if _os.path.isdir(_estimator_api_dir):
+  _LAZY_ATTRS['estimator'] = ('', 'tensorflow.python.estimator.api.estimator')
+  __path__ += [_estimator_api_dir]
+else:
+  print('tf.estimator package not installed.')
+
+
+class _LazyTensorFlowModule(_types.ModuleType):
+  """The `tensorflow` module, importing its contents on first access.
+
+  Most of the time of an eager `import tensorflow` is spent importing
+  `tensorflow.python`, which loads the runtime and registers ops, gradients
+  and exported symbols. This module only imports it when one of its
+  attributes is first looked up, and then resolves the attributes listed in
+  `_LAZY_ATTRS` one at a time, like the generated API submodules do.
+  """
+
+  def __getattr__(self, item):
+    # Only called when `item` is not yet in the module's `__dict__`.
+    # Dunders such as `__version__` are lazy attributes too.
+    lazy_attrs = self.__dict__.get('_LAZY_ATTRS', {})
+    if item not in lazy_attrs:
+      raise AttributeError("module '%s' has no attribute '%s'" %
+                           (self.__name__, item))
+    self._load_tensorflow_python()
+    module_name, symbol_name = lazy_attrs[item]
+    if module_name == '.':
+      value = _importlib.import_module(self.__name__ + '.' + symbol_name)
+    elif not module_name:
+      value = _importlib.import_module(symbol_name)
+    else:
+      value = getattr(_importlib.import_module(module_name), symbol_name)
+    setattr(self, item, value)
+    return value
+
+  def __dir__(self):
+    return sorted(set(self.__dict__) | set(self._LAZY_ATTRS))
+
+  def _load_tensorflow_python(self):
+    """Imports tensorflow.python once, as the eager `import tensorflow` does."""
+    if self.__dict__.get('_tensorflow_python_loaded'):
+      return
+    self.__dict__['_tensorflow_python_loaded'] = True
+    _importlib.import_module('tensorflow.python')
+    # Importing tensorflow.python adds these submodules to this module. They
+    # are not part of the API.
+    self.__dict__.pop('python', None)
+    self.__dict__.pop('core', None)
+
+
+del absolute_import
+del division
+del print_function
+
+_module = _LazyTensorFlowModule(__name__, __doc__)
+for _key, _value in list(globals().items()):
+  if (_key.startswith('__') or not _key.startswith('_') or
+      _key in ('_LAZY_ATTRS', '_api_lazy_loader')):
+    _module.__dict__[_key] = _value
+# Keep the original module alive: on Python 2, module objects clear their
+# globals when they are garbage collected.
+_module.__dict__['_original_module'] = _sys.modules[__name__]
+_sys.modules[__name__] = _module
+
+# `tf.app.flags` is not exported by the API generator. It is attached when
+# `tensorflow` is imported, and, like the rest of `tf.app`, only imported when
+# it is first used.
+if 'app' in _LAZY_ATTRS:
+  _module.__dict__['app'] = _importlib.import_module(__name__ + '.app')
+  _module.app.add_lazy_attr('flags', '', 'tensorflow.python.platform.flags')
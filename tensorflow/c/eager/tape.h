@@ -317,6 +317,75 @@ struct BackpropInitialState {
   gtl::FlatMap<int64, int64> op_missing_tensor;
 };
 
+// Removes from `state->op_tape` the operations which are not on a path from
+// any of the sources: their backward functions would only compute gradients
+// which are never used. Operations producing one of the targets are kept, as
+// the initial gradients are computed from their outputs.
+//
+// If `persistent_tape` is false, the backward functions of the removed
+// operations are deleted.
+template <typename BackwardFunction>
+void PruneOpsNotReachableFromSources(
+    gtl::ArraySlice<int64> target, const TensorTape& tensor_tape,
+    const gtl::FlatSet<int64>& sources_set, bool persistent_tape,
+    BackpropInitialState<BackwardFunction>* state) {
+  // Map from tensor ID to the IDs of the operations consuming it.
+  gtl::FlatMap<int64, std::vector<int64>> tensor_consumers;
+  for (const auto& op_pair : state->op_tape) {
+    for (int64 id : op_pair.second.input_tensor_id) {
+      tensor_consumers[id].push_back(op_pair.first);
+    }
+  }
+  gtl::FlatSet<int64> reachable_ops;
+  std::vector<int64> tensor_stack(sources_set.begin(), sources_set.end());
+  while (!tensor_stack.empty()) {
+    int64 tensor_id = tensor_stack.back();
+    tensor_stack.pop_back();
+    auto consumers_it = tensor_consumers.find(tensor_id);
+    if (consumers_it == tensor_consumers.end()) {
+      continue;
+    }
+    for (int64 op_id : consumers_it->second) {
+      if (!reachable_ops.insert(op_id).second) {
+        continue;
+      }
+      const auto& op_entry = state->op_tape[op_id];
+      for (const TapeTensor& output : op_entry.output_tensor_info) {
+        tensor_stack.push_back(output.id);
+      }
+    }
+  }
+  for (int64 id : target) {
+    auto it = tensor_tape.find(id);
+    if (it != tensor_tape.end() && it->second != -1) {
+      reachable_ops.insert(it->second);
+    }
+  }
+  if (reachable_ops.size() == state->op_tape.size()) {
+    return;
+  }
+  std::vector<int64> unreachable_ops;
+  for (const auto& op_pair : state->op_tape) {
+    if (reachable_ops.find(op_pair.first) == reachable_ops.end()) {
+      unreachable_ops.push_back(op_pair.first);
+    }
+  }
+  for (int64 op_id : unreachable_ops) {
+    auto op_it = state->op_tape.find(op_id);
+    if (!persistent_tape) {
+      op_it->second.backward_function_deleter(op_it->second.backward_function);
+    }
+    state->op_tape.erase(op_it);
+  }
+  // Only the remaining operations consume gradients.
+  state->tensor_usage_counts.clear();
+  for (const auto& op_pair : state->op_tape) {
+    for (int64 id : op_pair.second.input_tensor_id) {
+      state->tensor_usage_counts[id] += 1;
+    }
+  }
+}
+
 // If `persistent_tape` is true, op_tape is not changed and none of the
 // backwards functions are deleted.
 // If `persistent_tape` is false, op_tape is cleared and backwards functions
@@ -363,6 +432,8 @@ BackpropInitialState<BackwardFunction> PrepareBackprop(
       op_tape->erase(op_it);
     }
   }
+  PruneOpsNotReachableFromSources(target, tensor_tape, sources_set,
+                                  persistent_tape, &result);
   for (auto& pair : result.tensor_usage_counts) {
     auto it = tensor_tape.find(pair.first);
     if (it != tensor_tape.end() && it->second != -1) {
@@ -501,38 +572,45 @@ Status GradientTape<Gradient, BackwardFunction>::ComputeGradient(
     }
     auto trace = std::move(op_it->second);
     state.op_tape.erase(op_it);
-    std::vector<Gradient*> out_gradients;
-    out_gradients.reserve(trace.output_tensor_info.size());
+    // Zero gradients for the missing outputs are only materialized if at least
+    // one output has a gradient, i.e. if the backward function is called.
     bool any_gradient_nonzero = false;
     for (int i = 0; i < trace.output_tensor_info.size(); ++i) {
-      const int64 id = trace.output_tensor_info[i].id;
-      auto grad_it = gradients.find(id);
-      if (grad_it == gradients.end()) {
-        auto func_name_it =
-            functions_accept_none_for_indices.find(trace.op_type);
-        if (func_name_it != functions_accept_none_for_indices.end() &&
-            func_name_it->second.find(i) != func_name_it->second.end()) {
-          out_gradients.push_back(nullptr);
-        } else {
-          out_gradients.push_back(
-              vspace.Zeros(trace.output_tensor_info[i].shape,
-                           trace.output_tensor_info[i].dtype));
-        }
-      } else {
+      if (gradients.find(trace.output_tensor_info[i].id) != gradients.end()) {
         any_gradient_nonzero = true;
-        auto new_gradients = vspace.AggregateGradients(grad_it->second);
-        if (sources_set.find(grad_it->first) == sources_set.end()) {
-          gradients.erase(grad_it);
-        } else {
-          grad_it->second.clear();
-          grad_it->second.push_back(new_gradients);
-          vspace.MarkAsResult(new_gradients);
-        }
-        out_gradients.push_back(new_gradients);
+        break;
       }
     }
     std::vector<Gradient*> in_gradients;
     if (any_gradient_nonzero) {
+      std::vector<Gradient*> out_gradients;
+      out_gradients.reserve(trace.output_tensor_info.size());
+      for (int i = 0; i < trace.output_tensor_info.size(); ++i) {
+        const int64 id = trace.output_tensor_info[i].id;
+        auto grad_it = gradients.find(id);
+        if (grad_it == gradients.end()) {
+          auto func_name_it =
+              functions_accept_none_for_indices.find(trace.op_type);
+          if (func_name_it != functions_accept_none_for_indices.end() &&
+              func_name_it->second.find(i) != func_name_it->second.end()) {
+            out_gradients.push_back(nullptr);
+          } else {
+            out_gradients.push_back(
+                vspace.Zeros(trace.output_tensor_info[i].shape,
+                             trace.output_tensor_info[i].dtype));
+          }
+        } else {
+          auto new_gradients = vspace.AggregateGradients(grad_it->second);
+          if (sources_set.find(grad_it->first) == sources_set.end()) {
+            gradients.erase(grad_it);
+          } else {
+            grad_it->second.clear();
+            grad_it->second.push_back(new_gradients);
+            vspace.MarkAsResult(new_gradients);
+          }
+          out_gradients.push_back(new_gradients);
+        }
+      }
       Status s = vspace.CallBackwardFunction(trace.backward_function,
                                              out_gradients, &in_gradients);
       if (!persistent_) {
@@ -547,11 +625,6 @@ Status GradientTape<Gradient, BackwardFunction>::ComputeGradient(
       if (!persistent_) {
         trace.backward_function_deleter(trace.backward_function);
       }
-      for (Gradient* grad : out_gradients) {
-        if (grad != nullptr) {
-          vspace.DeleteGradient(grad);
-        }
-      }
     }
     VLOG(1) << "Got " << in_gradients.size() << " in_gradients for "
             << trace.input_tensor_id.size() << " sources";
@@ -99,6 +99,11 @@ class ProgramContext(object):
     required_imports: str, containing an import statement on each line. These
         are all the imports necessary for the compiled code to run, in addition
         to the closures of each entity, which are attached dynamically.
+    conversion_cache: Optional[ConversionCache], a persistent cache of
+        converted functions. None disables caching.
+    pass_times: Dict[str, float], the total time in seconds spent in each
+        conversion step, keyed by the name of the step. Converter passes are
+        keyed by the name of their module.
   """
 
   def __init__(
@@ -108,18 +113,21 @@ class ProgramContext(object):
       partial_types,
       autograph_module,
       uncompiled_modules,
+      conversion_cache=None,
   ):
     self.recursive = recursive
     self.autograph_decorators = autograph_decorators
     self.partial_types = partial_types if partial_types else ()
     self.autograph_module = autograph_module
     self.uncompiled_modules = uncompiled_modules
+    self.conversion_cache = conversion_cache
 
     # Required to output dependencies in discovery order, which should match
     # the reverse dependency order.
     self.dependency_cache = collections.OrderedDict()
     self.additional_imports = set()
     self.name_map = {}
+    self.pass_times = collections.defaultdict(float)
 
   @property
   def required_imports(self):
@@ -162,6 +170,9 @@ class ProgramContext(object):
       else:
         self.name_map[o] = name
 
+  def add_pass_time(self, name, seconds):
+    self.pass_times[name] += seconds
+
   def add_to_cache(self, original_entity, converted_ast):
     self.dependency_cache[original_entity] = converted_ast
 
@@ -19,6 +19,8 @@ from __future__ import division
 from __future__ import print_function
 
 from functools import wraps
+import os
+import time
 
 from enum import Enum
 
@@ -30,6 +32,7 @@ import six
 from tensorflow.contrib.autograph.core import config
 from tensorflow.contrib.autograph.core import converter
 from tensorflow.contrib.autograph.impl import conversion
+from tensorflow.contrib.autograph.impl import conversion_cache
 from tensorflow.contrib.autograph.pyct import compiler
 from tensorflow.contrib.autograph.pyct import inspect_utils
 from tensorflow.contrib.autograph.utils import builtins
@@ -204,7 +207,8 @@ def to_graph(e,
              verbose=False,
              arg_values=None,
              arg_types=None,
-             partial_types=None):
+             partial_types=None,
+             cache_dir=None):
   """Compile a Python entity into equivalent TensorFlow code.
 
   Currently supported entities:
@@ -225,25 +229,34 @@ def to_graph(e,
     partial_types: A set of types (e.g. classes) that will not be converted
         entirely. Calls to member functions for these types will be renamed
         independently.
+    cache_dir: Directory in which converted functions are persisted across
+        processes. Defaults to the value of the AUTOGRAPH_CACHE_DIR environment
+        variable; the cache is disabled if neither is set.
 
   Returns:
     A function with a signature identical to `o`, but which when executed it
   creates TF a graph that has the same functionality as the original entity.
   """
+  if cache_dir is None:
+    cache_dir = os.environ.get(conversion_cache.CACHE_DIR_ENV_VAR)
   program_ctx = converter.ProgramContext(
       recursive=recursive,
       autograph_decorators=(convert, do_not_convert, converted_call),
       partial_types=partial_types,
       autograph_module=tf_inspect.getmodule(to_graph),
-      uncompiled_modules=config.DEFAULT_UNCOMPILED_MODULES)
+      uncompiled_modules=config.DEFAULT_UNCOMPILED_MODULES,
+      conversion_cache=(conversion_cache.ConversionCache(cache_dir)
+                        if cache_dir else None))
   _, name, namespace = conversion.entity_to_graph(e, program_ctx, arg_values,
                                                   arg_types)
 
+  start = time.time()
   module = gast.Module([])
   for dep in reversed(program_ctx.dependency_cache.values()):
     module.body.append(dep)
   compiled_node, compiled_src = compiler.ast_to_object(
       module, source_prefix=program_ctx.required_imports)
+  program_ctx.add_pass_time('compile', time.time() - start)
 
   # The compiled code should see everything the entry entity saw.
   # TODO(mdan): This might not work well if the call tree spans modules?
@@ -253,8 +266,14 @@ def to_graph(e,
       compiled_node.__dict__[key] = val
   compiled_fn = getattr(compiled_node, name)
 
+  pass_times = '\n'.join(
+      '  %s: %.4fs' % (k, v) for k, v in sorted(
+          program_ctx.pass_times.items(), key=lambda kv: kv[1], reverse=True))
   if verbose:
     logging.info('Compiled output of %s:\n\n%s\n', e, compiled_src)
+    logging.info('Conversion time of %s by step:\n%s', e, pass_times)
+  else:
+    logging.vlog(1, 'Conversion time of %s by step:\n%s', e, pass_times)
 
   return compiled_fn
 
@@ -18,6 +18,8 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import os
+
 import numpy as np
 
 from tensorflow.contrib.autograph import utils
@@ -276,6 +278,22 @@ class ApiTest(test.TestCase):
       x = compiled_fn(constant_op.constant([4, 8]), 4)
       self.assertListEqual([1, 2], sess.run(x).tolist())
 
+  def test_to_graph_conversion_cache(self):
+
+    def test_fn(x, s):
+      while tf.reduce_sum(x) > s:
+        x //= 2
+      return x
+
+    cache_dir = os.path.join(self.get_temp_dir(), 'to_graph_cache')
+    api.to_graph(test_fn, cache_dir=cache_dir)
+    self.assertTrue(os.listdir(cache_dir))
+    compiled_fn = api.to_graph(test_fn, cache_dir=cache_dir)
+
+    with self.test_session() as sess:
+      x = compiled_fn(constant_op.constant([4, 8]), 4)
+      self.assertListEqual([1, 2], sess.run(x).tolist())
+
   def test_to_code_basic(self):
 
     def test_fn(x, s):
@@ -19,6 +19,8 @@ from __future__ import division
 from __future__ import print_function
 
 import imp
+import textwrap
+import time
 
 import gast
 
@@ -40,7 +42,9 @@ from tensorflow.contrib.autograph.converters import single_return
 from tensorflow.contrib.autograph.converters import slices
 from tensorflow.contrib.autograph.core import config
 from tensorflow.contrib.autograph.core import converter
+from tensorflow.contrib.autograph.impl import conversion_cache
 from tensorflow.contrib.autograph.pyct import ast_util
+from tensorflow.contrib.autograph.pyct import compiler
 from tensorflow.contrib.autograph.pyct import inspect_utils
 from tensorflow.contrib.autograph.pyct import parser
 from tensorflow.contrib.autograph.pyct import qual_names
@@ -239,24 +243,108 @@ def _add_self_references(namespace, autograph_module):
   _add_reserved_symbol(namespace, 'ag__', ag_internal)
 
 
+def _load_cached_function(entry, namespace, program_ctx, owner_type):
+  """Restores a function converted by an earlier process.
+
+  Returns:
+    A tuple (node, namer), or None if the entry conflicts with the current
+    program, in which case the function needs to be converted again.
+  """
+  namer = program_ctx.new_namer(namespace)
+  for locator, name in entry.renamed_calls:
+    entity = conversion_cache.ConversionCache.resolve(
+        locator, namespace, owner_type)
+    if entity is None:
+      return None
+    if program_ctx.name_map.get(entity, name) != name:
+      return None
+    if name in namespace and namespace[name] is not entity:
+      return None
+    namer.renamed_calls[entity] = name
+    namer.generated_names.add(name)
+  node = parser.parse_str(entry.source).body[0]
+  program_ctx.additional_imports.update(entry.additional_imports)
+  return node, namer
+
+
+def _make_cache_entry(node, namer, namespace, additional_imports, owner_type):
+  """Returns a CacheEntry for a converted function, or None."""
+  source = compiler.ast_to_source(node)
+  identifiers = set(conversion_cache.IDENTIFIER_RE.findall(source))
+  renamed_calls = []
+  for entity, name in namer.renamed_calls.items():
+    if name not in identifiers:
+      continue
+    locator = conversion_cache.ConversionCache.locate(
+        entity, namespace, owner_type)
+    if locator is None:
+      return None
+    renamed_calls.append((locator, name))
+  return conversion_cache.CacheEntry(
+      source=source,
+      renamed_calls=tuple(sorted(renamed_calls)),
+      additional_imports=tuple(sorted(additional_imports)))
+
+
 def function_to_graph(f, program_ctx, arg_values, arg_types, owner_type=None):
   """Specialization of `entity_to_graph` for callable functions."""
-  node, source = parser.parse_entity(f)
-  node = node.body[0]
+  start = time.time()
+  source = textwrap.dedent(tf_inspect.getsource(f))
+  program_ctx.add_pass_time('parse', time.time() - start)
 
   namespace = inspect_utils.getnamespace(f)
   _add_self_references(namespace, program_ctx.autograph_module)
-  namer = program_ctx.new_namer(namespace)
 
-  entity_info = transformer.EntityInfo(
-      source_code=source,
-      source_file='<fragment>',
-      namespace=namespace,
-      arg_values=arg_values,
-      arg_types=arg_types,
-      owner_type=owner_type)
-  context = converter.EntityContext(namer, entity_info, program_ctx)
-  node = node_to_graph(node, context)
+  cache = program_ctx.conversion_cache
+  cache_key = None
+  cached = None
+  if cache is not None:
+    start = time.time()
+    cache_key = cache.key(f, source, namespace, program_ctx, arg_values,
+                          arg_types, owner_type)
+    if cache_key is not None:
+      entry = cache.get(cache_key)
+      if entry is not None:
+        cached = _load_cached_function(entry, namespace, program_ctx,
+                                       owner_type)
+    program_ctx.add_pass_time('cache', time.time() - start)
+
+  if cached is not None:
+    node, namer = cached
+    # Keep the symbols that the converters would have added.
+    namespace['len'] = len
+  else:
+    start = time.time()
+    node = parser.parse_str(source).body[0]
+    program_ctx.add_pass_time('parse', time.time() - start)
+    namer = program_ctx.new_namer(namespace)
+
+    entity_info = transformer.EntityInfo(
+        source_code=source,
+        source_file='<fragment>',
+        namespace=namespace,
+        arg_values=arg_values,
+        arg_types=arg_types,
+        owner_type=owner_type)
+    context = converter.EntityContext(namer, entity_info, program_ctx)
+    # Collect the imports of this function separately, so that they can be
+    # cached with it.
+    program_imports = program_ctx.additional_imports
+    program_ctx.additional_imports = set()
+    try:
+      node = node_to_graph(node, context)
+      entity_imports = program_ctx.additional_imports
+    finally:
+      program_ctx.additional_imports = program_imports
+    program_imports.update(entity_imports)
+
+    if cache_key is not None:
+      start = time.time()
+      entry = _make_cache_entry(node, namer, namespace, entity_imports,
+                                owner_type)
+      if entry is not None:
+        cache.put(cache_key, entry)
+      program_ctx.add_pass_time('cache', time.time() - start)
 
   # TODO(mdan): This somewhat duplicates the call rename logic in call_treest.py
   new_name, did_rename = namer.compiled_function_name(f.__name__, f, owner_type)
@@ -274,11 +362,17 @@ def function_to_graph(f, program_ctx, arg_values, arg_types, owner_type=None):
 
 def _apply_transformer(node, context, converter_module):
   # TODO(mdan): Clear static analysis here.
+  start = time.time()
   node = qual_names.resolve(node)
   node = activity.resolve(node, context.info, None)
   node = live_values.resolve(node, context.info, config.PYTHON_LITERALS)
   node = type_info.resolve(node, context.info)
+  context.program.add_pass_time('static_analysis', time.time() - start)
+
+  start = time.time()
   node = converter_module.transform(node, context)
+  context.program.add_pass_time(
+      converter_module.__name__.split('.')[-1], time.time() - start)
   return node
 
 
@@ -0,0 +1,249 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Persistent, on-disk cache for converted functions."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+
+from tensorflow.python.framework import versions
+from tensorflow.python.platform import tf_logging as logging
+from tensorflow.python.util import tf_inspect
+
+
+# Increment whenever a change to the format of the cache entries may alter
+# the loaded code. Changes to the converters are detected by
+# `converter_version`.
+CACHE_FORMAT_VERSION = 1
+
+# The files and packages, relative to the autograph package, whose code
+# generates the converted code.
+_CONVERTER_SOURCES = (
+    'converters',
+    'core',
+    'pyct',
+    os.path.join('impl', 'conversion.py'),
+)
+
+_converter_version = None
+
+# Name of the environment variable that enables the cache in all processes.
+CACHE_DIR_ENV_VAR = 'AUTOGRAPH_CACHE_DIR'
+
+IDENTIFIER_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+
+# A converted function, as it was stored in the cache.
+#   source: str, the source code of the converted FunctionDef.
+#   renamed_calls: Tuple[Tuple[str, str], ...], (locator, new name) pairs for
+#       each entity whose calls were renamed; see `ConversionCache.locate`.
+#   additional_imports: Tuple[str, ...], import statements that the converted
+#       code requires.
+CacheEntry = collections.namedtuple(
+    'CacheEntry', ('source', 'renamed_calls', 'additional_imports'))
+
+
+def _converter_sources():
+  """Yields the paths of the Python files listed by _CONVERTER_SOURCES."""
+  root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+  for source in _CONVERTER_SOURCES:
+    path = os.path.join(root, source)
+    if not os.path.isdir(path):
+      yield path
+      continue
+    for dirpath, dirnames, filenames in os.walk(path):
+      dirnames.sort()
+      for filename in sorted(filenames):
+        if filename.endswith('.py') and not filename.endswith('_test.py'):
+          yield os.path.join(dirpath, filename)
+
+
+def converter_version():
+  """Returns a fingerprint of the code that generates converted functions.
+
+  The fingerprint hashes the sources of the converters and of the modules
+  that drive them, along with the TensorFlow version, so that entries written
+  by a different converter are ignored. Sources which can't be read, e.g. when
+  only bytecode is installed, are only covered by the TensorFlow version.
+
+  Returns:
+    str, the hex digest of the fingerprint.
+  """
+  global _converter_version
+  if _converter_version is None:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    fingerprint = hashlib.sha1()
+    fingerprint.update(versions.__version__.encode('utf-8'))
+    for path in _converter_sources():
+      fingerprint.update(os.path.relpath(path, root).encode('utf-8'))
+      try:
+        with open(path, 'rb') as f:
+          fingerprint.update(f.read())
+      except (IOError, OSError):
+        fingerprint.update(b'<unreadable>')
+    _converter_version = fingerprint.hexdigest()
+  return _converter_version
+
+
+def _describe(value):
+  """Returns a string that identifies the kind of a namespace value."""
+  if tf_inspect.ismodule(value):
+    return 'module:%s' % value.__name__
+  if tf_inspect.isclass(value) or tf_inspect.isroutine(value):
+    name = getattr(value, '__qualname__', getattr(value, '__name__', ''))
+    return 'entity:%s.%s' % (getattr(value, '__module__', None), name)
+  return 'value:%s.%s' % (type(value).__module__, type(value).__name__)
+
+
+def _describe_type_hint(hint):
+  if isinstance(hint, tuple):
+    return tuple(_describe_type_hint(h) for h in hint)
+  if isinstance(hint, str):
+    return hint
+  return _describe(hint)
+
+
+class ConversionCache(object):
+  """Stores the converted code of functions in a directory.
+
+  Entries are keyed on everything the converters read: the source code of the
+  function, the converter version, the Python version, the conversion options
+  and the kind of each symbol that the function refers to. Calls to other
+  entities are stored as names relative to the function's namespace, so that
+  they can be resolved to the live entities again when the entry is loaded.
+
+  Values hinted with `arg_values` are live objects that cannot be described
+  reliably, so functions converted with such hints are never cached.
+
+  This object may be shared by any number of processes. Writes are atomic.
+  """
+
+  def __init__(self, cache_dir):
+    self.cache_dir = cache_dir
+    self.hits = 0
+    self.misses = 0
+
+  def key(self, f, source, namespace, program_ctx, arg_values, arg_types,
+          owner_type):
+    """Returns the cache key of a function, or None if it can't be cached."""
+    if arg_values:
+      return None
+    referenced = sorted(
+        set(IDENTIFIER_RE.findall(source)).intersection(namespace))
+    fingerprint = (
+        CACHE_FORMAT_VERSION,
+        converter_version(),
+        sys.version_info[:2],
+        source,
+        f.__name__,
+        _describe(owner_type) if owner_type is not None else None,
+        program_ctx.recursive,
+        sorted(_describe(t) for t in program_ctx.partial_types),
+        sorted((k, _describe_type_hint(v))
+               for k, v in (arg_types or {}).items()),
+        [(name, _describe(namespace[name])) for name in referenced],
+    )
+    return hashlib.sha1(repr(fingerprint).encode('utf-8')).hexdigest()
+
+  def _path(self, key):
+    return os.path.join(self.cache_dir, '%s.json' % key)
+
+  def get(self, key):
+    """Returns the CacheEntry stored under key, or None."""
+    try:
+      with open(self._path(key), 'r') as f:
+        data = json.load(f)
+      if data['version'] != CONVERTER_VERSION:
+        raise ValueError('version %s' % data['version'])
+      entry = CacheEntry(
+          source=data['source'],
+          renamed_calls=tuple(tuple(r) for r in data['renamed_calls']),
+          additional_imports=tuple(data['additional_imports']))
+    except (IOError, OSError):
+      self.misses += 1
+      return None
+    except (ValueError, KeyError, TypeError) as e:
+      logging.vlog(1, 'Ignoring invalid cache entry %s: %s', key, e)
+      self.misses += 1
+      return None
+    self.hits += 1
+    return entry
+
+  def put(self, key, entry):
+    """Stores an entry. Failures are logged and otherwise ignored."""
+    data = {
+        'version': CONVERTER_VERSION,
+        'source': entry.source,
+        'renamed_calls': [list(r) for r in entry.renamed_calls],
+        'additional_imports': list(entry.additional_imports),
+    }
+    try:
+      if not os.path.isdir(self.cache_dir):
+        os.makedirs(self.cache_dir)
+      fd, tmp_name = tempfile.mkstemp(suffix='.tmp', dir=self.cache_dir)
+      with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+      os.rename(tmp_name, self._path(key))
+    except (IOError, OSError) as e:
+      logging.vlog(1, 'Could not write cache entry %s: %s', key, e)
+
+  @staticmethod
+  def locate(entity, namespace, owner_type):
+    """Returns a string that resolves to entity in namespace, or None.
+
+    Args:
+      entity: The entity to locate.
+      namespace: Dict[str, Any], the namespace of the converted function.
+      owner_type: The class that owns the converted function, if any.
+
+    Returns:
+      One of 'name' for a symbol of the namespace, 'name.attr' for an
+      attribute of a module in the namespace or '.attr' for an attribute of
+      owner_type; None if the entity could not be found.
+    """
+    for name, value in namespace.items():
+      if value is entity:
+        return name
+    if owner_type is not None:
+      name = getattr(entity, '__name__', None)
+      if name and getattr(owner_type, name, None) == entity:
+        return '.%s' % name
+    for name, value in namespace.items():
+      if not tf_inspect.ismodule(value):
+        continue
+      attr = getattr(entity, '__name__', None)
+      if attr and getattr(value, attr, None) is entity:
+        return '%s.%s' % (name, attr)
+    return None
+
+  @staticmethod
+  def resolve(locator, namespace, owner_type):
+    """Inverse of `locate`. Returns None if the locator no longer resolves."""
+    prefix, _, attr = locator.partition('.')
+    if not prefix:
+      return getattr(owner_type, attr, None)
+    if prefix not in namespace:
+      return None
+    if not attr:
+      return namespace[prefix]
+    return getattr(namespace[prefix], attr, None)
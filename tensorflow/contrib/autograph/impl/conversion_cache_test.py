@@ -0,0 +1,143 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for conversion_cache module."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+from tensorflow.contrib.autograph.core import config
+from tensorflow.contrib.autograph.core import converter
+from tensorflow.contrib.autograph.impl import api
+from tensorflow.contrib.autograph.impl import conversion_cache
+from tensorflow.python.framework import constant_op
+from tensorflow.python.platform import test
+
+
+class ConversionCacheTest(test.TestCase):
+
+  def _program_ctx(self, recursive=True):
+    return converter.ProgramContext(
+        recursive=recursive,
+        autograph_decorators=(),
+        partial_types=(),
+        autograph_module=api,
+        uncompiled_modules=config.DEFAULT_UNCOMPILED_MODULES)
+
+  def _key(self, f, source, namespace, program_ctx=None, arg_values=None,
+           arg_types=None):
+    cache = conversion_cache.ConversionCache(self.get_temp_dir())
+    return cache.key(f, source, namespace, program_ctx or self._program_ctx(),
+                     arg_values, arg_types, None)
+
+  def test_key(self):
+
+    def f(a):
+      return a
+
+    source = 'def f(a):\n  return constant_op.constant(a)\n'
+    namespace = {'constant_op': constant_op}
+    key = self._key(f, source, namespace)
+    self.assertEqual(key, self._key(f, source, dict(namespace)))
+
+    self.assertNotEqual(key, self._key(f, source + '\n', namespace))
+    self.assertNotEqual(
+        key, self._key(f, source, namespace, self._program_ctx(False)))
+    self.assertNotEqual(
+        key, self._key(f, source, {'constant_op': os}))
+    self.assertNotEqual(
+        key, self._key(f, source, namespace, arg_types={'a': ('int', int)}))
+    # Symbols that the function doesn't refer to are ignored.
+    self.assertEqual(
+        key, self._key(f, source, dict(namespace, os=os)))
+    # Live values can't be described.
+    self.assertIsNone(self._key(f, source, namespace, arg_values={'a': 1}))
+
+  def test_key_depends_on_converter_version(self):
+
+    def f(a):
+      return a
+
+    source = 'def f(a):\n  return a\n'
+    version = conversion_cache.converter_version()
+    self.assertEqual(version, conversion_cache.converter_version())
+    key = self._key(f, source, {})
+    try:
+      conversion_cache._converter_version = version + '0'
+      self.assertNotEqual(key, self._key(f, source, {}))
+    finally:
+      conversion_cache._converter_version = version
+    self.assertEqual(key, self._key(f, source, {}))
+
+  def test_converter_sources(self):
+    sources = [os.path.basename(path)
+               for path in conversion_cache._converter_sources()]
+    self.assertIn('control_flow.py', sources)
+    self.assertIn('transformer.py', sources)
+    self.assertIn('conversion.py', sources)
+    self.assertNotIn('control_flow_test.py', sources)
+
+  def test_get_put(self):
+    cache_dir = os.path.join(self.get_temp_dir(), 'get_put')
+    cache = conversion_cache.ConversionCache(cache_dir)
+    entry = conversion_cache.CacheEntry(
+        source='def f():\n  pass\n',
+        renamed_calls=(('g', 'tf__g'),),
+        additional_imports=('import os as os',))
+
+    self.assertIsNone(cache.get('key'))
+    cache.put('key', entry)
+    self.assertEqual(entry, cache.get('key'))
+    self.assertEqual(1, cache.hits)
+    self.assertEqual(1, cache.misses)
+
+    with open(os.path.join(cache_dir, 'key.json'), 'w') as f:
+      f.write('{"source": ')
+    self.assertIsNone(cache.get('key'))
+
+  def test_locate_resolve(self):
+
+    class TestClass(object):
+
+      def foo(self):
+        pass
+
+    def g():
+      pass
+
+    namespace = {'g': g, 'constant_op': constant_op}
+    for entity, locator, owner_type in (
+        (g, 'g', None),
+        (constant_op.constant, 'constant_op.constant', None),
+        (TestClass.foo, '.foo', TestClass)):
+      self.assertEqual(
+          locator,
+          conversion_cache.ConversionCache.locate(entity, namespace,
+                                                  owner_type))
+      self.assertEqual(
+          entity,
+          conversion_cache.ConversionCache.resolve(locator, namespace,
+                                                   owner_type))
+
+    self.assertIsNone(
+        conversion_cache.ConversionCache.locate(os.path.join, namespace, None))
+    self.assertIsNone(
+        conversion_cache.ConversionCache.resolve('h', namespace, None))
+
+
+if __name__ == '__main__':
+  test.main()
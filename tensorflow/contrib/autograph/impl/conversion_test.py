@@ -18,6 +18,8 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import os
+
 import gast
 
 from tensorflow.contrib.autograph import utils
@@ -25,6 +27,8 @@ from tensorflow.contrib.autograph.core import config
 from tensorflow.contrib.autograph.core import converter
 from tensorflow.contrib.autograph.impl import api
 from tensorflow.contrib.autograph.impl import conversion
+from tensorflow.contrib.autograph.impl import conversion_cache
+from tensorflow.contrib.autograph.pyct import compiler
 from tensorflow.python.framework import constant_op
 from tensorflow.python.keras.engine import training
 from tensorflow.python.platform import test
@@ -32,13 +36,14 @@ from tensorflow.python.platform import test
 
 class ConversionTest(test.TestCase):
 
-  def _simple_program_ctx(self):
+  def _simple_program_ctx(self, cache=None):
     return converter.ProgramContext(
         recursive=True,
         autograph_decorators=(),
         partial_types=(),
         autograph_module=api,
-        uncompiled_modules=config.DEFAULT_UNCOMPILED_MODULES)
+        uncompiled_modules=config.DEFAULT_UNCOMPILED_MODULES,
+        conversion_cache=cache)
 
   def test_is_whitelisted_for_graph(self):
 
@@ -164,6 +169,66 @@ class ConversionTest(test.TestCase):
 
     self.assertTrue(callee_ns['ag__'] is caller_ns['ag__'])
 
+  def test_entity_to_graph_pass_times(self):
+
+    def f(a):
+      return a + 1
+
+    program_ctx = self._simple_program_ctx()
+    conversion.entity_to_graph(f, program_ctx, None, None)
+
+    for step in ('parse', 'static_analysis', 'call_trees', 'control_flow'):
+      self.assertGreater(program_ctx.pass_times[step], 0, step)
+    self.assertNotIn('cache', program_ctx.pass_times)
+
+  def test_entity_to_graph_conversion_cache(self):
+
+    def g(a):
+      return a
+
+    def f(a):
+      return g(a)
+
+    cache_dir = os.path.join(self.get_temp_dir(), 'conversion_cache')
+    cache = conversion_cache.ConversionCache(cache_dir)
+    program_ctx = self._simple_program_ctx(cache)
+    conversion.entity_to_graph(f, program_ctx, None, None)
+    self.assertEqual(0, cache.hits)
+    self.assertEqual(2, cache.misses)
+    self.assertEqual(2, len(os.listdir(cache_dir)))
+
+    # A new program, e.g. in a different process, reuses the converted code.
+    cache = conversion_cache.ConversionCache(cache_dir)
+    cached_program_ctx = self._simple_program_ctx(cache)
+    conversion.entity_to_graph(f, cached_program_ctx, None, None)
+    self.assertEqual(2, cache.hits)
+    self.assertEqual(0, cache.misses)
+    self.assertEqual(program_ctx.name_map, cached_program_ctx.name_map)
+    for entity in (f, g):
+      self.assertEqual(
+          compiler.ast_to_source(program_ctx.dependency_cache[entity]),
+          compiler.ast_to_source(cached_program_ctx.dependency_cache[entity]))
+
+  def test_entity_to_graph_conversion_cache_conflict(self):
+
+    def g(a):
+      return a
+
+    def f(a):
+      return g(a)
+
+    cache_dir = os.path.join(self.get_temp_dir(), 'conversion_cache_conflict')
+    program_ctx = self._simple_program_ctx(
+        conversion_cache.ConversionCache(cache_dir))
+    conversion.entity_to_graph(f, program_ctx, None, None)
+
+    # The cached entry of f refers to tf__g, which now names another entity.
+    cache = conversion_cache.ConversionCache(cache_dir)
+    program_ctx = self._simple_program_ctx(cache)
+    program_ctx.name_map[g] = 'tf__other_g'
+    node, _, _ = conversion.entity_to_graph(f, program_ctx, None, None)
+    self.assertEqual('tf__other_g', node.body[0].body[0].value.func.id)
+
 
 if __name__ == '__main__':
   test.main()
@@ -16,8 +16,12 @@
 
 See the @{$python/contrib.crf} guide.
 
+@@batch_viterbi_decode
 @@crf_binary_score
 @@crf_decode
+@@crf_decode_backward
+@@crf_decode_forward
+@@crf_forward
 @@crf_log_likelihood
 @@crf_log_norm
 @@crf_sequence_score
@@ -32,8 +36,12 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+from tensorflow.contrib.crf.python.ops.crf import batch_viterbi_decode
 from tensorflow.contrib.crf.python.ops.crf import crf_binary_score
 from tensorflow.contrib.crf.python.ops.crf import crf_decode
+from tensorflow.contrib.crf.python.ops.crf import crf_decode_backward
+from tensorflow.contrib.crf.python.ops.crf import crf_decode_forward
+from tensorflow.contrib.crf.python.ops.crf import crf_forward
 from tensorflow.contrib.crf.python.ops.crf import crf_log_likelihood
 from tensorflow.contrib.crf.python.ops.crf import crf_log_norm
 from tensorflow.contrib.crf.python.ops.crf import crf_sequence_score
@@ -19,16 +19,32 @@ from __future__ import division
 from __future__ import print_function
 
 import itertools
+import time
 
 import numpy as np
 
 from tensorflow.contrib.crf.python.ops import crf
+from tensorflow.python.client import session
 from tensorflow.python.framework import constant_op
+from tensorflow.python.framework import ops
 from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import control_flow_ops
+from tensorflow.python.ops import gradients_impl
 from tensorflow.python.ops import math_ops
 from tensorflow.python.platform import test
 
 
+def _random_batch(batch_size, max_seq_len, num_tags, seed=0):
+  """Returns random unary potentials, sequence lengths and transitions."""
+  rng = np.random.RandomState(seed)
+  inputs = rng.randn(batch_size, max_seq_len, num_tags).astype(np.float32)
+  sequence_lengths = rng.randint(
+      1, max_seq_len + 1, size=[batch_size]).astype(np.int32)
+  sequence_lengths[0] = max_seq_len
+  transition_params = rng.randn(num_tags, num_tags).astype(np.float32)
+  return inputs, sequence_lengths, transition_params
+
+
 class CrfTest(test.TestCase):
 
   def testCrfSequenceScore(self):
@@ -235,6 +251,66 @@ class CrfTest(test.TestCase):
       self.assertEqual(actual_max_sequence,
                        expected_max_sequence[:sequence_lengths])
 
+  def testBatchViterbiDecode(self):
+    inputs, sequence_lengths, transition_params = _random_batch(8, 6, 4)
+    viterbi, viterbi_score = crf.batch_viterbi_decode(
+        inputs, transition_params, sequence_lengths)
+    self.assertEqual((8, 6), viterbi.shape)
+    for i, sequence_length in enumerate(sequence_lengths):
+      expected_viterbi, expected_score = crf.viterbi_decode(
+          inputs[i, :sequence_length], transition_params)
+      self.assertEqual(expected_viterbi, list(viterbi[i, :sequence_length]))
+      self.assertFalse(viterbi[i, sequence_length:].any())
+      self.assertAllClose(expected_score, viterbi_score[i])
+
+    # The sequences default to the full length.
+    viterbi, viterbi_score = crf.batch_viterbi_decode(
+        inputs[:1], transition_params)
+    expected_viterbi, expected_score = crf.viterbi_decode(
+        inputs[0], transition_params)
+    self.assertEqual(expected_viterbi, list(viterbi[0]))
+    self.assertAllClose(expected_score, viterbi_score[0])
+
+  def testCrfDecodeBatch(self):
+    inputs, sequence_lengths, transition_params = _random_batch(8, 6, 4)
+    expected_tags, expected_scores = crf.batch_viterbi_decode(
+        inputs, transition_params, sequence_lengths)
+    with self.test_session() as sess:
+      tags, scores = crf.crf_decode(
+          constant_op.constant(inputs), constant_op.constant(transition_params),
+          constant_op.constant(sequence_lengths))
+      tf_tags, tf_scores = sess.run([tags, scores])
+    self.assertAllEqual(expected_tags, tf_tags)
+    self.assertAllClose(expected_scores, tf_scores)
+
+  def testCrfLogNormBatch(self):
+    inputs, sequence_lengths, transition_params = _random_batch(8, 6, 4)
+    with self.test_session() as sess:
+      inputs_t = constant_op.constant(inputs)
+      transition_params_t = constant_op.constant(transition_params)
+      log_norm = crf.crf_log_norm(
+          inputs_t, constant_op.constant(sequence_lengths),
+          transition_params_t)
+      # Each sequence is normalized as if it was alone and unpadded.
+      expected_log_norm = array_ops.concat([
+          crf.crf_log_norm(
+              inputs_t[i:i + 1, :sequence_length],
+              constant_op.constant([sequence_length]), transition_params_t)
+          for i, sequence_length in enumerate(sequence_lengths)
+      ], 0)
+      grads = gradients_impl.gradients(
+          math_ops.reduce_sum(log_norm), [inputs_t, transition_params_t])
+      tf_log_norm, tf_expected_log_norm, tf_grads = sess.run(
+          [log_norm, expected_log_norm, grads])
+    self.assertAllClose(tf_expected_log_norm, tf_log_norm)
+    tf_inputs_grad, tf_transition_params_grad = tf_grads
+    # The marginals of the tags at each step sum to one, and the padding gets
+    # no gradient.
+    mask = np.arange(6) < np.expand_dims(sequence_lengths, 1)
+    self.assertAllClose(mask.astype(np.float32), tf_inputs_grad.sum(2))
+    self.assertAllClose(np.sum(sequence_lengths - 1),
+                        tf_transition_params_grad.sum())
+
   def testCrfDecode(self):
     transition_params = np.array(
         [[-3, 5, -2], [3, 4, 1], [1, 2, 1]], dtype=np.float32)
@@ -313,5 +389,52 @@ class CrfTest(test.TestCase):
       self.assertEqual(len(tf_tags.shape), 2)
       self.assertEqual(len(tf_scores.shape), 1)
 
+
+class CrfBenchmark(test.Benchmark):
+  """Measures the decoding and normalization of batches of sequences."""
+
+  def _benchmark_numpy(self, inputs, sequence_lengths, transition_params,
+                       name, num_iters=10):
+    start = time.time()
+    for _ in range(num_iters):
+      for score, sequence_length in zip(inputs, sequence_lengths):
+        crf.viterbi_decode(score[:sequence_length], transition_params)
+    self.report_benchmark(
+        iters=num_iters, wall_time=(time.time() - start) / num_iters,
+        name="viterbi_decode_%s" % name)
+
+    start = time.time()
+    for _ in range(num_iters):
+      crf.batch_viterbi_decode(inputs, transition_params, sequence_lengths)
+    self.report_benchmark(
+        iters=num_iters, wall_time=(time.time() - start) / num_iters,
+        name="batch_viterbi_decode_%s" % name)
+
+  def benchmarkCrf(self):
+    batch_size = 32
+    for max_seq_len in [16, 64, 256]:
+      for num_tags in [8, 32, 128]:
+        inputs, sequence_lengths, transition_params = _random_batch(
+            batch_size, max_seq_len, num_tags)
+        name = "len_%d_tags_%d" % (max_seq_len, num_tags)
+        with ops.Graph().as_default(), session.Session() as sess:
+          inputs_t = constant_op.constant(inputs)
+          sequence_lengths_t = constant_op.constant(sequence_lengths)
+          transition_params_t = constant_op.constant(transition_params)
+          tags, _ = crf.crf_decode(inputs_t, transition_params_t,
+                                   sequence_lengths_t)
+          self.run_op_benchmark(
+              sess, tags.op, min_iters=10, name="crf_decode_%s" % name)
+          log_norm = crf.crf_log_norm(inputs_t, sequence_lengths_t,
+                                      transition_params_t)
+          grads = gradients_impl.gradients(
+              math_ops.reduce_sum(log_norm), [inputs_t, transition_params_t])
+          self.run_op_benchmark(
+              sess, control_flow_ops.group(*grads), min_iters=10,
+              name="crf_log_norm_and_gradients_%s" % name)
+        self._benchmark_numpy(inputs, sequence_lengths, transition_params,
+                              name)
+
+
 if __name__ == "__main__":
   test.main()
@@ -18,7 +18,7 @@ The following snippet is an example of a CRF layer on top of a batched sequence
 of unary scores (logits for every word). This example also decodes the most
 likely sequence at test time. There are two ways to do decoding. One
 is using crf_decode to do decoding in Tensorflow , and the other one is using
-viterbi_decode in Numpy.
+viterbi_decode or batch_viterbi_decode in Numpy.
 
 log_likelihood, transition_params = tf.contrib.crf.crf_log_likelihood(
     unary_scores, gold_tags, sequence_lengths)
@@ -44,6 +44,10 @@ tf_unary_scores_ = tf_unary_scores_[:tf_sequence_length_]
 # Compute the highest score and its tag sequence.
 tf_viterbi_sequence, tf_viterbi_score = tf.contrib.crf.viterbi_decode(
     tf_unary_scores_, tf_transition_params)
+
+# Or decode the whole batch at once.
+tf_viterbi_sequences, tf_viterbi_scores = tf.contrib.crf.batch_viterbi_decode(
+    tf_unary_scores, tf_transition_params, tf_sequence_lengths)
 """
 
 from __future__ import absolute_import
@@ -52,22 +56,22 @@ from __future__ import print_function
 
 import numpy as np
 
-from tensorflow.python.framework import constant_op
 from tensorflow.python.framework import dtypes
 from tensorflow.python.layers import utils
 from tensorflow.python.ops import array_ops
 from tensorflow.python.ops import control_flow_ops
+from tensorflow.python.ops import functional_ops
 from tensorflow.python.ops import gen_array_ops
 from tensorflow.python.ops import math_ops
-from tensorflow.python.ops import rnn
 from tensorflow.python.ops import rnn_cell
 from tensorflow.python.ops import variable_scope as vs
 
 __all__ = [
     "crf_sequence_score", "crf_log_norm", "crf_log_likelihood",
-    "crf_unary_score", "crf_binary_score", "CrfForwardRnnCell",
-    "viterbi_decode", "crf_decode", "CrfDecodeForwardRnnCell",
-    "CrfDecodeBackwardRnnCell"
+    "crf_unary_score", "crf_binary_score", "CrfForwardRnnCell", "crf_forward",
+    "viterbi_decode", "batch_viterbi_decode", "crf_decode",
+    "CrfDecodeForwardRnnCell", "CrfDecodeBackwardRnnCell",
+    "crf_decode_forward", "crf_decode_backward"
 ]
 
 
@@ -146,17 +150,8 @@ def crf_log_norm(inputs, sequence_lengths, transition_params):
 
     # Compute the alpha values in the forward algorithm in order to get the
     # partition function.
-    forward_cell = CrfForwardRnnCell(transition_params)
-    # Sequence length is not allowed to be less than zero.
-    sequence_lengths_less_one = math_ops.maximum(
-        constant_op.constant(0, dtype=sequence_lengths.dtype),
-        sequence_lengths - 1)
-    _, alphas = rnn.dynamic_rnn(
-        cell=forward_cell,
-        inputs=rest_of_input,
-        sequence_length=sequence_lengths_less_one,
-        initial_state=first_input,
-        dtype=dtypes.float32)
+    alphas = crf_forward(rest_of_input, first_input, transition_params,
+                         sequence_lengths - 1)
     log_norm = math_ops.reduce_logsumexp(alphas, [1])
     # Mask `log_norm` of the sequences with length <= zero.
     log_norm = array_ops.where(math_ops.less_equal(sequence_lengths, 0),
@@ -332,6 +327,47 @@ class CrfForwardRnnCell(rnn_cell.RNNCell):
     return new_alphas, new_alphas
 
 
+def _time_major_step_mask(inputs, sequence_lengths):
+  """Returns a [num_steps, batch_size] mask of the steps in the sequences."""
+  return array_ops.transpose(
+      array_ops.sequence_mask(sequence_lengths,
+                              maxlen=array_ops.shape(inputs)[1]))
+
+
+def crf_forward(inputs, state, transition_params, sequence_lengths):
+  """Computes the alpha values in a linear-chain CRF.
+
+  Unlike running a `CrfForwardRnnCell` with `dynamic_rnn`, all the sequences of
+  the batch are advanced by a single `scan`. The alpha values of a sequence
+  are carried unchanged through the steps past its end, so no reordering of the
+  inputs or gathering of the final states is needed.
+
+  Args:
+    inputs: A [batch_size, num_steps, num_tags] tensor of unary potentials.
+    state: A [batch_size, num_tags] matrix containing the initial alpha values.
+    transition_params: A [num_tags, num_tags] matrix of binary potentials.
+    sequence_lengths: A [batch_size] vector of the number of steps of `inputs`
+        in each sequence. Non-positive lengths consume no steps.
+
+  Returns:
+    alphas: A [batch_size, num_tags] matrix containing the alpha values after
+        the last step of each sequence.
+  """
+  forward_cell = CrfForwardRnnCell(transition_params)
+
+  def _scan_fn(alphas, elems):
+    step_inputs, step_mask = elems
+    _, new_alphas = forward_cell(step_inputs, alphas)
+    return array_ops.where(step_mask, new_alphas, alphas)
+
+  all_alphas = functional_ops.scan(
+      _scan_fn,
+      (array_ops.transpose(inputs, [1, 0, 2]),
+       _time_major_step_mask(inputs, sequence_lengths)),
+      initializer=state)
+  return all_alphas[-1]
+
+
 def viterbi_decode(score, transition_params):
   """Decode the highest scoring sequence of tags outside of TensorFlow.
 
@@ -364,6 +400,54 @@ def viterbi_decode(score, transition_params):
   return viterbi, viterbi_score
 
 
+def batch_viterbi_decode(score, transition_params, sequence_lengths=None):
+  """Decode the highest scoring sequences of tags of a batch outside of TF.
+
+  This computes the same result as calling `viterbi_decode` on every sequence
+  of the batch, but each step of the dynamic program is vectorized across the
+  batch. This should only be used at test time.
+
+  Args:
+    score: A [batch_size, max_seq_len, num_tags] array of unary potentials.
+    transition_params: A [num_tags, num_tags] matrix of binary potentials.
+    sequence_lengths: A [batch_size] vector of true sequence lengths. Defaults
+        to `max_seq_len` for all the sequences.
+
+  Returns:
+    viterbi: A [batch_size, max_seq_len] int32 matrix containing the highest
+        scoring tag indices, padded with zeros past the end of each sequence.
+    viterbi_score: A [batch_size] vector containing the scores of the Viterbi
+        sequences.
+  """
+  score = np.asarray(score)
+  batch_size, max_seq_len, num_tags = score.shape
+  if sequence_lengths is None:
+    sequence_lengths = np.full([batch_size], max_seq_len, dtype=np.int32)
+  sequence_lengths = np.asarray(sequence_lengths)
+
+  # The scores of a sequence are carried unchanged past its end, where the
+  # backpointers are the identity so that its last tag is backtracked up to the
+  # actual end of the sequence.
+  identity = np.arange(num_tags, dtype=np.int32)
+  trellis = score[:, 0]
+  backpointers = np.zeros([max_seq_len, batch_size, num_tags], dtype=np.int32)
+  for t in range(1, max_seq_len):
+    v = np.expand_dims(trellis, 2) + transition_params
+    active = np.expand_dims(t < sequence_lengths, 1)
+    trellis = np.where(active, score[:, t] + np.max(v, 1), trellis)
+    backpointers[t] = np.where(active, np.argmax(v, 1), identity)
+
+  batch_indices = np.arange(batch_size)
+  viterbi = np.zeros([batch_size, max_seq_len], dtype=np.int32)
+  viterbi[:, -1] = np.argmax(trellis, 1)
+  for t in range(max_seq_len - 1, 0, -1):
+    viterbi[:, t - 1] = backpointers[t][batch_indices, viterbi[:, t]]
+  viterbi[np.arange(max_seq_len) >= np.expand_dims(sequence_lengths, 1)] = 0
+
+  viterbi_score = np.max(trellis, 1)
+  return viterbi, viterbi_score
+
+
 class CrfDecodeForwardRnnCell(rnn_cell.RNNCell):
   """Computes the forward decoding in a linear-chain CRF.
   """
@@ -459,6 +543,74 @@ class CrfDecodeBackwardRnnCell(rnn_cell.RNNCell):
     return new_tags, new_tags
 
 
+def crf_decode_forward(inputs, state, transition_params, sequence_lengths):
+  """Computes forward decoding in a linear-chain CRF.
+
+  Like `crf_forward`, all the sequences of the batch are advanced by a single
+  `scan`. Past the end of a sequence its scores are carried unchanged and its
+  backpointers are the identity, so `crf_decode_backward` can backtrack every
+  sequence from the last step.
+
+  Args:
+    inputs: A [batch_size, num_steps, num_tags] tensor of unary potentials.
+    state: A [batch_size, num_tags] matrix containing the initial score values.
+    transition_params: A [num_tags, num_tags] matrix of binary potentials.
+    sequence_lengths: A [batch_size] vector of the number of steps of `inputs`
+        in each sequence. Non-positive lengths consume no steps.
+
+  Returns:
+    backpointers: A [batch_size, num_steps, num_tags] matrix of backpointers,
+        with dtype `tf.int32`.
+    last_score: A [batch_size, num_tags] matrix containing the score values
+        after the last step of each sequence.
+  """
+  # For simplicity, in shape comments, denote:
+  # 'batch_size' by 'B', 'num_steps' by 'T' , 'num_tags' by 'O' (output).
+  forward_cell = CrfDecodeForwardRnnCell(transition_params)
+  identity = array_ops.expand_dims(  # [1, O]
+      math_ops.range(array_ops.shape(state)[1]), 0)
+
+  def _scan_fn(accumulator, elems):
+    scores, _ = accumulator
+    step_inputs, step_mask = elems
+    backpointers, new_scores = forward_cell(step_inputs, scores)
+    new_scores = array_ops.where(step_mask, new_scores, scores)
+    backpointers = array_ops.where(
+        step_mask, backpointers, array_ops.zeros_like(backpointers) + identity)
+    return new_scores, backpointers
+
+  all_scores, backpointers = functional_ops.scan(
+      _scan_fn,
+      (array_ops.transpose(inputs, [1, 0, 2]),  # [T, B, O]
+       _time_major_step_mask(inputs, sequence_lengths)),  # [T, B]
+      initializer=(state, array_ops.zeros_like(state, dtype=dtypes.int32)))
+  return array_ops.transpose(backpointers, [1, 0, 2]), all_scores[-1]
+
+
+def crf_decode_backward(inputs, state):
+  """Computes backward decoding in a linear-chain CRF.
+
+  Args:
+    inputs: A [batch_size, num_steps, num_tags] matrix of backpointers, as
+        returned by `crf_decode_forward`.
+    state: A [batch_size] vector of the tag indices after the last step.
+
+  Returns:
+    new_tags: A [batch_size, num_steps] matrix containing the tag indices
+        before each step.
+  """
+  batch_indices = math_ops.range(array_ops.shape(inputs)[0])  # [B]
+
+  def _scan_fn(tags, backpointers):
+    indices = array_ops.stack([batch_indices, tags], axis=1)  # [B, 2]
+    return gen_array_ops.gather_nd(backpointers, indices)  # [B]
+
+  new_tags = functional_ops.scan(  # [T, B]
+      _scan_fn, array_ops.transpose(inputs, [1, 0, 2]), initializer=state,
+      reverse=True)
+  return array_ops.transpose(new_tags)
+
+
 def crf_decode(potentials, transition_params, sequence_length):
   """Decode the highest scoring sequence of tags in TensorFlow.
 
@@ -490,42 +642,25 @@ def crf_decode(potentials, transition_params, sequence_length):
 
     # For simplicity, in shape comments, denote:
     # 'batch_size' by 'B', 'max_seq_len' by 'T' , 'num_tags' by 'O' (output).
-    num_tags = potentials.get_shape()[2].value
-
     # Computes forward decoding. Get last score and backpointers.
-    crf_fwd_cell = CrfDecodeForwardRnnCell(transition_params)
     initial_state = array_ops.slice(potentials, [0, 0, 0], [-1, 1, -1])
     initial_state = array_ops.squeeze(initial_state, axis=[1])  # [B, O]
     inputs = array_ops.slice(potentials, [0, 1, 0], [-1, -1, -1])  # [B, T-1, O]
-    # Sequence length is not allowed to be less than zero.
-    sequence_length_less_one = math_ops.maximum(0, sequence_length - 1)
-    backpointers, last_score = rnn.dynamic_rnn(  # [B, T - 1, O], [B, O]
-        crf_fwd_cell,
-        inputs=inputs,
-        sequence_length=sequence_length_less_one,
-        initial_state=initial_state,
-        time_major=False,
-        dtype=dtypes.int32)
-    backpointers = gen_array_ops.reverse_sequence(  # [B, T - 1, O]
-        backpointers, sequence_length_less_one, seq_dim=1)
+    backpointers, last_score = crf_decode_forward(  # [B, T - 1, O], [B, O]
+        inputs, initial_state, transition_params, sequence_length - 1)
 
     # Computes backward decoding. Extract tag indices from backpointers.
-    crf_bwd_cell = CrfDecodeBackwardRnnCell(num_tags)
-    initial_state = math_ops.cast(math_ops.argmax(last_score, axis=1),  # [B]
-                                  dtype=dtypes.int32)
-    initial_state = array_ops.expand_dims(initial_state, axis=-1)  # [B, 1]
-    decode_tags, _ = rnn.dynamic_rnn(  # [B, T - 1, 1]
-        crf_bwd_cell,
-        inputs=backpointers,
-        sequence_length=sequence_length_less_one,
-        initial_state=initial_state,
-        time_major=False,
+    last_tags = math_ops.cast(math_ops.argmax(last_score, axis=1),  # [B]
+                              dtype=dtypes.int32)
+    decode_tags = crf_decode_backward(backpointers, last_tags)  # [B, T - 1]
+    decode_tags = array_ops.concat(  # [B, T]
+        [decode_tags, array_ops.expand_dims(last_tags, 1)], axis=1)
+    # The steps past the end of a sequence repeat its last tag, zero them. The
+    # first tag of empty sequences is kept.
+    decode_tags *= array_ops.sequence_mask(  # [B, T]
+        math_ops.maximum(sequence_length, 1),
+        maxlen=array_ops.shape(potentials)[1],
         dtype=dtypes.int32)
-    decode_tags = array_ops.squeeze(decode_tags, axis=[2])  # [B, T - 1]
-    decode_tags = array_ops.concat([initial_state, decode_tags],   # [B, T]
-                                   axis=1)
-    decode_tags = gen_array_ops.reverse_sequence(  # [B, T]
-        decode_tags, sequence_length, seq_dim=1)
 
     best_score = math_ops.reduce_max(last_score, axis=1)  # [B]
     return decode_tags, best_score
@@ -25,14 +25,20 @@ from tensorflow.contrib.distribute.python.monitor import Monitor
 from tensorflow.contrib.distribute.python.one_device_strategy import OneDeviceStrategy
 from tensorflow.contrib.distribute.python.step_fn import *
 from tensorflow.python.training.distribute import *
+from tensorflow.python.training.gradient_compression import Float16GradientCompressor
+from tensorflow.python.training.gradient_compression import GradientCompressor
+from tensorflow.python.training.gradient_compression import TopKGradientCompressor
 
 from tensorflow.python.util.all_util import remove_undocumented
 
 
 _allowed_symbols = [
     'AllReduceCrossTowerOps',
+    'CompressedCrossTowerOps',
     'CrossTowerOps',
     'DistributionStrategy',
+    'Float16GradientCompressor',
+    'GradientCompressor',
     'MirroredStrategy',
     'Monitor',
     'OneDeviceStrategy',
@@ -40,6 +46,7 @@ _allowed_symbols = [
     'Step',
     'StandardInputStep',
     'StandardSingleLossStep',
+    'TopKGradientCompressor',
     'TowerContext',
     'get_cross_tower_context',
     'get_distribution_strategy',
@@ -0,0 +1,242 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Benchmarks all-reduce algorithms and selects the fastest per tensor size.
+
+Usage:
+
+```python
+profile = all_reduce_profile.profile_all_reduce(
+    devices, algs=["xring", "rechd", "pscpu"], num_elements=[2**10, 2**20])
+profile.save("/tmp/all_reduce_profile.json")
+
+# Later, e.g. in another process:
+profile = all_reduce_profile.AllReduceProfile.load(
+    "/tmp/all_reduce_profile.json")
+cross_tower_ops = cross_tower_ops_lib.choose_the_best(
+    devices, all_reduce_profile=profile)
+```
+
+Algorithm names are the ones accepted by `MultiWorkerAllReduce`, and
+`AllReduceProfile.all_reduce_spec` returns an `all_reduce_spec` for it that
+uses the fastest measured algorithm for every band of tensor sizes.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import json
+import time
+
+from tensorflow.contrib.distribute.python import cross_tower_utils
+from tensorflow.python.client import session
+from tensorflow.python.framework import device as pydev
+from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import ops
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import control_flow_ops
+from tensorflow.python.platform import gfile
+from tensorflow.python.platform import tf_logging as logging
+
+
+# Algorithms that do not use the number of shards.
+_ALGS_WITHOUT_SHARDS = ("nccl", "rechd", "nccl/rechd")
+
+AllReduceTiming = collections.namedtuple(
+    "AllReduceTiming",
+    ["alg", "num_shards", "num_devices", "num_elements", "seconds"])
+
+
+class AllReduceProfile(object):
+  """Measured all-reduce step times, see `profile_all_reduce`."""
+
+  def __init__(self, timings=None):
+    self.timings = list(timings or [])
+
+  def add(self, timing):
+    self.timings.append(timing)
+
+  def all_reduce_spec(self, num_devices):
+    """Returns the fastest algorithm per tensor size band for `num_devices`.
+
+    For every measured tensor size, the algorithm and number of shards with
+    the lowest step time is selected. A band covers the tensor sizes up to the
+    measured size at which it was selected (the last band is unbounded), and
+    neighboring bands with the same selection are merged.
+
+    Args:
+      num_devices: the number of devices reduced across.
+
+    Returns:
+      a list of `(alg, num_shards, limit)` tuples as accepted by the
+      `all_reduce_spec` argument of `MultiWorkerAllReduce`, or None if no
+      timing was measured for `num_devices`.
+    """
+    best = {}
+    for t in self.timings:
+      if t.num_devices != num_devices:
+        continue
+      current = best.get(t.num_elements)
+      if current is None or t.seconds < current.seconds:
+        best[t.num_elements] = t
+    if not best:
+      return None
+    spec = []
+    for num_elements in sorted(best):
+      t = best[num_elements]
+      if spec and spec[-1][:2] == (t.alg, t.num_shards):
+        spec[-1] = (t.alg, t.num_shards, num_elements)
+      else:
+        spec.append((t.alg, t.num_shards, num_elements))
+    spec[-1] = spec[-1][:2] + (-1,)
+    return spec
+
+  def to_json(self):
+    return json.dumps({"timings": [t._asdict() for t in self.timings]},
+                      indent=2, sort_keys=True)
+
+  @classmethod
+  def from_json(cls, json_string):
+    return cls([AllReduceTiming(**t)
+                for t in json.loads(json_string)["timings"]])
+
+  def save(self, path):
+    with gfile.GFile(path, "w") as f:
+      f.write(self.to_json())
+
+  @classmethod
+  def load(cls, path):
+    with gfile.GFile(path, "r") as f:
+      return cls.from_json(f.read())
+
+
+def worker_prefixes(devices):
+  """Returns the distinct job/replica/task prefixes of `devices`, in order."""
+  prefixes = []
+  for d in devices:
+    spec = pydev.DeviceSpec.from_string(d)
+    prefix = pydev.DeviceSpec(
+        job=spec.job, replica=spec.replica, task=spec.task).to_string()
+    if prefix not in prefixes:
+      prefixes.append(prefix)
+  return prefixes
+
+
+def time_all_reduce(devices,
+                    alg,
+                    num_shards,
+                    num_elements,
+                    num_iters=10,
+                    num_warmup_iters=2,
+                    target="",
+                    session_config=None):
+  """Measures the step time of one all-reduce algorithm.
+
+  Args:
+    devices: a list of fully specified device strings, with the same number of
+      devices on every task.
+    alg: an all-reduce algorithm name, see `MultiWorkerAllReduce`.
+    num_shards: the number of shards, see `MultiWorkerAllReduce`.
+    num_elements: the number of float32 elements of the reduced tensor.
+    num_iters: number of timed runs.
+    num_warmup_iters: number of untimed runs.
+    target: the session target, e.g. of a localhost cluster.
+    session_config: an optional `ConfigProto`, e.g. with virtual CPU devices.
+
+  Returns:
+    an `AllReduceTiming`.
+
+  Raises:
+    ValueError: if `alg` does not support this configuration.
+  """
+  prefixes = worker_prefixes(devices)
+  num_workers = len(prefixes)
+  gpu_indices = list(range(len(devices) // num_workers))
+  with ops.Graph().as_default() as graph:
+    tower_grads = []
+    for d in devices:
+      with ops.device(d):
+        tower_grads.append([(array_ops.ones([num_elements],
+                                            dtype=dtypes.float32), None)])
+    reduced = cross_tower_utils.sum_gradients_all_reduce(
+        prefixes, tower_grads, num_workers, alg, num_shards,
+        gpu_indices)
+    step = control_flow_ops.group([g for tower in reduced for g, _ in tower])
+    with session.Session(target, graph=graph, config=session_config) as sess:
+      for _ in range(num_warmup_iters):
+        sess.run(step)
+      start = time.time()
+      for _ in range(num_iters):
+        sess.run(step)
+      seconds = (time.time() - start) / max(num_iters, 1)
+  return AllReduceTiming(alg, num_shards, len(devices), num_elements, seconds)
+
+
+def profile_all_reduce(devices,
+                       algs=("xring", "rechd", "pscpu"),
+                       num_shards=(1, 2),
+                       num_elements=(2**8, 2**12, 2**16, 2**20),
+                       device_counts=None,
+                       num_iters=10,
+                       num_warmup_iters=2,
+                       target="",
+                       session_config=None,
+                       profile=None):
+  """Times every combination of algorithm, shards, size and device count.
+
+  Combinations that an algorithm does not support, e.g. recursive
+  halving-doubling over a number of devices that is not a power of 2, are
+  skipped.
+
+  Args:
+    devices: a list of fully specified device strings.
+    algs: the all-reduce algorithm names to time.
+    num_shards: the numbers of shards to time.
+    num_elements: the float32 tensor sizes to time.
+    device_counts: the numbers of devices to time, using the first devices of
+      `devices`. Defaults to all of them.
+    num_iters: number of timed runs per combination.
+    num_warmup_iters: number of untimed runs per combination.
+    target: the session target, e.g. of a localhost cluster.
+    session_config: an optional `ConfigProto`, e.g. with virtual CPU devices.
+    profile: an optional `AllReduceProfile` to add the timings to.
+
+  Returns:
+    an `AllReduceProfile`.
+  """
+  if profile is None:
+    profile = AllReduceProfile()
+  if device_counts is None:
+    device_counts = [len(devices)]
+  for num_devices in device_counts:
+    for alg in algs:
+      for shards in num_shards:
+        if alg in _ALGS_WITHOUT_SHARDS and shards != 1:
+          continue
+        for size in num_elements:
+          try:
+            timing = time_all_reduce(devices[:num_devices], alg, shards, size,
+                                     num_iters, num_warmup_iters, target,
+                                     session_config)
+          except ValueError as e:
+            logging.info("Skipping all-reduce %s with %d shards over %d "
+                         "devices: %s", alg, shards, num_devices, e)
+            continue
+          logging.info("All-reduce %s with %d shards of %d elements over %d "
+                       "devices: %.3f ms", alg, shards, size, num_devices,
+                       timing.seconds * 1e3)
+          profile.add(timing)
+  return profile
@@ -0,0 +1,103 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for all_reduce_profile."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+from tensorflow.contrib.distribute.python import all_reduce_profile
+from tensorflow.contrib.distribute.python import cross_tower_ops as cross_tower_ops_lib
+from tensorflow.core.protobuf import config_pb2
+from tensorflow.python.platform import test
+
+Timing = all_reduce_profile.AllReduceTiming
+
+
+class AllReduceProfileTest(test.TestCase):
+
+  def _profile(self):
+    return all_reduce_profile.AllReduceProfile([
+        Timing("pscpu", 1, 2, 16, 1.0),
+        Timing("xring", 1, 2, 16, 2.0),
+        Timing("pscpu", 1, 2, 256, 1.0),
+        Timing("xring", 2, 2, 256, 1.5),
+        Timing("pscpu", 1, 2, 4096, 3.0),
+        Timing("xring", 2, 2, 4096, 2.0),
+        Timing("xring", 1, 4, 16, 1.0),
+    ])
+
+  def testAllReduceSpec(self):
+    profile = self._profile()
+    self.assertEqual([("pscpu", 1, 256), ("xring", 2, -1)],
+                     profile.all_reduce_spec(2))
+    self.assertEqual([("xring", 1, -1)], profile.all_reduce_spec(4))
+    self.assertIsNone(profile.all_reduce_spec(8))
+
+  def testSaveAndLoad(self):
+    profile = self._profile()
+    path = os.path.join(self.get_temp_dir(), "profile.json")
+    profile.save(path)
+    loaded = all_reduce_profile.AllReduceProfile.load(path)
+    self.assertEqual(profile.timings, loaded.timings)
+
+  def testWorkerPrefixes(self):
+    self.assertEqual(
+        ["/job:worker/replica:0/task:0", "/job:worker/replica:0/task:1"],
+        all_reduce_profile.worker_prefixes([
+            "/job:worker/replica:0/task:0/device:GPU:0",
+            "/job:worker/replica:0/task:0/device:GPU:1",
+            "/job:worker/replica:0/task:1/device:GPU:0",
+        ]))
+
+  def testProfileOnVirtualCpus(self):
+    config = config_pb2.ConfigProto(device_count={"CPU": 2})
+    devices = ["/job:localhost/replica:0/task:0/device:CPU:0",
+               "/job:localhost/replica:0/task:0/device:CPU:1"]
+    profile = all_reduce_profile.profile_all_reduce(
+        devices,
+        algs=("xring", "rechd", "pscpu"),
+        num_shards=(1, 2),
+        num_elements=(16, 256),
+        num_iters=1,
+        num_warmup_iters=0,
+        session_config=config)
+    # "rechd" ignores the number of shards and "pscpu" can not use more
+    # shards than there are workers.
+    self.assertEqual(
+        set([("xring", 1), ("xring", 2), ("rechd", 1), ("pscpu", 1)]),
+        set((t.alg, t.num_shards) for t in profile.timings))
+    self.assertEqual(8, len(profile.timings))
+    for t in profile.timings:
+      self.assertEqual(2, t.num_devices)
+      self.assertGreater(t.seconds, 0)
+    self.assertEqual(-1, profile.all_reduce_spec(2)[-1][2])
+
+  def testChooseTheBestFromProfile(self):
+    result = cross_tower_ops_lib.choose_the_best(
+        ["/device:CPU:0", "/device:CPU:1"],
+        all_reduce_profile=self._profile())
+    self.assertIsInstance(result, cross_tower_ops_lib.MultiWorkerAllReduce)
+    self.assertEqual([("pscpu", 1, 256), ("xring", 2, -1)],
+                     [tuple(s) for s in result._all_reduce_spec])
+    self.assertEqual(["/job:localhost/replica:0/task:0"],
+                     result._worker_devices)
+    self.assertEqual(2, result._num_gpus_per_worker)
+
+
+if __name__ == "__main__":
+  test.main()
@@ -19,14 +19,21 @@ from __future__ import division
 from __future__ import print_function
 
 import collections
+import time
+
 import six
 
+from tensorflow.contrib.distribute.python import all_reduce_profile as all_reduce_profile_lib
 from tensorflow.contrib.distribute.python import cross_tower_utils
 from tensorflow.contrib.distribute.python import values as value_lib
 from tensorflow.python.client import device_lib
+from tensorflow.python.client import session
 from tensorflow.python.eager import context
+from tensorflow.python.framework import dtypes
 from tensorflow.python.framework import ops
+from tensorflow.python.framework import tensor_shape
 from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import control_flow_ops
 from tensorflow.python.ops import math_ops
 from tensorflow.python.platform import tf_logging as logging
 from tensorflow.python.training import device_util
@@ -232,6 +239,72 @@ class ReductionToOneDeviceCrossTowerOps(CrossTowerOps):
             for t, v in value_destination_pairs]
 
 
+class CompressedCrossTowerOps(CrossTowerOps):
+  """Compresses dense values before reducing them with another CrossTowerOps.
+
+  Every dense component of a `PerDevice` value is compressed on its device
+  with a `GradientCompressor`, the compressed values are reduced with
+  `cross_tower_ops`, and the results are decompressed on their destinations.
+  Compressors producing `IndexedSlices`, such as `TopKGradientCompressor`,
+  make `cross_tower_ops` gather the slices instead of all-reducing dense
+  tensors. `IndexedSlices` values are reduced without compression.
+  """
+
+  def __init__(self, cross_tower_ops, gradient_compressor):
+    """Constructor.
+
+    Args:
+      cross_tower_ops: the `CrossTowerOps` used for the compressed values.
+      gradient_compressor: a `GradientCompressor`.
+    """
+    self._cross_tower_ops = cross_tower_ops
+    self._gradient_compressor = gradient_compressor
+    super(CompressedCrossTowerOps, self).__init__()
+
+  def _compress(self, per_device_value):
+    """Returns the compressed value, shape and dtype, or None if not dense."""
+    components = list(per_device_value._index.values())  # pylint: disable=protected-access
+    if not all(isinstance(v, ops.Tensor) for v in components):
+      return None
+    index = {}
+    for d, v in per_device_value._index.items():  # pylint: disable=protected-access
+      with ops.device(d):
+        index[d] = self._gradient_compressor.compress(v)
+    return (value_lib.PerDevice(index), components[0].shape,
+            components[0].dtype)
+
+  def _decompress(self, mirrored, shape, dtype):
+    index = {}
+    for d, v in mirrored._index.items():  # pylint: disable=protected-access
+      with ops.device(d):
+        index[d] = self._gradient_compressor.decompress(v, shape, dtype)
+    return value_lib.Mirrored(index)
+
+  def _reduce(self, method_string, per_device_value, destinations):
+    compressed = self._compress(per_device_value)
+    if compressed is None:
+      return self._cross_tower_ops.reduce(method_string, per_device_value,
+                                          destinations)
+    compressed_value, shape, dtype = compressed
+    reduced = self._cross_tower_ops.reduce(method_string, compressed_value,
+                                           destinations)
+    return self._decompress(reduced, shape, dtype)
+
+  def _batch_reduce(self, method_string, value_destination_pairs):
+    compressed = [self._compress(v) for v, _ in value_destination_pairs]
+    reduced = self._cross_tower_ops.batch_reduce(
+        method_string,
+        [(c[0] if c is not None else v, d)
+         for c, (v, d) in zip(compressed, value_destination_pairs)])
+    return [
+        self._decompress(r, c[1], c[2]) if c is not None else r
+        for r, c in zip(reduced, compressed)
+    ]
+
+  def _broadcast(self, tensor, destinations):
+    return self._cross_tower_ops.broadcast(tensor, destinations)
+
+
 def _group_value_by_device(per_device_values):
   """Group values into sublists by their devices.
 
@@ -429,12 +502,138 @@ class AggregateSmallTensorPacker(object):
                                                   self.packing)
 
 
+def _assign_buckets(grads_and_vars, bucket_bytes):
+  """Groups gradients into buckets of about `bucket_bytes` bytes.
+
+  Gradients are visited in reverse order, which is roughly the order in which
+  the backward pass produces them, so that the first buckets only depend on
+  the gradients of the last layers. Gradients of different dtypes never share
+  a bucket. A gradient with an unknown size closes its bucket.
+
+  Args:
+    grads_and_vars: a list of (gradient, variable) tuples of one device.
+    bucket_bytes: the target size of a bucket, in bytes.
+
+  Returns:
+    a list of buckets, each a list of indices into `grads_and_vars`.
+  """
+  buckets = []
+  open_buckets = {}
+  for i in reversed(range(len(grads_and_vars))):
+    grad = grads_and_vars[i][0]
+    dtype = grad.dtype.base_dtype
+    if grad.shape.is_fully_defined():
+      num_bytes = grad.shape.num_elements() * dtype.size
+    else:
+      num_bytes = bucket_bytes
+    bucket = open_buckets.get(dtype)
+    if bucket is None:
+      bucket = open_buckets[dtype] = [[], 0]
+      buckets.append(bucket[0])
+    bucket[0].append(i)
+    bucket[1] += num_bytes
+    if bucket[1] >= bucket_bytes:
+      del open_buckets[dtype]
+  return buckets
+
+
+class BucketedConcatPacker(object):
+  """Concatenate gradients into size-targeted buckets for reduction.
+
+  Unlike `ConcatAndSplitPacker`, which concatenates all gradients into a
+  single tensor and therefore has to wait for the whole backward pass, each
+  bucket here only depends on its own gradients. Buckets are formed in
+  reverse-layer order, so the all-reduce of the first buckets can start while
+  the gradients of the earlier layers are still being computed.
+  """
+
+  def __init__(self, bucket_bytes=4 * 1024 * 1024):
+    """Initialize the BucketedConcatPacker object.
+
+    Args:
+      bucket_bytes: the target size of a bucket, in bytes.
+
+    Raises:
+      ValueError: if `bucket_bytes` is not greater than 0.
+    """
+    if bucket_bytes <= 0:
+      raise ValueError("bucket_bytes must be greater than zero.")
+    self.bucket_bytes = bucket_bytes
+
+  def pack(self, grouped_grads_and_vars):
+    """Pack tensors."""
+    self.grouped_grads_and_vars = grouped_grads_and_vars
+    self.buckets = _assign_buckets(grouped_grads_and_vars[0],
+                                   self.bucket_bytes)
+    self.all_tower_shapes = []
+    self.all_tower_sizes = []
+
+    device_grad_packs = []
+    for tower_grads_and_vars in grouped_grads_and_vars:
+      tower_packs = []
+      tower_shapes = []
+      tower_sizes = []
+      for bucket in self.buckets:
+        grads = [tower_grads_and_vars[i][0] for i in bucket]
+        if len(grads) == 1:
+          # Nothing to concatenate.
+          tower_packs.append((grads[0], None))
+          tower_shapes.append(None)
+          tower_sizes.append(None)
+          continue
+        with ops.colocate_with(grads[0]):
+          shapes = []
+          sizes = []
+          for g in grads:
+            if g.shape.is_fully_defined():
+              shapes.append(g.shape.as_list())
+              sizes.append(g.shape.num_elements())
+            else:
+              shapes.append(array_ops.shape(g))
+              sizes.append(array_ops.size(g))
+          flat_grads = [array_ops.reshape(g, [-1]) for g in grads]
+          tower_packs.append((array_ops.concat(flat_grads, 0), None))
+        tower_shapes.append(shapes)
+        tower_sizes.append(sizes)
+      device_grad_packs.append(tower_packs)
+      self.all_tower_shapes.append(tower_shapes)
+      self.all_tower_sizes.append(tower_sizes)
+    return device_grad_packs
+
+  def unpack(self, summed_device_grad_packs):
+    """Reverse the pack."""
+    aggregated_device_grads = []
+    for (summed_tower_grad_packs,
+         tower_grads_and_vars, tower_shapes, tower_sizes) in zip(
+             summed_device_grad_packs, self.grouped_grads_and_vars,
+             self.all_tower_shapes, self.all_tower_sizes):
+      summed_tower_grads = [None] * len(tower_grads_and_vars)
+      for (pack, _), bucket, shapes, sizes in zip(
+          summed_tower_grad_packs, self.buckets, tower_shapes, tower_sizes):
+        if shapes is None:
+          grads = [pack]
+        else:
+          with ops.colocate_with(pack):
+            grads = [
+                array_ops.reshape(g, shape)
+                for g, shape in zip(array_ops.split(pack, sizes), shapes)
+            ]
+        for i, g in zip(bucket, grads):
+          summed_tower_grads[i] = (g, tower_grads_and_vars[i][1])
+      aggregated_device_grads.append(summed_tower_grads)
+    return aggregated_device_grads
+
+
 def _pack_tensors(device_grads,
                   num_packs=0,
                   agg_small_grads_max_bytes=0,
-                  agg_small_grads_max_group=0):
+                  agg_small_grads_max_group=0,
+                  bucket_bytes=0):
   """Pack tensors if specified."""
-  if num_packs > 0:
+  if bucket_bytes > 0:
+    tensor_packer = BucketedConcatPacker(bucket_bytes)
+    device_grad_packs = tensor_packer.pack(device_grads)
+  elif num_packs > 0:
     tensor_packer = ConcatAndSplitPacker(num_packs)
     device_grad_packs = tensor_packer.pack(device_grads)
   elif agg_small_grads_max_bytes > 0 and agg_small_grads_max_group > 0:
@@ -461,18 +660,23 @@ class AllReduceCrossTowerOps(CrossTowerOps):
                all_reduce_alg="nccl",
                num_packs=1,
                agg_small_grads_max_bytes=0,
-               agg_small_grads_max_group=10):
+               agg_small_grads_max_group=10,
+               bucket_bytes=0):
     """All-reduce implementation of CrossTowerOps.
 
     Before performing all-reduce, tensors will be repacked or aggregated for
     more efficient cross-device transportation:
-      1) If `num_packs` is non-zero, pack values into
+      1) If `bucket_bytes` is non-zero, concatenate values into buckets of
+        about `bucket_bytes` bytes, in reverse order, so that the all-reduce
+        of a bucket can start as soon as its values are computed. See
+        `BucketedConcatPacker` and `autotune_bucket_bytes`.
+      2) Otherwise, if `num_packs` is non-zero, pack values into
         `num_packs` splits.
-      2) Otherwise, if `agg_small_grads_max_bytes` > 0 and
+      3) Otherwise, if `agg_small_grads_max_bytes` > 0 and
         `agg_small_grads_max_group` > 0, aggregate values smaller than
         `agg_small_grads_max_bytes` into groups with at most
         `agg_small_grads_max_group` values.
-      3) Otherwise, no repacking or grouping will happen.
+      4) Otherwise, no repacking or grouping will happen.
 
     Args:
       all_reduce_alg: the all-reduce algorithm to use, currently only "nccl" or
@@ -481,11 +685,13 @@ class AllReduceCrossTowerOps(CrossTowerOps):
       agg_small_grads_max_bytes: see above.
       agg_small_grads_max_group: see above.
         tensors.
+      bucket_bytes: see above.
     """
     self._all_reduce_alg = all_reduce_alg
     self._num_packs = num_packs
     self._agg_small_grads_max_bytes = agg_small_grads_max_bytes
     self._agg_small_grads_max_group = agg_small_grads_max_group
+    self._bucket_bytes = bucket_bytes
     super(AllReduceCrossTowerOps, self).__init__()
 
   def _reduce(self, method_string, per_device_value, destinations):
@@ -529,16 +735,17 @@ class AllReduceCrossTowerOps(CrossTowerOps):
     """All reduce algorithm in a batch."""
     logging.info(
         "batch_all_reduce invoked for batches size = %d with "
-        "algorithm = %s, num_packs = %d, agg_small_grads_max_bytes = %d and "
-        "agg_small_grads_max_group = %d", len(per_device_values),
-        self._all_reduce_alg, self._num_packs, self._agg_small_grads_max_bytes,
-        self._agg_small_grads_max_group)
+        "algorithm = %s, num_packs = %d, agg_small_grads_max_bytes = %d, "
+        "agg_small_grads_max_group = %d and bucket_bytes = %d",
+        len(per_device_values), self._all_reduce_alg, self._num_packs,
+        self._agg_small_grads_max_bytes, self._agg_small_grads_max_group,
+        self._bucket_bytes)
     destinations = per_device_values[0].devices
     grouped = _group_value_by_device(per_device_values)
 
     device_grad_packs, self._tensor_packer = _pack_tensors(
         grouped, self._num_packs, self._agg_small_grads_max_bytes,
-        self._agg_small_grads_max_group)
+        self._agg_small_grads_max_group, self._bucket_bytes)
 
     # The actual aggregation of the repacked gradients. Note that they are
     # sharded among different aggregation trees. So it is important to strike
@@ -572,7 +779,8 @@ class MultiWorkerAllReduce(AllReduceCrossTowerOps):
                all_reduce_spec=("pscpu/pscpu", 2, -1),
                num_packs=0,
                agg_small_grads_max_bytes=0,
-               agg_small_grads_max_group=10):
+               agg_small_grads_max_group=10,
+               bucket_bytes=0):
     """Initialize the all-reduce algorithm.
 
     Args:
@@ -583,10 +791,10 @@ class MultiWorkerAllReduce(AllReduceCrossTowerOps):
         the all-reduce algorithm.
         1. The first element of a tuple is the name of the all-reduce algorithm.
         Valid algorithm names are: "nccl", "nccl/xring", "nccl/rechd",
-        "nccl/pscpu", "xring", "pscpu", "psgpu", "pscpu/pscpu". Algorithms with
-        a "/" are hierarchical, so two all-reduces are executed, the first one
-        aggregates tensors within a worker and the second aggregates across
-        workers.
+        "nccl/pscpu", "xring", "rechd", "pscpu", "psgpu", "pscpu/pscpu".
+        Algorithms with a "/" are hierarchical, so two all-reduces are
+        executed, the first one aggregates tensors within a worker and the
+        second aggregates across workers.
         2. The second element of a tuple is the number of shards when doing
         all-reduce. Let's say its values is M, each tensor after packing will be
         split into M shards and then M parallel all-reduces would be performed
@@ -601,13 +809,15 @@ class MultiWorkerAllReduce(AllReduceCrossTowerOps):
       num_packs: see AllReduceCrossTowerOps.
       agg_small_grads_max_bytes: see AllReduceCrossTowerOps.
       agg_small_grads_max_group: see AllReduceCrossTowerOps.
+      bucket_bytes: see AllReduceCrossTowerOps.
     """
     self._worker_devices = worker_devices
     self._num_gpus_per_worker = num_gpus_per_worker
     super(MultiWorkerAllReduce, self).__init__(
         num_packs=num_packs,
         agg_small_grads_max_bytes=agg_small_grads_max_bytes,
-        agg_small_grads_max_group=agg_small_grads_max_group)
+        agg_small_grads_max_group=agg_small_grads_max_group,
+        bucket_bytes=bucket_bytes)
 
     def validate_and_complete_spec(spec):
       """Validate and complete the all-reduce spec."""
@@ -639,10 +849,11 @@ class MultiWorkerAllReduce(AllReduceCrossTowerOps):
     """All reduce algorithm in a batch."""
     logging.info(
         "distributed batch_all_reduce invoked for batches size = %d with "
-        "allreduce_spec = %r, num_packs = %d, agg_small_grads_max_bytes = %d "
-        "and agg_small_grads_max_group = %d", len(per_device_values),
-        self._all_reduce_spec, self._num_packs, self._agg_small_grads_max_bytes,
-        self._agg_small_grads_max_group)
+        "allreduce_spec = %r, num_packs = %d, agg_small_grads_max_bytes = %d, "
+        "agg_small_grads_max_group = %d and bucket_bytes = %d",
+        len(per_device_values), self._all_reduce_spec, self._num_packs,
+        self._agg_small_grads_max_bytes, self._agg_small_grads_max_group,
+        self._bucket_bytes)
 
     destinations = sorted(per_device_values[0].devices)
     device_grads = _group_value_by_device(per_device_values)
@@ -667,7 +878,7 @@ class MultiWorkerAllReduce(AllReduceCrossTowerOps):
       if this_grads:
         device_grad_packs, self._tensor_packer = _pack_tensors(
             this_grads, self._num_packs, self._agg_small_grads_max_bytes,
-            self._agg_small_grads_max_group)
+            self._agg_small_grads_max_group, self._bucket_bytes)
         range_agg_grads = cross_tower_utils.sum_gradients_all_reduce(
             self._worker_devices, device_grad_packs, len(self._worker_devices),
             spec_tuple.alg, spec_tuple.shards, range(self._num_gpus_per_worker))
@@ -685,6 +896,87 @@ class MultiWorkerAllReduce(AllReduceCrossTowerOps):
                                       method_string)
 
 
+_DEFAULT_CANDIDATE_BUCKET_BYTES = (256 * 1024, 1024 * 1024, 4 * 1024 * 1024,
+                                   16 * 1024 * 1024, 64 * 1024 * 1024)
+
+
+def autotune_bucket_bytes(devices,
+                          grad_shapes,
+                          all_reduce_alg="nccl",
+                          candidate_bucket_bytes=None,
+                          num_iters=10,
+                          num_warmup_iters=2,
+                          dtype=dtypes.float32,
+                          session_config=None,
+                          cross_tower_ops_fn=None):
+  """Picks the `bucket_bytes` with the fastest all-reduce in a short run.
+
+  For every candidate, a graph all-reducing synthetic gradients of the given
+  shapes across `devices` is built and run `num_iters` times, after
+  `num_warmup_iters` untimed runs.
+
+  Args:
+    devices: a list of device strings to reduce across.
+    grad_shapes: a list of the shapes of the gradients to reduce, e.g. the
+      shapes of the trainable variables, in the order of the variables.
+    all_reduce_alg: the all-reduce algorithm, see `AllReduceCrossTowerOps`.
+    candidate_bucket_bytes: the bucket sizes to try, in bytes. Defaults to
+      sizes from 256KB to 64MB.
+    num_iters: number of timed runs per candidate.
+    num_warmup_iters: number of untimed runs per candidate.
+    dtype: the dtype of the synthetic gradients.
+    session_config: an optional `ConfigProto` for the calibration sessions.
+    cross_tower_ops_fn: an optional function mapping a bucket size to the
+      `CrossTowerOps` to calibrate. Defaults to creating an
+      `AllReduceCrossTowerOps` with `all_reduce_alg`.
+
+  Returns:
+    a tuple of the fastest bucket size and a dict mapping every candidate to
+    its mean step time in seconds.
+
+  Raises:
+    ValueError: if `candidate_bucket_bytes` or `grad_shapes` is empty.
+  """
+  if candidate_bucket_bytes is None:
+    candidate_bucket_bytes = _DEFAULT_CANDIDATE_BUCKET_BYTES
+  if not candidate_bucket_bytes:
+    raise ValueError("candidate_bucket_bytes can not be empty.")
+  if not grad_shapes:
+    raise ValueError("grad_shapes can not be empty.")
+  if cross_tower_ops_fn is None:
+    cross_tower_ops_fn = (
+        lambda b: AllReduceCrossTowerOps(all_reduce_alg, bucket_bytes=b))
+  grad_shapes = [tensor_shape.as_shape(s).as_list() for s in grad_shapes]
+
+  step_times = {}
+  for bucket_bytes in candidate_bucket_bytes:
+    with ops.Graph().as_default() as graph:
+      per_device_grads = []
+      for shape in grad_shapes:
+        index = {}
+        for d in devices:
+          with ops.device(d):
+            index[d] = array_ops.ones(shape, dtype=dtype)
+        per_device_grads.append((value_lib.PerDevice(index), None))
+      reduced = cross_tower_ops_fn(bucket_bytes).batch_reduce(
+          "sum", per_device_grads)
+      step = control_flow_ops.group(
+          [m.get(d) for m in reduced for d in m.devices])
+      with session.Session(graph=graph, config=session_config) as sess:
+        for _ in range(num_warmup_iters):
+          sess.run(step)
+        start = time.time()
+        for _ in range(num_iters):
+          sess.run(step)
+        step_times[bucket_bytes] = (time.time() - start) / max(num_iters, 1)
+    logging.info("All-reduce with bucket_bytes = %d: %.3f ms per step",
+                 bucket_bytes, step_times[bucket_bytes] * 1e3)
+
+  best = min(step_times, key=step_times.get)
+  logging.info("Selected bucket_bytes = %d", best)
+  return best, step_times
+
+
 _dgx1_links = [[1, 2, 3, 4], [0, 2, 3, 5], [0, 1, 3, 6], [0, 1, 2, 7],
                [0, 5, 6, 7], [1, 4, 6, 7], [2, 4, 5, 7], [3, 4, 5, 6]]
 
@@ -714,17 +1006,34 @@ def _choose_all_reduce_algorithm(device_links):
     return AllReduceCrossTowerOps("nccl", num_packs=1)
 
 
-def choose_the_best(devices, session_config=None):
+def choose_the_best(devices, session_config=None, all_reduce_profile=None):
   """Find the best subclass of CrossTowerOps given a tensorflow session.
 
   Args:
     devices: a list of devices passed for distribute strategy.
     session_config: a tensorflow session config or None. If None, it will make
       deciesion based on all local devices.
+    all_reduce_profile: an optional `AllReduceProfile` with all-reduce timings
+      measured on these devices, see `all_reduce_profile.profile_all_reduce`.
+      If it has timings for the number of `devices`, the fastest algorithm is
+      used for every band of tensor sizes instead of choosing the algorithm
+      from the device topology.
 
   Returns:
     a subclass of CrossTowerOps.
   """
+  if all_reduce_profile is not None:
+    all_reduce_spec = all_reduce_profile.all_reduce_spec(len(devices))
+    if all_reduce_spec is not None:
+      resolved_devices = [device_util.resolve(d) for d in devices]
+      worker_devices = all_reduce_profile_lib.worker_prefixes(resolved_devices)
+      logging.info("Configured all-reduce from profile: %r", all_reduce_spec)
+      return MultiWorkerAllReduce(
+          worker_devices, len(devices) // len(worker_devices),
+          all_reduce_spec=all_reduce_spec)
+    logging.warning("The all-reduce profile has no timings for %d devices.",
+                    len(devices))
+
   requested_devices = set([device_util.canonicalize(d) for d in devices])
   machine_devices = device_lib.list_local_devices(session_config=session_config)
   using_devices = []
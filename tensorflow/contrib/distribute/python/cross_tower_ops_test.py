@@ -24,15 +24,20 @@ from absl.testing import parameterized
 
 from tensorflow.contrib.distribute.python import combinations
 from tensorflow.contrib.distribute.python import cross_tower_ops as cross_tower_ops_lib
+from tensorflow.contrib.distribute.python import mirrored_strategy
 from tensorflow.contrib.distribute.python import multi_worker_test_base
 from tensorflow.contrib.distribute.python import values as value_lib
+from tensorflow.core.protobuf import config_pb2
 from tensorflow.python.eager import context
 from tensorflow.python.eager import test
 from tensorflow.python.framework import constant_op
+from tensorflow.python.framework import dtypes
 from tensorflow.python.framework import ops
 from tensorflow.python.ops import array_ops
 from tensorflow.python.ops import math_ops
+from tensorflow.python.ops import variables
 from tensorflow.python.training import device_util
+from tensorflow.python.training import gradient_compression
 
 
 def _make_per_device(values, devices):
@@ -183,6 +188,17 @@ class SingleWorkerCrossTowerOpsTest(CrossTowerOpsTestBase):
               "AccumulateNCrossTowerOp",
               cross_tower_ops_lib.ReductionToOneDeviceCrossTowerOps(
                   accumulation_fn=math_ops.accumulate_n)),
+          combinations.NamedObject(
+              "Float16CompressedCrossTowerOps",
+              cross_tower_ops_lib.CompressedCrossTowerOps(
+                  cross_tower_ops_lib.ReductionToOneDeviceCrossTowerOps(),
+                  gradient_compression.Float16GradientCompressor())),
+          combinations.NamedObject(
+              "TopKCompressedCrossTowerOps",
+              cross_tower_ops_lib.CompressedCrossTowerOps(
+                  cross_tower_ops_lib.ReductionToOneDeviceCrossTowerOps(),
+                  gradient_compression.TopKGradientCompressor(
+                      ratio=1.0, error_feedback=False))),
       ],
       distribution=[
           combinations.one_device_strategy,
@@ -205,7 +221,11 @@ class SingleWorkerCrossTowerOpsTest(CrossTowerOpsTestBase):
           combinations.NamedObject(
               "HierarchicalCopyAggregateSmallTensors",
               cross_tower_ops_lib.AllReduceCrossTowerOps(
-                  "hierarchical_copy", 0, 100, 10))
+                  "hierarchical_copy", 0, 100, 10)),
+          combinations.NamedObject(
+              "AllReduceBucketed",
+              cross_tower_ops_lib.AllReduceCrossTowerOps(
+                  "nccl", 0, 0, 0, bucket_bytes=4))
       ],
       distribution=[combinations.mirrored_strategy_with_two_gpus],
       mode=["graph", "eager"])
@@ -323,6 +343,154 @@ class SingleWorkerCrossTowerOpsTest(CrossTowerOpsTestBase):
     self._assert_values_equal(total_mirrored_without_dups, result)
 
 
+class BucketedConcatPackerTest(test.TestCase):
+
+  def testAssignBuckets(self):
+    grads_and_vars = [
+        (array_ops.zeros([4], dtype=dtypes.float32), None),  # 16 bytes
+        (array_ops.zeros([2], dtype=dtypes.float32), None),  # 8 bytes
+        (array_ops.zeros([2], dtype=dtypes.float64), None),  # 16 bytes
+        (array_ops.zeros([1], dtype=dtypes.float32), None),  # 4 bytes
+        (array_ops.zeros([3], dtype=dtypes.float32), None),  # 12 bytes
+    ]
+    # Buckets are filled in reverse order, separately for every dtype.
+    self.assertEqual(
+        [[4, 3], [2], [1, 0]],
+        cross_tower_ops_lib._assign_buckets(grads_and_vars, 16))
+    self.assertEqual(
+        [[4], [3], [2], [1], [0]],
+        cross_tower_ops_lib._assign_buckets(grads_and_vars, 1))
+    self.assertEqual(
+        [[4, 3, 1, 0], [2]],
+        cross_tower_ops_lib._assign_buckets(grads_and_vars, 1024))
+
+  def testPackAndUnpack(self):
+    config = config_pb2.ConfigProto(device_count={"CPU": 2})
+    devices = ["/device:CPU:0", "/device:CPU:1"]
+    shapes = [[2, 3], [5], [], [4, 1]]
+    with ops.Graph().as_default(), self.test_session(config=config) as sess:
+      grouped = []
+      for d, device in enumerate(devices):
+        with ops.device(device):
+          grouped.append([
+              (constant_op.constant(float(d + i), shape=shape), None)
+              for i, shape in enumerate(shapes)
+          ])
+
+      packer = cross_tower_ops_lib.BucketedConcatPacker(bucket_bytes=20)
+      device_grad_packs = packer.pack(grouped)
+      self.assertEqual(len(packer.buckets), len(device_grad_packs[0]))
+      self.assertLess(len(packer.buckets), len(shapes))
+
+      # Sum the packs across devices, like an all-reduce would.
+      summed = []
+      for b in range(len(packer.buckets)):
+        summed.append(math_ops.add_n([packs[b][0]
+                                      for packs in device_grad_packs]))
+      unpacked = packer.unpack(
+          [[(s, None) for s in summed] for _ in devices])
+
+      self.assertEqual(len(devices), len(unpacked))
+      for tower in unpacked:
+        self.assertEqual(len(shapes), len(tower))
+        for i, ((grad, var), shape) in enumerate(zip(tower, shapes)):
+          self.assertIsNone(var)
+          self.assertEqual(shape, grad.shape.as_list())
+          self.assertAllEqual(
+              sess.run(grad),
+              sess.run(constant_op.constant(2. * i + 1., shape=shape)))
+
+  def testAutotuneBucketBytes(self):
+    config = config_pb2.ConfigProto(device_count={"CPU": 2})
+    devices = ["/device:CPU:0", "/device:CPU:1"]
+    grad_shapes = [[10, 10], [10], [3, 3, 3]]
+    created = []
+
+    def cross_tower_ops_fn(bucket_bytes):
+      cross_tower_ops = cross_tower_ops_lib.MultiWorkerAllReduce(
+          ["/job:localhost/replica:0/task:0"], 0, ("pscpu", 1, -1),
+          bucket_bytes=bucket_bytes)
+      created.append(cross_tower_ops)
+      return cross_tower_ops
+
+    best, step_times = cross_tower_ops_lib.autotune_bucket_bytes(
+        devices, grad_shapes,
+        candidate_bucket_bytes=[64, 1024],
+        num_iters=2,
+        num_warmup_iters=1,
+        session_config=config,
+        cross_tower_ops_fn=cross_tower_ops_fn)
+    self.assertEqual(set([64, 1024]), set(step_times))
+    self.assertIn(best, step_times)
+    self.assertEqual(min(step_times.values()), step_times[best])
+    # Every candidate was calibrated with its own bucketed packing. Visited in
+    # reverse, the 108 bytes gradient fills a 64 bytes bucket and the 40 and
+    # 400 bytes gradients share the next one, while all of them fit in a
+    # single 1024 bytes bucket.
+    self.assertEqual(2, len(created))
+    for cross_tower_ops, bucket_bytes, num_buckets in zip(
+        created, [64, 1024], [2, 1]):
+      packer = cross_tower_ops._tensor_packer
+      self.assertIsInstance(packer, cross_tower_ops_lib.BucketedConcatPacker)
+      self.assertEqual(bucket_bytes, packer.bucket_bytes)
+      self.assertEqual(num_buckets, len(packer.buckets))
+
+    # The chosen bucket size reduces the gradients correctly.
+    with ops.Graph().as_default(), self.test_session(config=config) as sess:
+      per_device_grads = []
+      for i, shape in enumerate(grad_shapes):
+        values = [constant_op.constant(float(i + d), shape=shape)
+                  for d in range(len(devices))]
+        per_device_grads.append((_make_per_device(values, devices), None))
+      reduced = cross_tower_ops_fn(best).batch_reduce("sum", per_device_grads)
+      for i, (shape, mirrored) in enumerate(zip(grad_shapes, reduced)):
+        for device in devices:
+          self.assertAllEqual(
+              sess.run(constant_op.constant(2. * i + 1., shape=shape)),
+              sess.run(mirrored.get(device)))
+
+
+class CompressedCrossTowerOpsTest(test.TestCase):
+
+  def testTopKErrorFeedbackPerDevice(self):
+    config = config_pb2.ConfigProto(device_count={"CPU": 2})
+    devices = ["/device:CPU:0", "/device:CPU:1"]
+    distribution = mirrored_strategy.MirroredStrategy(devices)
+    with ops.Graph().as_default(), self.test_session(config=config) as sess:
+      grads = []
+      for device in devices:
+        with ops.device(device):
+          grads.append(array_ops.placeholder(dtypes.float32, shape=[2]))
+      cross_tower_ops = cross_tower_ops_lib.CompressedCrossTowerOps(
+          cross_tower_ops_lib.ReductionToOneDeviceCrossTowerOps(),
+          gradient_compression.TopKGradientCompressor(ratio=0.5))
+      with distribution.scope():
+        reduced = cross_tower_ops.reduce(
+            "sum", _make_per_device(grads, devices), destinations=devices)
+
+      # Each device keeps its own residual, instead of a mirrored one.
+      residuals = variables.local_variables()
+      self.assertEqual(2, len(residuals))
+      self.assertEqual(
+          set(device_util.resolve(d) for d in devices),
+          set(device_util.resolve(r.device) for r in residuals))
+      for residual in residuals:
+        self.assertNotIsInstance(residual, value_lib.DistributedValues)
+
+      sess.run(variables.local_variables_initializer())
+      # Only the largest entry of each gradient is sent, the other one is kept
+      # on its device.
+      self.assertAllEqual(
+          [4., 3.],
+          sess.run(reduced.get(devices[0]),
+                   {grads[0]: [4., 1.], grads[1]: [1., 3.]}))
+      # The kept entries are sent with the next gradients.
+      self.assertAllEqual(
+          [1., 1.],
+          sess.run(reduced.get(devices[0]),
+                   {grads[0]: [0., 0.], grads[1]: [0., 0.]}))
+
+
 class MultiWorkerCrossTowerOpsTest(multi_worker_test_base.MultiWorkerTestBase,
                                    CrossTowerOpsTestBase):
 
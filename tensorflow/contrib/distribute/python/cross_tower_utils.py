@@ -237,6 +237,9 @@ def sum_grad_and_var_all_reduce(grad_and_vars,
     elif alg == 'nccl/xring':
       summed_grads = all_reduce.build_nccl_then_ring(scaled_grads, num_shards,
                                                      math_ops.add)
+    elif alg == 'rechd':
+      summed_grads = all_reduce.build_recursive_hd_all_reduce(
+          scaled_grads, math_ops.add)
     elif alg == 'nccl/rechd':
       summed_grads = all_reduce.build_nccl_then_recursive_hd(
           scaled_grads, math_ops.add)
@@ -200,6 +200,51 @@ class NearestCentersLargeTest(test.TestCase):
           self._expected_nearest_neighbor_squared_distances[:, 0:5])
 
 
+class WeightedKmeansPlusPlusTest(test.TestCase):
+
+  def testIgnoresZeroWeights(self):
+    points = np.array([[0., 0.], [10., 0.], [1000., 0.]], dtype=np.float32)
+    weights = np.array([1., 1., 0.], dtype=np.float32)
+    with self.test_session():
+      for seed in range(10):
+        sampled = clustering_ops._weighted_kmeans_plus_plus(
+            points, weights, 2, seed=seed)
+        self.assertAllEqual([[0., 0.], [10., 0.]],
+                            sorted(sampled.eval().tolist()))
+
+  def testSamplesAtMostAllPoints(self):
+    points = np.array([[0., 0.], [10., 0.]], dtype=np.float32)
+    with self.test_session():
+      sampled = clustering_ops._weighted_kmeans_plus_plus(
+          points, np.ones(2, dtype=np.float32), 5, seed=1)
+      self.assertEqual((2, 2), sampled.eval().shape)
+
+
+class BlockedDistanceTest(test.TestCase):
+
+  def setUp(self):
+    np.random.seed(0)
+    self._points = np.random.rand(10, 3).astype(np.float32)
+    self._clusters = np.random.rand(4, 3).astype(np.float32)
+
+  def testEuclidean(self):
+    with self.test_session():
+      expected = clustering_ops.KMeans._compute_euclidean_distance(
+          [self._points], self._clusters)[0].eval()
+      blocked = clustering_ops.KMeans._compute_euclidean_distance(
+          [self._points], self._clusters, block_size=3)[0].eval()
+      self.assertAllClose(expected, blocked)
+
+  def testCosine(self):
+    with self.test_session():
+      expected = clustering_ops.KMeans._compute_cosine_distance(
+          [self._points], self._clusters, inputs_normalized=False)[0].eval()
+      blocked = clustering_ops.KMeans._compute_cosine_distance(
+          [self._points], self._clusters, inputs_normalized=False,
+          block_size=4)[0].eval()
+      self.assertAllClose(expected, blocked)
+
+
 if __name__ == "__main__":
   np.random.seed(0)
   test.main()
@@ -34,6 +34,7 @@ from tensorflow.python.ops import math_ops
 from tensorflow.python.ops import nn_impl
 from tensorflow.python.ops import random_ops
 from tensorflow.python.ops import state_ops
+from tensorflow.python.ops import tensor_array_ops
 from tensorflow.python.ops import variable_scope
 from tensorflow.python.ops.embedding_ops import embedding_lookup
 from tensorflow.python.platform import resource_loader
@@ -52,6 +53,7 @@ COSINE_DISTANCE = 'cosine'
 RANDOM_INIT = 'random'
 KMEANS_PLUS_PLUS_INIT = 'kmeans_plus_plus'
 KMC2_INIT = 'kmc2'
+KMEANS_PARALLEL_INIT = 'kmeans_parallel'
 
 # The name of the variable holding the cluster centers. Used by the Estimator.
 CLUSTERS_VAR_NAME = 'clusters'
@@ -69,7 +71,11 @@ class KMeans(object):
                mini_batch_steps_per_iteration=1,
                random_seed=0,
                kmeans_plus_plus_num_retries=2,
-               kmc2_chain_length=200):
+               kmc2_chain_length=200,
+               kmeans_parallel_oversampling_factor=2.0,
+               kmeans_parallel_num_rounds=5,
+               kmeans_parallel_steps_per_pass=1,
+               distance_block_size=None):
     """Creates an object for generating KMeans clustering graph.
 
     This class implements the following variants of K-means algorithm:
@@ -109,9 +115,13 @@ class KMeans(object):
         - "random": Choose centers randomly from `inputs`.
         - "kmeans_plus_plus": Use kmeans++ to choose centers from `inputs`.
         - "kmc2": Use the fast k-MC2 algorithm to choose centers from `inputs`.
-        In the last three cases, one batch of `inputs` may not yield
-        `num_clusters` centers, in which case initialization will require
-        multiple batches until enough centers are chosen. In the case of
+        - "kmeans_parallel": Use the k-means|| algorithm, streaming over
+          successive batches of `inputs` in multiple passes, see
+          `kmeans_parallel_steps_per_pass`.
+        In the "random", "kmeans_plus_plus" and "kmc2" cases, one batch of
+        `inputs` may not yield `num_clusters` centers, in which case
+        initialization will require multiple batches until enough centers are
+        chosen. In the case of
         "random" or "kmeans_plus_plus", if the input size is <= `num_clusters`
         then the entire batch is chosen to be cluster centers.
       distance_metric: Distance metric used for clustering. Supported options:
@@ -130,13 +140,28 @@ class KMeans(object):
         k-MC2 algorithm to produce one new cluster centers. If a (mini-)batch
         contains less points, one new cluster center is generated from the
         (mini-)batch.
+      kmeans_parallel_oversampling_factor: For k-means|| initialization, the
+        expected number of candidate centers sampled in each round, as a
+        multiple of `num_clusters`.
+      kmeans_parallel_num_rounds: The number of sampling rounds of k-means||
+        initialization. Every round takes two passes over the data.
+      kmeans_parallel_steps_per_pass: The number of batches of `inputs`, i.e.
+        runs of the init op, that make up one pass over the data during
+        k-means|| initialization. k-means|| needs one run to pick the first
+        candidate and `2 * kmeans_parallel_num_rounds + 1` passes after that.
+      distance_block_size: If set, the distances of all inputs to all cluster
+        centers (the `all_scores` returned by `training_graph`) are computed
+        for at most this many input rows at a time, so that the temporaries
+        are bounded by `distance_block_size * num_clusters` elements. The
+        closest centers are always found without materializing the full
+        distance matrix.
 
     Raises:
       ValueError: An invalid argument was passed to initial_clusters or
         distance_metric.
     """
     if isinstance(initial_clusters, str) and initial_clusters not in [
-        RANDOM_INIT, KMEANS_PLUS_PLUS_INIT, KMC2_INIT
+        RANDOM_INIT, KMEANS_PLUS_PLUS_INIT, KMC2_INIT, KMEANS_PARALLEL_INIT
     ]:
       raise ValueError(
           "Unsupported initialization algorithm '%s'" % initial_clusters)
@@ -151,15 +176,22 @@ class KMeans(object):
     self._random_seed = random_seed
     self._kmeans_plus_plus_num_retries = kmeans_plus_plus_num_retries
     self._kmc2_chain_length = kmc2_chain_length
+    self._kmeans_parallel_oversampling_factor = (
+        kmeans_parallel_oversampling_factor)
+    self._kmeans_parallel_num_rounds = int(kmeans_parallel_num_rounds)
+    self._kmeans_parallel_steps_per_pass = int(kmeans_parallel_steps_per_pass)
+    self._distance_block_size = distance_block_size
 
   @classmethod
-  def _distance_graph(cls, inputs, clusters, distance_metric):
+  def _distance_graph(cls, inputs, clusters, distance_metric,
+                      block_size=None):
     """Computes distance between each input and each cluster center.
 
     Args:
       inputs: list of input Tensors.
       clusters: cluster Tensor.
       distance_metric: distance metric used for clustering
+      block_size: optional maximum number of input rows processed at a time.
 
     Returns:
       list of Tensors, where each element corresponds to each element in inputs.
@@ -168,20 +200,57 @@ class KMeans(object):
     """
     assert isinstance(inputs, list)
     if distance_metric == SQUARED_EUCLIDEAN_DISTANCE:
-      return cls._compute_euclidean_distance(inputs, clusters)
+      return cls._compute_euclidean_distance(inputs, clusters, block_size)
     elif distance_metric == COSINE_DISTANCE:
       return cls._compute_cosine_distance(
-          inputs, clusters, inputs_normalized=True)
+          inputs, clusters, inputs_normalized=True, block_size=block_size)
     else:
       assert False, str(distance_metric)
 
   @classmethod
-  def _compute_euclidean_distance(cls, inputs, clusters):
+  def _blocked_distance(cls, inp, distance_fn, block_size):
+    """Applies `distance_fn` to blocks of at most `block_size` rows of `inp`.
+
+    The blocks are computed one after the other, so that only the result, and
+    not the temporaries of `distance_fn`, has as many rows as `inp`.
+
+    Args:
+      inp: input Tensor.
+      distance_fn: function mapping a block of rows of `inp` to the distances
+        of these rows to all cluster centers.
+      block_size: maximum number of rows per block, or None to compute all
+        rows at once.
+
+    Returns:
+      The distances of all rows of `inp` to all cluster centers.
+    """
+    if block_size is None:
+      return distance_fn(inp)
+    num_rows = array_ops.shape(inp)[0]
+    num_blocks = math_ops.maximum((num_rows + block_size - 1) // block_size, 1)
+
+    def _body(i, distances):
+      block = inp[i * block_size:(i + 1) * block_size]
+      return i + 1, distances.write(i, distance_fn(block))
+
+    _, distances = control_flow_ops.while_loop(
+        lambda i, _: i < num_blocks,
+        _body,
+        [0, tensor_array_ops.TensorArray(
+            inp.dtype, size=num_blocks, infer_shape=False)],
+        parallel_iterations=1)
+    output = distances.concat()
+    output.set_shape([inp.shape[0], None])
+    return output
+
+  @classmethod
+  def _compute_euclidean_distance(cls, inputs, clusters, block_size=None):
     """Computes Euclidean distance between each input and each cluster center.
 
     Args:
       inputs: list of input Tensors.
       clusters: cluster Tensor.
+      block_size: optional maximum number of input rows processed at a time.
 
     Returns:
       list of Tensors, where each element corresponds to each element in inputs.
@@ -190,20 +259,25 @@ class KMeans(object):
     output = []
     for inp in inputs:
       with ops.colocate_with(inp, ignore_existing=True):
-        # Computes Euclidean distance. Note the first and third terms are
-        # broadcast additions.
-        squared_distance = (
-            math_ops.reduce_sum(math_ops.square(inp), 1, keepdims=True) -
-            2 * math_ops.matmul(inp, clusters, transpose_b=True) +
-            array_ops.transpose(
-                math_ops.reduce_sum(
-                    math_ops.square(clusters), 1, keepdims=True)))
-        output.append(squared_distance)
+        clusters_squared_norm = array_ops.transpose(
+            math_ops.reduce_sum(math_ops.square(clusters), 1, keepdims=True))
+
+        def _squared_distance(block):
+          # Computes Euclidean distance. Note the first and third terms are
+          # broadcast additions.
+          return (
+              math_ops.reduce_sum(math_ops.square(block), 1, keepdims=True) -
+              2 * math_ops.matmul(block, clusters, transpose_b=True) +
+              clusters_squared_norm)
+
+        output.append(
+            cls._blocked_distance(inp, _squared_distance, block_size))
 
     return output
 
   @classmethod
-  def _compute_cosine_distance(cls, inputs, clusters, inputs_normalized=True):
+  def _compute_cosine_distance(cls, inputs, clusters, inputs_normalized=True,
+                               block_size=None):
     """Computes cosine distance between each input and each cluster center.
 
     Args:
@@ -212,6 +286,7 @@ class KMeans(object):
       inputs_normalized: if True, it assumes that inp and clusters are
       normalized and computes the dot product which is equivalent to the cosine
       distance. Else it L2 normalizes the inputs first.
+      block_size: optional maximum number of input rows processed at a time.
 
     Returns:
       list of Tensors, where each element corresponds to each element in inp.
@@ -225,7 +300,10 @@ class KMeans(object):
       with ops.colocate_with(inp, ignore_existing=True):
         if not inputs_normalized:
           inp = nn_impl.l2_normalize(inp, dim=1)
-        output.append(1 - math_ops.matmul(inp, clusters, transpose_b=True))
+        output.append(cls._blocked_distance(
+            inp,
+            lambda b: 1 - math_ops.matmul(b, clusters, transpose_b=True),
+            block_size))
     return output
 
   def _infer_graph(self, inputs, clusters):
@@ -245,7 +323,8 @@ class KMeans(object):
     assert isinstance(inputs, list)
     # Pairwise distances are used only by transform(). In all other cases, this
     # sub-graph is not evaluated.
-    scores = self._distance_graph(inputs, clusters, self._distance_metric)
+    scores = self._distance_graph(inputs, clusters, self._distance_metric,
+                                  self._distance_block_size)
     output = []
     if (self._distance_metric == COSINE_DISTANCE and
         not self._clusters_l2_normalized()):
@@ -371,7 +450,10 @@ class KMeans(object):
         self._inputs, num_clusters, initial_clusters, self._distance_metric,
         self._random_seed, self._kmeans_plus_plus_num_retries,
         self._kmc2_chain_length, cluster_centers_var, cluster_centers_updated,
-        cluster_centers_initialized).op()
+        cluster_centers_initialized,
+        self._kmeans_parallel_oversampling_factor,
+        self._kmeans_parallel_num_rounds,
+        self._kmeans_parallel_steps_per_pass).op()
     cluster_centers = cluster_centers_var
 
     if self._distance_metric == COSINE_DISTANCE:
@@ -565,7 +647,10 @@ class _InitializeClustersOpFactory(object):
   def __init__(self, inputs, num_clusters, initial_clusters, distance_metric,
                random_seed, kmeans_plus_plus_num_retries, kmc2_chain_length,
                cluster_centers, cluster_centers_updated,
-               cluster_centers_initialized):
+               cluster_centers_initialized,
+               kmeans_parallel_oversampling_factor=2.0,
+               kmeans_parallel_num_rounds=5,
+               kmeans_parallel_steps_per_pass=1):
     """Creates an op factory.
 
     Args:
@@ -583,6 +668,9 @@ class _InitializeClustersOpFactory(object):
           cluster_centers_updated is the same variable as cluster_centers.
       cluster_centers_initialized: A boolean TF variable that will be set
           to true when all the initial centers have been chosen.
+      kmeans_parallel_oversampling_factor: See KMeans constructor.
+      kmeans_parallel_num_rounds: See KMeans constructor.
+      kmeans_parallel_steps_per_pass: See KMeans constructor.
     """
     # All of these instance variables are constants.
     self._inputs = inputs
@@ -595,11 +683,18 @@ class _InitializeClustersOpFactory(object):
     self._cluster_centers = cluster_centers
     self._cluster_centers_updated = cluster_centers_updated
     self._cluster_centers_initialized = cluster_centers_initialized
+    self._kmeans_parallel_oversampling_factor = (
+        kmeans_parallel_oversampling_factor)
+    self._kmeans_parallel_num_rounds = kmeans_parallel_num_rounds
+    self._kmeans_parallel_steps_per_pass = kmeans_parallel_steps_per_pass
 
     self._num_selected = array_ops.shape(self._cluster_centers)[0]
     self._num_remaining = self._num_clusters - self._num_selected
     self._num_data = math_ops.add_n(
         [array_ops.shape(i)[0] for i in self._inputs])
+    if self._initial_clusters == KMEANS_PARALLEL_INIT:
+      # The variables can not be created inside the cond of op().
+      self._create_kmeans_parallel_variables()
 
   def _random(self):
     indices = random_ops.random_uniform(
@@ -705,6 +800,193 @@ class _InitializeClustersOpFactory(object):
     _, num_remaining = control_flow_ops.while_loop(_cond, _body, [0, 0])
     return num_remaining
 
+  def _create_kmeans_parallel_variables(self):
+    """Creates the state of the k-means|| initialization."""
+    init_value = array_ops.constant([], dtype=dtypes.float32)
+    # The candidate centers sampled so far, and their weights.
+    self._candidates = variable_scope.variable(
+        init_value,
+        name='kmeans_parallel_candidates',
+        validate_shape=False,
+        trainable=False)
+    self._candidate_weights = variable_scope.variable(
+        init_value,
+        name='kmeans_parallel_candidate_weights',
+        validate_shape=False,
+        trainable=False)
+    # The number of batches processed since the first candidate was chosen.
+    self._kmeans_parallel_step = variable_scope.variable(
+        0, dtype=dtypes.int64, name='kmeans_parallel_step', trainable=False)
+    # The sum of the squared distances to the closest candidates over the
+    # current pass, and over the last completed cost pass.
+    self._partial_cost = variable_scope.variable(
+        0., name='kmeans_parallel_partial_cost', trainable=False)
+    self._cost = variable_scope.variable(
+        0., name='kmeans_parallel_cost', trainable=False)
+
+  def _kmeans_parallel_inputs(self):
+    """Returns the input shards, l2-normalized if using cosine distance."""
+    if self._distance_metric != COSINE_DISTANCE:
+      return self._inputs
+    output = []
+    for inp in self._inputs:
+      with ops.colocate_with(inp, ignore_existing=True):
+        output.append(nn_impl.l2_normalize(inp, dim=1))
+    return output
+
+  def _nearest_candidates(self, inputs):
+    """Returns the closest candidates and squared distances of `inputs`."""
+    output = []
+    for inp in inputs:
+      with ops.colocate_with(inp, ignore_existing=True):
+        # nearest_neighbors processes the candidates in blocks, so that the
+        # full distance matrix is never materialized.
+        indices, distances = gen_clustering_ops.nearest_neighbors(
+            inp, self._candidates, 1)
+        output.append((array_ops.squeeze(indices, [-1]),
+                       array_ops.squeeze(distances, [-1])))
+    return output
+
+  def _kmeans_parallel(self):
+    """Runs one step of the streaming k-means|| initialization.
+
+    k-means|| (Bahmani et al., "Scalable K-Means++", VLDB 2012) samples
+    candidate centers in `kmeans_parallel_num_rounds` rounds and then chooses
+    the centers among the candidates with kmeans++, weighting every candidate
+    by the number of points closest to it. Each run of this op processes one
+    batch of inputs, and every `kmeans_parallel_steps_per_pass` runs make up
+    one pass over the data:
+
+      - The first run picks the first point of its batch as the first
+        candidate. The batches are assumed to be randomly permuted.
+      - Every round takes a cost pass, which sums the squared distances of all
+        points to their closest candidates, followed by a sampling pass, which
+        adds every point as a candidate with probability
+        `oversampling_factor * num_clusters * distance**2 / cost`.
+      - A final pass counts the points closest to every candidate, and its
+        last run chooses the centers.
+
+    If there are fewer candidates than centers remaining, the remaining
+    centers are chosen at random from the following batches.
+
+    Returns:
+      The number of centers remaining after this step.
+    """
+    steps_per_pass = self._kmeans_parallel_steps_per_pass
+    step = self._kmeans_parallel_step
+    pass_index = step // steps_per_pass
+    first_step_of_pass = math_ops.equal(step % steps_per_pass, 0)
+    last_step_of_pass = math_ops.equal(step % steps_per_pass,
+                                       steps_per_pass - 1)
+    num_sampling_passes = 2 * self._kmeans_parallel_num_rounds
+
+    def _sampling_round_step():
+      return control_flow_ops.cond(
+          math_ops.equal(pass_index % 2, 0),
+          lambda: self._kmeans_parallel_cost_step(last_step_of_pass),
+          self._kmeans_parallel_sample_step)
+
+    def _final_step():
+      return control_flow_ops.cond(
+          math_ops.equal(pass_index, num_sampling_passes),
+          lambda: self._kmeans_parallel_weight_step(first_step_of_pass,
+                                                    last_step_of_pass),
+          self._add_new_centers)
+
+    def _next_step():
+      num_remaining = control_flow_ops.cond(pass_index < num_sampling_passes,
+                                            _sampling_round_step, _final_step)
+      with ops.control_dependencies([num_remaining]):
+        increment_step = state_ops.assign_add(step, 1)
+      with ops.control_dependencies([increment_step]):
+        return array_ops.identity(num_remaining)
+
+    return control_flow_ops.cond(
+        math_ops.equal(array_ops.shape(self._candidates)[0], 0),
+        self._kmeans_parallel_first_candidate, _next_step)
+
+  def _kmeans_parallel_first_candidate(self):
+    first_shard = self._kmeans_parallel_inputs()[0]
+    with ops.control_dependencies([
+        state_ops.assign(
+            self._candidates, first_shard[:1], validate_shape=False)
+    ]):
+      return array_ops.identity(self._num_remaining)
+
+  def _kmeans_parallel_cost_step(self, last_step_of_pass):
+    """Adds the cost of the batch to the cost of the current pass."""
+    batch_cost = math_ops.add_n([
+        math_ops.reduce_sum(distances) for _, distances in
+        self._nearest_candidates(self._kmeans_parallel_inputs())
+    ])
+    partial_cost = state_ops.assign_add(self._partial_cost, batch_cost)
+
+    def _end_pass():
+      with ops.control_dependencies(
+          [state_ops.assign(self._cost, partial_cost)]):
+        return control_flow_ops.group(
+            state_ops.assign(self._partial_cost, 0.))
+
+    with ops.control_dependencies([partial_cost]):
+      end_pass = control_flow_ops.cond(last_step_of_pass, _end_pass,
+                                       control_flow_ops.no_op)
+    with ops.control_dependencies([end_pass]):
+      return array_ops.identity(self._num_remaining)
+
+  def _kmeans_parallel_sample_step(self):
+    """Adds points of the batch as candidates, with probability ~ cost."""
+    inputs = self._kmeans_parallel_inputs()
+    # The expected number of candidates sampled per pass.
+    num_to_sample = self._kmeans_parallel_oversampling_factor * math_ops.cast(
+        self._num_clusters, dtypes.float32)
+    cost = math_ops.maximum(self._cost, 1e-30)
+    sampled = [self._candidates]
+    for i, (inp, (_, distances)) in enumerate(
+        zip(inputs, self._nearest_candidates(inputs))):
+      with ops.colocate_with(inp, ignore_existing=True):
+        probabilities = num_to_sample * distances / cost
+        uniform = random_ops.random_uniform(
+            array_ops.shape(distances), seed=self._random_seed + i)
+        sampled.append(
+            array_ops.boolean_mask(inp, math_ops.less(uniform, probabilities)))
+    with ops.control_dependencies([
+        state_ops.assign(
+            self._candidates, array_ops.concat(sampled, 0),
+            validate_shape=False)
+    ]):
+      return array_ops.identity(self._num_remaining)
+
+  def _kmeans_parallel_weight_step(self, first_step_of_pass,
+                                   last_step_of_pass):
+    """Counts the points closest to every candidate, then chooses centers."""
+    num_candidates = array_ops.shape(self._candidates)[0]
+    counts = []
+    for indices, _ in self._nearest_candidates(self._kmeans_parallel_inputs()):
+      counts.append(
+          math_ops.unsorted_segment_sum(
+              array_ops.ones_like(indices, dtype=dtypes.float32), indices,
+              num_candidates))
+    counts = math_ops.add_n(counts)
+    weights = state_ops.assign(
+        self._candidate_weights,
+        control_flow_ops.cond(first_step_of_pass, lambda: counts,
+                              lambda: self._candidate_weights + counts),
+        validate_shape=False)
+
+    def _choose_centers():
+      new_centers = _weighted_kmeans_plus_plus(
+          self._candidates, weights, self._num_remaining, self._random_seed)
+      if self._distance_metric == COSINE_DISTANCE:
+        new_centers = nn_impl.l2_normalize(new_centers, dim=1)
+      return self._append_centers(new_centers)
+
+    def _continue_pass():
+      with ops.control_dependencies([weights]):
+        return array_ops.identity(self._num_remaining)
+
+    return control_flow_ops.cond(last_step_of_pass, _choose_centers,
+                                 _continue_pass)
+
   def _greedy_batch_sampler(self, sampler):
     # If the input dataset size is smaller than the number of centers
     # remaining, choose the entire input dataset as centers. This can happen
@@ -724,7 +1006,9 @@ class _InitializeClustersOpFactory(object):
 
   def _choose_initial_centers(self):
     if isinstance(self._initial_clusters, str):
-      if self._initial_clusters == RANDOM_INIT:
+      # k-means|| chooses the centers for which it did not sample enough
+      # candidates at random.
+      if self._initial_clusters in (RANDOM_INIT, KMEANS_PARALLEL_INIT):
         return self._greedy_batch_sampler(self._random)
       else:  # self._initial_clusters == KMEANS_PLUS_PLUS_INIT
         return self._single_batch_sampler(self._kmeans_plus_plus)
@@ -742,6 +1026,10 @@ class _InitializeClustersOpFactory(object):
     new_centers = self._choose_initial_centers()
     if self._distance_metric == COSINE_DISTANCE:
       new_centers = nn_impl.l2_normalize(new_centers, dim=1)
+    return self._append_centers(new_centers)
+
+  def _append_centers(self, new_centers):
+    """Appends centers and returns the number of centers remaining."""
     # If cluster_centers is empty, it doesn't have the right shape for concat.
     all_centers = control_flow_ops.cond(
         math_ops.equal(self._num_selected, 0), lambda: new_centers,
@@ -760,6 +1048,8 @@ class _InitializeClustersOpFactory(object):
     ]):
       if self._initial_clusters == KMC2_INIT:
         num_now_remaining = self._kmc2_multiple_centers()
+      elif self._initial_clusters == KMEANS_PARALLEL_INIT:
+        num_now_remaining = self._kmeans_parallel()
       else:
         num_now_remaining = self._add_new_centers()
       return control_flow_ops.cond(
@@ -773,3 +1063,42 @@ class _InitializeClustersOpFactory(object):
         math_ops.equal(self._num_remaining, 0),
         lambda: check_ops.assert_equal(self._cluster_centers_initialized, True),
         self._initialize)
+
+
+def _weighted_kmeans_plus_plus(points, weights, num_to_sample, seed=None):
+  """Chooses rows of `points` with kmeans++, weighting every row.
+
+  Args:
+    points: a matrix of candidate centers.
+    weights: a vector with the weight of every row of `points`.
+    num_to_sample: the number of rows to choose. At most all rows are chosen.
+    seed: seed for the sampling.
+
+  Returns:
+    A matrix with the chosen rows of `points`.
+  """
+  num_to_sample = math_ops.minimum(num_to_sample, array_ops.shape(points)[0])
+
+  def _sample(scores):
+    # Rows with a zero score are only chosen if all scores are zero.
+    logits = array_ops.expand_dims(math_ops.log(scores + 1e-30), 0)
+    return math_ops.to_int32(random_ops.multinomial(logits, 1, seed=seed)[0, 0])
+
+  def _squared_distances(index):
+    return math_ops.reduce_sum(math_ops.square(points - points[index]), 1)
+
+  first = _sample(weights)
+
+  def _body(i, indices, min_distances):
+    index = _sample(weights * min_distances)
+    return (i + 1, indices.write(i, index),
+            math_ops.minimum(min_distances, _squared_distances(index)))
+
+  _, indices, _ = control_flow_ops.while_loop(
+      lambda i, *_: i < num_to_sample, _body, [
+          1,
+          tensor_array_ops.TensorArray(dtypes.int32,
+                                       size=num_to_sample).write(0, first),
+          _squared_distances(first)
+      ])
+  return array_ops.gather(points, indices.stack())
@@ -140,7 +140,8 @@ class _ModelFn(object):
   def __init__(self, num_clusters, initial_clusters, distance_metric,
                random_seed, use_mini_batch, mini_batch_steps_per_iteration,
                kmeans_plus_plus_num_retries, relative_tolerance,
-               feature_columns):
+               feature_columns, kmeans_parallel_oversampling_factor,
+               kmeans_parallel_num_rounds, kmeans_parallel_steps_per_pass):
     self._num_clusters = num_clusters
     self._initial_clusters = initial_clusters
     self._distance_metric = distance_metric
@@ -150,6 +151,10 @@ class _ModelFn(object):
     self._kmeans_plus_plus_num_retries = kmeans_plus_plus_num_retries
     self._relative_tolerance = relative_tolerance
     self._feature_columns = feature_columns
+    self._kmeans_parallel_oversampling_factor = (
+        kmeans_parallel_oversampling_factor)
+    self._kmeans_parallel_num_rounds = kmeans_parallel_num_rounds
+    self._kmeans_parallel_steps_per_pass = kmeans_parallel_steps_per_pass
 
   def model_fn(self, features, mode, config):
     """Model function for the estimator.
@@ -203,7 +208,11 @@ class _ModelFn(object):
          use_mini_batch=self._use_mini_batch,
          mini_batch_steps_per_iteration=self._mini_batch_steps_per_iteration,
          random_seed=self._random_seed,
-         kmeans_plus_plus_num_retries=self._kmeans_plus_plus_num_retries
+         kmeans_plus_plus_num_retries=self._kmeans_plus_plus_num_retries,
+         kmeans_parallel_oversampling_factor=(
+             self._kmeans_parallel_oversampling_factor),
+         kmeans_parallel_num_rounds=self._kmeans_parallel_num_rounds,
+         kmeans_parallel_steps_per_pass=self._kmeans_parallel_steps_per_pass
      ).training_graph()
 
     loss = math_ops.reduce_sum(losses)
@@ -303,6 +312,7 @@ class KMeansClustering(estimator.Estimator):
   # Values for initial_clusters constructor argument.
   RANDOM_INIT = clustering_ops.RANDOM_INIT
   KMEANS_PLUS_PLUS_INIT = clustering_ops.KMEANS_PLUS_PLUS_INIT
+  KMEANS_PARALLEL_INIT = clustering_ops.KMEANS_PARALLEL_INIT
 
   # Metric returned by evaluate(): The sum of the squared distances from each
   # input point to its closest center.
@@ -328,7 +338,10 @@ class KMeansClustering(estimator.Estimator):
                kmeans_plus_plus_num_retries=2,
                relative_tolerance=None,
                config=None,
-               feature_columns=None):
+               feature_columns=None,
+               kmeans_parallel_oversampling_factor=2.0,
+               kmeans_parallel_num_rounds=5,
+               kmeans_parallel_steps_per_pass=1):
     """Creates an Estimator for running KMeans training and inference.
 
     This Estimator implements the following variants of the K-means algorithm:
@@ -372,6 +385,12 @@ class KMeansClustering(estimator.Estimator):
         * `KMeansClustering.KMEANS_PLUS_PLUS_INIT`: Use kmeans++ to choose
               centers from the first input batch. If the batch size is less
               than `num_clusters`, a TensorFlow runtime error occurs.
+        * `KMeansClustering.KMEANS_PARALLEL_INIT`: Use k-means|| to choose
+              centers, streaming over successive input batches in
+              `2 * kmeans_parallel_num_rounds + 1` passes of
+              `kmeans_parallel_steps_per_pass` batches each, after one batch
+              that picks the first candidate. This scales to large datasets
+              and large `num_clusters`.
       distance_metric: The distance metric used for clustering. One of:
         * `KMeansClustering.SQUARED_EUCLIDEAN_DISTANCE`: Euclidean distance
              between vectors `u` and `v` is defined as \\(||u - v||_2\\)
@@ -399,13 +418,24 @@ class KMeansClustering(estimator.Estimator):
         used by the model. All items in the set should be feature column
         instances that can be passed to `tf.feature_column.input_layer`. If this
         is None, all features will be used.
+      kmeans_parallel_oversampling_factor: The expected number of candidate
+        centers sampled in each round of k-means||, as a multiple of
+        `num_clusters`. Used only if
+        `initial_clusters=KMeansClustering.KMEANS_PARALLEL_INIT`.
+      kmeans_parallel_num_rounds: The number of sampling rounds of k-means||.
+        Used only if `initial_clusters=KMeansClustering.KMEANS_PARALLEL_INIT`.
+      kmeans_parallel_steps_per_pass: The number of input batches that make up
+        one pass over the data during k-means||, e.g.
+        `num_inputs / batch_size`. Used only if
+        `initial_clusters=KMeansClustering.KMEANS_PARALLEL_INIT`.
 
     Raises:
       ValueError: An invalid argument was passed to `initial_clusters` or
         `distance_metric`.
     """
     if isinstance(initial_clusters, str) and initial_clusters not in [
-        KMeansClustering.RANDOM_INIT, KMeansClustering.KMEANS_PLUS_PLUS_INIT
+        KMeansClustering.RANDOM_INIT, KMeansClustering.KMEANS_PLUS_PLUS_INIT,
+        KMeansClustering.KMEANS_PARALLEL_INIT
     ]:
       raise ValueError(
           "Unsupported initialization algorithm '%s'" % initial_clusters)
@@ -419,7 +449,9 @@ class KMeansClustering(estimator.Estimator):
             num_clusters, initial_clusters, distance_metric, random_seed,
             use_mini_batch, mini_batch_steps_per_iteration,
             kmeans_plus_plus_num_retries, relative_tolerance,
-            feature_columns).model_fn,
+            feature_columns, kmeans_parallel_oversampling_factor,
+            kmeans_parallel_num_rounds,
+            kmeans_parallel_steps_per_pass).model_fn,
         model_dir=model_dir,
         config=config)
 
@@ -317,6 +317,40 @@ class KMeansTestMultiStageInit(KMeansTestBase):
           input_fn=self.input_fn(batch_size=4, points=points, randomize=False),
           steps=1)
 
+  def _test_kmeans_parallel(self, batch_size, steps_per_pass):
+    points = np.array(
+        [[0, 0], [1, 0], [0, 1], [100, 100], [101, 100], [100, 101],
+         [-100, 100], [-101, 100], [-100, 101], [-101, 101]],
+        dtype=np.float32)
+    kmeans = kmeans_lib.KMeansClustering(
+        num_clusters=3,
+        initial_clusters=kmeans_lib.KMeansClustering.KMEANS_PARALLEL_INIT,
+        distance_metric=kmeans_lib.KMeansClustering.SQUARED_EUCLIDEAN_DISTANCE,
+        use_mini_batch=True,
+        mini_batch_steps_per_iteration=100,
+        random_seed=24,
+        relative_tolerance=None,
+        kmeans_parallel_num_rounds=3,
+        kmeans_parallel_steps_per_pass=steps_per_pass)
+    kmeans.train(
+        input_fn=self.input_fn(
+            batch_size=batch_size, points=points, randomize=False),
+        steps=1)
+    clusters = kmeans.cluster_centers()
+    self.assertEqual((3, 2), clusters.shape)
+    # Every center is close to a different true center.
+    true_centers = np.array([[0, 0], [100, 100], [-100, 100]])
+    distances = np.sum(
+        np.square(clusters[:, np.newaxis] - true_centers[np.newaxis]), axis=2)
+    self.assertAllEqual([0, 1, 2], sorted(np.argmin(distances, axis=1)))
+    self.assertLess(np.max(np.min(distances, axis=1)), 4)
+
+  def test_kmeans_parallel_single_batch_passes(self):
+    self._test_kmeans_parallel(batch_size=10, steps_per_pass=1)
+
+  def test_kmeans_parallel_multi_batch_passes(self):
+    self._test_kmeans_parallel(batch_size=2, steps_per_pass=5)
+
 
 class MiniBatchKMeansTest(KMeansTest):
 
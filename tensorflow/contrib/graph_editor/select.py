@@ -186,12 +186,15 @@ def filter_ops_from_regex(ops, regex):
   return filter_ops(ops, lambda op: regex_obj.search(op.name))
 
 
-def get_name_scope_ops(ops, scope):
+def get_name_scope_ops(ops, scope, graph_index=None):
   """Get all the operations under the given scope path.
 
   Args:
     ops: an object convertible to a list of tf.Operation.
     scope: a scope path.
+    graph_index: an optional util.GraphIndex of the graph of `ops`. If given,
+      the scope is looked up in the index instead of matching every op name,
+      and is taken literally instead of as a regular expression.
   Returns:
     A list of tf.Operation.
   Raises:
@@ -199,6 +202,12 @@ def get_name_scope_ops(ops, scope):
   """
   if scope and scope[-1] == "/":
     scope = scope[:-1]
+  if graph_index is not None:
+    scope_ops = graph_index.update().name_scope_ops(scope)
+    if isinstance(ops, tf_ops.Graph):
+      return scope_ops
+    scope_ops = frozenset(scope_ops)
+    return [op for op in util.make_list_of_op(ops) if op in scope_ops]
   return filter_ops_from_regex(ops, "^{}(/.*)?$".format(scope))
 
 
@@ -241,7 +250,7 @@ def check_cios(control_inputs=False, control_outputs=None, control_ios=None):
 
 
 def get_ops_ios(ops, control_inputs=False, control_outputs=None,
-                control_ios=None):
+                control_ios=None, graph_index=None):
   """Return all the `tf.Operation` which are connected to an op in ops.
 
   Args:
@@ -253,6 +262,7 @@ def get_ops_ios(ops, control_inputs=False, control_outputs=None,
       both control inputs and control outputs are enabled. This is equivalent to
       set `control_inputs` to `True` and `control_outputs` to the
       `util.ControlOutputs` instance.
+    graph_index: an optional `util.GraphIndex` used to find the consumers.
   Returns:
     All the `tf.Operation` surrounding the given ops.
   Raises:
@@ -261,19 +271,33 @@ def get_ops_ios(ops, control_inputs=False, control_outputs=None,
   control_inputs, control_outputs = check_cios(control_inputs, control_outputs,
                                                control_ios)
   ops = util.make_list_of_op(ops)
+  consumers = _get_consumers_fn(graph_index)
   res = []
+  res_set = set()
+  def add(new_ops):
+    for new_op in new_ops:
+      if new_op not in res_set:
+        res.append(new_op)
+        res_set.add(new_op)
   for op in ops:
-    util.concatenate_unique(res, [t.op for t in op.inputs])
+    add(t.op for t in op.inputs)
     for t in op.outputs:
-      util.concatenate_unique(res, t.consumers())
+      add(consumers(t))
     if control_outputs is not None:
-      util.concatenate_unique(res, control_outputs.get(op))
+      add(control_outputs.get(op))
     if control_inputs:
-      util.concatenate_unique(res, op.control_inputs)
+      add(op.control_inputs)
   return res
 
 
-def compute_boundary_ts(ops):
+def _get_consumers_fn(graph_index):
+  """Return a function returning the consumers of a tensor."""
+  if graph_index is None:
+    return lambda t: t.consumers()
+  return graph_index.update().consumers
+
+
+def compute_boundary_ts(ops, graph_index=None):
   """Compute the tensors at the boundary of a set of ops.
 
   This function looks at all the tensors connected to the given ops (in/out)
@@ -287,6 +311,7 @@ def compute_boundary_ts(ops):
 
   Args:
     ops: an object convertible to a list of tf.Operation.
+    graph_index: an optional `util.GraphIndex` used to find the consumers.
   Returns:
     A tuple `(outside_input_ts, outside_output_ts, inside_ts)` where:
       `outside_input_ts` is a Python list of input tensors;
@@ -298,6 +323,7 @@ def compute_boundary_ts(ops):
     TypeError: if ops cannot be converted to a list of tf.Operation.
   """
   ops = util.make_list_of_op(ops)
+  consumers_fn = _get_consumers_fn(graph_index)
   input_ts = _get_input_ts(ops)
   output_ts = _get_output_ts(ops)
   output_ts_set = frozenset(output_ts)
@@ -313,7 +339,7 @@ def compute_boundary_ts(ops):
     # Mark as "inside".
     inside_ts.append(t)
     # Mark as "only inside" if the tensor is not both inside and output.
-    consumers = frozenset(t.consumers())
+    consumers = frozenset(consumers_fn(t))
     if consumers - ops_set:
       continue
     only_inside_ts.append(t)
@@ -331,7 +357,8 @@ def get_within_boundary_ops(ops,
                             inclusive=True,
                             control_inputs=False,
                             control_outputs=None,
-                            control_ios=None):
+                            control_ios=None,
+                            graph_index=None):
   """Return all the `tf.Operation` within the given boundary.
 
   Args:
@@ -348,6 +375,7 @@ def get_within_boundary_ops(ops,
       `None`, both control inputs and control outputs are enabled. This is
       equivalent to set control_inputs to True and control_outputs to
       the `util.ControlOutputs` instance.
+    graph_index: an optional `util.GraphIndex` used to find the consumers.
   Returns:
     All the `tf.Operation` surrounding the given ops.
   Raises:
@@ -366,7 +394,8 @@ def get_within_boundary_ops(ops,
   wave = set(seed_ops)
   while wave:
     new_wave = set()
-    ops_io = get_ops_ios(wave, control_inputs, control_outputs)
+    ops_io = get_ops_ios(wave, control_inputs, control_outputs,
+                         graph_index=graph_index)
     for op in ops_io:
       if op in res:
         continue
@@ -385,7 +414,8 @@ def get_forward_walk_ops(seed_ops,
                          within_ops=None,
                          within_ops_fn=None,
                          stop_at_ts=(),
-                         control_outputs=None):
+                         control_outputs=None,
+                         graph_index=None):
   """Do a forward graph walk and return all the visited ops.
 
   Args:
@@ -402,6 +432,7 @@ def get_forward_walk_ops(seed_ops,
     stop_at_ts: an iterable of tensors at which the graph walk stops.
     control_outputs: a `util.ControlOutputs` instance or None.
       If not `None`, it will be used while walking the graph forward.
+    graph_index: an optional `util.GraphIndex` used to find the consumers.
   Returns:
     A Python set of all the `tf.Operation` ahead of `seed_ops`.
   Raises:
@@ -409,13 +440,16 @@ def get_forward_walk_ops(seed_ops,
       `tf.Operation`.
   """
   _, control_outputs = check_cios(False, control_outputs)
+  consumers = _get_consumers_fn(graph_index)
   if not util.is_iterable(seed_ops):
     seed_ops = [seed_ops]
   if not seed_ops:
     return []
   if isinstance(seed_ops[0], tf_ops.Tensor):
     ts = util.make_list_of_t(seed_ops, allow_graph=False)
-    seed_ops = util.get_consuming_ops(ts)
+    seed_ops = []
+    for t in ts:
+      util.concatenate_unique(seed_ops, consumers(t))
   else:
     seed_ops = util.make_list_of_op(seed_ops, allow_graph=False)
 
@@ -431,6 +465,7 @@ def get_forward_walk_ops(seed_ops,
         within_ops_fn is None or within_ops_fn(op))
 
   result = list(seed_ops)
+  result_set = set(seed_ops)
   wave = set(seed_ops)
   while wave:
     new_wave = set()
@@ -438,14 +473,15 @@ def get_forward_walk_ops(seed_ops,
       for new_t in op.outputs:
         if new_t in stop_at_ts:
           continue
-        for new_op in new_t.consumers():
-          if new_op not in result and is_within(new_op):
+        for new_op in consumers(new_t):
+          if new_op not in result_set and is_within(new_op):
             new_wave.add(new_op)
       if control_outputs is not None:
         for new_op in control_outputs.get(op):
-          if new_op not in result and is_within(new_op):
+          if new_op not in result_set and is_within(new_op):
             new_wave.add(new_op)
-    util.concatenate_unique(result, new_wave)
+    result.extend(new_wave)
+    result_set.update(new_wave)
     wave = new_wave
   if not inclusive:
     result = [op for op in result if op not in seed_ops]
@@ -457,7 +493,8 @@ def get_backward_walk_ops(seed_ops,
                           within_ops=None,
                           within_ops_fn=None,
                           stop_at_ts=(),
-                          control_inputs=False):
+                          control_inputs=False,
+                          graph_index=None):
   """Do a backward graph walk and return all the visited ops.
 
   Args:
@@ -473,6 +510,8 @@ def get_backward_walk_ops(seed_ops,
       in which case an op is within if it is also in within_ops.
     stop_at_ts: an iterable of tensors at which the graph walk stops.
     control_inputs: if True, control inputs will be used while moving backward.
+    graph_index: an optional `util.GraphIndex` used to find the control
+      inputs.
   Returns:
     A Python set of all the `tf.Operation` behind `seed_ops`.
   Raises:
@@ -500,7 +539,13 @@ def get_backward_walk_ops(seed_ops,
     return (within_ops is None or op in within_ops) and (
         within_ops_fn is None or within_ops_fn(op))
 
+  if graph_index is None:
+    get_control_inputs = lambda op: op.control_inputs
+  else:
+    get_control_inputs = graph_index.update().control_inputs
+
   result = list(seed_ops)
+  result_set = set(seed_ops)
   wave = set(seed_ops)
   while wave:
     new_wave = set()
@@ -508,13 +553,14 @@ def get_backward_walk_ops(seed_ops,
       for new_t in op.inputs:
         if new_t in stop_at_ts:
           continue
-        if new_t.op not in result and is_within(new_t.op):
+        if new_t.op not in result_set and is_within(new_t.op):
           new_wave.add(new_t.op)
       if control_inputs:
-        for new_op in op.control_inputs:
-          if new_op not in result and is_within(new_op):
+        for new_op in get_control_inputs(op):
+          if new_op not in result_set and is_within(new_op):
             new_wave.add(new_op)
-    util.concatenate_unique(result, new_wave)
+    result.extend(new_wave)
+    result_set.update(new_wave)
     wave = new_wave
   if not inclusive:
     result = [op for op in result if op not in seed_ops]
@@ -529,7 +575,8 @@ def get_walks_intersection_ops(forward_seed_ops,
                                within_ops_fn=None,
                                control_inputs=False,
                                control_outputs=None,
-                               control_ios=None):
+                               control_ios=None,
+                               graph_index=None):
   """Return the intersection of a forward and a backward walk.
 
   Args:
@@ -556,6 +603,7 @@ def get_walks_intersection_ops(forward_seed_ops,
       control inputs and control outputs are enabled. This is equivalent to set
       control_inputs to True and control_outputs to the util.ControlOutputs
       instance.
+    graph_index: an optional util.GraphIndex used to walk the graph.
   Returns:
     A Python set of all the tf.Operation in the intersection of a forward and a
       backward walk.
@@ -570,13 +618,16 @@ def get_walks_intersection_ops(forward_seed_ops,
       inclusive=forward_inclusive,
       within_ops=within_ops,
       within_ops_fn=within_ops_fn,
-      control_outputs=control_outputs)
+      control_outputs=control_outputs,
+      graph_index=graph_index)
   backward_ops = get_backward_walk_ops(
       backward_seed_ops,
       inclusive=backward_inclusive,
       within_ops=within_ops,
       within_ops_fn=within_ops_fn,
-      control_inputs=control_inputs)
+      control_inputs=control_inputs,
+      graph_index=graph_index)
+  backward_ops = frozenset(backward_ops)
   return [op for op in forward_ops if op in backward_ops]
 
 
@@ -588,7 +639,8 @@ def get_walks_union_ops(forward_seed_ops,
                         within_ops_fn=None,
                         control_inputs=False,
                         control_outputs=None,
-                        control_ios=None):
+                        control_ios=None,
+                        graph_index=None):
   """Return the union of a forward and a backward walk.
 
   Args:
@@ -614,6 +666,7 @@ def get_walks_union_ops(forward_seed_ops,
       control inputs and control outputs are enabled. This is equivalent to set
       control_inputs to True and control_outputs to the util.ControlOutputs
       instance.
+    graph_index: an optional util.GraphIndex used to walk the graph.
   Returns:
     A Python set of all the tf.Operation in the union of a forward and a
       backward walk.
@@ -628,13 +681,15 @@ def get_walks_union_ops(forward_seed_ops,
       inclusive=forward_inclusive,
       within_ops=within_ops,
       within_ops_fn=within_ops_fn,
-      control_outputs=control_outputs)
+      control_outputs=control_outputs,
+      graph_index=graph_index)
   backward_ops = get_backward_walk_ops(
       backward_seed_ops,
       inclusive=backward_inclusive,
       within_ops=within_ops,
       within_ops_fn=within_ops_fn,
-      control_inputs=control_inputs)
+      control_inputs=control_inputs,
+      graph_index=graph_index)
   return util.concatenate_unique(forward_ops, backward_ops)
 
 
@@ -679,6 +734,7 @@ def select_ops(*args, **kwargs):
       raise ValueError("Wrong keywords argument: {}.".format(k))
 
   ops = []
+  ops_set = set()
 
   for arg in args:
     if can_be_regex(arg):
@@ -691,15 +747,17 @@ def select_ops(*args, **kwargs):
         continue
       ops_ = filter_ops_from_regex(graph, regex)
       for op_ in ops_:
-        if op_ not in ops:
+        if op_ not in ops_set:
           if positive_filter is None or positive_filter(op_):
             ops.append(op_)
+            ops_set.add(op_)
     else:
       ops_aux = util.make_list_of_op(arg, ignore_ts=True)
       if positive_filter is not None:
         ops_aux = [op for op in ops_aux if positive_filter(op)]
-      ops_aux = [op for op in ops_aux if op not in ops]
+      ops_aux = [op for op in ops_aux if op not in ops_set]
       ops += ops_aux
+      ops_set.update(ops_aux)
 
   return ops
 
@@ -745,6 +803,7 @@ def select_ts(*args, **kwargs):
       raise ValueError("Wrong keywords argument: {}.".format(k))
 
   ts = []
+  ts_set = set()
 
   for arg in args:
     if can_be_regex(arg):
@@ -757,15 +816,17 @@ def select_ts(*args, **kwargs):
         continue
       ts_ = filter_ts_from_regex(graph, regex)
       for t_ in ts_:
-        if t_ not in ts:
+        if t_ not in ts_set:
           if positive_filter is None or positive_filter(t_):
             ts.append(t_)
+            ts_set.add(t_)
     else:
       ts_aux = util.make_list_of_t(arg, ignore_ops=True)
       if positive_filter is not None:
         ts_aux = [t for t in ts_aux if positive_filter(t)]
-      ts_aux = [t for t in ts_aux if t not in ts]
+      ts_aux = [t for t in ts_aux if t not in ts_set]
       ts += ts_aux
+      ts_set.update(ts_aux)
 
   return ts
 
@@ -173,7 +173,7 @@ class SubGraphView(object):
   swapped.
   """
 
-  def __init__(self, inside_ops=(), passthrough_ts=()):
+  def __init__(self, inside_ops=(), passthrough_ts=(), graph_index=None):
     """Create a subgraph containing the given ops and the "passthrough" tensors.
 
     Args:
@@ -184,6 +184,8 @@ class SubGraphView(object):
         which goes directly from the input of the subgraph to it output, without
         any intermediate operations. All the non passthrough tensors are
         silently ignored.
+      graph_index: an optional `util.GraphIndex` used to compute the boundary
+        of the subgraph.
     Raises:
       TypeError: if inside_ops cannot be converted to a list of `tf.Operation`
         or if `passthrough_ts` cannot be converted to a list of `tf.Tensor`.
@@ -197,7 +199,8 @@ class SubGraphView(object):
       self._ops = inside_ops
 
       # Compute inside and outside tensor
-      inputs, outputs, insides = select.compute_boundary_ts(inside_ops)
+      inputs, outputs, insides = select.compute_boundary_ts(
+          inside_ops, graph_index=graph_index)
 
       # Compute passthrough tensors, silently ignoring the non-passthrough ones.
       all_tensors = frozenset(inputs + outputs + list(insides))
@@ -634,7 +637,9 @@ def make_view(*args, **kwargs):
       `tf.Operation` 3) (array of) `tf.Tensor`. Those objects will be converted
       into a list of operations and a list of candidate for passthrough tensors.
     **kwargs: keyword graph is used 1) to check that the ops and ts are from
-      the correct graph 2) for regular expression query
+      the correct graph 2) for regular expression query. Keyword graph_index
+      is an optional `util.GraphIndex` used to compute the boundary of the
+      subgraph.
   Returns:
     A subgraph view.
   Raises:
@@ -645,24 +650,27 @@ def make_view(*args, **kwargs):
   """
   # get keywords arguments
   graph = kwargs["graph"] if "graph" in kwargs else None
+  graph_index = kwargs.pop("graph_index", None)
 
   # already a view?
   if len(args) == 1 and isinstance(args[0], SubGraphView):
     return _check_graph(args[0], graph)
 
   ops, ts = select.select_ops_and_ts(*args, **kwargs)
-  sgv = SubGraphView(ops, ts)
+  sgv = SubGraphView(ops, ts, graph_index=graph_index)
   return _check_graph(sgv, graph)
 
 
-def make_view_from_scope(scope, graph):
+def make_view_from_scope(scope, graph, graph_index=None):
   """Make a subgraph from a name scope.
 
   Args:
     scope: the name of the scope.
     graph: the `tf.Graph`.
+    graph_index: an optional `util.GraphIndex` of `graph`, see
+      `select.get_name_scope_ops`.
   Returns:
     A subgraph view representing the given scope.
   """
-  ops = select.get_name_scope_ops(graph, scope)
-  return SubGraphView(ops)
+  ops = select.get_name_scope_ops(graph, scope, graph_index=graph_index)
+  return SubGraphView(ops, graph_index=graph_index)
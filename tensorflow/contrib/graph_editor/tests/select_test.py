@@ -18,6 +18,7 @@ from __future__ import division
 from __future__ import print_function
 
 import re
+import time
 
 from tensorflow.contrib import graph_editor as ge
 from tensorflow.python.framework import constant_op
@@ -170,6 +171,41 @@ class SelectTest(test.TestCase):
     self.assertTrue(self.b.op not in ops)
     self.assertTrue(self.d.op not in ops)
 
+  def test_graph_index(self):
+    """Test that the graph walks give the same results with a GraphIndex."""
+    index = ge.util.GraphIndex(self.graph)
+    control_outputs = ge.util.ControlOutputs(self.graph)
+    self.assertEqual(
+        set(ge.get_forward_walk_ops([self.a.op],
+                                    control_outputs=control_outputs)),
+        set(ge.get_forward_walk_ops([self.a.op], control_outputs=index,
+                                    graph_index=index)))
+    self.assertEqual(
+        set(ge.get_backward_walk_ops([self.h.op], control_inputs=True)),
+        set(ge.get_backward_walk_ops([self.h.op], control_inputs=True,
+                                     graph_index=index)))
+    self.assertEqual(
+        set(ge.get_walks_intersection_ops([self.a.op], [self.f.op])),
+        set(ge.get_walks_intersection_ops([self.a.op], [self.f.op],
+                                          graph_index=index)))
+    ops = [self.c.op, self.e.op]
+    self.assertEqual(ge.compute_boundary_ts(ops),
+                     ge.compute_boundary_ts(ops, graph_index=index))
+    self.assertEqual(set(ge.get_ops_ios(ops)),
+                     set(ge.get_ops_ios(ops, graph_index=index)))
+    self.assertEqual(
+        ge.get_name_scope_ops(self.graph, "foo/bar"),
+        ge.get_name_scope_ops(self.graph, "foo/bar", graph_index=index))
+    self.assertEqual(
+        ge.get_name_scope_ops(ops, "foo/bar"),
+        ge.get_name_scope_ops(ops, "foo/bar", graph_index=index))
+
+    # The index is updated with the ops added since it was built.
+    with self.graph.as_default():
+      i = math_ops.add(self.h, self.a, name="i")
+    self.assertIn(i.op, ge.get_forward_walk_ops([self.h.op],
+                                                graph_index=index))
+
   def test_select_ops(self):
     parameters = (
         (("^foo/",), 7),
@@ -308,5 +344,58 @@ class SelectTest(test.TestCase):
           ]))
 
 
+class GraphIndexBenchmark(test.Benchmark):
+  """Benchmarks graph walks on large synthetic graphs."""
+
+  def _build_graph(self, num_layers, width):
+    graph = ops_lib.Graph()
+    with graph.as_default():
+      layer = [constant_op.constant(1., name="input_%d" % i)
+               for i in range(width)]
+      inputs = list(layer)
+      for l in range(num_layers):
+        with ops_lib.name_scope("layer_%d" % l):
+          layer = [math_ops.add(layer[i], layer[(i + 1) % width])
+                   for i in range(width)]
+    return graph, inputs, layer
+
+  def _benchmark(self, name, fn):
+    start = time.time()
+    fn()
+    self.report_benchmark(iters=1, wall_time=time.time() - start, name=name)
+
+  def benchmark_walks(self):
+    for num_layers, width in [(100, 100), (100, 1000)]:
+      graph, inputs, outputs = self._build_graph(num_layers, width)
+      name = "%d_ops" % len(graph.get_operations())
+      self._benchmark(
+          "forward_walk_" + name,
+          lambda: ge.get_forward_walk_ops(inputs))
+      index = [None]
+      def build_index():
+        index[0] = ge.util.GraphIndex(graph)
+      self._benchmark("build_index_" + name, build_index)
+      self._benchmark(
+          "forward_walk_indexed_" + name,
+          lambda: ge.get_forward_walk_ops(inputs, graph_index=index[0]))
+      self._benchmark(
+          "walks_intersection_" + name,
+          lambda: ge.get_walks_intersection_ops(inputs, outputs))
+      self._benchmark(
+          "walks_intersection_indexed_" + name,
+          lambda: ge.get_walks_intersection_ops(inputs, outputs,
+                                                graph_index=index[0]))
+      ops = graph.get_operations()
+      self._benchmark(
+          "compute_boundary_ts_" + name,
+          lambda: ge.compute_boundary_ts(ops))
+      self._benchmark(
+          "compute_boundary_ts_indexed_" + name,
+          lambda: ge.compute_boundary_ts(ops, graph_index=index[0]))
+      self._benchmark(
+          "copy_indexed_" + name,
+          lambda: ge.copy(ops, graph_index=index[0]))
+
+
 if __name__ == "__main__":
   test.main()
@@ -165,6 +165,24 @@ class TransformTest(test.TestCase):
     self.assertNear(c_val, 2.001, ERROR_TOLERANCE)
     self.assertNear(c_new_val, 3.001, ERROR_TOLERANCE)
 
+  def test_graph_replace_graph_index(self):
+    ops.reset_default_graph()
+    a = constant_op.constant(1.0, name="a")
+    b = variables.Variable(1.0, name="b")
+    eps = constant_op.constant(0.001, name="eps")
+    c = array_ops.identity(a + b + eps, name="c")
+    a_new = constant_op.constant(2.0, name="a_new")
+    index = ge.util.GraphIndex(ops.get_default_graph())
+    c_new = ge.graph_replace(c, {a: a_new}, graph_index=index)
+    # The index knows about the new ops.
+    self.assertIn(c_new.op,
+                  ge.get_forward_walk_ops([a_new.op], graph_index=index))
+    with session.Session() as sess:
+      sess.run(variables.global_variables_initializer())
+      c_val, c_new_val = sess.run([c, c_new])
+    self.assertNear(c_val, 2.001, ERROR_TOLERANCE)
+    self.assertNear(c_new_val, 3.001, ERROR_TOLERANCE)
+
   def test_graph_replace_dict(self):
     ops.reset_default_graph()
     a = constant_op.constant(1.0, name="a")
@@ -118,6 +118,43 @@ class UtilTest(test.TestCase):
     self.assertEqual(len(control_outputs[x0.op]), 1)
     self.assertIs(list(control_outputs[x0.op])[0], c0.op)
 
+  def test_graph_index(self):
+    """Test for the ge.util.GraphIndex class."""
+    g0 = ops.Graph()
+    with g0.as_default():
+      a0 = constant_op.constant(1, name="a0")
+      with ops.name_scope("foo"):
+        b0 = constant_op.constant(2, name="b0")
+        x0 = constant_op.constant(3, name="x0")
+        with ops.control_dependencies([x0.op]):
+          c0 = math_ops.add(a0, b0, name="c0")
+    index = ge.util.GraphIndex(g0)
+    self.assertEqual(index.consumers(a0), [c0.op])
+    self.assertEqual(list(index.consumers(c0)), [])
+    self.assertEqual(index.get(x0.op), [c0.op])
+    self.assertEqual(index.get_all(), {x0.op: [c0.op]})
+    self.assertEqual(list(index.control_inputs(c0.op)), [x0.op])
+    self.assertEqual(index.name_scope_ops("foo"), [b0.op, x0.op, c0.op])
+    self.assertEqual(index.name_scope_ops("foo/c0/"), [c0.op])
+    self.assertEqual(index.name_scope_ops("fo"), [])
+    self.assertEqual(index.sort([c0.op, a0.op, x0.op]),
+                     [a0.op, x0.op, c0.op])
+
+    # New ops are indexed by update.
+    with g0.as_default():
+      d0 = math_ops.add(c0, a0, name="foo/d0")
+    self.assertEqual(index.consumers(a0), [c0.op])
+    index.update()
+    self.assertEqual(index.consumers(a0), [c0.op, d0.op])
+    self.assertEqual(index.name_scope_ops("foo")[-1], d0.op)
+    self.assertLess(index.rank(c0.op), index.rank(d0.op))
+
+    # Ops modified in place are re-indexed by reindex.
+    ge.reroute_ts([b0], [a0], can_modify=[d0.op])
+    index.reindex([d0.op])
+    self.assertEqual(index.consumers(a0), [c0.op])
+    self.assertEqual(index.consumers(b0), [c0.op, d0.op])
+
   def test_scope(self):
     """Test simple path scope functionalities."""
     self.assertEqual(ge.util.scope_finalize("foo/bar"), "foo/bar/")
@@ -94,12 +94,8 @@ def assign_renamed_collections_handler(info, elem, elem_):
     elem: the original element (`tf.Tensor` or `tf.Operation`)
     elem_: the transformed element
   """
-  known_collection_names = util.get_predefined_collection_names()
-  for name, collection in iteritems(info.collections):
-    if elem not in collection:
-      continue
-
-    if name in known_collection_names:
+  for name in info.collection_names(elem):
+    if name in info.known_collection_names:
       transformed_name = name
     else:
       transformed_name = info.new_name(name)
@@ -120,7 +116,7 @@ def transform_op_if_inside_handler(info, op, keep_if_possible=True):
   Returns:
     The transformed op or None.
   """
-  if op in info.sgv.ops:
+  if op in info.ops:
     return info.transformed_ops[op]
   else:
     if keep_if_possible and info.graph is info.graph_:
@@ -169,8 +165,12 @@ def copy_op_handler(info, op, new_inputs, copy_shape=True, nodedef_fn=None):
   input_types_ = op._input_types[:]
 
   # Make a copy of the op_def too.
-  # Its unique to every _type_ of Operation.
-  op_def_ = deepcopy(op.op_def)
+  # Its unique to every _type_ of Operation, so it is only copied once per
+  # type and transform.
+  op_def_ = info.op_def_copies.get(op.type)
+  if op_def_ is None:
+    op_def_ = deepcopy(op.op_def)
+    info.op_def_copies[op.type] = op_def_
 
   # Initialize a new Operation instance
   op_ = tf_ops.Operation(node_def_, info.graph_, new_inputs, output_types_,
@@ -326,11 +326,14 @@ class _TmpInfo(object):
   argument to the handlers.
   """
 
-  def __init__(self, sgv, dst_graph, dst_scope, src_scope):
+  def __init__(self, sgv, dst_graph, dst_scope, src_scope, graph_index=None):
     self.sgv = sgv
     self.sgv_inputs_set = frozenset(sgv.inputs)
     self.ops = frozenset(sgv.ops)
-    self.control_outputs = util.ControlOutputs(sgv.graph)
+    if graph_index is not None and graph_index.graph is sgv.graph:
+      self.control_outputs = graph_index.update()
+    else:
+      self.control_outputs = util.ControlOutputs(sgv.graph)
     self.graph = sgv.graph
     self.scope = src_scope
     self.graph_ = dst_graph
@@ -339,6 +342,17 @@ class _TmpInfo(object):
     self.transformed_ts = {}
     self.collections = dict((key, self.graph.get_collection(key))
                             for key in self.graph.get_all_collection_keys())
+    self.known_collection_names = frozenset(
+        util.get_predefined_collection_names())
+    # Maps the ids of the elements of the collections to the names of their
+    # collections, in the order of `collections`.
+    self._collection_names = {}
+    for key, collection in iteritems(self.collections):
+      for elem in collection:
+        names = self._collection_names.setdefault(id(elem), [])
+        if not names or names[-1] != key:
+          names.append(key)
+    self.op_def_copies = {}
     self.cyclic_ops = []
     self.transform_original_op_handler = transform_op_if_inside_handler
     # The graph is transformed op by op, in the same order the original ops
@@ -350,6 +364,10 @@ class _TmpInfo(object):
     # (see the function `_finalize_cycles`).
     self.tmp_cyclic_ts = []
 
+  def collection_names(self, elem):
+    """Return the names of the collections containing `elem`."""
+    return self._collection_names.get(id(elem), ())
+
   def new_name(self, name):
     """Compute a destination name from a source name.
 
@@ -413,7 +431,8 @@ class Transformer(object):
                dst_graph,
                dst_scope,
                src_scope="",
-               reuse_dst_scope=False):
+               reuse_dst_scope=False,
+               graph_index=None):
     """Execute the transformation.
 
     Args:
@@ -427,6 +446,9 @@ class Transformer(object):
       reuse_dst_scope: if True the dst_scope is re-used if it already exists.
         Otherwise, the scope is given a unique name based on the one given
         by appending an underscore followed by a digit (default).
+      graph_index: an optional `util.GraphIndex` of the source graph. It is
+        used instead of querying the graph, and is kept up to date with the
+        transformed ops if the destination graph is the source graph.
     Returns:
       A tuple `(sgv, info)` where:
         `sgv` is the transformed subgraph view;
@@ -436,7 +458,7 @@ class Transformer(object):
     Raises:
       ValueError: if the arguments are invalid.
     """
-    sgv = subgraph.make_view(sgv)
+    sgv = subgraph.make_view(sgv, graph_index=graph_index)
     if not isinstance(dst_graph, tf_ops.Graph):
       raise TypeError("Expected a tf.Graph, got: {}".format(type(dst_graph)))
 
@@ -448,15 +470,21 @@ class Transformer(object):
       dst_scope = util.scope_finalize(dst_graph.unique_name(dst_scope[:-1]))
 
     # Create temporary info used during this transform call
-    info = _TmpInfo(sgv, dst_graph, dst_scope, src_scope)
+    info = _TmpInfo(sgv, dst_graph, dst_scope, src_scope, graph_index)
 
     self._copy_ops(info)
     self._finalize_cycles(info)
     self._connect_control_inputs(info)
 
+    # The inputs of the new ops were modified after their creation.
+    if graph_index is None or graph_index.graph is not dst_graph:
+      graph_index = None
+    else:
+      graph_index.reindex(list(info.transformed_ops.values()))
+
     # Compute information about the transformation
     res_info = TransformerInfo(info)
-    sgv_ = self._transform_sgv(info, sgv)
+    sgv_ = self._transform_sgv(info, sgv, graph_index)
     return sgv_, res_info
 
   def _copy_ops(self, info):
@@ -514,7 +542,7 @@ class Transformer(object):
       control_inputs_ = [ci for ci in control_inputs_ if ci is not None]
       reroute.add_control_inputs(op_, control_inputs_)
 
-  def _transform_sgv(self, info, sgv):
+  def _transform_sgv(self, info, sgv, graph_index=None):
     """Transform a subgraph view.
 
     For convenience, a transform operation returns a subgraph view of the
@@ -523,13 +551,19 @@ class Transformer(object):
     Args:
       info: Temporary information for this transorfm call.
       sgv: the subgraph to be transformed.
+      graph_index: an optional `util.GraphIndex` of the destination graph.
     Returns:
       The transformed subgraph.
     """
     ops_ = [op_ for _, op_ in iteritems(info.transformed_ops)]
-    sgv_ = subgraph.SubGraphView(ops_)
-    sgv_inputs_ = sgv_.inputs
-    sgv_outputs_ = sgv_.outputs
+    sgv_ = subgraph.SubGraphView(ops_, graph_index=graph_index)
+    # Index of the first occurrence of every input and output tensor.
+    sgv_input_indices_ = {}
+    for i, t_ in enumerate(sgv_.inputs):
+      sgv_input_indices_.setdefault(t_, i)
+    sgv_output_indices_ = {}
+    for i, t_ in enumerate(sgv_.outputs):
+      sgv_output_indices_.setdefault(t_, i)
 
     # re-order inputs
     input_map_ = []
@@ -537,10 +571,9 @@ class Transformer(object):
       if input_t not in info.transformed_ts:
         continue
       input_t_ = info.transformed_ts[input_t]
-      if input_t_ not in sgv_inputs_:
+      if input_t_ not in sgv_input_indices_:
         continue
-      input_t_index_ = sgv_.input_index(input_t_)
-      input_map_.append(input_t_index_)
+      input_map_.append(sgv_input_indices_[input_t_])
 
     # re-order outputs
     output_map_ = []
@@ -548,10 +581,9 @@ class Transformer(object):
       if output_t not in info.transformed_ts:
         continue
       output_t_ = info.transformed_ts[output_t]
-      if output_t_ not in sgv_outputs_:
+      if output_t_ not in sgv_output_indices_:
         continue
-      output_t_index_ = sgv_.output_index(output_t_)
-      output_map_.append(output_t_index_)
+      output_map_.append(sgv_output_indices_[output_t_])
 
     return sgv_.remap(input_map_, output_map_)
 
@@ -590,7 +622,7 @@ class Transformer(object):
 
 
 def copy(sgv, dst_graph=None, dst_scope="", src_scope="",
-         reuse_dst_scope=False):
+         reuse_dst_scope=False, graph_index=None):
   """Copy a subgraph.
 
   Args:
@@ -602,6 +634,8 @@ def copy(sgv, dst_graph=None, dst_scope="", src_scope="",
     reuse_dst_scope: if True the dst_scope is re-used if it already exists.
       Otherwise, the scope is given a unique name based on the one given
       by appending an underscore followed by a digit (default).
+    graph_index: an optional `util.GraphIndex` of the source graph, see
+      `Transformer.__call__`.
   Returns:
     A tuple `(sgv, info)` where:
       `sgv` is the transformed subgraph view;
@@ -613,7 +647,7 @@ def copy(sgv, dst_graph=None, dst_scope="", src_scope="",
     StandardError: if sgv cannot be converted to a SubGraphView using
       the same rules than the function subgraph.make_view.
   """
-  sgv = subgraph.make_view(sgv)
+  sgv = subgraph.make_view(sgv, graph_index=graph_index)
   if dst_graph is None:
     dst_graph = sgv.graph
   if not isinstance(dst_graph, tf_ops.Graph):
@@ -621,12 +655,13 @@ def copy(sgv, dst_graph=None, dst_scope="", src_scope="",
 
   copier = Transformer()
   return copier(
-      sgv, dst_graph, dst_scope, src_scope, reuse_dst_scope=reuse_dst_scope)
+      sgv, dst_graph, dst_scope, src_scope, reuse_dst_scope=reuse_dst_scope,
+      graph_index=graph_index)
 
 
 def copy_with_input_replacements(sgv, replacement_ts,
                                  dst_graph=None, dst_scope="", src_scope="",
-                                 reuse_dst_scope=False):
+                                 reuse_dst_scope=False, graph_index=None):
   """Copy a subgraph, replacing some of its inputs.
 
   Note a replacement only happens if the tensor to be replaced
@@ -644,6 +679,8 @@ def copy_with_input_replacements(sgv, replacement_ts,
     reuse_dst_scope: if True the dst_scope is re-used if it already exists.
       Otherwise, the scope is given a unique name based on the one given
       by appending an underscore followed by a digit (default).
+    graph_index: an optional `util.GraphIndex` of the source graph, see
+      `Transformer.__call__`.
   Returns:
     A tuple `(sgv, info)` where:
       `sgv` is the transformed subgraph view;
@@ -655,7 +692,7 @@ def copy_with_input_replacements(sgv, replacement_ts,
     StandardError: if sgv cannot be converted to a SubGraphView using
       the same rules as the function subgraph.make_view.
   """
-  sgv = subgraph.make_view(sgv)
+  sgv = subgraph.make_view(sgv, graph_index=graph_index)
   if dst_graph is None:
     dst_graph = sgv.graph
   if not isinstance(dst_graph, tf_ops.Graph):
@@ -670,10 +707,11 @@ def copy_with_input_replacements(sgv, replacement_ts,
       return keep_t_if_possible_handler(info, t)
   copier.transform_external_input_handler = replace_t_with_replacement_handler
   return copier(
-      sgv, dst_graph, dst_scope, src_scope, reuse_dst_scope=reuse_dst_scope)
+      sgv, dst_graph, dst_scope, src_scope, reuse_dst_scope=reuse_dst_scope,
+      graph_index=graph_index)
 
 
-def _add_control_flow_ops(ops, control_ios):
+def _add_control_flow_ops(ops, control_ios, graph_index=None):
   """Complete `ops` so that the transformed graph is valid.
 
   Partially copying a graph can lead to a malformed graph. For instance,
@@ -684,6 +722,7 @@ def _add_control_flow_ops(ops, control_ios):
   Args:
     ops: list of ops (modifed in-place).
     control_ios: object created by a call to `util.ControlOutputs`.
+    graph_index: an optional `util.GraphIndex` used to walk the graph.
   """
   # Find while contexts.
   control_flow_contexts = set()
@@ -698,7 +737,8 @@ def _add_control_flow_ops(ops, control_ios):
       new_ops += select.get_walks_intersection_ops(
           [enter_t.op for enter_t in cfc.loop_enters],
           [exit_t.op for exit_t in cfc.loop_exits],
-          control_ios=control_ios)
+          control_ios=control_ios,
+          graph_index=graph_index)
   # Add new ops.
   new_ops_set = set(new_ops)
   ops_set = frozenset(ops)
@@ -708,7 +748,7 @@ def _add_control_flow_ops(ops, control_ios):
 
 
 def graph_replace(target_ts, replacement_ts, dst_scope="",
-                  src_scope="", reuse_dst_scope=False):
+                  src_scope="", reuse_dst_scope=False, graph_index=None):
   """Create a new graph which compute the targets from the replaced Tensors.
 
   Args:
@@ -719,6 +759,8 @@ def graph_replace(target_ts, replacement_ts, dst_scope="",
     reuse_dst_scope: if True the dst_scope is re-used if it already exists.
       Otherwise, the scope is given a unique name based on the one given
       by appending an underscore followed by a digit (default).
+    graph_index: an optional `util.GraphIndex` of the graph, which is used to
+      walk the graph and is kept up to date with the new ops.
   Returns:
     A single tf.Tensor or a list of target tf.Tensor, depending on
     the type of the input argument `target_ts`.
@@ -734,20 +776,26 @@ def graph_replace(target_ts, replacement_ts, dst_scope="",
   # the get_walks_intersection_ops can also traverse the
   # control dependencies.
   graph = util.get_unique_graph(flatten_target_ts, check_types=(tf_ops.Tensor))
-  control_ios = util.ControlOutputs(graph)
+  if graph_index is not None and graph_index.graph is graph:
+    control_ios = graph_index.update()
+  else:
+    graph_index = None
+    control_ios = util.ControlOutputs(graph)
   ops = select.get_walks_intersection_ops(list(iterkeys(replacement_ts)),
                                           flatten_target_ts,
-                                          control_ios=control_ios)
+                                          control_ios=control_ios,
+                                          graph_index=graph_index)
   if not ops:
     raise ValueError("Targets and replacements are not connected!")
 
   # Complete ops to avoid malformed control flow.
   # TODO(fkp): Consider moving this function deeper (in the transformer?).
-  _add_control_flow_ops(ops, control_ios)
+  _add_control_flow_ops(ops, control_ios, graph_index)
 
   # Create a copy of the relevant subgraph
   unused_sgv_, info = copy_with_input_replacements(
-      ops, replacement_ts, None, dst_scope, src_scope, reuse_dst_scope)
+      ops, replacement_ts, None, dst_scope, src_scope, reuse_dst_scope,
+      graph_index=graph_index)
   # Return the transformed targets but keep the original if the transformed
   # counterpart cannot be found
   missing_fn = lambda original_t: original_t
@@ -32,6 +32,7 @@ __all__ = [
     "get_generating_ops",
     "get_consuming_ops",
     "ControlOutputs",
+    "GraphIndex",
     "placeholder_name",
     "make_placeholder_from_tensor",
     "make_placeholder_from_dtype_and_shape",
@@ -329,9 +330,7 @@ def get_consuming_ops(ts):
   ts = make_list_of_t(ts, allow_graph=False)
   ops = []
   for t in ts:
-    for op in t.consumers():
-      if op not in ops:
-        ops.append(op)
+    concatenate_unique(ops, t.consumers())
   return ops
 
 
@@ -390,6 +389,165 @@ class ControlOutputs(object):
     return self._graph
 
 
+class GraphIndex(ControlOutputs):
+  """An incrementally updated index of the topology of a graph.
+
+  On top of the control outputs, the index maps every tensor to its consumers,
+  every op to its rank in the creation order and every name scope to the ops
+  under it. Looking up consumers through the index avoids a call into the
+  graph per tensor, which dominates walks over large graphs.
+
+  Ops added to the graph are indexed by `update`, which only visits the new
+  ops. Ops whose inputs are modified in place, for instance by the functions
+  of the `reroute` module, must be re-indexed with `reindex`.
+
+  A `GraphIndex` can be used wherever a `ControlOutputs` is expected.
+  """
+
+  def __init__(self, graph):
+    """Index all the operations of a graph.
+
+    Args:
+      graph: a `tf.Graph`.
+    Raises:
+      TypeError: graph is not a `tf.Graph`.
+    """
+    self._consumers = {}
+    self._inputs = {}
+    self._control_inputs = {}
+    self._rank = {}
+    self._scope_ops = {}
+    super(GraphIndex, self).__init__(graph)
+
+  def update(self):
+    """Index the operations added to the graph since the last update."""
+    version = self._graph.version
+    if self._version == version:
+      return self
+    # pylint: disable=protected-access
+    nodes_by_id = self._graph._nodes_by_id
+    # pylint: enable=protected-access
+    for op_id in range(self._version + 1, version + 1):
+      op = nodes_by_id.get(op_id)
+      if isinstance(op, tf_ops.Operation):
+        self._add(op)
+    self._version = version
+    return self
+
+  def _build(self):
+    """Build the index from scratch."""
+    self._control_outputs.clear()
+    self._consumers.clear()
+    self._inputs.clear()
+    self._control_inputs.clear()
+    self._rank.clear()
+    self._scope_ops.clear()
+    self._version = 0
+    self.update()
+
+  def _add(self, op):
+    """Index a new op."""
+    self._rank[op] = len(self._rank)
+    self._index_inputs(op)
+    name = op.name
+    slash = name.find("/")
+    while slash != -1:
+      self._scope_ops.setdefault(name[:slash], []).append(op)
+      slash = name.find("/", slash + 1)
+    self._scope_ops.setdefault(name, []).append(op)
+
+  def _index_inputs(self, op):
+    inputs = tuple(op.inputs)
+    control_inputs = tuple(op.control_inputs)
+    self._inputs[op] = inputs
+    self._control_inputs[op] = control_inputs
+    # Consumers and control outputs are insertion-ordered sets, so that
+    # indexing and re-indexing high-fanout tensors stays linear.
+    for t in inputs:
+      consumers = self._consumers.get(t)
+      if consumers is None:
+        consumers = self._consumers[t] = collections.OrderedDict()
+      consumers[op] = None
+    for control_input in control_inputs:
+      control_outputs = self._control_outputs.get(control_input)
+      if control_outputs is None:
+        control_outputs = collections.OrderedDict()
+        self._control_outputs[control_input] = control_outputs
+      control_outputs[op] = None
+
+  def reindex(self, ops):
+    """Re-index the inputs of ops which have been modified in place.
+
+    Args:
+      ops: an object convertible to a list of `tf.Operation`.
+    Returns:
+      The index itself.
+    """
+    self.update()
+    for op in make_list_of_op(ops, allow_graph=False):
+      if op not in self._rank:
+        continue
+      for t in self._inputs[op]:
+        self._consumers[t].pop(op, None)
+      for control_input in self._control_inputs[op]:
+        self._control_outputs[control_input].pop(op, None)
+      self._index_inputs(op)
+    return self
+
+  def consumers(self, t):
+    """Return the consuming ops of the tensor `t`, in creation order."""
+    return list(self._consumers.get(t, ()))
+
+  def get_all(self):
+    """Return a dictionary mapping ops to the list of their control outputs."""
+    return {op: list(control_outputs)
+            for op, control_outputs in self._control_outputs.items()
+            if control_outputs}
+
+  def get(self, op):
+    """return the control outputs of op."""
+    if op in self._control_outputs:
+      return list(self._control_outputs[op])
+    else:
+      return ()
+
+  def inputs(self, op):
+    """Return the input tensors of `op`, as of its last indexing."""
+    if op in self._inputs:
+      return self._inputs[op]
+    return op.inputs
+
+  def control_inputs(self, op):
+    """Return the control inputs of `op`, as of its last indexing."""
+    if op in self._control_inputs:
+      return self._control_inputs[op]
+    return op.control_inputs
+
+  def rank(self, op):
+    """Return the rank of `op` in the creation order of the indexed ops."""
+    return self._rank[op]
+
+  def sort(self, ops):
+    """Return `ops` sorted in creation order.
+
+    The creation order is a topological order of the data and control
+    dependencies, except for the edges created by modifying inputs in place,
+    such as the back edges of while loops.
+
+    Args:
+      ops: an iterable of indexed `tf.Operation`.
+    Returns:
+      A sorted list of `tf.Operation`.
+    """
+    return sorted(ops, key=self._rank.__getitem__)
+
+  def name_scope_ops(self, scope):
+    """Return the ops under the name scope `scope`, in creation order."""
+    if scope and scope[-1] == "/":
+      scope = scope[:-1]
+    return list(self._scope_ops.get(scope, ()))
+
+
 def scope_finalize(scope):
   if scope and scope[-1] != "/":
     scope += "/"
@@ -19,6 +19,7 @@ from __future__ import division
 from __future__ import print_function
 
 # pylint: disable=unused-import,line-too-long
+from tensorflow.contrib.kfac.python.ops import async_inverse_updates_lib as async_inverse_updates
 from tensorflow.contrib.kfac.python.ops import curvature_matrix_vector_products_lib as curvature_matrix_vector_products
 from tensorflow.contrib.kfac.python.ops import estimator_lib as estimator
 from tensorflow.contrib.kfac.python.ops import fisher_blocks_lib as fisher_blocks
@@ -32,6 +33,7 @@ from tensorflow.python.util.all_util import remove_undocumented
 # pylint: enable=unused-import,line-too-long
 
 _allowed_symbols = [
+    "async_inverse_updates",
     "curvature_matrix_vector_products",
     "estimator",
     "fisher_blocks",
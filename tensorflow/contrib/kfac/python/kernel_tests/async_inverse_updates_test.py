@@ -0,0 +1,114 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for tf.contrib.kfac.async_inverse_updates."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from tensorflow.contrib.kfac.python.ops import async_inverse_updates
+from tensorflow.python.framework import errors
+from tensorflow.python.framework import ops
+from tensorflow.python.ops import control_flow_ops
+from tensorflow.python.ops import variables
+from tensorflow.python.platform import test
+from tensorflow.python.training import monitored_session
+from tensorflow.python.training import session_run_hook
+
+
+class AsyncInverseUpdateHookTest(test.TestCase):
+
+  def _make_ops(self, fail=False):
+    # 'source' stands in for a covariance and 'served' for its inverse.
+    source = variables.Variable(1.)
+    snapshot = variables.Variable(0.)
+    staging = variables.Variable(0.)
+    served = variables.Variable(0.)
+    snapshot_op = snapshot.assign(source)
+    compute_op = staging.assign(10. * snapshot)
+    if fail:
+      with ops.control_dependencies([control_flow_ops.Assert(
+          snapshot < 2., ["Failed"])]):
+        compute_op = staging.assign(10. * snapshot)
+    swap_op = served.assign(staging)
+    train_op = source.assign_add(1.)
+    return snapshot_op, compute_op, swap_op, train_op, served
+
+  def testRefreshes(self):
+    with ops.Graph().as_default(), self.test_session() as sess:
+      snapshot_op, compute_op, swap_op, train_op, served = self._make_ops()
+      hook = async_inverse_updates.AsyncInverseUpdateHook(
+          snapshot_op, [compute_op], swap_op, every_n_steps=2)
+      sess.run(variables.global_variables_initializer())
+      run_context = session_run_hook.SessionRunContext(None, sess)
+
+      # The inverses are computed before the first step.
+      hook.after_create_session(sess, None)
+      self.assertEqual(10., sess.run(served))
+      self.assertEqual(1, hook.num_refreshes)
+
+      sess.run(train_op)
+      hook.after_run(run_context, None)
+      sess.run(train_op)
+      # Snapshots the source value of 3.
+      hook.after_run(run_context, None)
+      hook._done.wait()
+      self.assertEqual(10., sess.run(served))
+
+      sess.run(train_op)
+      hook.after_run(run_context, None)
+      self.assertEqual(30., sess.run(served))
+      self.assertEqual(2, hook.num_refreshes)
+      hook.end(sess)
+
+  def testRaisesErrorsOfComputeOps(self):
+    with ops.Graph().as_default(), self.test_session() as sess:
+      snapshot_op, compute_op, swap_op, train_op, _ = self._make_ops(
+          fail=True)
+      hook = async_inverse_updates.AsyncInverseUpdateHook(
+          snapshot_op, [compute_op], swap_op)
+      sess.run(variables.global_variables_initializer())
+      run_context = session_run_hook.SessionRunContext(None, sess)
+      hook.after_create_session(sess, None)
+
+      sess.run(train_op)
+      hook.after_run(run_context, None)
+      hook._done.wait()
+      sess.run(train_op)
+      with self.assertRaises(errors.InvalidArgumentError):
+        hook.after_run(run_context, None)
+      hook.end(sess)
+
+  def testMonitoredSession(self):
+    with ops.Graph().as_default():
+      snapshot_op, compute_op, swap_op, train_op, served = self._make_ops()
+      hook = async_inverse_updates.AsyncInverseUpdateHook(
+          snapshot_op, [compute_op], swap_op)
+      with monitored_session.MonitoredSession(hooks=[hook]) as sess:
+        for _ in range(20):
+          sess.run(train_op)
+        served_value = sess.run(served)
+      self.assertGreaterEqual(hook.num_refreshes, 1)
+      self.assertEqual(0., served_value % 10.)
+      self.assertGreaterEqual(served_value, 10.)
+
+  def testInvalidEveryNSteps(self):
+    with self.assertRaises(ValueError):
+      async_inverse_updates.AsyncInverseUpdateHook(None, [], None,
+                                                   every_n_steps=0)
+
+
+if __name__ == "__main__":
+  test.main()
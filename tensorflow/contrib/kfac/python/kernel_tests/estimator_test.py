@@ -305,6 +305,60 @@ class EstimatorTest(test.TestCase):
         sess.run(inv_update_op)
         sess.run(increment_global_step)
 
+  def test_async_inverse_update_ops(self):
+    """Ensures async inverse updates only take effect when swapped in."""
+    with self._graph.as_default(), self.test_session() as sess:
+      fisher_estimator = estimator.FisherEstimatorRoundRobin(
+          variables=[self.weights],
+          layer_collection=self.layer_collection,
+          damping=0.2,
+          cov_ema_decay=0.0)
+      with self.assertRaises(ValueError):
+        fisher_estimator.make_async_inverse_update_ops()
+
+      _, inv_update_thunks = fisher_estimator.make_vars_and_create_op_thunks()
+      inv_update_op = control_flow_ops.group(
+          *[thunk() for thunk in inv_update_thunks])
+      snapshot_op, compute_ops, swap_op = (
+          fisher_estimator.make_async_inverse_update_ops())
+      self.assertEqual(len(inv_update_thunks), len(compute_ops))
+      self.assertEqual(len(inv_update_thunks),
+                       len(fisher_estimator.inverse_update_costs))
+      inv_matrices = [
+          matrix
+          for fisher_factor in self.layer_collection.get_factors()
+          for matrix in fisher_factor._matpower_by_exp_and_damping.values()
+      ]
+      cov_matrices = [
+          fisher_factor.get_cov()
+          for fisher_factor in self.layer_collection.get_factors()
+      ]
+
+      sess.run(variables.global_variables_initializer())
+      sess.run(variables.local_variables_initializer())
+      initial_inv_values = sess.run(inv_matrices)
+      sess.run([
+          cov_matrix.assign(2 * linalg_ops.eye(int(cov_matrix.shape[0])))
+          for cov_matrix in cov_matrices
+      ])
+      sess.run(snapshot_op)
+      # Changes of the covariances after the snapshot are not used.
+      sess.run([
+          cov_matrix.assign(3 * linalg_ops.eye(int(cov_matrix.shape[0])))
+          for cov_matrix in cov_matrices
+      ])
+      sess.run(compute_ops)
+      self.assertAllClose(initial_inv_values, sess.run(inv_matrices))
+
+      sess.run(swap_op)
+      async_inv_values = sess.run(inv_matrices)
+      sess.run([
+          cov_matrix.assign(2 * linalg_ops.eye(int(cov_matrix.shape[0])))
+          for cov_matrix in cov_matrices
+      ])
+      sess.run(inv_update_op)
+      self.assertAllClose(sess.run(inv_matrices), async_inv_values)
+
 
 if __name__ == "__main__":
   test.main()
@@ -74,6 +74,9 @@ class FisherFactorTestingDummy(ff.FisherFactor):
   def make_inverse_update_ops(self):
     return []
 
+  def make_async_inverse_update_ops(self):
+    return [], [], []
+
   def get_cov(self):
     return NotImplementedError
 
@@ -392,6 +395,52 @@ class DenseSquareMatrixFactorTest(test.TestCase):
       new_inv = sess.run(factor.get_inverse(damping_func).to_dense())
       self.assertAllClose(new_inv, np.linalg.inv(cov))
 
+  def testMakeAsyncInverseUpdateOps(self):
+    with tf_ops.Graph().as_default(), self.test_session() as sess:
+      random_seed.set_random_seed(200)
+      cov = np.array([[6., 2.], [2., 4.]])
+      factor = DenseSquareMatrixFactorTestingDummy(cov.shape)
+      factor._cov = tf_variables.Variable(cov, dtype=dtypes.float32)
+      damping = 0.5
+      damping_func = make_damping_func(damping)
+
+      factor.register_inverse(damping_func)
+      factor.register_matpower(2, damping_func)
+      factor.instantiate_inv_variables()
+      snapshot_ops, compute_ops, swap_ops = (
+          factor.make_async_inverse_update_ops())
+      self.assertEqual(1, len(snapshot_ops))
+      self.assertEqual(1, len(compute_ops))
+      self.assertEqual(2, len(swap_ops))
+      # Two matrix powers of a 2x2 matrix.
+      self.assertEqual(16, factor.inverse_update_cost)
+
+      sess.run(tf_variables.global_variables_initializer())
+      sess.run(tf_variables.local_variables_initializer())
+      old_inv = sess.run(factor.get_inverse(damping_func).to_dense())
+      sess.run(snapshot_ops)
+      sess.run(factor.get_cov().assign(2 * cov))
+      sess.run(compute_ops)
+      # The served matrices only change when the new values are swapped in.
+      self.assertAllClose(
+          old_inv, sess.run(factor.get_inverse(damping_func).to_dense()))
+
+      sess.run(swap_ops)
+      damped_cov = cov + np.eye(2) * damping
+      self.assertAllClose(
+          np.linalg.inv(damped_cov),
+          sess.run(factor.get_inverse(damping_func).to_dense()))
+      self.assertAllClose(
+          np.linalg.matrix_power(damped_cov, 2),
+          sess.run(factor.get_matpower(2, damping_func).to_dense()))
+
+  def testMakeAsyncInverseUpdateOpsNothingRegistered(self):
+    with tf_ops.Graph().as_default():
+      factor = DenseSquareMatrixFactorTestingDummy((2, 2))
+      factor._cov = array_ops.constant(np.eye(2), dtype=dtypes.float32)
+      self.assertEqual(([], [], []), factor.make_async_inverse_update_ops())
+      self.assertEqual(0, factor.inverse_update_cost)
+
 
 class FullFactorTest(test.TestCase):
 
@@ -950,6 +999,47 @@ class FullyConnectedMultiKFTest(test.TestCase):
       new_cov = sess.run(factor.make_covariance_update_op(.5))
       self.assertAllClose([[3, 3.5], [3.5, 5.5]], new_cov)
 
+  def testMakeAsyncInverseUpdateOpsOptionQuants(self):
+    for option in (1, 2):
+      with tf_ops.Graph().as_default(), self.test_session() as sess:
+        random_seed.set_random_seed(200)
+        tensor = array_ops.constant([[1., 2.], [3., 5.], [4., 1.], [2., 3.]],
+                                    name='a/b/c')
+        factor = ff.FullyConnectedMultiKF(((tensor,),), num_uses=2)
+        factor.register_cov_dt1()
+        factor.instantiate_cov_variables()
+        damping_func = make_damping_func(0.5)
+        if option == 1:
+          factor.register_option1quants(damping_func)
+        else:
+          factor.register_option2quants(damping_func)
+        factor.instantiate_inv_variables()
+        if option == 1:
+          quants = factor.get_option1quants(damping_func)
+        else:
+          quants = factor.get_option2quants(damping_func)
+
+        cov_update_op = factor.make_covariance_update_op(0.)
+        snapshot_ops, compute_ops, swap_ops = (
+            factor.make_async_inverse_update_ops())
+        self.assertEqual(len(quants), len(swap_ops))
+        inverse_update_ops = factor.make_inverse_update_ops()
+
+        sess.run(tf_variables.global_variables_initializer())
+        sess.run(tf_variables.local_variables_initializer())
+        sess.run(cov_update_op)
+        old_quants = sess.run(quants)
+        sess.run(snapshot_ops)
+        sess.run(compute_ops)
+        # The served quantities only change when the new values are swapped
+        # in.
+        self.assertAllClose(old_quants, sess.run(quants))
+
+        sess.run(swap_ops)
+        async_quants = sess.run(quants)
+        sess.run(inverse_update_ops)
+        self.assertAllClose(sess.run(quants), async_quants)
+
 
 if __name__ == '__main__':
   test.main()
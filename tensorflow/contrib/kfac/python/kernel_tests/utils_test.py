@@ -327,6 +327,52 @@ class UtilsTest(test.TestCase):
           ],
           values)
 
+  def testBalancedPhases(self):
+    self.assertEqual([0, 1, 1, 1], utils.balanced_phases([4, 1, 1, 1], 2))
+    self.assertEqual([1, 0, 2], utils.balanced_phases([2, 3, 1], 3))
+
+  def testStaggeredExecute(self):
+    """Ensure staggered_execute runs every op once per period."""
+
+    def increment_var(var):
+      return lambda: var.assign_add(1)
+
+    with ops.Graph().as_default(), self.test_session() as sess:
+      i = variable_scope.get_variable('i', initializer=0)
+      accumulators = [
+          variable_scope.get_variable('var%d' % j, initializer=0)
+          for j in range(4)
+      ]
+      thunks = [increment_var(var) for var in accumulators]
+      increment_accumulators = utils.staggered_execute(
+          i, thunks, 2, costs=[4, 1, 1, 1])
+      increment_i = i.assign_add(1)
+
+      sess.run(variables.global_variables_initializer())
+
+      # Ensure one op per thunk.
+      self.assertEqual(4, len(increment_accumulators))
+
+      # The expensive op runs alone on even steps.
+      values = []
+      for _ in range(4):
+        sess.run(increment_accumulators)
+        sess.run(increment_i)
+        values.append(sess.run(accumulators))
+      self.assertAllClose(
+          [
+              [1, 0, 0, 0],  #
+              [1, 1, 1, 1],  #
+              [2, 1, 1, 1],  #
+              [2, 2, 2, 2]
+          ],
+          values)
+
+      with self.assertRaises(ValueError):
+        utils.staggered_execute(i, thunks, 0)
+      with self.assertRaises(ValueError):
+        utils.staggered_execute(i, thunks, 2, costs=[1])
+
   def testExtractConvolutionPatches(self):
     with ops.Graph().as_default(), self.test_session() as sess:
       batch_size = 10
@@ -0,0 +1,159 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Updates the inverses of K-FAC factors concurrently with training steps.
+
+Usage:
+
+```python
+optimizer = KfacOptimizer(...)
+cov_update_thunks, _ = optimizer.make_vars_and_create_op_thunks()
+snapshot_op, compute_ops, swap_op = optimizer.make_async_inverse_update_ops()
+with tf.control_dependencies([tf.group(*[t() for t in cov_update_thunks])]):
+  train_op = optimizer.minimize(loss, global_step=global_step)
+hook = AsyncInverseUpdateHook(snapshot_op, compute_ops, swap_op,
+                              every_n_steps=20)
+with tf.train.MonitoredTrainingSession(hooks=[hook]) as sess:
+  while not sess.should_stop():
+    sess.run(train_op)
+```
+
+Training steps then only apply the (possibly stale) inverses, while the
+inverses are recomputed on a background thread.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import threading
+
+import six
+
+from tensorflow.python.platform import tf_logging as logging
+from tensorflow.python.training import session_run_hook
+
+
+class AsyncInverseUpdateHook(session_run_hook.SessionRunHook):
+  """Recomputes K-FAC inverses on a background thread.
+
+  The ops are the ones returned by `make_async_inverse_update_ops`. A refresh
+  runs `snapshot_op` between two training steps, runs `compute_ops` on a
+  background thread while training continues, and runs `swap_op` between the
+  first two training steps after they finished. Training steps therefore
+  never wait for the inverse computations, and never see partially updated
+  inverses.
+
+  A refresh starts at most every `every_n_steps` steps, and only once the
+  previous refresh was swapped in. The inverses are computed once before the
+  first training step.
+  """
+
+  def __init__(self, snapshot_op, compute_ops, swap_op, every_n_steps=1):
+    """Initializes an AsyncInverseUpdateHook.
+
+    Args:
+      snapshot_op: Op copying the covariance variables to snapshot variables.
+      compute_ops: List of ops computing the inverses from the snapshots into
+        staging variables. They are run one at a time.
+      swap_op: Op copying the staging variables to the inverse variables.
+      every_n_steps: int. Minimum number of training steps between the start
+        of two refreshes.
+
+    Raises:
+      ValueError: If every_n_steps is not positive.
+    """
+    if every_n_steps < 1:
+      raise ValueError(
+          "every_n_steps must be positive, got {}.".format(every_n_steps))
+    self._snapshot_op = snapshot_op
+    self._compute_ops = list(compute_ops)
+    self._swap_op = swap_op
+    self._every_n_steps = every_n_steps
+    self._thread = None
+    self._num_refreshes = 0
+
+  @property
+  def num_refreshes(self):
+    """Number of refreshes of the inverses that were swapped in."""
+    return self._num_refreshes
+
+  def after_create_session(self, session, coord):
+    del coord  # Unused.
+    # A recovered session replaces the previous one.
+    self._stop_thread()
+    # Inverses should be available from the first step on.
+    session.run(self._snapshot_op)
+    for op in self._compute_ops:
+      session.run(op)
+    session.run(self._swap_op)
+    self._num_refreshes += 1
+    self._steps_since_refresh = 0
+    self._in_flight = False
+    self._exc_info = None
+    self._stop = False
+    self._requested = threading.Event()
+    self._done = threading.Event()
+    self._thread = threading.Thread(
+        target=self._run_compute_ops, args=(session,),
+        name="kfac_async_inverse_updates")
+    self._thread.daemon = True
+    self._thread.start()
+
+  def _run_compute_ops(self, session):
+    while True:
+      self._requested.wait()
+      self._requested.clear()
+      if self._stop:
+        return
+      try:
+        for op in self._compute_ops:
+          session.run(op)
+      except Exception:  # pylint: disable=broad-except
+        self._exc_info = sys.exc_info()
+      self._done.set()
+
+  def after_run(self, run_context, run_values):
+    del run_values  # Unused.
+    self._steps_since_refresh += 1
+    session = run_context.session
+    if self._in_flight and self._done.is_set():
+      self._done.clear()
+      self._in_flight = False
+      if self._exc_info is not None:
+        six.reraise(*self._exc_info)
+      session.run(self._swap_op)
+      self._num_refreshes += 1
+    if (not self._in_flight and
+        self._steps_since_refresh >= self._every_n_steps):
+      session.run(self._snapshot_op)
+      self._steps_since_refresh = 0
+      self._in_flight = True
+      self._requested.set()
+
+  def end(self, session):
+    del session  # Unused.
+    self._stop_thread()
+    logging.info("Swapped in %d refreshes of the K-FAC inverses.",
+                 self._num_refreshes)
+
+  def _stop_thread(self):
+    """Stops the background thread, after its current computation."""
+    if self._thread is None:
+      return
+    self._stop = True
+    self._requested.set()
+    self._thread.join()
+    self._thread = None
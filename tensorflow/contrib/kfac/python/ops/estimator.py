@@ -416,6 +416,61 @@ class FisherEstimator(object):
     return (cov_variable_thunks, cov_update_thunks,
             inv_variable_thunks, inv_update_thunks)
 
+  @property
+  def inverse_update_costs(self):
+    """Rough relative costs of the inverse update ops of all factors.
+
+    Corresponds one-to-one with the list of factors given by the "factors"
+    property, and so with the inv update thunks. Can be passed to
+    `utils.staggered_execute` to spread the inverse updates across steps.
+    """
+    return [factor.inverse_update_cost for factor in self.factors]
+
+  def make_async_inverse_update_ops(self, scope=None):
+    """Makes ops which update the inverses from snapshots of the covariances.
+
+    The inverse updates are split into three stages, see
+    `FisherFactor.make_async_inverse_update_ops`. Only the snapshot and swap
+    ops access variables used by training steps, and they are cheap copies.
+    The expensive compute ops can run concurrently with training steps, e.g.
+    with `AsyncInverseUpdateHook`.
+
+    Must be called after the variables were made, e.g. by
+    make_vars_and_create_op_thunks. The ops use the current device placement
+    context.
+
+    Args:
+      scope: A string or None.  If None it will be set to the name of this
+        estimator (given by the name property). Must be the scope that was
+        used to make the variables. (Default: None)
+
+    Returns:
+      snapshot_op: Op copying all covariance variables to snapshot variables.
+      compute_ops: List of ops, computing the inverses of one factor each from
+        the snapshots into staging variables.
+      swap_op: Op copying all staging variables to the inverse variables.
+
+    Raises:
+      ValueError: If the variables were not made yet.
+    """
+    if not self.made_vars():
+      raise ValueError("Variables must be made before the async inverse "
+                       "update ops.")
+    scope = self.name if scope is None else scope
+    snapshot_ops = []
+    compute_ops = []
+    swap_ops = []
+    with variable_scope.variable_scope(scope):
+      for factor in self.factors:
+        (factor_snapshot_ops, factor_compute_ops,
+         factor_swap_ops) = factor.make_async_inverse_update_ops()
+        snapshot_ops.extend(factor_snapshot_ops)
+        if factor_compute_ops:
+          compute_ops.append(control_flow_ops.group(*factor_compute_ops))
+        swap_ops.extend(factor_swap_ops)
+    return (control_flow_ops.group(*snapshot_ops), compute_ops,
+            control_flow_ops.group(*swap_ops))
+
   def _create_cov_variable_thunk(self, factor, scope):
     """Constructs a covariance variable thunk for a single FisherFactor."""
 
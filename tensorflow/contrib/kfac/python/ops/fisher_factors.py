@@ -156,6 +156,18 @@ def place_on_device(device):
     yield
 
 
+def _compute_eigendecomp(cov):
+  """Returns the eigenvalues and eigenvectors of the covariance `cov`."""
+  eigenvalues, eigenvectors = linalg_ops.self_adjoint_eig(cov)
+
+  # The matrix cov is positive semidefinite by construction, but the numerical
+  # eigenvalues could be negative due to numerical errors, so here we clip them
+  # to be at least FLAGS.eigenvalue_clipping_threshold
+  clipped_eigenvalues = math_ops.maximum(eigenvalues,
+                                         EIGENVALUE_CLIPPING_THRESHOLD)
+  return clipped_eigenvalues, eigenvectors
+
+
 def compute_cov(tensor, tensor_right=None, normalizer=None):
   """Compute the empirical second moment of the rows of a 2D Tensor.
 
@@ -459,6 +471,36 @@ class FisherFactor(object):
     """Create and return update ops corresponding to registered computations."""
     pass
 
+  @abc.abstractmethod
+  def make_async_inverse_update_ops(self):
+    """Creates ops which update the registered computations in three stages.
+
+    Unlike the ops of `make_inverse_update_ops`, the expensive part of the
+    update only reads and writes private variables, so it can run
+    concurrently with training steps, e.g. on another thread:
+
+      1. `snapshot_ops` copy the cov variable to a snapshot variable.
+      2. `compute_ops` compute the registered matrices from the snapshot into
+         staging variables.
+      3. `swap_ops` copy the staging variables to the variables served by
+         `get_matpower` etc.
+
+    The snapshot and swap ops are cheap copies, and running them between
+    training steps ensures that no training step reads partially updated
+    values.
+
+    Returns:
+      snapshot_ops: List of ops.
+      compute_ops: List of ops.
+      swap_ops: List of ops.
+    """
+    pass
+
+  @property
+  def inverse_update_cost(self):
+    """Rough relative cost of the ops of `make_inverse_update_ops`."""
+    return 0
+
   def get_cov(self):
     return self._cov
 
@@ -635,12 +677,99 @@ class DenseSquareMatrixFactor(FisherFactor):
 
   def make_inverse_update_ops(self):
     """Create and return update ops corresponding to registered computations."""
+    ops = self._make_inverse_update_ops(
+        self.get_cov(), self._matpower_by_exp_and_damping,
+        self._cholesky_by_damping, self._cholesky_inverse_by_damping)
+    self._eigendecomp = False
+    return ops
+
+  def make_async_inverse_update_ops(self):
+    """Creates ops which update the registered computations in three stages.
+
+    See `FisherFactor.make_async_inverse_update_ops`. The snapshot and
+    staging variables are local variables, so they are not checkpointed.
+
+    Returns:
+      snapshot_ops: List of ops.
+      compute_ops: List of ops.
+      swap_ops: List of ops.
+    """
+    served_variables = (list(self._matpower_by_exp_and_damping.values()) +
+                        list(self._cholesky_by_damping.values()) +
+                        list(self._cholesky_inverse_by_damping.values()))
+    if not served_variables:
+      return [], [], []
+
+    def make_local_variable(name, initializer):
+      return variable_scope.get_variable(
+          name,
+          initializer=initializer,
+          shape=self._cov_shape,
+          trainable=False,
+          dtype=self._dtype,
+          collections=[tf_ops.GraphKeys.LOCAL_VARIABLES])
+
+    def make_staging_variables(variables_by_key):
+      return {
+          key: make_local_variable(
+              var.op.name.split("/")[-1] + "_staging", inverse_initializer)
+          for key, var in variables_by_key.items()
+      }
+
+    with variable_scope.variable_scope(self._var_scope):
+      cov_snapshot = make_local_variable("cov_snapshot",
+                                         self._cov_initializer)
+      staging_matpowers = make_staging_variables(
+          self._matpower_by_exp_and_damping)
+      staging_choleskys = make_staging_variables(self._cholesky_by_damping)
+      staging_cholesky_inverses = make_staging_variables(
+          self._cholesky_inverse_by_damping)
+
+    snapshot_ops = [cov_snapshot.assign(self.get_cov())]
+    compute_ops = [control_flow_ops.group(*self._make_inverse_update_ops(
+        cov_snapshot, staging_matpowers, staging_choleskys,
+        staging_cholesky_inverses))]
+    swap_ops = []
+    for variables_by_key, staging_by_key in [
+        (self._matpower_by_exp_and_damping, staging_matpowers),
+        (self._cholesky_by_damping, staging_choleskys),
+        (self._cholesky_inverse_by_damping, staging_cholesky_inverses)]:
+      for key, var in variables_by_key.items():
+        swap_ops.append(var.assign(staging_by_key[key]))
+    return snapshot_ops, compute_ops, swap_ops
+
+  @property
+  def inverse_update_cost(self):
+    """Rough relative cost of the ops of `make_inverse_update_ops`."""
+    # Every registered computation takes O(n^3) time.
+    num_choleskys = len(self._cholesky_registrations |
+                        self._cholesky_inverse_registrations)
+    num_computations = len(self._matpower_registrations) + num_choleskys
+    return num_computations * int(self._cov_shape[0])**3
+
+  def _make_inverse_update_ops(self, cov, matpower_by_exp_and_damping,
+                               cholesky_by_damping,
+                               cholesky_inverse_by_damping):
+    """Creates ops assigning the registered computations of `cov`.
+
+    Args:
+      cov: Tensor. The covariance matrix to compute the matrices from.
+      matpower_by_exp_and_damping: Dict mapping (exp, damping id) to the
+        variable to assign the damped matrix power to.
+      cholesky_by_damping: Dict mapping damping ids to the variable to assign
+        the damped Cholesky factor to.
+      cholesky_inverse_by_damping: Dict mapping damping ids to the variable to
+        assign the inverse of the damped Cholesky factor to.
+
+    Returns:
+      List of ops.
+    """
     ops = []
 
-    num_inverses = sum(1 for (exp, _) in self._matpower_by_exp_and_damping
+    num_inverses = sum(1 for (exp, _) in matpower_by_exp_and_damping
                        if exp == -1)
 
-    num_other_matpower = len(self._matpower_by_exp_and_damping) - num_inverses
+    num_other_matpower = len(matpower_by_exp_and_damping) - num_inverses
 
     other_matrix_power_registered = num_other_matpower >= 1
 
@@ -655,10 +784,13 @@ class DenseSquareMatrixFactor(FisherFactor):
                            for damping_id in self._damping_funcs_by_id}
 
     if use_eig:
-      eigenvalues, eigenvectors = self.get_eigendecomp()  # pylint: disable=unpacking-non-sequence
+      if cov is self.get_cov():
+        eigenvalues, eigenvectors = self.get_eigendecomp()  # pylint: disable=unpacking-non-sequence
+      else:
+        eigenvalues, eigenvectors = _compute_eigendecomp(cov)
 
       for (exp, damping_id), matpower in (
-          self._matpower_by_exp_and_damping.items()):
+          matpower_by_exp_and_damping.items()):
         damping = damping_value_by_id[damping_id]
         ops.append(
             matpower.assign(
@@ -669,23 +801,23 @@ class DenseSquareMatrixFactor(FisherFactor):
       ops = [control_flow_ops.group(*ops)]
     else:
       for (exp, damping_id), matpower in (
-          self._matpower_by_exp_and_damping.items()):
+          matpower_by_exp_and_damping.items()):
         assert exp == -1
         damping = damping_value_by_id[damping_id]
-        ops.append(matpower.assign(utils.posdef_inv(self.get_cov(), damping)))
+        ops.append(matpower.assign(utils.posdef_inv(cov, damping)))
 
     # TODO(b/77902055): If inverses are being computed with Cholesky's
     # we can share the work. Instead this code currently just computes the
     # Cholesky a second time. It does at least share work between requests for
     # Cholesky's and Cholesky inverses with the same damping id.
-    for damping_id, cholesky_inv in self._cholesky_inverse_by_damping.items():
+    for damping_id, cholesky_inv in cholesky_inverse_by_damping.items():
       cholesky_ops = []
 
       damping = damping_value_by_id[damping_id]
-      cholesky_value = utils.cholesky(self.get_cov(), damping)
+      cholesky_value = utils.cholesky(cov, damping)
 
-      if damping_id in self._cholesky_by_damping:
-        cholesky = self._cholesky_by_damping[damping_id]
+      if damping_id in cholesky_by_damping:
+        cholesky = cholesky_by_damping[damping_id]
         cholesky_ops.append(cholesky.assign(cholesky_value))
 
       identity = linalg_ops.eye(cholesky_value.shape.as_list()[0],
@@ -696,13 +828,12 @@ class DenseSquareMatrixFactor(FisherFactor):
 
       ops.append(control_flow_ops.group(*cholesky_ops))
 
-    for damping_id, cholesky in self._cholesky_by_damping.items():
-      if damping_id not in self._cholesky_inverse_by_damping:
+    for damping_id, cholesky in cholesky_by_damping.items():
+      if damping_id not in cholesky_inverse_by_damping:
         damping = damping_value_by_id[damping_id]
-        cholesky_value = utils.cholesky(self.get_cov(), damping)
+        cholesky_value = utils.cholesky(cov, damping)
         ops.append(cholesky.assign(cholesky_value))
 
-    self._eigendecomp = False
     return ops
 
   def get_inverse(self, damping_func):
@@ -756,14 +887,7 @@ class DenseSquareMatrixFactor(FisherFactor):
     # Unlike get_matpower this doesn't retrieve a stored variable, but instead
     # always computes a fresh version from the current value of get_cov().
     if not self._eigendecomp:
-      eigenvalues, eigenvectors = linalg_ops.self_adjoint_eig(self.get_cov())
-
-      # The matrix self._cov is positive semidefinite by construction, but the
-      # numerical eigenvalues could be negative due to numerical errors, so here
-      # we clip them to be at least FLAGS.eigenvalue_clipping_threshold
-      clipped_eigenvalues = math_ops.maximum(eigenvalues,
-                                             EIGENVALUE_CLIPPING_THRESHOLD)
-      self._eigendecomp = (clipped_eigenvalues, eigenvectors)
+      self._eigendecomp = _compute_eigendecomp(self.get_cov())
 
     return self._eigendecomp
 
@@ -846,6 +970,9 @@ class DiagonalFactor(FisherFactor):
   def make_inverse_update_ops(self):
     return []
 
+  def make_async_inverse_update_ops(self):
+    return [], [], []
+
   def instantiate_inv_variables(self):
     pass
 
@@ -1727,104 +1854,192 @@ class FullyConnectedMultiKF(FullyConnectedKroneckerFactor):
   def make_inverse_update_ops(self):
     """Create and return update ops corresponding to registered computations."""
     # TODO(b/69918258): Add correctness tests for this method.
-    # pylint: disable=invalid-name
-
     ops = []
 
     if (len(self._option1quants_by_damping) +
         len(self._option2quants_by_damping)):
+      ops += self._make_option_quants_update_ops(
+          self.get_cov(), self.get_cov_dt1(), self._option1quants_by_damping,
+          self._option2quants_by_damping)
+
+    ops += super(FullyConnectedMultiKF, self).make_inverse_update_ops()
+    return [control_flow_ops.group(*ops)]
+
+  def make_async_inverse_update_ops(self):
+    """Creates ops which update the registered computations in three stages.
+
+    See `FisherFactor.make_async_inverse_update_ops`. The option 1 and 2
+    quantities are computed from snapshots of both `cov` and `cov_dt1`, which
+    are taken together so that the two stay consistent.
+
+    Returns:
+      snapshot_ops: List of ops.
+      compute_ops: List of ops.
+      swap_ops: List of ops.
+    """
+    snapshot_ops, compute_ops, swap_ops = super(
+        FullyConnectedMultiKF, self).make_async_inverse_update_ops()
+    if not (self._option1quants_by_damping or
+            self._option2quants_by_damping):
+      return snapshot_ops, compute_ops, swap_ops
+
+    def make_local_variable(name, initializer, shape):
+      return variable_scope.get_variable(
+          name,
+          initializer=initializer,
+          shape=shape,
+          trainable=False,
+          dtype=self._dtype,
+          collections=[tf_ops.GraphKeys.LOCAL_VARIABLES])
+
+    def make_staging_variables(variables_by_damping):
+      return {
+          damping_id: tuple(
+              make_local_variable(var.op.name.split("/")[-1] + "_staging",
+                                  init_ops.zeros_initializer,
+                                  var.shape)
+              for var in variables)
+          for damping_id, variables in variables_by_damping.items()
+      }
 
-      # Note that C0 and C1 are stand-ins for A0 and A1, or G0 and G1, from
-      # the pseudo-code in the original paper.  Because the computations for
-      # the A and G case are essentially the same they can both be performed by
-      # the same class (this one).
+    with variable_scope.variable_scope(self._var_scope):
+      cov_snapshot = make_local_variable("option_quants_cov_snapshot",
+                                         self._cov_initializer,
+                                         self._cov_shape)
+      cov_dt1_snapshot = make_local_variable("cov_dt1_snapshot",
+                                             init_ops.zeros_initializer,
+                                             self._cov_shape)
+      staging_option1quants = make_staging_variables(
+          self._option1quants_by_damping)
+      staging_option2quants = make_staging_variables(
+          self._option2quants_by_damping)
+
+    snapshot_ops.append(control_flow_ops.group(
+        cov_snapshot.assign(self.get_cov()),
+        cov_dt1_snapshot.assign(self.get_cov_dt1())))
+    compute_ops.append(control_flow_ops.group(
+        *self._make_option_quants_update_ops(
+            cov_snapshot, cov_dt1_snapshot, staging_option1quants,
+            staging_option2quants)))
+    for variables_by_damping, staging_by_damping in [
+        (self._option1quants_by_damping, staging_option1quants),
+        (self._option2quants_by_damping, staging_option2quants)]:
+      for damping_id, variables in variables_by_damping.items():
+        for var, staging in zip(variables, staging_by_damping[damping_id]):
+          swap_ops.append(var.assign(staging))
+    return snapshot_ops, compute_ops, swap_ops
+
+  def _make_option_quants_update_ops(self, cov, cov_dt1,
+                                     option1quants_by_damping,
+                                     option2quants_by_damping):
+    """Creates ops assigning the option 1 and 2 quantities.
 
-      C1 = self.get_cov_dt1()
+    Args:
+      cov: Tensor. The covariance matrix C0.
+      cov_dt1: Tensor. The covariance matrix C1 between consecutive uses.
+      option1quants_by_damping: Dict mapping damping ids to the (Lmat, psi)
+        variables to assign the option 1 quantities to.
+      option2quants_by_damping: Dict mapping damping ids to the (Pmat, Kmat,
+        mu) variables to assign the option 2 quantities to.
 
-      # Get the eigendecomposition of C0  (= self.get_cov())
-      eigen_e, eigen_V = self.get_eigendecomp()
+    Returns:
+      List of ops.
+    """
+    # pylint: disable=invalid-name
 
-      # TODO(b/69678661): Note, there is an implicit assumption here that C1
-      # and C0 (as represented here by its eigen-decomp) are consistent.  This
-      # could fail to be the case if self._cov and self._cov_dt1 are not updated
-      # consistently, or are somehow read between or during the cov updates.
-      # Can this possibly happen?  Is there a way to prevent it?
+    ops = []
 
-      for damping_id, (Lmat_var,
-                       psi_var) in self._option1quants_by_damping.items():
+    # Note that C0 and C1 are stand-ins for A0 and A1, or G0 and G1, from
+    # the pseudo-code in the original paper.  Because the computations for
+    # the A and G case are essentially the same they can both be performed by
+    # the same class (this one).
 
-        damping = self._damping_funcs_by_id[damping_id]()
-        damping = math_ops.cast(damping, self._dtype)
+    C1 = cov_dt1
 
-        invsqrtC0 = math_ops.matmul(
-            eigen_V * (eigen_e + damping)**(-0.5), eigen_V, transpose_b=True)
+    # Get the eigendecomposition of C0
+    if cov is self.get_cov():
+      eigen_e, eigen_V = self.get_eigendecomp()  # pylint: disable=unpacking-non-sequence
+    else:
+      eigen_e, eigen_V = _compute_eigendecomp(cov)
 
-        # Might need to enforce symmetry lost due to numerical issues.
-        invsqrtC0 = (invsqrtC0 + array_ops.transpose(invsqrtC0)) / 2.0
+    # TODO(b/69678661): Note, there is an implicit assumption here that C1
+    # and C0 (as represented here by its eigen-decomp) are consistent.  This
+    # could fail to be the case if self._cov and self._cov_dt1 are not updated
+    # consistently, or are somehow read between or during the cov updates.
+    # Can this possibly happen?  Is there a way to prevent it?
 
-        # The following line imposses the symmetry assumed by "Option 1" on C1.
-        # Stangely the code can work okay with this line commented out,
-        # depending on how psd_eig is defined.  I'm not sure why.
-        C1 = (C1 + array_ops.transpose(C1)) / 2.0
+    for damping_id, (Lmat_var, psi_var) in option1quants_by_damping.items():
 
-        # hPsi = C0^(-1/2) * C1 * C0^(-1/2)  (hPsi means hat{Psi})
-        hPsi = math_ops.matmul(math_ops.matmul(invsqrtC0, C1), invsqrtC0)
+      damping = self._damping_funcs_by_id[damping_id]()
+      damping = math_ops.cast(damping, self._dtype)
 
-        # Compute the decomposition U*diag(psi)*U^T = hPsi
-        psi, U = utils.posdef_eig(hPsi)
+      invsqrtC0 = math_ops.matmul(
+          eigen_V * (eigen_e + damping)**(-0.5), eigen_V, transpose_b=True)
 
-        # L = C0^(-1/2) * U
-        Lmat = math_ops.matmul(invsqrtC0, U)
+      # Might need to enforce symmetry lost due to numerical issues.
+      invsqrtC0 = (invsqrtC0 + array_ops.transpose(invsqrtC0)) / 2.0
 
-        ops.append(Lmat_var.assign(Lmat))
-        ops.append(psi_var.assign(psi))
+      # The following line imposses the symmetry assumed by "Option 1" on C1.
+      # Stangely the code can work okay with this line commented out,
+      # depending on how psd_eig is defined.  I'm not sure why.
+      C1 = (C1 + array_ops.transpose(C1)) / 2.0
 
-      for damping_id, (Pmat_var, Kmat_var,
-                       mu_var) in self._option2quants_by_damping.items():
+      # hPsi = C0^(-1/2) * C1 * C0^(-1/2)  (hPsi means hat{Psi})
+      hPsi = math_ops.matmul(math_ops.matmul(invsqrtC0, C1), invsqrtC0)
 
-        damping = self._damping_funcs_by_id[damping_id]()
-        damping = math_ops.cast(damping, self._dtype)
+      # Compute the decomposition U*diag(psi)*U^T = hPsi
+      psi, U = utils.posdef_eig(hPsi)
 
-        # compute C0^(-1/2)
-        invsqrtC0 = math_ops.matmul(
-            eigen_V * (eigen_e + damping)**(-0.5), eigen_V, transpose_b=True)
+      # L = C0^(-1/2) * U
+      Lmat = math_ops.matmul(invsqrtC0, U)
 
-        # Might need to enforce symmetry lost due to numerical issues.
-        invsqrtC0 = (invsqrtC0 + array_ops.transpose(invsqrtC0)) / 2.0
+      ops.append(Lmat_var.assign(Lmat))
+      ops.append(psi_var.assign(psi))
 
-        # Compute the product C0^(-1/2) * C1
-        invsqrtC0C1 = math_ops.matmul(invsqrtC0, C1)
+    for damping_id, (Pmat_var, Kmat_var,
+                     mu_var) in option2quants_by_damping.items():
 
-        # hPsi = C0^(-1/2) * C1 * C0^(-1/2)  (hPsi means hat{Psi})
-        hPsi = math_ops.matmul(invsqrtC0C1, invsqrtC0)
+      damping = self._damping_funcs_by_id[damping_id]()
+      damping = math_ops.cast(damping, self._dtype)
 
-        # Compute the decomposition E*diag(mu)*E^T = hPsi^T * hPsi
-        # Note that we using the notation mu instead of "m" for the eigenvalues.
-        # Instead of computing the product hPsi^T * hPsi and then doing an
-        # eigen-decomposition of this we just compute the SVD of hPsi and then
-        # square the singular values to get the eigenvalues. For a justification
-        # of this approach, see:
-        # https://en.wikipedia.org/wiki/Singular-value_decomposition#Relation_to_eigenvalue_decomposition
-        sqrtmu, _, E = linalg_ops.svd(hPsi)
-        mu = math_ops.square(sqrtmu)
+      # compute C0^(-1/2)
+      invsqrtC0 = math_ops.matmul(
+          eigen_V * (eigen_e + damping)**(-0.5), eigen_V, transpose_b=True)
 
-        # Mathematically, the eigenvalues should not should not exceed 1.0, but
-        # due to numerical issues, or possible issues with inconsistent
-        # values of C1 and (the eigen-decomposition of) C0 they might. So
-        # we enforce this condition.
-        mu = math_ops.minimum(mu, 1.0)
+      # Might need to enforce symmetry lost due to numerical issues.
+      invsqrtC0 = (invsqrtC0 + array_ops.transpose(invsqrtC0)) / 2.0
 
-        # P = (C0^(-1/2) * C1)^T * C0^(-1/2) = C_1^T * C_0^(-1)
-        Pmat = math_ops.matmul(invsqrtC0C1, invsqrtC0, transpose_a=True)
+      # Compute the product C0^(-1/2) * C1
+      invsqrtC0C1 = math_ops.matmul(invsqrtC0, C1)
 
-        # K = C_0^(-1/2) * E
-        Kmat = math_ops.matmul(invsqrtC0, E)
+      # hPsi = C0^(-1/2) * C1 * C0^(-1/2)  (hPsi means hat{Psi})
+      hPsi = math_ops.matmul(invsqrtC0C1, invsqrtC0)
 
-        ops.append(Pmat_var.assign(Pmat))
-        ops.append(Kmat_var.assign(Kmat))
-        ops.append(mu_var.assign(mu))
+      # Compute the decomposition E*diag(mu)*E^T = hPsi^T * hPsi
+      # Note that we using the notation mu instead of "m" for the eigenvalues.
+      # Instead of computing the product hPsi^T * hPsi and then doing an
+      # eigen-decomposition of this we just compute the SVD of hPsi and then
+      # square the singular values to get the eigenvalues. For a justification
+      # of this approach, see:
+      # https://en.wikipedia.org/wiki/Singular-value_decomposition#Relation_to_eigenvalue_decomposition
+      sqrtmu, _, E = linalg_ops.svd(hPsi)
+      mu = math_ops.square(sqrtmu)
 
-    ops += super(FullyConnectedMultiKF, self).make_inverse_update_ops()
-    return [control_flow_ops.group(*ops)]
+      # Mathematically, the eigenvalues should not should not exceed 1.0, but
+      # due to numerical issues, or possible issues with inconsistent
+      # values of C1 and (the eigen-decomposition of) C0 they might. So
+      # we enforce this condition.
+      mu = math_ops.minimum(mu, 1.0)
+
+      # P = (C0^(-1/2) * C1)^T * C0^(-1/2) = C_1^T * C_0^(-1)
+      Pmat = math_ops.matmul(invsqrtC0C1, invsqrtC0, transpose_a=True)
+
+      # K = C_0^(-1/2) * E
+      Kmat = math_ops.matmul(invsqrtC0, E)
+
+      ops.append(Pmat_var.assign(Pmat))
+      ops.append(Kmat_var.assign(Kmat))
+      ops.append(mu_var.assign(mu))
 
     # pylint: enable=invalid-name
+    return ops
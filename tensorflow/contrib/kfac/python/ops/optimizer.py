@@ -287,6 +287,26 @@ class KfacOptimizer(gradient_descent.GradientDescentOptimizer):
     scope = self.get_name() + "/" + self._fisher_est.name
     return self._fisher_est.create_ops_and_vars_thunks(scope=scope)
 
+  @property
+  def inverse_update_costs(self):
+    """Rough relative costs of the inv update thunks, see FisherEstimator."""
+    return self._fisher_est.inverse_update_costs
+
+  def make_async_inverse_update_ops(self):
+    """Makes ops which update the inverses from snapshots of the covariances.
+
+    Must be called after make_vars_and_create_op_thunks. See
+    `FisherEstimator.make_async_inverse_update_ops`.
+
+    Returns:
+      snapshot_op: Op copying all covariance variables to snapshot variables.
+      compute_ops: List of ops, computing the inverses of one factor each from
+        the snapshots into staging variables.
+      swap_op: Op copying all staging variables to the inverse variables.
+    """
+    scope = self.get_name() + "/" + self._fisher_est.name
+    return self._fisher_est.make_async_inverse_update_ops(scope=scope)
+
   def minimize(self, *args, **kwargs):
     # Should this variable scope encompass everything below?  Or will the super-
     # class make another copy of the same name scope?
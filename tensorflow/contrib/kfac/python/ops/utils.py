@@ -439,6 +439,91 @@ def batch_execute(global_step, thunks, batch_size, name=None):
     return result
 
 
+def balanced_phases(costs, period):
+  """Assigns items to phases such that the total cost per phase is balanced.
+
+  Items are assigned in order of decreasing cost, each to the phase with the
+  lowest total cost so far (the "longest processing time first" heuristic).
+
+  Args:
+    costs: List of nonnegative numbers. The cost of every item.
+    period: int. Number of phases.
+
+  Returns:
+    List of ints in [0, period), the phase of every item.
+  """
+  loads = [0] * period
+  phases = [None] * len(costs)
+  for i in sorted(range(len(costs)), key=lambda i: -costs[i]):
+    phase = min(range(period), key=lambda p: loads[p])
+    phases[i] = phase
+    loads[phase] += costs[i]
+  return phases
+
+
+def staggered_execute(global_step, thunks, period, costs=None, name=None):
+  """Executes every op once per 'period' global steps, spread across steps.
+
+  Unlike running all ops whenever 'global_step' is a multiple of 'period',
+  every op is assigned a phase in [0, period) and runs when
+  'global_step % period' equals its phase, so that the total cost of the ops
+  run per global step is balanced (see `balanced_phases`). For example, with
+  period 2 and costs [4, 1, 1, 1]
+
+    global_step | op0 | op1 | op2 | op3
+    ------------+-----+-----+-----+-----
+        0       |  x  |     |     |
+    ------------+-----+-----+-----+-----
+        1       |     |  x  |  x  |  x
+    ------------+-----+-----+-----+-----
+        2       |  x  |     |     |
+
+  Does not guarantee order of op execution within a single global step.
+
+  Args:
+    global_step: Tensor indicating time. Determines which ops run.
+    thunks: List of thunks. Each thunk encapsulates one op. Return values are
+      ignored.
+    period: int. Number of global steps between two executions of every op.
+    costs: List of nonnegative numbers or None. The relative cost of the op of
+      every thunk, e.g. `FisherEstimator.inverse_update_costs`. If None, all
+      ops are assumed to be equally costly.
+    name: string or None. Name scope for newly added ops.
+
+  Returns:
+    List of ops, one per thunk.
+
+  Raises:
+    ValueError: If 'period' is not positive, or if 'costs' and 'thunks' have
+      different lengths.
+  """
+  if period < 1:
+    raise ValueError("period must be positive, got {}.".format(period))
+  if costs is None:
+    costs = [1] * len(thunks)
+  if len(costs) != len(thunks):
+    raise ValueError("Got {} costs for {} thunks.".format(
+        len(costs), len(thunks)))
+
+  def true_fn(thunk):
+    """Ensures thunk is executed and returns an Op (not a Tensor)."""
+
+    def result():
+      with ops.control_dependencies([thunk()]):
+        return control_flow_ops.no_op()
+
+    return result
+
+  with ops.name_scope(name, "staggered_execute"):
+    step_phase = math_ops.mod(global_step, period)
+    return [
+        control_flow_ops.cond(
+            math_ops.equal(step_phase, phase), true_fn(thunk),
+            control_flow_ops.no_op)
+        for thunk, phase in zip(thunks, balanced_phases(costs, period))
+    ]
+
+
 def extract_convolution_patches(inputs,
                                 filter_shape,
                                 padding,
@@ -28,6 +28,9 @@
 @@HashTable
 @@MutableHashTable
 @@MutableDenseHashTable
+@@IncrementalCheckpointTable
+@@IncrementalTableSaver
+@@IncrementalTableSaverHook
 @@TableInitializerBase
 @@KeyValueTensorInitializer
 @@TextFileIndex
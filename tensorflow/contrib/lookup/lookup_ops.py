@@ -18,11 +18,18 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import os
+import re
+
 from tensorflow.python.framework import dtypes
 from tensorflow.python.framework import ops
 from tensorflow.python.framework import tensor_shape
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import control_flow_ops
 from tensorflow.python.ops import gen_lookup_ops
+from tensorflow.python.ops import io_ops
 from tensorflow.python.ops import lookup_ops
+from tensorflow.python.ops import math_ops
 # pylint: disable=unused-import
 from tensorflow.python.ops.lookup_ops import FastHashSpec
 from tensorflow.python.ops.lookup_ops import HasherSpec
@@ -40,6 +47,10 @@ from tensorflow.python.ops.lookup_ops import TextFileIndex
 from tensorflow.python.ops.lookup_ops import TextFileInitializer
 from tensorflow.python.ops.lookup_ops import TextFileStringTableInitializer
 # pylint: enable=unused-import
+from tensorflow.python.platform import gfile
+from tensorflow.python.platform import tf_logging as logging
+from tensorflow.python.training import session_run_hook
+from tensorflow.python.training import training_util
 from tensorflow.python.training.saver import BaseSaverBuilder
 from tensorflow.python.util.deprecation import deprecated
 
@@ -545,6 +556,7 @@ class MutableDenseHashTable(LookupInterface):
     # explicitly specified.
     use_node_name_sharing = checkpoint and shared_name is None
     empty_key = ops.convert_to_tensor(empty_key, dtype=key_dtype)
+    self._empty_key = empty_key
     self._table_ref = gen_lookup_ops.mutable_dense_hash_table_v2(
         empty_key=empty_key,
         shared_name=shared_name,
@@ -671,3 +683,408 @@ class MutableDenseHashTable(LookupInterface):
       with ops.colocate_with(self.op._table_ref):
         return gen_lookup_ops.lookup_table_import_v2(
             self.op._table_ref, restored_tensors[0], restored_tensors[1])
+
+
+def _table_entries(table):
+  """Returns the keys and values of all entries of a mutable table."""
+  keys, values = table.export()
+  if isinstance(table, MutableDenseHashTable):
+    # pylint: disable=protected-access
+    # The export contains all buckets, including the empty ones.
+    empty_key = table._empty_key
+    keys = array_ops.reshape(
+        keys, array_ops.concat([[-1], array_ops.shape(empty_key)], 0))
+    values = array_ops.reshape(
+        values, array_ops.concat(
+            [[-1], array_ops.shape(table._default_value)], 0))
+    # pylint: enable=protected-access
+    is_empty = math_ops.equal(keys, empty_key)
+    if empty_key.get_shape().ndims:
+      is_empty = math_ops.reduce_all(
+          is_empty, axis=list(range(1, empty_key.get_shape().ndims + 1)))
+    is_entry = math_ops.logical_not(is_empty)
+    keys = array_ops.boolean_mask(keys, is_entry)
+    values = array_ops.boolean_mask(values, is_entry)
+  return keys, values
+
+
+def _clear_table(table):
+  """Returns an op that removes all entries of a mutable table."""
+  # pylint: disable=protected-access
+  if isinstance(table, MutableDenseHashTable):
+    # Marks all buckets as empty, keeping the number of buckets.
+    keys, values = table.export()
+    empty_keys = array_ops.reshape(
+        array_ops.tile(
+            array_ops.reshape(table._empty_key, [1, -1]),
+            [array_ops.shape(keys)[0], 1]), array_ops.shape(keys))
+    with ops.colocate_with(table._table_ref):
+      return gen_lookup_ops.lookup_table_import_v2(
+          table._table_ref, empty_keys, values)
+  # Importing into a MutableHashTable replaces all entries.
+  empty_keys = array_ops.constant([], dtype=table.key_dtype)
+  empty_values = array_ops.expand_dims(table._default_value, 0)[:0]
+  with ops.colocate_with(table._table_ref):
+    return gen_lookup_ops.lookup_table_import_v2(
+        table._table_ref, empty_keys, empty_values)
+  # pylint: enable=protected-access
+
+
+class IncrementalCheckpointTable(LookupInterface):
+  """Records the updates of a mutable table for incremental checkpoints.
+
+  Wraps a `MutableHashTable` or `MutableDenseHashTable` that was created with
+  `checkpoint=False`, and has the same `lookup`, `insert`, `size` and `export`
+  methods. The keys inserted through the wrapper are recorded until the next
+  save of an `IncrementalTableSaver`, so that only the updated entries are
+  written, and saving takes time proportional to the number of updates rather
+  than to the size of the table.
+
+  With `max_unused_steps`, the step at which every key was last looked up or
+  inserted is recorded as well, and entries that have not been used for more
+  than `max_unused_steps` steps are evicted before every full snapshot, which
+  bounds the memory of tables over unbounded key spaces.
+
+  Only tables with scalar `int64` or `string` keys are supported. Inserts that
+  run concurrently with a save may be missing from the delta of that save, so
+  saves should run between training steps, e.g. in an
+  `IncrementalTableSaverHook` of the chief.
+
+  Example usage:
+
+  ```python
+  table = tf.contrib.lookup.IncrementalCheckpointTable(
+      tf.contrib.lookup.MutableHashTable(
+          tf.int64, tf.float32, default_value=0., checkpoint=False),
+      max_unused_steps=100000)
+  table_saver = tf.contrib.lookup.IncrementalTableSaver(
+      [table], "/tmp/tables", full_snapshot_every_n_saves=10)
+  hooks = [tf.contrib.lookup.IncrementalTableSaverHook(
+      table_saver, save_steps=1000)]
+  ```
+  """
+
+  def __init__(self, table, step=None, max_unused_steps=None, name=None):
+    """Creates an `IncrementalCheckpointTable`.
+
+    Args:
+      table: a `MutableHashTable` or `MutableDenseHashTable`, created with
+        `checkpoint=False`.
+      step: a scalar `int64` `Tensor` with the current step, used to record
+        when keys were last used. Defaults to the global step.
+      max_unused_steps: if set, entries that have not been looked up or
+        inserted for more than this many steps are evicted before every full
+        snapshot.
+      name: A name for the operations (optional).
+
+    Raises:
+      ValueError: if the keys of `table` are not scalar `int64` or `string`
+        keys, or if `max_unused_steps` is set and there is no `step` and no
+        global step.
+    """
+    if table.key_dtype not in (dtypes.int64, dtypes.string):
+      raise ValueError("Only int64 and string keys are supported, got %s." %
+                       table.key_dtype)
+    # pylint: disable=protected-access
+    if (isinstance(table, MutableDenseHashTable) and
+        table._empty_key.get_shape().ndims):
+      raise ValueError("Only scalar keys are supported.")
+    # pylint: enable=protected-access
+    if step is None:
+      step = training_util.get_global_step()
+      if step is None and max_unused_steps is not None:
+        raise ValueError("max_unused_steps requires a step or a global step.")
+    self._table = table
+    self._step = step
+    self._max_unused_steps = max_unused_steps
+    name = name or table.name
+    super(IncrementalCheckpointTable, self).__init__(table.key_dtype,
+                                                     table.value_dtype, name)
+    with ops.name_scope(None, name):
+      # The keys inserted since the last save, mapped to the step of the
+      # insert.
+      self._updated_keys = MutableHashTable(
+          table.key_dtype, dtypes.int64, -1, name="updated_keys",
+          checkpoint=False)
+      # The step at which every key was last looked up or inserted.
+      self._last_used = MutableHashTable(
+          table.key_dtype, dtypes.int64, -1, name="last_used",
+          checkpoint=False) if max_unused_steps is not None else None
+
+  @property
+  def table(self):
+    """The wrapped table."""
+    return self._table
+
+  def _current_step(self, keys):
+    step = self._step if self._step is not None else 0
+    return array_ops.fill(array_ops.shape(keys), math_ops.to_int64(step))
+
+  def size(self, name=None):
+    """Returns the number of entries, see the wrapped table."""
+    return self._table.size(name=name)
+
+  def lookup(self, keys, name=None):
+    """Looks up `keys`, see the wrapped table.
+
+    With `max_unused_steps`, this also records the current step as the last
+    use of `keys`.
+    """
+    values = self._table.lookup(keys, name=name)
+    if self._last_used is None:
+      return values
+    with ops.control_dependencies(
+        [self._last_used.insert(keys, self._current_step(keys))]):
+      return array_ops.identity(values)
+
+  def insert(self, keys, values, name=None):
+    """Inserts `keys` and records them as updated, see the wrapped table."""
+    keys = ops.convert_to_tensor(keys, dtype=self._key_dtype)
+    steps = self._current_step(keys)
+    updates = [self._table.insert(keys, values, name=name),
+               self._updated_keys.insert(keys, steps)]
+    if self._last_used is not None:
+      updates.append(self._last_used.insert(keys, steps))
+    return control_flow_ops.group(*updates)
+
+  def export(self, name=None):
+    """Exports the wrapped table, see its `export`."""
+    return self._table.export(name=name)
+
+  def updated_entries(self):
+    """Returns the keys and values of the entries updated since the last save.
+    """
+    keys, _ = self._updated_keys.export()
+    return keys, self._table.lookup(keys)
+
+  def clear_updated_entries(self):
+    """Returns an op that forgets which entries were updated."""
+    return _clear_table(self._updated_keys)
+
+  def entries(self):
+    """Returns the keys and values of all entries."""
+    return _table_entries(self._table)
+
+  def evict(self):
+    """Returns an op that evicts the entries unused for `max_unused_steps`."""
+    if self._last_used is None:
+      return control_flow_ops.no_op()
+    keys, values = self.entries()
+    last_used = self._last_used.lookup(keys)
+    keep = math_ops.logical_or(
+        math_ops.equal(last_used, -1),
+        math_ops.to_int64(self._step) - last_used <= self._max_unused_steps)
+    keys = array_ops.boolean_mask(keys, keep)
+    values = array_ops.boolean_mask(values, keep)
+    last_used = array_ops.boolean_mask(last_used, keep)
+    # Entries that were never used through this wrapper are kept and marked
+    # as used now.
+    last_used = array_ops.where(
+        math_ops.equal(last_used, -1), self._current_step(last_used),
+        last_used)
+    with ops.control_dependencies([keys, values, last_used]):
+      clear = control_flow_ops.group(
+          _clear_table(self._table), _clear_table(self._last_used))
+    with ops.control_dependencies([clear]):
+      return control_flow_ops.group(
+          self._table.insert(keys, values),
+          self._last_used.insert(keys, last_used))
+
+  def restore(self, keys, values, full):
+    """Returns an op that restores entries written by `IncrementalTableSaver`.
+
+    Args:
+      keys: the restored keys.
+      values: the restored values.
+      full: whether the entries are a full snapshot, which replaces all
+        entries, or a delta, which is inserted.
+
+    Returns:
+      The restore op.
+    """
+    restored = []
+    if full:
+      with ops.control_dependencies([_clear_table(self._table)]):
+        restored.append(self._table.insert(keys, values))
+    else:
+      restored.append(self._table.insert(keys, values))
+    if self._last_used is not None:
+      restored.append(self._last_used.insert(keys, self._current_step(keys)))
+    with ops.control_dependencies(restored):
+      return self.clear_updated_entries()
+
+
+class IncrementalTableSaver(object):
+  """Saves `IncrementalCheckpointTable`s as full snapshots and deltas.
+
+  Every `full_snapshot_every_n_saves`-th call to `save` evicts unused entries
+  and writes all entries of the tables, and the other calls only write the
+  entries updated since the previous save. The files are named
+  `<directory>/tables-<step>-full` and `<directory>/tables-<step>-delta`, and
+  the files older than the latest full snapshot are deleted after it has been
+  written. `restore` restores the latest full snapshot and replays the deltas
+  written after it.
+  """
+
+  _FILE_PATTERN = re.compile(r"^tables-(\d+)-(full|delta)\.")
+
+  def __init__(self, tables, directory, full_snapshot_every_n_saves=10,
+               name="IncrementalTableSaver"):
+    """Creates an `IncrementalTableSaver`.
+
+    Args:
+      tables: a list of `IncrementalCheckpointTable`s with distinct names.
+      directory: the directory to write the snapshots to.
+      full_snapshot_every_n_saves: the number of saves per full snapshot.
+      name: A name for the operations (optional).
+
+    Raises:
+      ValueError: if `full_snapshot_every_n_saves` is not positive or the
+        table names are not distinct.
+    """
+    if full_snapshot_every_n_saves < 1:
+      raise ValueError("full_snapshot_every_n_saves must be positive: %s" %
+                       full_snapshot_every_n_saves)
+    names = [t.name for t in tables]
+    if len(set(names)) != len(names):
+      raise ValueError("Table names must be distinct: %s" % names)
+    self._tables = tables
+    self._directory = directory
+    self._full_snapshot_every_n_saves = full_snapshot_every_n_saves
+    self._num_deltas = None
+    with ops.name_scope(name):
+      self._prefix = array_ops.placeholder(dtypes.string, [], name="prefix")
+      tensor_names = []
+      for t in tables:
+        tensor_names.extend([t.name + "-keys", t.name + "-values"])
+      slices = [""] * len(tensor_names)
+      with ops.control_dependencies([t.evict() for t in tables]):
+        entries = [t.entries() for t in tables]
+      self._save_full = self._save_op(tensor_names, slices, entries)
+      self._save_delta = self._save_op(
+          tensor_names, slices, [t.updated_entries() for t in tables])
+      restored = io_ops.restore_v2(
+          self._prefix, tensor_names, slices,
+          [dt for t in tables for dt in (t.key_dtype, t.value_dtype)])
+      self._restore_full = control_flow_ops.group(*[
+          t.restore(restored[2 * i], restored[2 * i + 1], full=True)
+          for i, t in enumerate(tables)])
+      self._restore_delta = control_flow_ops.group(*[
+          t.restore(restored[2 * i], restored[2 * i + 1], full=False)
+          for i, t in enumerate(tables)])
+
+  def _save_op(self, tensor_names, slices, entries):
+    save = io_ops.save_v2(self._prefix, tensor_names, slices,
+                          [tensor for pair in entries for tensor in pair])
+    with ops.control_dependencies([save]):
+      return control_flow_ops.group(
+          *[t.clear_updated_entries() for t in self._tables])
+
+  def snapshots(self):
+    """Returns the `(step, is_full, prefix)` of the files to restore, in order.
+    """
+    files = []
+    for path in gfile.Glob(os.path.join(self._directory, "tables-*.index")):
+      match = self._FILE_PATTERN.match(os.path.basename(path))
+      if match:
+        files.append((int(match.group(1)), match.group(2) == "full",
+                      path[:-len(".index")]))
+    files.sort()
+    full = [i for i, (_, is_full, _) in enumerate(files) if is_full]
+    return files[full[-1]:] if full else []
+
+  def save(self, sess, global_step):
+    """Writes a full snapshot or a delta of the tables.
+
+    Args:
+      sess: the session to run the save in.
+      global_step: the step to name the files by.
+
+    Returns:
+      The prefix of the written files.
+    """
+    snapshots = self.snapshots()
+    if self._num_deltas is None:
+      self._num_deltas = max(len(snapshots) - 1, 0)
+    full = (not snapshots or
+            self._num_deltas + 1 >= self._full_snapshot_every_n_saves)
+    gfile.MakeDirs(self._directory)
+    prefix = os.path.join(self._directory, "tables-%d-%s" %
+                          (global_step, "full" if full else "delta"))
+    sess.run(self._save_full if full else self._save_delta,
+             feed_dict={self._prefix: prefix})
+    if full:
+      self._num_deltas = 0
+      self._delete_before(global_step)
+    else:
+      self._num_deltas += 1
+    logging.info("Saved %s table snapshot %s.",
+                 "full" if full else "delta", prefix)
+    return prefix
+
+  def _delete_before(self, global_step):
+    for path in gfile.Glob(os.path.join(self._directory, "tables-*")):
+      match = self._FILE_PATTERN.match(os.path.basename(path))
+      if match and int(match.group(1)) < global_step:
+        gfile.Remove(path)
+
+  def restore(self, sess):
+    """Restores the latest full snapshot and the deltas written after it.
+
+    Args:
+      sess: the session to run the restore in.
+
+    Returns:
+      The step of the last restored file, or None if there is nothing to
+      restore.
+    """
+    snapshots = self.snapshots()
+    for _, is_full, prefix in snapshots:
+      sess.run(self._restore_full if is_full else self._restore_delta,
+               feed_dict={self._prefix: prefix})
+    self._num_deltas = max(len(snapshots) - 1, 0)
+    return snapshots[-1][0] if snapshots else None
+
+
+class IncrementalTableSaverHook(session_run_hook.SessionRunHook):
+  """Saves tables with an `IncrementalTableSaver` every N steps."""
+
+  def __init__(self, table_saver, save_steps, restore=True):
+    """Creates an `IncrementalTableSaverHook`.
+
+    Args:
+      table_saver: an `IncrementalTableSaver`.
+      save_steps: the number of global steps between saves.
+      restore: whether to restore the tables when the session is created.
+    """
+    self._table_saver = table_saver
+    self._save_steps = save_steps
+    self._restore = restore
+
+  def begin(self):
+    self._global_step_tensor = training_util.get_global_step()
+    if self._global_step_tensor is None:
+      raise RuntimeError(
+          "Global step should be created to use IncrementalTableSaverHook.")
+    self._last_saved_step = None
+
+  def after_create_session(self, session, coord):
+    del coord  # unused
+    if self._restore:
+      self._last_saved_step = self._table_saver.restore(session)
+
+  def before_run(self, run_context):
+    return session_run_hook.SessionRunArgs(self._global_step_tensor)
+
+  def after_run(self, run_context, run_values):
+    global_step = run_values.results
+    if (self._last_saved_step is None or
+        global_step >= self._last_saved_step + self._save_steps):
+      self._table_saver.save(run_context.session, global_step)
+      self._last_saved_step = global_step
+
+  def end(self, session):
+    global_step = session.run(self._global_step_tensor)
+    if global_step != self._last_saved_step:
+      self._table_saver.save(session, global_step)
+
@@ -35,6 +35,7 @@ from tensorflow.python.ops import array_ops
 from tensorflow.python.ops import lookup_ops
 from tensorflow.python.ops import variables
 from tensorflow.python.platform import test
+from tensorflow.python.training import checkpoint_utils
 from tensorflow.python.training import saver
 from tensorflow.python.training import server_lib
 
@@ -1191,6 +1192,82 @@ class MutableDenseHashTableOpTest(test.TestCase):
         self.assertAllEqual(0, table2.size().eval())
 
 
+class IncrementalCheckpointTableTest(test.TestCase):
+
+  def _table(self, step, **kwargs):
+    return lookup.IncrementalCheckpointTable(
+        lookup.MutableHashTable(
+            dtypes.int64, dtypes.int64, -1, name="t", checkpoint=False),
+        step=step, **kwargs)
+
+  def testSavesDeltasAndRestores(self):
+    save_dir = os.path.join(self.get_temp_dir(), "incremental_save_restore")
+
+    with self.test_session(graph=ops.Graph()) as sess:
+      table = self._table(step=constant_op.constant(0, dtypes.int64))
+      table_saver = lookup.IncrementalTableSaver(
+          [table], save_dir, full_snapshot_every_n_saves=3)
+      table.insert(
+          constant_op.constant([1, 2, 3], dtypes.int64),
+          constant_op.constant([10, 20, 30], dtypes.int64)).run()
+      table_saver.save(sess, 1)
+      self.assertAllEqual([], table.updated_entries()[0].eval())
+      table.insert(
+          constant_op.constant([2, 4], dtypes.int64),
+          constant_op.constant([21, 40], dtypes.int64)).run()
+      delta = table_saver.save(sess, 2)
+      self.assertEqual([(1, True), (2, False)],
+                       [s[:2] for s in table_saver.snapshots()])
+      # The delta only contains the updated entries.
+      reader = checkpoint_utils.load_checkpoint(delta)
+      self.assertAllEqual([2, 4], sorted(reader.get_tensor("t-keys")))
+
+    with self.test_session(graph=ops.Graph()) as sess:
+      table = self._table(step=constant_op.constant(0, dtypes.int64))
+      table_saver = lookup.IncrementalTableSaver(
+          [table], save_dir, full_snapshot_every_n_saves=3)
+      self.assertEqual(2, table_saver.restore(sess))
+      self.assertAllEqual(
+          [10, 21, 30, 40, -1],
+          table.lookup(constant_op.constant([1, 2, 3, 4, 5],
+                                            dtypes.int64)).eval())
+      table_saver.save(sess, 3)
+      table_saver.save(sess, 4)
+      # The full snapshot replaces the files written before it.
+      self.assertEqual([(4, True)], [s[:2] for s in table_saver.snapshots()])
+      self.assertEqual(4, table.size().eval())
+
+  def testEvictsUnusedEntries(self):
+    save_dir = os.path.join(self.get_temp_dir(), "incremental_evict")
+    with self.test_session(graph=ops.Graph()) as sess:
+      step = variables.Variable(0, dtype=dtypes.int64)
+      table = lookup.IncrementalCheckpointTable(
+          lookup.MutableDenseHashTable(
+              dtypes.int64, dtypes.float32, default_value=-1., empty_key=0,
+              initial_num_buckets=8, checkpoint=False),
+          step=step, max_unused_steps=2)
+      table_saver = lookup.IncrementalTableSaver(
+          [table], save_dir, full_snapshot_every_n_saves=1)
+      step.initializer.run()
+      table.insert(
+          constant_op.constant([1, 2], dtypes.int64),
+          constant_op.constant([1., 2.], dtypes.float32)).run()
+      step.assign(3).eval()
+      table.lookup(constant_op.constant([2], dtypes.int64)).eval()
+      table_saver.save(sess, 3)
+      self.assertEqual(1, table.size().eval())
+      self.assertAllEqual(
+          [-1., 2.],
+          table.lookup(constant_op.constant([1, 2], dtypes.int64)).eval())
+
+  def testInvalidKeys(self):
+    with self.assertRaises(ValueError):
+      lookup.IncrementalCheckpointTable(
+          lookup.MutableHashTable(
+              dtypes.int32, dtypes.int32, -1, checkpoint=False),
+          step=constant_op.constant(0, dtypes.int64))
+
+
 class IndexTableFromFile(test.TestCase):
 
   def _createVocabFile(self, basename, values=("brain", "salad", "surgery")):
@@ -29,6 +29,7 @@ _allowed_symbols = [
     "FixedLossScaleManager",
     "ExponentialUpdateLossScaleManager",
     "LossScaleOptimizer",
+    "LossScaleReport",
 ]
 
 remove_undocumented(__name__, _allowed_symbols)
@@ -22,9 +22,11 @@ import six
 
 from tensorflow.python.framework import dtypes
 from tensorflow.python.framework import ops
+from tensorflow.python.ops import array_ops
 from tensorflow.python.ops import control_flow_ops
 from tensorflow.python.ops import gen_control_flow_ops
 from tensorflow.python.ops import gen_math_ops
+from tensorflow.python.ops import math_ops
 from tensorflow.python.ops import state_ops
 from tensorflow.python.ops import variable_scope
 
@@ -147,54 +149,39 @@ class ExponentialUpdateLossScaleManager(LossScaleManager):
     self._num_bad_steps = variable_scope.variable(
         name="bad_steps", initial_value=0, dtype=dtypes.int32, trainable=False)
 
-  def _reset_stats(self):
-    return control_flow_ops.group(
-        state_ops.assign(self._num_good_steps, 0),
-        state_ops.assign(self._num_bad_steps, 0))
-
   def get_loss_scale(self):
     """Returns the loss scale."""
     return self._loss_scale
 
   def update_loss_scale(self, finite_grads):
     """Updates loss scale based on if gradients are finite in current step."""
-
-    def update_if_finite_grads():
-      """Branch function when grads are all finite."""
-
-      def incr_loss_scale():
-        new_loss_scale = control_flow_ops.cond(
-            gen_math_ops.is_finite(self._loss_scale * self._incr_ratio),
-            lambda: self._loss_scale * self._incr_ratio,
-            lambda: self._loss_scale)
-        update_op = state_ops.assign(self._loss_scale, new_loss_scale)
-        # When loss_scale is updated, both good and bad steps are reset.
-        return control_flow_ops.group(update_op, self._reset_stats())
-
-      return control_flow_ops.cond(
-          self._num_good_steps + 1 >= self._incr_every_n_steps,
-          incr_loss_scale,
-          lambda: state_ops.assign_add(self._num_good_steps, 1).op)
-
-    def update_if_not_finite_grads():
-      """Branch function when any grad is not finite."""
-
-      def decr_loss_scale():
-        update_op = state_ops.assign(
-            self._loss_scale,
-            gen_math_ops.maximum(1., self._loss_scale * self._decr_ratio))
-        # When loss_scale is updated, both good and bad steps are reset.
-        return control_flow_ops.group(update_op, self._reset_stats())
-
-      def just_update_steps():
-        # When bad_steps is incremented, good_step is reset.
-        return control_flow_ops.group(
-            state_ops.assign_add(self._num_bad_steps, 1),
-            state_ops.assign(self._num_good_steps, 0))
-
-      return control_flow_ops.cond(
-          self._num_bad_steps + 1 >= self._decr_every_n_nan_or_inf,
-          decr_loss_scale, just_update_steps)
-
-    return control_flow_ops.cond(finite_grads, update_if_finite_grads,
-                                 update_if_not_finite_grads)
+    # The new loss scale and step counts are selected without control flow, so
+    # that the update is a single assignment to each variable.
+    good_steps = self._num_good_steps + 1
+    bad_steps = self._num_bad_steps + 1
+    incr = math_ops.logical_and(finite_grads,
+                                good_steps >= self._incr_every_n_steps)
+    decr = math_ops.logical_and(
+        math_ops.logical_not(finite_grads),
+        bad_steps >= self._decr_every_n_nan_or_inf)
+    # When loss_scale is updated, both good and bad steps are reset.
+    reset = math_ops.logical_or(incr, decr)
+
+    incr_loss_scale = self._loss_scale * self._incr_ratio
+    decr_loss_scale = gen_math_ops.maximum(
+        1., self._loss_scale * self._decr_ratio)
+    new_loss_scale = array_ops.where(
+        math_ops.logical_and(incr, gen_math_ops.is_finite(incr_loss_scale)),
+        incr_loss_scale,
+        array_ops.where(decr, decr_loss_scale, self._loss_scale))
+    # When bad_steps is incremented, good_step is reset.
+    new_good_steps = array_ops.where(
+        math_ops.logical_or(reset, math_ops.logical_not(finite_grads)),
+        array_ops.zeros_like(good_steps), good_steps)
+    new_bad_steps = array_ops.where(
+        reset, array_ops.zeros_like(bad_steps),
+        array_ops.where(finite_grads, self._num_bad_steps, bad_steps))
+    return control_flow_ops.group(
+        state_ops.assign(self._loss_scale, new_loss_scale),
+        state_ops.assign(self._num_good_steps, new_good_steps),
+        state_ops.assign(self._num_bad_steps, new_bad_steps))
@@ -17,14 +17,73 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
+
 from tensorflow.python.eager import context
+from tensorflow.python.framework import constant_op
+from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import ops
+from tensorflow.python.ops import array_ops
 from tensorflow.python.ops import control_flow_ops
 from tensorflow.python.ops import gen_control_flow_ops
 from tensorflow.python.ops import gen_math_ops
 from tensorflow.python.ops import math_ops
+from tensorflow.python.ops import state_ops
+from tensorflow.python.ops import variable_scope
 from tensorflow.python.training import optimizer
 
 
+class LossScaleReport(
+    collections.namedtuple("LossScaleReport",
+                           ["loss_scale", "all_grads_finite",
+                            "num_skipped_steps"])):
+  """The state of loss scaling after a training step.
+
+  Fields:
+    loss_scale: A scalar `float32` tensor, the loss scale to use in the next
+      step.
+    all_grads_finite: A scalar `bool` tensor, whether the gradients of the step
+      were all finite, i.e. whether the step was applied.
+    num_skipped_steps: A scalar `int64` tensor, the total number of steps that
+      were skipped because of non-finite gradients.
+  """
+
+
+def _all_finite(grads):
+  """Returns a scalar `bool` tensor, whether all `grads` are finite.
+
+  Rather than reducing every gradient separately, the gradients that share a
+  dtype and a device are flattened and concatenated so that a single
+  `is_finite` and `reduce_all` check them all.
+
+  Args:
+    grads: A list of gradients. They may be `Tensor`s, `IndexedSlices` or None.
+
+  Returns:
+    A scalar `bool` tensor.
+  """
+  grads_by_key = collections.OrderedDict()
+  for g in grads:
+    if g is None:
+      continue
+    if isinstance(g, ops.IndexedSlices):
+      g = g.values
+    with ops.colocate_with(g):
+      flat_g = array_ops.reshape(g, [-1])
+    grads_by_key.setdefault((g.dtype.base_dtype, g.device), []).append(flat_g)
+
+  is_finite = []
+  for flat_grads in grads_by_key.values():
+    with ops.colocate_with(flat_grads[0]):
+      if len(flat_grads) > 1:
+        flat_grads = [array_ops.concat(flat_grads, 0)]
+      is_finite.append(
+          math_ops.reduce_all(gen_math_ops.is_finite(flat_grads[0])))
+  if not is_finite:
+    return constant_op.constant(True)
+  return math_ops.reduce_all(is_finite)
+
+
 class LossScaleOptimizer(optimizer.Optimizer):
   # TODO(jamesqin): move mixed precision training explanation to __init__
   # docstring.
@@ -96,6 +155,17 @@ class LossScaleOptimizer(optimizer.Optimizer):
 
   loss_scale_optimizer.apply(grads_and_vars)
   ```
+
+  The training step is skipped when any of the gradients is not finite. The
+  check and the skip are part of the training op, so they don't need separate
+  `session.run` calls. Use `get_report()` to monitor the loss scale and the
+  number of skipped steps:
+
+  ```
+  train_op = loss_scale_optimizer.minimize(loss)
+  report = loss_scale_optimizer.get_report()
+  _, report_value = sess.run([train_op, report])
+  ```
   """
 
   def __init__(self, opt, loss_scale_manager):
@@ -109,6 +179,8 @@ class LossScaleOptimizer(optimizer.Optimizer):
     """
     self._opt = opt
     self._loss_scale_manager = loss_scale_manager
+    self._num_skipped_steps = None
+    self._report = None
 
   def compute_gradients(self,
                         loss,
@@ -142,12 +214,8 @@ class LossScaleOptimizer(optimizer.Optimizer):
 
   def apply_gradients(self, grads_and_vars, global_step=None, name=None):
     """Apply gradients. See base class @{tf.train.Optimizer}."""
-    grads = [g for (g, _) in grads_and_vars]
-
-    is_finite_grad = []
-    for g in grads:
-      is_finite_grad.append(math_ops.reduce_all(gen_math_ops.is_finite(g)))
-    is_overall_finite = math_ops.reduce_all(is_finite_grad)
+    grads_and_vars = list(grads_and_vars)
+    is_overall_finite = _all_finite([g for (g, _) in grads_and_vars])
 
     # Only update gradients when all grads are finite.
     def true_apply_gradients_fn():
@@ -155,18 +223,65 @@ class LossScaleOptimizer(optimizer.Optimizer):
 
     update_vars = control_flow_ops.cond(
         is_overall_finite, true_apply_gradients_fn, gen_control_flow_ops.no_op)
+    num_skipped_steps = self._get_num_skipped_steps()
+    update_num_skipped_steps = state_ops.assign_add(
+        num_skipped_steps,
+        math_ops.cast(math_ops.logical_not(is_overall_finite), dtypes.int64))
     # Potentially adjust gradient scale in case of finite gradients.
-    return control_flow_ops.group(
+    update_op = control_flow_ops.group(
         update_vars,
-        self._loss_scale_manager.update_loss_scale(is_overall_finite))
+        self._loss_scale_manager.update_loss_scale(is_overall_finite),
+        update_num_skipped_steps)
+
+    # The report is read after the step, so that it can be fetched together
+    # with the training op.
+    with ops.control_dependencies([update_op]):
+      self._report = LossScaleReport(
+          loss_scale=array_ops.identity(
+              self._loss_scale_manager.get_loss_scale()),
+          all_grads_finite=array_ops.identity(is_overall_finite),
+          num_skipped_steps=array_ops.identity(num_skipped_steps))
+    return update_op
+
+  def get_report(self):
+    """Returns the state of loss scaling after the last training step.
+
+    In graph mode, the tensors of the report depend on the op returned by the
+    last `apply_gradients()` or `minimize()` call, so evaluating them runs the
+    training step.
+
+    Returns:
+      A `LossScaleReport`.
+
+    Raises:
+      ValueError: If `apply_gradients()` hasn't been called.
+    """
+    if self._report is None:
+      raise ValueError("get_report() must be called after apply_gradients().")
+    return self._report
+
+  def _get_num_skipped_steps(self):
+    if self._num_skipped_steps is None:
+      with ops.init_scope():
+        self._num_skipped_steps = variable_scope.variable(
+            name="skipped_steps",
+            initial_value=0,
+            dtype=dtypes.int64,
+            trainable=False)
+    return self._num_skipped_steps
 
   def _down_scale(self, grads_vars, loss_scale):
     # Down scale grads by the loss_scale.
     gv = []
     inv_loss_scale = gen_math_ops.reciprocal(loss_scale)
+    # Casts the scale once per dtype rather than once per gradient.
+    inv_loss_scales = {}
     for g, v in grads_vars:
       if g is not None:
-        gv.append((g * math_ops.cast(inv_loss_scale, g.dtype.base_dtype), v))
+        dtype = g.dtype.base_dtype
+        if dtype not in inv_loss_scales:
+          inv_loss_scales[dtype] = math_ops.cast(inv_loss_scale, dtype)
+        gv.append((g * inv_loss_scales[dtype], v))
       else:
         gv.append((g, v))
     return gv
@@ -211,6 +211,88 @@ class LossScaleOptimizerTest(test.TestCase):
                           self.evaluate(lsm._loss_scale))
     self.assertAllClose(expected_output, actual_output)
 
+  @test_util.run_in_graph_and_eager_modes()
+  def test_float16_variables_skip_steps_and_report(self):
+    x = variable_scope.get_variable(
+        "x", initializer=np.float16(1.), dtype=dtypes.float16)
+    c = constant_op.constant(8., dtype=dtypes.float16)
+    if context.executing_eagerly():
+      loss = lambda: x * c
+    else:
+      loss = x * c
+
+    lr = 0.01
+    lsm = lsm_lib.ExponentialUpdateLossScaleManager(
+        init_loss_scale=2**14,
+        incr_every_n_steps=2,
+        decr_every_n_nan_or_inf=1,
+        decr_ratio=0.5)
+    opt = lso.LossScaleOptimizer(gd.GradientDescentOptimizer(lr), lsm)
+    with self.assertRaises(ValueError):
+      opt.get_report()
+    train_fn = lambda: opt.minimize(loss, var_list=[x])
+    if not context.executing_eagerly():
+      train_op = train_fn()
+      report = opt.get_report()
+
+    self.evaluate(variables.global_variables_initializer())
+
+    # The scaled gradient, 8 times the loss scale, overflows float16 when the
+    # loss scale is 2**13 or more.
+    expected_reports = [
+        (2**13, False, 1), (2**12, False, 2), (2**12, True, 2),
+        (2**13, True, 2), (2**12, False, 3)
+    ]
+    expected_output = [1, 1, 1 - 8 * lr, 1 - 16 * lr, 1 - 16 * lr]
+    actual_output = []
+    for expected_report in expected_reports:
+      if context.executing_eagerly():
+        train_fn()
+        report_value = self.evaluate(opt.get_report())
+      else:
+        _, report_value = self.evaluate([train_op, report])
+      self.assertEqual(expected_report, tuple(report_value))
+      actual_output.append(self.evaluate(x))
+    self.assertAllClose(expected_output, actual_output, rtol=0, atol=1e-3)
+
+  @test_util.run_in_graph_and_eager_modes()
+  def test_apply_gradients_of_mixed_dtypes(self):
+    x = variable_scope.get_variable(
+        "x", initializer=np.float16([1., 2.]), dtype=dtypes.float16)
+    y = variable_scope.get_variable("y", initializer=[3., 4.])
+    z = variable_scope.get_variable("z", initializer=5.)
+    dataset = dataset_ops.Dataset.from_tensor_slices(
+        ([[0.5, 0.5], [0.5, 0.5]], [[0.5, np.inf], [0.5, 0.5]]))
+    itr = dataset.make_one_shot_iterator()
+
+    opt = lso.LossScaleOptimizer(
+        gd.GradientDescentOptimizer(1), lsm_lib.FixedLossScaleManager(1.))
+
+    def train_fn():
+      x_grad, y_grad = itr.get_next()
+      # The gradient of z is None, which is ignored.
+      return opt.apply_gradients([(math_ops.cast(x_grad, dtypes.float16), x),
+                                  (y_grad, y), (None, z)])
+
+    if not context.executing_eagerly():
+      train_op = train_fn()
+      report = opt.get_report()
+    self.evaluate(variables.global_variables_initializer())
+    all_grads_finite = []
+    for _ in range(2):
+      if context.executing_eagerly():
+        train_fn()
+        report_value = self.evaluate(opt.get_report())
+      else:
+        _, report_value = self.evaluate([train_op, report])
+      all_grads_finite.append(report_value.all_grads_finite)
+    # The first step is skipped because of the non-finite gradient of y.
+    self.assertEqual([False, True], all_grads_finite)
+    self.assertEqual(1, report_value.num_skipped_steps)
+    self.assertAllClose([0.5, 1.5], self.evaluate(x))
+    self.assertAllClose([2.5, 3.5], self.evaluate(y))
+    self.assertAllClose(5., self.evaluate(z))
+
 
 if __name__ == "__main__":
   test.main()
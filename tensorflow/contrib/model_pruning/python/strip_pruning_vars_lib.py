@@ -0,0 +1,389 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Utilities to export pruned models for inference.
+
+A pruned model stores every weight twice: once as the dense weight variable
+and once as the binary mask that the pruning library multiplies it with. The
+functions in this module remove that overhead from a frozen graph:
+
+ - `strip_pruning_vars_fn` folds each mask into its weight constant and drops
+   the masks and thresholds.
+
+ - `sparsify_weights` additionally stores sparse 2-D `MatMul` weights and 4-D
+   `Conv2D` kernels in a (block) compressed sparse row format and rewrites
+   their consumers into `SparseTensorDenseMatMul` ops, so that a model with a
+   high sparsity is both saved and served without its zeros.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import re
+
+import numpy as np
+
+from tensorflow.contrib.model_pruning.python.layers import core_layers as core
+from tensorflow.core.framework import graph_pb2
+from tensorflow.core.framework import node_def_pb2
+from tensorflow.python.client import session
+from tensorflow.python.framework import constant_op
+from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import graph_util
+from tensorflow.python.framework import ops
+from tensorflow.python.framework import tensor_util
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import gen_sparse_ops
+from tensorflow.python.ops import math_ops
+from tensorflow.python.platform import tf_logging as logging
+from tensorflow.python.training import saver as saver_lib
+
+_SPARSE_DTYPES = (dtypes.float32, dtypes.float64)
+# Suffix of the name scope that holds the nodes replacing a dense op.
+_SPARSE_SCOPE = 'sparse'
+
+
+def _node_name(tensor_name):
+  """Strips off ports and control markers to get the underlying node name."""
+  if tensor_name.startswith('^'):
+    tensor_name = tensor_name[1:]
+  m = re.search(r'(.*):\d+$', tensor_name)
+  if m:
+    tensor_name = m.group(1)
+  return tensor_name
+
+
+def _const_input(node_map, tensor_name):
+  """Returns the Const node behind `tensor_name`, skipping Identity nodes."""
+  node = node_map.get(_node_name(tensor_name))
+  while node is not None and node.op == 'Identity':
+    node = node_map.get(_node_name(node.input[0]))
+  if node is None or node.op != 'Const':
+    return None
+  return node
+
+
+def _make_const_node(name, value, dtype):
+  node = node_def_pb2.NodeDef()
+  node.op = 'Const'
+  node.name = name
+  node.attr['dtype'].type = dtype.as_datatype_enum
+  node.attr['value'].tensor.CopyFrom(
+      tensor_util.make_tensor_proto(value, dtype=dtype, shape=value.shape))
+  return node
+
+
+def graph_def_from_checkpoint(checkpoint_dir, output_node_names):
+  """Converts checkpoint data to GraphDef.
+
+  Reads the latest checkpoint data and produces a GraphDef in which the
+  variables have been converted to constants.
+
+  Args:
+    checkpoint_dir: Path to the checkpoints.
+    output_node_names: List of name strings for the result nodes of the graph.
+
+  Returns:
+    A GraphDef from the latest checkpoint
+
+  Raises:
+    ValueError: if no checkpoint is found
+  """
+  checkpoint_path = saver_lib.latest_checkpoint(checkpoint_dir)
+  if checkpoint_path is None:
+    raise ValueError('Could not find a checkpoint at: {0}.'
+                     .format(checkpoint_dir))
+
+  with ops.Graph().as_default() as graph:
+    saver_for_restore = saver_lib.import_meta_graph(
+        checkpoint_path + '.meta', clear_devices=True)
+    with session.Session() as sess:
+      saver_for_restore.restore(sess, checkpoint_path)
+      output_graph_def = graph_util.convert_variables_to_constants(
+          sess, graph.as_graph_def(), output_node_names)
+
+  return output_graph_def
+
+
+def strip_pruning_vars_fn(input_graph_def, output_node_names):
+  """Removes mask variables from the graph.
+
+  Replaces each masked_weight tensor in the graph with the product of the
+  corresponding weight and mask constants, and removes the now unused masks
+  and thresholds.
+
+  Args:
+    input_graph_def: A GraphDef in which the variables have been converted to
+      constants. This is typically the output of graph_def_from_checkpoint()
+    output_node_names: List of name strings for the result nodes of the graph
+
+  Returns:
+    A GraphDef in which pruning-related variables have been removed
+  """
+  node_map = {node.name: node for node in input_graph_def.node}
+  masked_weights_dict = {}
+  for node in input_graph_def.node:
+    if node.op == 'Mul' and node.name.endswith(core.MASKED_WEIGHT_NAME):
+      mask_node = _const_input(node_map, node.input[0])
+      weight_node = _const_input(node_map, node.input[1])
+      if mask_node is None or weight_node is None:
+        raise ValueError('Expected the masked weight %s to be the product of '
+                         'two constants; is the graph frozen?' % node.name)
+      mask = tensor_util.MakeNdarray(mask_node.attr['value'].tensor)
+      weight = tensor_util.MakeNdarray(weight_node.attr['value'].tensor)
+      masked_weights_dict[node.name] = np.multiply(mask, weight)
+
+  stripped_graph_def = graph_pb2.GraphDef()
+  stripped_graph_def.versions.CopyFrom(input_graph_def.versions)
+  stripped_graph_def.library.CopyFrom(input_graph_def.library)
+  for node in input_graph_def.node:
+    if node.name in masked_weights_dict:
+      new_node = _make_const_node(
+          node.name, masked_weights_dict[node.name],
+          dtypes.as_dtype(node.attr['T'].type))
+      new_node.device = node.device
+    else:
+      new_node = node_def_pb2.NodeDef()
+      new_node.CopyFrom(node)
+    stripped_graph_def.node.extend([new_node])
+
+  return graph_util.extract_sub_graph(stripped_graph_def, output_node_names)
+
+
+def _block_csr(matrix, block_shape):
+  """Compresses `matrix` in block compressed sparse row format.
+
+  Args:
+    matrix: 2-D numpy array.
+    block_shape: Pair of ints, the shape of the blocks. The dimensions of
+      `matrix` must be multiples of it.
+
+  Returns:
+    A tuple `(values, col_indices, row_ptr)`. `values` holds the blocks that
+    contain a nonzero, with shape `[num_blocks] + block_shape`, `col_indices`
+    the block column of each of them and `row_ptr` the offset of the first
+    block of each block row, followed by `num_blocks`.
+  """
+  block_rows, block_cols = block_shape
+  num_rows = matrix.shape[0] // block_rows
+  num_cols = matrix.shape[1] // block_cols
+  blocks = matrix.reshape(num_rows, block_rows, num_cols, block_cols)
+  blocks = blocks.transpose(0, 2, 1, 3)
+  nonzero = np.any(blocks != 0, axis=(2, 3))
+  rows, cols = np.nonzero(nonzero)
+  row_ptr = np.zeros(num_rows + 1, np.int32)
+  row_ptr[1:] = np.cumsum(np.bincount(rows, minlength=num_rows))
+  return blocks[rows, cols], cols.astype(np.int32), row_ptr
+
+
+def _sparse_matmul_operand(matrix, block_shape):
+  """Builds the indices, values and shape of `matrix` from its compression.
+
+  Only the block compressed sparse row representation is stored in the graph.
+  The element indices are recomputed from it by a few cheap ops whose inputs
+  are all constant, so that they can be folded when the graph is loaded.
+
+  Args:
+    matrix: 2-D numpy array.
+    block_shape: Pair of ints, the shape of the blocks.
+
+  Returns:
+    A tuple `(indices, values, dense_shape)` of tensors that are suitable as
+    the sparse operand of `SparseTensorDenseMatMul`.
+  """
+  block_rows, block_cols = block_shape
+  values, col_indices, row_ptr = _block_csr(matrix, block_shape)
+  values = constant_op.constant(values, name='values')
+  col_indices = constant_op.constant(col_indices, name='col_indices')
+  row_ptr = constant_op.constant(row_ptr, name='row_ptr')
+
+  # Expands the row offsets into the block row of each block, e.g. [0, 2, 2, 5]
+  # into [0, 0, 2, 2, 2].
+  num_blocks = array_ops.size(col_indices)
+  row_starts = row_ptr[1:-1]
+  row_indices = math_ops.cumsum(
+      math_ops.unsorted_segment_sum(
+          array_ops.ones_like(row_starts), row_starts, num_blocks + 1))
+  row_indices = row_indices[:-1]
+
+  rows = (array_ops.reshape(row_indices * block_rows, [-1, 1, 1]) +
+          array_ops.reshape(math_ops.range(block_rows), [1, -1, 1]))
+  cols = (array_ops.reshape(col_indices * block_cols, [-1, 1, 1]) +
+          array_ops.reshape(math_ops.range(block_cols), [1, 1, -1]))
+  indices = array_ops.stack([
+      rows + array_ops.zeros_like(cols),
+      cols + array_ops.zeros_like(rows)], axis=-1)
+  return (array_ops.reshape(indices, [-1, 2]),
+          array_ops.reshape(values, [-1]),
+          constant_op.constant(matrix.shape, dtypes.int64, name='dense_shape'))
+
+
+def _sparse_matmul(a, matrix, transpose_a, transpose_b, block_shape):
+  """Returns `matmul(a, matrix)` with `matrix` stored as a sparse constant."""
+  indices, values, dense_shape = _sparse_matmul_operand(matrix, block_shape)
+  # SparseTensorDenseMatMul takes the sparse operand first, so this computes
+  # the transposed product op(matrix)^T * op(a)^T and transposes it back.
+  product = gen_sparse_ops.sparse_tensor_dense_mat_mul(
+      indices, values, dense_shape, a,
+      adjoint_a=not transpose_b, adjoint_b=not transpose_a)
+  return array_ops.transpose(product)
+
+
+def _sparse_conv2d(images, kernel, strides, padding, dilations, block_shape):
+  """Returns `conv2d(images, kernel)` with `kernel` stored as sparse."""
+  kernel_height, kernel_width, in_channels, out_channels = kernel.shape
+  patches = array_ops.extract_image_patches(
+      images, ksizes=[1, kernel_height, kernel_width, 1], strides=strides,
+      rates=dilations, padding=padding)
+  # The patches hold the inputs of each output position in the (height, width,
+  # in_channels) order of the kernel, so the convolution is a matmul with the
+  # kernel reshaped into a matrix.
+  product = _sparse_matmul(
+      array_ops.reshape(patches,
+                        [-1, kernel_height * kernel_width * in_channels]),
+      kernel.reshape(-1, out_channels), transpose_a=False, transpose_b=False,
+      block_shape=block_shape)
+  output_shape = array_ops.concat(
+      [array_ops.shape(patches)[:3], [out_channels]], axis=0)
+  return array_ops.reshape(product, output_shape)
+
+
+def _sparse_replacement_nodes(node, weight, block_shape):
+  """Builds the nodes that compute `node` with a sparse `weight`.
+
+  Args:
+    node: The `MatMul` or `Conv2D` NodeDef to replace.
+    weight: The value of the constant second input of `node`.
+    block_shape: Pair of ints, the shape of the blocks.
+
+  Returns:
+    A list of NodeDefs, or None if `node` can't be computed sparsely. The
+    NodeDef that replaces `node` has the same name, so that its consumers are
+    left untouched, and the others are in its 'sparse' name scope.
+  """
+  dtype = dtypes.as_dtype(node.attr['T'].type)
+  if dtype not in _SPARSE_DTYPES:
+    return None
+  if node.op == 'MatMul':
+    matrix = weight
+  elif node.op == 'Conv2D':
+    if node.attr['data_format'].s not in (b'', b'NHWC'):
+      return None
+    matrix = weight.reshape(-1, weight.shape[-1])
+  else:
+    return None
+  if matrix.ndim != 2 or any(
+      dim % block_dim for dim, block_dim in zip(matrix.shape, block_shape)):
+    return None
+
+  with ops.Graph().as_default() as graph, ops.device(node.device):
+    with ops.name_scope('%s/%s/' % (node.name, _SPARSE_SCOPE)):
+      inputs = array_ops.placeholder(dtype, name='input')
+      if node.op == 'MatMul':
+        output = _sparse_matmul(inputs, weight, node.attr['transpose_a'].b,
+                                node.attr['transpose_b'].b, block_shape)
+      else:
+        dilations = list(node.attr['dilations'].list.i) or [1, 1, 1, 1]
+        output = _sparse_conv2d(
+            inputs, weight, list(node.attr['strides'].list.i),
+            node.attr['padding'].s.decode('ascii'), dilations, block_shape)
+    array_ops.identity(output, name=node.name)
+
+  input_name = inputs.op.name
+  new_nodes = []
+  for new_node in graph.as_graph_def().node:
+    if new_node.name == input_name:
+      continue
+    for i, tensor_name in enumerate(new_node.input):
+      if _node_name(tensor_name) == input_name:
+        new_node.input[i] = node.input[0]
+    if new_node.name == node.name:
+      # Keeps the control dependencies of the replaced node.
+      new_node.input.extend(
+          [name for name in node.input if name.startswith('^')])
+    new_nodes.append(new_node)
+  return new_nodes
+
+
+def sparsify_weights(input_graph_def, output_node_names, min_sparsity=0.5,
+                     block_shape=(1, 1)):
+  """Stores the sparse weights of a graph in compressed form.
+
+  Every `MatMul` whose second input is a constant 2-D matrix, and every NHWC
+  `Conv2D` whose kernel is a constant, with at least `min_sparsity` of zero
+  weights is replaced by a `SparseTensorDenseMatMul` on a block compressed
+  sparse row representation of the weights. Convolutions are turned into
+  matmuls on their input patches first.
+
+  A `block_shape` of (1, 1) gives the compressed sparse row format, which
+  stores a 4 byte column index for every nonzero weight. Larger blocks amortize
+  the column index over more weights, but also store the zeros of the blocks
+  that have a nonzero, so they pay off for block-structured sparsity, like the
+  one produced by the `block_height` and `block_width` pruning hyperparameters.
+
+  Args:
+    input_graph_def: A GraphDef in which the variables have been converted to
+      constants and the masks have been folded into the weights. This is
+      typically the output of strip_pruning_vars_fn()
+    output_node_names: List of name strings for the result nodes of the graph
+    min_sparsity: The minimum fraction of zeros in the weights of a node for
+      it to be replaced.
+    block_shape: Pair of ints, the shape of the blocks in which the weights
+      are stored. Weights whose dimensions aren't multiples of it are left
+      dense.
+
+  Returns:
+    A GraphDef in which the sparse weights are stored compressed.
+
+  Raises:
+    ValueError: If `min_sparsity` or `block_shape` is invalid.
+  """
+  if not 0. <= min_sparsity <= 1.:
+    raise ValueError('min_sparsity must be in [0, 1], got %s.' % min_sparsity)
+  block_shape = tuple(block_shape)
+  if len(block_shape) != 2 or min(block_shape) < 1:
+    raise ValueError('block_shape must be a pair of positive integers, got %s.'
+                     % (block_shape,))
+
+  node_map = {node.name: node for node in input_graph_def.node}
+  replacements = {}
+  for node in input_graph_def.node:
+    if node.op not in ('MatMul', 'Conv2D'):
+      continue
+    weight_node = _const_input(node_map, node.input[1])
+    if weight_node is None:
+      continue
+    weight = tensor_util.MakeNdarray(weight_node.attr['value'].tensor)
+    if not weight.size or np.mean(weight == 0) < min_sparsity:
+      continue
+    new_nodes = _sparse_replacement_nodes(node, weight, block_shape)
+    if new_nodes is None:
+      logging.info('Leaving %s dense: its weights can\'t be stored in blocks '
+                   'of shape %s.', node.name, block_shape)
+      continue
+    replacements[node.name] = new_nodes
+
+  output_graph_def = graph_pb2.GraphDef()
+  output_graph_def.versions.CopyFrom(input_graph_def.versions)
+  output_graph_def.library.CopyFrom(input_graph_def.library)
+  for node in input_graph_def.node:
+    if node.name in replacements:
+      output_graph_def.node.extend(replacements[node.name])
+    else:
+      new_node = node_def_pb2.NodeDef()
+      new_node.CopyFrom(node)
+      output_graph_def.node.extend([new_node])
+
+  return graph_util.extract_sub_graph(output_graph_def, output_node_names)
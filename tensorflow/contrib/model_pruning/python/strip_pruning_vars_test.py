@@ -0,0 +1,203 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for strip_pruning_vars."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import time
+
+import numpy as np
+
+from tensorflow.contrib.model_pruning.python import pruning
+from tensorflow.contrib.model_pruning.python import strip_pruning_vars_lib
+from tensorflow.contrib.model_pruning.python.layers import layers
+from tensorflow.python.client import session
+from tensorflow.python.framework import graph_util
+from tensorflow.python.framework import importer
+from tensorflow.python.framework import ops
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import variables
+from tensorflow.python.platform import test
+from tensorflow.python.training import saver as saver_lib
+
+_OUTPUT_NODE_NAMES = ['output']
+
+
+def _build_model(image_size=8, num_channels=4, num_units=64):
+  """Builds a small pruned convnet and returns its input placeholder."""
+  images = array_ops.placeholder(
+      'float32', [None, image_size, image_size, 4], name='images')
+  net = layers.masked_conv2d(images, num_channels, 3, stride=2, scope='conv')
+  net = array_ops.reshape(net, [-1, (image_size // 2)**2 * num_channels])
+  net = layers.masked_fully_connected(net, num_units, scope='fc')
+  net = layers.masked_fully_connected(
+      net, 2, activation_fn=None, scope='logits')
+  array_ops.identity(net, name=_OUTPUT_NODE_NAMES[0])
+  return images
+
+
+def _prune(sess, sparsity, block_shape=(1, 1)):
+  """Sets the masks of the current graph to random masks of given sparsity."""
+  rng = np.random.RandomState(0)
+  for mask in pruning.get_masks():
+    shape = mask.get_shape().as_list()
+    num_rows = np.prod(shape[:-1]) // block_shape[0]
+    num_cols = shape[-1] // block_shape[1]
+    value = rng.uniform(size=[num_rows, num_cols]) >= sparsity
+    value = np.kron(value, np.ones(block_shape)).reshape(shape)
+    sess.run(mask.assign(value.astype(np.float32)))
+
+
+def _run(graph_def, images):
+  with ops.Graph().as_default() as graph:
+    importer.import_graph_def(graph_def, name='')
+    with session.Session(graph=graph) as sess:
+      return sess.run('output:0', {'images:0': images})
+
+
+class StripPruningVarsTest(test.TestCase):
+
+  def setUp(self):
+    super(StripPruningVarsTest, self).setUp()
+    self.images = np.random.RandomState(1).uniform(
+        size=[5, 8, 8, 4]).astype(np.float32)
+
+  def _frozen_graph_def(self, sparsity, block_shape=(1, 1)):
+    with ops.Graph().as_default() as graph:
+      _build_model()
+      with session.Session(graph=graph) as sess:
+        sess.run(variables.global_variables_initializer())
+        _prune(sess, sparsity, block_shape)
+        expected = sess.run('output:0', {'images:0': self.images})
+        graph_def = graph_util.convert_variables_to_constants(
+            sess, graph.as_graph_def(), _OUTPUT_NODE_NAMES)
+    return graph_def, expected
+
+  def testStripPruningVarsFn(self):
+    graph_def, expected = self._frozen_graph_def(sparsity=0.5)
+    stripped_graph_def = strip_pruning_vars_lib.strip_pruning_vars_fn(
+        graph_def, _OUTPUT_NODE_NAMES)
+
+    node_names = [node.name for node in stripped_graph_def.node]
+    self.assertFalse([name for name in node_names
+                      if 'mask' in name and 'masked_weight' not in name])
+    self.assertFalse([name for name in node_names if 'threshold' in name])
+    self.assertAllClose(expected, _run(stripped_graph_def, self.images))
+
+  def testGraphDefFromCheckpoint(self):
+    checkpoint_dir = os.path.join(self.get_temp_dir(), 'checkpoint')
+    with ops.Graph().as_default() as graph:
+      _build_model()
+      with session.Session(graph=graph) as sess:
+        sess.run(variables.global_variables_initializer())
+        _prune(sess, sparsity=0.5)
+        expected = sess.run('output:0', {'images:0': self.images})
+        saver_lib.Saver().save(sess, os.path.join(checkpoint_dir, 'model'))
+
+    graph_def = strip_pruning_vars_lib.graph_def_from_checkpoint(
+        checkpoint_dir, _OUTPUT_NODE_NAMES)
+    self.assertAllClose(expected, _run(graph_def, self.images))
+    with self.assertRaisesRegexp(ValueError, 'Could not find a checkpoint'):
+      strip_pruning_vars_lib.graph_def_from_checkpoint(
+          self.get_temp_dir(), _OUTPUT_NODE_NAMES)
+
+  def testSparsifyWeights(self):
+    for block_shape in [(1, 1), (2, 2)]:
+      graph_def, expected = self._frozen_graph_def(0.8, block_shape)
+      stripped_graph_def = strip_pruning_vars_lib.strip_pruning_vars_fn(
+          graph_def, _OUTPUT_NODE_NAMES)
+      sparse_graph_def = strip_pruning_vars_lib.sparsify_weights(
+          stripped_graph_def, _OUTPUT_NODE_NAMES, block_shape=block_shape)
+
+      op_types = [node.op for node in sparse_graph_def.node]
+      self.assertNotIn('MatMul', op_types)
+      self.assertNotIn('Conv2D', op_types)
+      self.assertEqual(3, op_types.count('SparseTensorDenseMatMul'))
+      self.assertLess(sparse_graph_def.ByteSize(),
+                      stripped_graph_def.ByteSize())
+      self.assertAllClose(expected, _run(sparse_graph_def, self.images),
+                          rtol=1e-5, atol=1e-5)
+
+  def testSparsifyWeightsLeavesDenseWeights(self):
+    graph_def, expected = self._frozen_graph_def(sparsity=0.2)
+    stripped_graph_def = strip_pruning_vars_lib.strip_pruning_vars_fn(
+        graph_def, _OUTPUT_NODE_NAMES)
+    sparse_graph_def = strip_pruning_vars_lib.sparsify_weights(
+        stripped_graph_def, _OUTPUT_NODE_NAMES, min_sparsity=0.5)
+    self.assertEqual(stripped_graph_def, sparse_graph_def)
+
+    # The logits weights have 2 columns, so they can't be split in blocks of
+    # 4 columns.
+    sparse_graph_def = strip_pruning_vars_lib.sparsify_weights(
+        stripped_graph_def, _OUTPUT_NODE_NAMES, min_sparsity=0.,
+        block_shape=(1, 4))
+    op_types = [node.op for node in sparse_graph_def.node]
+    self.assertEqual(1, op_types.count('MatMul'))
+    self.assertEqual(2, op_types.count('SparseTensorDenseMatMul'))
+    self.assertAllClose(expected, _run(sparse_graph_def, self.images),
+                        rtol=1e-5, atol=1e-5)
+
+    with self.assertRaises(ValueError):
+      strip_pruning_vars_lib.sparsify_weights(
+          stripped_graph_def, _OUTPUT_NODE_NAMES, min_sparsity=2.)
+    with self.assertRaises(ValueError):
+      strip_pruning_vars_lib.sparsify_weights(
+          stripped_graph_def, _OUTPUT_NODE_NAMES, block_shape=(0, 1))
+
+
+class SparsifyWeightsBenchmark(test.Benchmark):
+  """Compares the size and CPU latency of sparse and dense exported models."""
+
+  def _benchmark(self, graph_def, name, batch_size=16, num_iters=50):
+    images = np.random.RandomState(0).uniform(
+        size=[batch_size, 32, 32, 4]).astype(np.float32)
+    with ops.Graph().as_default() as graph:
+      importer.import_graph_def(graph_def, name='')
+      with session.Session(graph=graph) as sess:
+        # Warms up, which also folds the index computations of sparse weights.
+        sess.run('output:0', {'images:0': images})
+        start = time.time()
+        for _ in range(num_iters):
+          sess.run('output:0', {'images:0': images})
+        wall_time = (time.time() - start) / num_iters
+    self.report_benchmark(
+        iters=num_iters, wall_time=wall_time, name=name,
+        extras={'graph_def_bytes': graph_def.ByteSize()})
+
+  def benchmarkSparsifyWeights(self):
+    for sparsity in [0.5, 0.8, 0.9, 0.95]:
+      with ops.Graph().as_default() as graph:
+        _build_model(image_size=32, num_channels=16, num_units=1024)
+        with session.Session(graph=graph) as sess:
+          sess.run(variables.global_variables_initializer())
+          _prune(sess, sparsity)
+          graph_def = graph_util.convert_variables_to_constants(
+              sess, graph.as_graph_def(), _OUTPUT_NODE_NAMES)
+      dense_graph_def = strip_pruning_vars_lib.strip_pruning_vars_fn(
+          graph_def, _OUTPUT_NODE_NAMES)
+      self._benchmark(dense_graph_def, 'dense_sparsity_%g' % sparsity)
+      for block_shape in [(1, 1), (4, 4)]:
+        sparse_graph_def = strip_pruning_vars_lib.sparsify_weights(
+            dense_graph_def, _OUTPUT_NODE_NAMES, block_shape=block_shape)
+        self._benchmark(
+            sparse_graph_def, 'sparse_%dx%d_sparsity_%g' %
+            (block_shape + (sparsity,)))
+
+
+if __name__ == '__main__':
+  test.main()
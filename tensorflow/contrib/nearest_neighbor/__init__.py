@@ -25,6 +25,12 @@ The following ops generate multiprobe sequences for various hash families.
 
 @@hyperplane_lsh_hash
 
+### Approximate nearest neighbor index
+
+@@HyperplaneLSHIndex
+@@LSHEvaluation
+@@brute_force_search
+
 """
 
 from __future__ import absolute_import
@@ -32,5 +38,8 @@ from __future__ import division
 from __future__ import print_function
 
 # pylint: disable=unused-import,wildcard-import, line-too-long
+from tensorflow.contrib.nearest_neighbor.python.ops.lsh_index import brute_force_search
+from tensorflow.contrib.nearest_neighbor.python.ops.lsh_index import HyperplaneLSHIndex
+from tensorflow.contrib.nearest_neighbor.python.ops.lsh_index import LSHEvaluation
 from tensorflow.contrib.nearest_neighbor.python.ops.nearest_neighbor_ops import *
 # pylint: enable=unused-import,wildcard-import,line-too-long
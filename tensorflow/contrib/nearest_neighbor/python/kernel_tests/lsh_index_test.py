@@ -0,0 +1,117 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+"""Tests for lsh_index."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+import numpy as np
+
+from tensorflow.contrib.nearest_neighbor.python.ops import lsh_index
+from tensorflow.python.platform import test
+
+
+class BruteForceSearchTest(test.TestCase):
+
+  def testCosine(self):
+    points = np.array([[1.0, 0.0], [0.0, 2.0], [-1.0, 0.1]])
+    queries = np.array([[3.0, 0.5], [0.0, -1.0]])
+    ids, scores = lsh_index.brute_force_search(points, queries, k=2)
+    self.assertAllEqual([[0, 1], [0, 2]], ids)
+    self.assertAllClose([[3.0 / np.sqrt(9.25), 0.5 / np.sqrt(9.25)],
+                         [0.0, -0.1 / np.sqrt(1.01)]], scores)
+
+  def testDot(self):
+    points = np.array([[1.0, 0.0], [0.0, 2.0]])
+    ids, scores = lsh_index.brute_force_search(
+        points, [[1.0, 1.0]], k=2, metric="dot")
+    self.assertAllEqual([[1, 0]], ids)
+    self.assertAllClose([[2.0, 1.0]], scores)
+
+  def testInvalidMetric(self):
+    with self.assertRaises(ValueError):
+      lsh_index.brute_force_search([[1.0]], [[1.0]], k=1, metric="l2")
+
+
+class HyperplaneLSHIndexTest(test.TestCase):
+
+  def setUp(self):
+    rng = np.random.RandomState(0)
+    self._points = rng.randn(500, 16).astype(np.float32)
+    self._queries = (self._points[:50] +
+                     0.1 * rng.randn(50, 16).astype(np.float32))
+    self._index = lsh_index.HyperplaneLSHIndex.build(
+        self._points, num_tables=4, num_hyperplanes_per_table=6, seed=1)
+
+  def tearDown(self):
+    self._index.close()
+
+  def testFindsPointsThemselves(self):
+    ids, scores = self._index.query(self._points[:20], k=1, num_probes=4)
+    self.assertAllEqual(np.arange(20), ids[:, 0])
+    self.assertAllClose(np.ones(20), scores[:, 0], atol=1e-5)
+
+  def testBuckets(self):
+    self.assertEqual((4, 500), self._index.sorted_hashes.shape)
+    for t in range(4):
+      self.assertTrue(np.all(np.diff(self._index.sorted_hashes[t]) >= 0))
+      self.assertAllEqual(np.arange(500), np.sort(self._index.sorted_ids[t]))
+
+  def testMoreProbesFindMoreCandidates(self):
+    evaluations = self._index.evaluate(self._queries, k=5,
+                                       num_probes_list=[4, 16, 64, 256])
+    self.assertEqual([4, 16, 64, 256], [e.num_probes for e in evaluations])
+    for fewer, more in zip(evaluations, evaluations[1:]):
+      self.assertLessEqual(fewer.mean_num_candidates, more.mean_num_candidates)
+      self.assertLessEqual(fewer.recall, more.recall)
+    # All 4 * 64 buckets are probed.
+    self.assertEqual(500, evaluations[-1].mean_num_candidates)
+    self.assertEqual(1.0, evaluations[-1].recall)
+
+  def testPadsMissingNeighbors(self):
+    with lsh_index.HyperplaneLSHIndex.build(
+        self._points[:3], num_tables=1, num_hyperplanes_per_table=4,
+        seed=1) as index:
+      ids, scores = index.query(self._points[:1], k=5, num_probes=16)
+    self.assertAllEqual([-1, -1], ids[0, 3:])
+    self.assertTrue(np.all(np.isneginf(scores[0, 3:])))
+
+  def testSaveAndLoad(self):
+    path = os.path.join(self.get_temp_dir(), "index.npz")
+    self._index.save(path)
+    with lsh_index.HyperplaneLSHIndex.load(path) as loaded:
+      self.assertEqual("cosine", loaded.metric)
+      self.assertEqual(4, loaded.num_tables)
+      self.assertAllEqual(self._index.sorted_ids, loaded.sorted_ids)
+      expected = self._index.query(self._queries, k=3, num_probes=8)
+      actual = loaded.query(self._queries, k=3, num_probes=8)
+    self.assertAllEqual(expected[0], actual[0])
+    self.assertAllClose(expected[1], actual[1])
+
+  def testClose(self):
+    with lsh_index.HyperplaneLSHIndex.build(
+        self._points, num_tables=1, num_hyperplanes_per_table=4,
+        seed=1) as index:
+      index.query(self._queries, k=1)
+    with self.assertRaisesRegexp(RuntimeError, "closed Session"):
+      index.query(self._queries, k=1)
+
+
+if __name__ == "__main__":
+  test.main()
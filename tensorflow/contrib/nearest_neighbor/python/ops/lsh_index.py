@@ -0,0 +1,331 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Approximate nearest neighbor index based on hyperplane LSH.
+
+Usage:
+
+```python
+index = HyperplaneLSHIndex.build(embeddings, num_tables=16,
+                                 num_hyperplanes_per_table=12)
+index.save("/tmp/index.npz")
+
+with HyperplaneLSHIndex.load("/tmp/index.npz") as index:
+  ids, scores = index.query(queries, k=10, num_probes=64)
+```
+
+Every table hashes a point to the signs of its inner products with
+`num_hyperplanes_per_table` random hyperplanes. A query looks up the buckets
+given by the multiprobe sequence of `hyperplane_lsh_probes` and re-ranks the
+points found there exactly.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import io
+import time
+
+import numpy as np
+
+from tensorflow.contrib.nearest_neighbor.python.ops import nearest_neighbor_ops
+from tensorflow.python.client import session
+from tensorflow.python.framework import constant_op
+from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import ops
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import math_ops
+from tensorflow.python.platform import gfile
+
+_METRICS = ("cosine", "dot")
+
+LSHEvaluation = collections.namedtuple("LSHEvaluation", [
+    "num_probes", "recall", "mean_num_candidates", "seconds_per_query",
+    "brute_force_seconds_per_query"
+])
+
+
+class _Prober(object):
+  """Computes multiprobe sequences with `hyperplane_lsh_probes`."""
+
+  def __init__(self, hyperplanes, num_tables, num_hyperplanes_per_table):
+    self._graph = ops.Graph()
+    with self._graph.as_default():
+      self._points = array_ops.placeholder(
+          dtypes.float32, [None, hyperplanes.shape[0]])
+      self._num_probes = array_ops.placeholder(dtypes.int32, [])
+      product = math_ops.matmul(self._points,
+                                constant_op.constant(hyperplanes))
+      self._probes, self._table_ids = (
+          nearest_neighbor_ops.hyperplane_lsh_probes(
+              product, num_tables, num_hyperplanes_per_table,
+              self._num_probes))
+    self._session = session.Session(graph=self._graph)
+
+  def probes(self, points, num_probes):
+    """Returns the probes and table ids of `points`, see the op."""
+    return self._session.run(
+        [self._probes, self._table_ids],
+        feed_dict={self._points: points, self._num_probes: num_probes})
+
+  def close(self):
+    """Closes the session of the prober."""
+    self._session.close()
+
+
+def _normalize(points):
+  norms = np.linalg.norm(points, axis=1, keepdims=True)
+  return points / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+def _top_k(scores, k):
+  """Returns the indices and values of the `k` largest scores of every row."""
+  k = min(k, scores.shape[1])
+  if k == 0:
+    return (np.zeros([scores.shape[0], 0], dtype=np.int64),
+            np.zeros([scores.shape[0], 0], dtype=scores.dtype))
+  rows = np.arange(scores.shape[0])[:, np.newaxis]
+  indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+  values = scores[rows, indices]
+  order = np.argsort(-values, axis=1, kind="mergesort")
+  return indices[rows, order], values[rows, order]
+
+
+def brute_force_search(points, queries, k, metric="cosine", batch_size=1024):
+  """Exact top-k search by scoring every point.
+
+  Args:
+    points: a `[num_points, dim]` array.
+    queries: a `[num_queries, dim]` array.
+    k: number of neighbors to return.
+    metric: "cosine" or "dot", the similarity to rank by.
+    batch_size: number of queries scored at a time.
+
+  Returns:
+    A tuple `(ids, scores)` of `[num_queries, k]` arrays, best first.
+  """
+  if metric not in _METRICS:
+    raise ValueError("metric must be one of %s, got %s" % (_METRICS, metric))
+  points = np.asarray(points, dtype=np.float32)
+  queries = np.asarray(queries, dtype=np.float32)
+  if metric == "cosine":
+    points = _normalize(points)
+    queries = _normalize(queries)
+  all_ids = []
+  all_scores = []
+  for start in range(0, len(queries), batch_size):
+    ids, scores = _top_k(np.dot(queries[start:start + batch_size], points.T), k)
+    all_ids.append(ids)
+    all_scores.append(scores)
+  return np.concatenate(all_ids), np.concatenate(all_scores)
+
+
+class HyperplaneLSHIndex(object):
+  """A multi-table hyperplane LSH index over a matrix of points.
+
+  The index holds a `tf.Session` to compute the probes of queries. Call
+  `close` when done with it, or use it as a context manager.
+  """
+
+  def __init__(self, points, hyperplanes, num_tables,
+               num_hyperplanes_per_table, sorted_hashes, sorted_ids,
+               metric="cosine"):
+    """Creates an index from its parts. Use `build` or `load` instead.
+
+    Args:
+      points: the `[num_points, dim]` float32 points, normalized for the
+        "cosine" metric.
+      hyperplanes: the `[dim, num_tables * num_hyperplanes_per_table]`
+        hyperplanes.
+      num_tables: the number of hash tables.
+      num_hyperplanes_per_table: the number of hyperplanes of every table.
+      sorted_hashes: a `[num_tables, num_points]` int32 array, the hashes of
+        all points of every table, sorted.
+      sorted_ids: a `[num_tables, num_points]` int64 array, the point ids in
+        the order of `sorted_hashes`.
+      metric: "cosine" or "dot", the similarity used for re-ranking.
+    """
+    if metric not in _METRICS:
+      raise ValueError("metric must be one of %s, got %s" % (_METRICS, metric))
+    self.points = points
+    self.hyperplanes = hyperplanes
+    self.num_tables = num_tables
+    self.num_hyperplanes_per_table = num_hyperplanes_per_table
+    self.sorted_hashes = sorted_hashes
+    self.sorted_ids = sorted_ids
+    self.metric = metric
+    self._prober = _Prober(hyperplanes, num_tables, num_hyperplanes_per_table)
+
+  @classmethod
+  def build(cls, points, num_tables, num_hyperplanes_per_table,
+            metric="cosine", seed=None, batch_size=65536):
+    """Builds an index over `points`.
+
+    Args:
+      points: a `[num_points, dim]` array.
+      num_tables: the number of hash tables, at most 1000.
+      num_hyperplanes_per_table: the number of hyperplanes, i.e. hash bits, of
+        every table, at most 30.
+      metric: "cosine" or "dot", the similarity used for re-ranking.
+      seed: optional seed for drawing the hyperplanes.
+      batch_size: number of points hashed at a time.
+
+    Returns:
+      A `HyperplaneLSHIndex`.
+    """
+    if metric not in _METRICS:
+      raise ValueError("metric must be one of %s, got %s" % (_METRICS, metric))
+    points = np.asarray(points, dtype=np.float32)
+    if metric == "cosine":
+      points = _normalize(points)
+    hyperplanes = np.random.RandomState(seed).randn(
+        points.shape[1], num_tables * num_hyperplanes_per_table).astype(
+            np.float32)
+    prober = _Prober(hyperplanes, num_tables, num_hyperplanes_per_table)
+    try:
+      # The first `num_tables` probes are the hashes of the point in every
+      # table, in table order.
+      hashes = np.concatenate([
+          prober.probes(points[start:start + batch_size], num_tables)[0]
+          for start in range(0, len(points), batch_size)
+      ]).T
+    finally:
+      prober.close()
+    sorted_ids = np.argsort(hashes, axis=1, kind="mergesort").astype(np.int64)
+    sorted_hashes = hashes[np.arange(num_tables)[:, np.newaxis], sorted_ids]
+    return cls(points, hyperplanes, num_tables, num_hyperplanes_per_table,
+               sorted_hashes, sorted_ids, metric)
+
+  def close(self):
+    """Releases the session used to compute probes.
+
+    The index can not be queried anymore once closed.
+    """
+    self._prober.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exec_type, exec_value, exec_tb):
+    self.close()
+
+  def save(self, path):
+    """Writes the index to `path` as a numpy `.npz` archive."""
+    # Zip archives need a seekable file, so the archive is built in memory.
+    buf = io.BytesIO()
+    np.savez(buf, points=self.points, hyperplanes=self.hyperplanes,
+             num_tables=self.num_tables,
+             num_hyperplanes_per_table=self.num_hyperplanes_per_table,
+             sorted_hashes=self.sorted_hashes, sorted_ids=self.sorted_ids,
+             metric=self.metric)
+    with gfile.GFile(path, "wb") as f:
+      f.write(buf.getvalue())
+
+  @classmethod
+  def load(cls, path):
+    """Reads an index written by `save`."""
+    with gfile.GFile(path, "rb") as f:
+      data = np.load(io.BytesIO(f.read()))
+    return cls(data["points"], data["hyperplanes"], int(data["num_tables"]),
+               int(data["num_hyperplanes_per_table"]), data["sorted_hashes"],
+               data["sorted_ids"], str(data["metric"]))
+
+  def candidates(self, queries, num_probes):
+    """Returns the ids of the points in the probed buckets of every query.
+
+    Args:
+      queries: a `[num_queries, dim]` array.
+      num_probes: the total number of buckets probed, over all tables.
+
+    Returns:
+      A list with a sorted int64 array of unique point ids per query.
+    """
+    probes, table_ids = self._prober.probes(
+        np.asarray(queries, dtype=np.float32), num_probes)
+    # Look up all probes of the batch at once.
+    starts = np.empty(probes.shape, dtype=np.int64)
+    ends = np.empty(probes.shape, dtype=np.int64)
+    for t in range(self.num_tables):
+      mask = table_ids == t
+      starts[mask] = np.searchsorted(self.sorted_hashes[t], probes[mask],
+                                     side="left")
+      ends[mask] = np.searchsorted(self.sorted_hashes[t], probes[mask],
+                                   side="right")
+    result = []
+    for q in range(len(probes)):
+      ids = [self.sorted_ids[t, s:e]
+             for t, s, e in zip(table_ids[q], starts[q], ends[q]) if e > s]
+      result.append(np.unique(np.concatenate(ids)) if ids
+                    else np.zeros([0], dtype=np.int64))
+    return result
+
+  def query(self, queries, k, num_probes=None):
+    """Returns the approximate top-k neighbors of every query.
+
+    Args:
+      queries: a `[num_queries, dim]` array.
+      k: number of neighbors to return.
+      num_probes: the total number of buckets probed, over all tables.
+        Defaults to `num_tables`, i.e. one bucket per table.
+
+    Returns:
+      A tuple `(ids, scores)` of `[num_queries, k]` arrays, best first. If
+      fewer than `k` candidates are found, the remaining ids are -1 and the
+      remaining scores are -inf.
+    """
+    if num_probes is None:
+      num_probes = self.num_tables
+    queries = np.asarray(queries, dtype=np.float32)
+    if self.metric == "cosine":
+      queries = _normalize(queries)
+    ids = np.full([len(queries), k], -1, dtype=np.int64)
+    scores = np.full([len(queries), k], -np.inf, dtype=np.float32)
+    for q, candidates in enumerate(self.candidates(queries, num_probes)):
+      candidate_scores = np.dot(self.points[candidates], queries[q])
+      top, top_scores = _top_k(candidate_scores[np.newaxis, :], k)
+      ids[q, :top.shape[1]] = candidates[top[0]]
+      scores[q, :top.shape[1]] = top_scores[0]
+    return ids, scores
+
+  def evaluate(self, queries, k, num_probes_list):
+    """Measures recall and latency against brute force search.
+
+    Args:
+      queries: a `[num_queries, dim]` array.
+      k: number of neighbors to retrieve.
+      num_probes_list: the numbers of probes to evaluate.
+
+    Returns:
+      A list of `LSHEvaluation`, one per number of probes. `recall` is the
+      fraction of the exact top-k neighbors that are retrieved.
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    start = time.time()
+    exact_ids, _ = brute_force_search(self.points, queries, k,
+                                      metric=self.metric)
+    brute_force_seconds = (time.time() - start) / len(queries)
+    results = []
+    for num_probes in num_probes_list:
+      start = time.time()
+      ids, _ = self.query(queries, k, num_probes)
+      seconds = (time.time() - start) / len(queries)
+      hits = sum(len(np.intersect1d(a, e)) for a, e in zip(ids, exact_ids))
+      num_candidates = np.mean(
+          [len(c) for c in self.candidates(queries, num_probes)])
+      results.append(LSHEvaluation(num_probes, hits / exact_ids.size,
+                                   num_candidates, seconds,
+                                   brute_force_seconds))
+    return results
@@ -23,7 +23,9 @@ from tensorflow.contrib.opt.python.training.adamax import *
 from tensorflow.contrib.opt.python.training.addsign import *
 from tensorflow.contrib.opt.python.training.drop_stale_gradient_optimizer import *
 from tensorflow.contrib.opt.python.training.external_optimizer import *
+from tensorflow.contrib.opt.python.training.fused_apply_optimizers import *
 from tensorflow.contrib.opt.python.training.lazy_adam_optimizer import *
+from tensorflow.contrib.opt.python.training.lbfgs import *
 from tensorflow.contrib.opt.python.training.moving_average_optimizer import *
 from tensorflow.contrib.opt.python.training.multitask_optimizer_wrapper import *
 from tensorflow.contrib.opt.python.training.nadam_optimizer import *
@@ -61,6 +63,15 @@ _allowed_symbols = [
     'ModelAverageOptimizer',
     'ModelAverageCustomGetter',
     'GGTOptimizer',
+    'InGraphLBFGSOptimizer',
+    'LBFGSResults',
+    'lbfgs_minimize',
+    'FusedApplyExtension',
+    'extend_with_fused_apply',
+    'FusedAdagradOptimizer',
+    'FusedAdamOptimizer',
+    'FusedMomentumOptimizer',
+    'FusedRMSPropOptimizer',
 ]
 
 remove_undocumented(__name__, _allowed_symbols)
@@ -132,12 +132,18 @@ class ExternalOptimizerInterface(object):
         self._pack(inequality_grads) for inequality_grads in inequalities_grads
     ]
 
-    dims = [_prod(_get_shape_tuple(var)) for var in self._vars]
+    self._var_shapes = [_get_shape_tuple(var) for var in self._vars]
+    dims = [_prod(shape) for shape in self._var_shapes]
     accumulated_dims = list(_accumulate(dims))
     self._packing_slices = [
         slice(start, end)
         for start, end in zip(accumulated_dims[:-1], accumulated_dims[1:])
     ]
+    # When all variables have the same dtype, the packed vector is converted
+    # once per evaluation rather than once per variable.
+    var_dtypes = set(var.dtype.base_dtype for var in self._vars)
+    self._packed_dtype = (
+        var_dtypes.pop().as_numpy_dtype if len(var_dtypes) == 1 else None)
 
   def minimize(self,
                session=None,
@@ -205,9 +211,7 @@ class ExternalOptimizerInterface(object):
         packed_bounds=self._packed_bounds,
         step_callback=step_callback,
         optimizer_kwargs=self.optimizer_kwargs)
-    var_vals = [
-        packed_var_val[packing_slice] for packing_slice in self._packing_slices
-    ]
+    var_vals = self._unpack(packed_var_val)
 
     # Set optimization variables to their new values.
     session.run(
@@ -258,21 +262,38 @@ class ExternalOptimizerInterface(object):
       flattened = [array_ops.reshape(tensor, [-1]) for tensor in tensors]
       return array_ops.concat(flattened, 0)
 
+  def _unpack(self, packed_val):
+    """Split a packed NumPy vector into one array per variable.
+
+    The arrays are views into `packed_val` whenever its dtype matches the
+    variables', so no copy is made before the values are fed to the session.
+
+    Args:
+      packed_val: A NumPy vector, as passed to or returned by `_minimize`.
+
+    Returns:
+      A list of NumPy arrays with the shapes of the optimization variables.
+    """
+    packed_val = np.asarray(packed_val)
+    if self._packed_dtype is not None:
+      packed_val = packed_val.astype(self._packed_dtype, copy=False)
+    return [
+        packed_val[packing_slice].reshape(shape)
+        for packing_slice, shape in zip(self._packing_slices, self._var_shapes)
+    ]
+
   def _make_eval_func(self, tensors, session, feed_dict, fetches,
                       callback=None):
     """Construct a function that evaluates a `Tensor` or list of `Tensor`s."""
     if not isinstance(tensors, list):
       tensors = [tensors]
     num_tensors = len(tensors)
+    augmented_fetches = tensors + fetches
 
     def eval_func(x):
       """Function to evaluate a `Tensor`."""
-      augmented_feed_dict = {
-          var: x[packing_slice].reshape(_get_shape_tuple(var))
-          for var, packing_slice in zip(self._vars, self._packing_slices)
-      }
+      augmented_feed_dict = dict(zip(self._vars, self._unpack(x)))
       augmented_feed_dict.update(feed_dict)
-      augmented_fetches = tensors + fetches
 
       augmented_fetch_vals = session.run(
           augmented_fetches, feed_dict=augmented_feed_dict)
@@ -365,7 +386,7 @@ class ScipyOptimizerInterface(ExternalOptimizerInterface):
     def loss_grad_func_wrapper(x):
       # SciPy's L-BFGS-B Fortran implementation requires gradients as doubles.
       loss, gradient = loss_grad_func(x)
-      return loss, gradient.astype('float64')
+      return loss, gradient.astype('float64', copy=False)
 
     optimizer_kwargs = dict(optimizer_kwargs.items())
     method = optimizer_kwargs.pop('method', self._DEFAULT_METHOD)
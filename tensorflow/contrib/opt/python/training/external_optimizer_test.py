@@ -130,6 +130,24 @@ class ExternalOptimizerInterfaceTest(TestCase):
       args, _ = step_callback.call_args
       self.assertAllClose(initial_vector_val, args[0])
 
+  def test_unpack_returns_views(self):
+    vector = variables.Variable(array_ops.zeros([2]), 'vector')
+    matrix = variables.Variable(array_ops.zeros([2, 3]), 'matrix')
+    loss = math_ops.reduce_sum(vector) + math_ops.reduce_sum(matrix)
+    optimizer = MockOptimizerInterface(loss)
+
+    packed_val = np.arange(8, dtype=np.float32)
+    vector_val, matrix_val = optimizer._unpack(packed_val)
+    self.assertAllClose(np.arange(2), vector_val)
+    self.assertAllClose(np.arange(6).reshape(2, 3) + 2, matrix_val)
+    self.assertTrue(np.shares_memory(packed_val, vector_val))
+    self.assertTrue(np.shares_memory(packed_val, matrix_val))
+
+    # Packed values of another dtype are converted once.
+    vector_val, matrix_val = optimizer._unpack(packed_val.astype(np.float64))
+    self.assertEqual(np.float32, vector_val.dtype)
+    self.assertIs(vector_val.base, matrix_val.base)
+
 
 class ScipyOptimizerInterfaceTest(TestCase):
 
@@ -0,0 +1,399 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Optimizers that apply the updates of many small variables at once."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+
+from tensorflow.python.eager import context
+from tensorflow.python.framework import ops
+from tensorflow.python.framework import tensor_shape
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import init_ops
+from tensorflow.python.ops import resource_variable_ops
+from tensorflow.python.ops import state_ops
+from tensorflow.python.training import adagrad
+from tensorflow.python.training import adam
+from tensorflow.python.training import distribute as distribute_lib
+from tensorflow.python.training import momentum as momentum_opt
+from tensorflow.python.training import optimizer
+from tensorflow.python.training import rmsprop
+
+__all__ = [
+    'FusedApplyExtension',
+    'extend_with_fused_apply',
+    'FusedAdagradOptimizer',
+    'FusedAdamOptimizer',
+    'FusedMomentumOptimizer',
+    'FusedRMSPropOptimizer',
+]
+
+
+class FusedApplyExtension(object):
+  """This class allows to extend optimizers with fused dense updates.
+
+  Models with many small variables spend most of the time of an update step
+  scheduling the tiny update ops of each variable and its slots. With this
+  extension, variables that have a dense gradient, the same dtype and the same
+  device are updated as a group:
+
+  * The gradients of the group are concatenated into one vector.
+  * The slots of the group (e.g. Adam's `m` and `v`) are single vectors,
+    created by the base optimizer for a per-group delta buffer.
+  * The base optimizer's dense update kernel runs once, on the delta buffer
+    set to zero. The buffer then holds the negated update of every variable,
+    which is added to each variable.
+
+  The kernel computes the same element-wise expressions as when it is applied
+  to each variable, and `var + (-update)` equals `var - update` in IEEE
+  arithmetic, so the results match those of the base optimizer. This only
+  holds for optimizers whose dense update does not read the value of the
+  variable, such as Adam, Momentum, Adagrad and RMSProp.
+
+  Sparse gradients, variables with constraints or shapes that are not fully
+  defined, and variables with more than `max_fused_size` elements are updated
+  by the base optimizer as usual. So are all variables when executing eagerly
+  or with a `DistributionStrategy`.
+
+  Fused variables have no slots of their own: `get_slot(var, 'm')` returns
+  None, and the slots of their group are slots of the delta buffer, which is
+  the `'fused_delta'` slot of the first variable of the group (by name). The
+  same variables must therefore be fused together in every call to
+  `apply_gradients`, and checkpoints are not interchangeable with those of the
+  base optimizer.
+
+  In order for it to work, it must be the first class the optimizer inherits
+  from, e.g.
+
+  ```python
+  class FusedAdamOptimizer(FusedApplyExtension, adam.AdamOptimizer):
+    def __init__(self, max_fused_size, *args, **kwargs):
+      super(FusedAdamOptimizer, self).__init__(max_fused_size, *args, **kwargs)
+  ```
+  """
+
+  def __init__(self, max_fused_size, *args, **kwargs):
+    """Construct the extension class that fuses the updates of an optimizer.
+
+    Args:
+      max_fused_size: The maximum number of elements of a variable for it to
+        be fused with others. Larger variables gain little from fusion but
+        cost an extra copy of their gradient.
+      *args: The arguments of the base optimizer.
+      **kwargs: The keyword arguments of the base optimizer.
+    """
+    self._max_fused_size = max_fused_size
+    # Maps each fused variable to the first variable of its group.
+    self._fused_primaries = {}
+    super(FusedApplyExtension, self).__init__(*args, **kwargs)
+
+  def _fusion_key(self, grad, var):
+    """Returns the key of the group that var can join, or None."""
+    if not isinstance(grad, ops.Tensor):
+      return None
+    # pylint: disable=protected-access
+    processor = optimizer._get_processor(var)
+    if not isinstance(processor, (optimizer._RefVariableProcessor,
+                                  optimizer._DenseResourceVariableProcessor)):
+      return None
+    # pylint: enable=protected-access
+    if var.constraint is not None:
+      return None
+    shape = var.get_shape()
+    if not shape.is_fully_defined() or (
+        shape.num_elements() > self._max_fused_size):
+      return None
+    return (var.dtype.base_dtype, var.device, type(processor))
+
+  def _group_for_fusion(self, grads_and_vars):
+    """Splits grads_and_vars into fused groups and the remaining pairs."""
+    groups = collections.OrderedDict()
+    for grad, var in grads_and_vars:
+      if grad is None:
+        continue
+      key = self._fusion_key(grad, var)
+      if key is not None:
+        groups.setdefault(key, []).append((grad, var))
+    fused = []
+    fused_vars = set()
+    for key, group in groups.items():
+      # A variable on its own gains nothing from fusion.
+      if len(group) > 1:
+        group = sorted(group, key=lambda gv: gv[1].op.name)
+        fused.append((key, group))
+        fused_vars.update(var for _, var in group)
+    unfused = [(g, v) for g, v in grads_and_vars if v not in fused_vars]
+    return fused, unfused
+
+  def _get_fused_delta(self, var_list):
+    """Returns the delta buffer of a group, creating it if needed."""
+    total_size = sum(var.get_shape().num_elements() for var in var_list)
+    primary = var_list[0]
+    delta = self._get_or_make_slot_with_initializer(
+        primary, init_ops.zeros_initializer(),
+        tensor_shape.TensorShape([total_size]), primary.dtype.base_dtype,
+        'fused_delta', self._name + '_fused')
+    for var in var_list:
+      # pylint: disable=protected-access
+      previous = self._fused_primaries.setdefault(
+          optimizer._var_key(var), optimizer._var_key(primary))
+      if (previous != optimizer._var_key(primary) or
+          delta.get_shape().num_elements() != total_size):
+        raise ValueError(
+            'Variable %s was fused with a different set of variables in a '
+            'previous call to apply_gradients.' % var.op.name)
+      # pylint: enable=protected-access
+    return delta
+
+  def _fused_update_op(self, processor_type, grads_and_vars, delta):
+    """Returns the ops that apply the dense updates of a group."""
+    grads = [grad for grad, _ in grads_and_vars]
+    var_list = [var for _, var in grads_and_vars]
+    flat_grad = array_ops.concat(
+        [array_ops.reshape(grad, [-1]) for grad in grads], 0)
+    with ops.control_dependencies(
+        [state_ops.assign(delta, array_ops.zeros_like(flat_grad))]):
+      # pylint: disable=protected-access
+      if processor_type is optimizer._RefVariableProcessor:
+        apply_op = self._apply_dense(flat_grad, delta)
+      else:
+        apply_op = self._resource_apply_dense(flat_grad, delta)
+      # pylint: enable=protected-access
+    with ops.control_dependencies([apply_op]):
+      deltas = array_ops.split(
+          delta.read_value(),
+          [var.get_shape().num_elements() for var in var_list])
+    update_ops = []
+    for var, var_delta in zip(var_list, deltas):
+      with ops.colocate_with(var):
+        var_delta = array_ops.reshape(var_delta, var.get_shape())
+        if isinstance(var, resource_variable_ops.ResourceVariable):
+          update_ops.append(var.assign_add(var_delta, read_value=False))
+        else:
+          update_ops.append(
+              state_ops.assign_add(
+                  var, var_delta, use_locking=self._use_locking).op)
+    return update_ops
+
+  def apply_gradients(self, grads_and_vars, global_step=None, name=None):
+    """Apply gradients to variables, fusing the updates of small variables.
+
+    For more information see the documentation of Optimizer.apply_gradients.
+    """
+    if (context.executing_eagerly() or
+        distribute_lib.has_distribution_strategy()):
+      return super(FusedApplyExtension, self).apply_gradients(
+          grads_and_vars, global_step=global_step, name=name)
+
+    grads_and_vars = tuple(grads_and_vars)  # Make sure repeat iteration works.
+    if not grads_and_vars:
+      raise ValueError('No variables provided.')
+    converted_grads_and_vars = []
+    for g, v in grads_and_vars:
+      if g is not None:
+        try:
+          # Convert the grad to Tensor or IndexedSlices if necessary.
+          g = ops.convert_to_tensor_or_indexed_slices(g)
+        except TypeError:
+          raise TypeError(
+              'Gradient must be convertible to a Tensor'
+              ' or IndexedSlices, or None: %s' % g)
+        if not isinstance(g, (ops.Tensor, ops.IndexedSlices)):
+          raise TypeError(
+              'Gradient must be a Tensor, IndexedSlices, or None: %s' % g)
+      converted_grads_and_vars.append((g, v))
+    if all(g is None for g, _ in converted_grads_and_vars):
+      raise ValueError('No gradients provided for any variable: %s.' %
+                       ([str(v) for _, v in converted_grads_and_vars],))
+
+    fused, unfused = self._group_for_fusion(converted_grads_and_vars)
+    with ops.init_scope():
+      deltas = [self._get_fused_delta([v for _, v in group])
+                for _, group in fused]
+      self._create_slots(
+          [v for g, v in unfused if g is not None] + deltas)
+
+    update_ops = []
+    with ops.name_scope(name, self._name) as name:
+      self._prepare()
+      for grad, var in unfused:
+        if grad is None:
+          continue
+        # pylint: disable=protected-access
+        processor = optimizer._get_processor(var)
+        # pylint: enable=protected-access
+        with ops.name_scope('update_' + var.op.name), ops.colocate_with(var):
+          update_ops.append(processor.update_op(self, grad))
+      for (key, group), delta in zip(fused, deltas):
+        with ops.name_scope('fused_update'), ops.colocate_with(delta):
+          update_ops.extend(self._fused_update_op(key[-1], group, delta))
+      if global_step is None:
+        apply_updates = self._finish(update_ops, name)
+      else:
+        with ops.control_dependencies([self._finish(update_ops, 'update')]):
+          with ops.colocate_with(global_step):
+            apply_updates = state_ops.assign_add(global_step, 1, name=name)
+
+      if isinstance(apply_updates, ops.Tensor):
+        apply_updates = apply_updates.op
+      train_op = ops.get_collection_ref(ops.GraphKeys.TRAIN_OP)
+      if apply_updates not in train_op:
+        train_op.append(apply_updates)
+
+      return apply_updates
+
+
+def extend_with_fused_apply(base_optimizer):
+  """Factory function returning an optimizer class with fused dense updates.
+
+  Returns an optimizer class. An instance of the returned class computes the
+  update step of `base_optimizer`, updating small variables in groups as
+  described in `FusedApplyExtension`. E.g., the class returned by
+  `extend_with_fused_apply(tf.train.AdamOptimizer)` is equivalent to
+  `tf.contrib.opt.FusedAdamOptimizer`.
+
+  The constructor of the new class accepts the optional keyword argument
+  `max_fused_size` in addition to the arguments of `base_optimizer`.
+
+  Args:
+    base_optimizer: An optimizer class that inherits from tf.train.Optimizer,
+      whose dense updates are element-wise and do not read the variable.
+
+  Returns:
+    A new optimizer class that inherits from FusedApplyExtension and
+    base_optimizer.
+  """
+
+  class OptimizerWithFusedApply(FusedApplyExtension, base_optimizer):
+    """Base_optimizer that updates small variables in groups."""
+
+    def __init__(self, *args, **kwargs):
+      max_fused_size = kwargs.pop('max_fused_size', 65536)
+      super(OptimizerWithFusedApply, self).__init__(
+          max_fused_size, *args, **kwargs)
+
+  return OptimizerWithFusedApply
+
+
+class FusedAdamOptimizer(FusedApplyExtension, adam.AdamOptimizer):
+  """Adam optimizer that updates small variables in groups.
+
+  See `FusedApplyExtension` and `tf.train.AdamOptimizer`.
+  """
+
+  def __init__(self, learning_rate=0.001, beta1=0.9, beta2=0.999,
+               epsilon=1e-8, use_locking=False, name='Adam',
+               max_fused_size=65536):
+    """Construct a new fused Adam optimizer.
+
+    Args:
+      learning_rate: A Tensor or a floating point value.  The learning rate.
+      beta1: A float value or a constant float tensor.
+        The exponential decay rate for the 1st moment estimates.
+      beta2: A float value or a constant float tensor.
+        The exponential decay rate for the 2nd moment estimates.
+      epsilon: A small constant for numerical stability.
+      use_locking: If True use locks for update operations.
+      name: Optional name for the operations created when applying gradients.
+        Defaults to "Adam".
+      max_fused_size: The maximum number of elements of a fused variable.
+    """
+    super(FusedAdamOptimizer, self).__init__(
+        max_fused_size, learning_rate=learning_rate,
+        beta1=beta1, beta2=beta2, epsilon=epsilon, use_locking=use_locking,
+        name=name)
+
+
+class FusedMomentumOptimizer(FusedApplyExtension,
+                             momentum_opt.MomentumOptimizer):
+  """Momentum optimizer that updates small variables in groups.
+
+  See `FusedApplyExtension` and `tf.train.MomentumOptimizer`.
+  """
+
+  def __init__(self, learning_rate, momentum, use_locking=False,
+               name='Momentum', use_nesterov=False, max_fused_size=65536):
+    """Construct a new fused Momentum optimizer.
+
+    Args:
+      learning_rate: A `Tensor` or a floating point value.  The learning rate.
+      momentum: A `Tensor` or a floating point value.  The momentum.
+      use_locking: If `True` use locks for update operations.
+      name: Optional name prefix for the operations created when applying
+        gradients.  Defaults to "Momentum".
+      use_nesterov: If `True` use Nesterov Momentum.
+      max_fused_size: The maximum number of elements of a fused variable.
+    """
+    super(FusedMomentumOptimizer, self).__init__(
+        max_fused_size, learning_rate=learning_rate,
+        momentum=momentum, use_locking=use_locking, name=name,
+        use_nesterov=use_nesterov)
+
+
+class FusedAdagradOptimizer(FusedApplyExtension, adagrad.AdagradOptimizer):
+  """Adagrad optimizer that updates small variables in groups.
+
+  See `FusedApplyExtension` and `tf.train.AdagradOptimizer`.
+  """
+
+  def __init__(self, learning_rate, initial_accumulator_value=0.1,
+               use_locking=False, name='Adagrad', max_fused_size=65536):
+    """Construct a new fused Adagrad optimizer.
+
+    Args:
+      learning_rate: A `Tensor` or a floating point value.  The learning rate.
+      initial_accumulator_value: A floating point value.
+        Starting value for the accumulators, must be positive.
+      use_locking: If `True` use locks for update operations.
+      name: Optional name prefix for the operations created when applying
+        gradients.  Defaults to "Adagrad".
+      max_fused_size: The maximum number of elements of a fused variable.
+    """
+    super(FusedAdagradOptimizer, self).__init__(
+        max_fused_size, learning_rate=learning_rate,
+        initial_accumulator_value=initial_accumulator_value,
+        use_locking=use_locking, name=name)
+
+
+class FusedRMSPropOptimizer(FusedApplyExtension, rmsprop.RMSPropOptimizer):
+  """RMSProp optimizer that updates small variables in groups.
+
+  See `FusedApplyExtension` and `tf.train.RMSPropOptimizer`.
+  """
+
+  def __init__(self, learning_rate, decay=0.9, momentum=0.0, epsilon=1e-10,
+               use_locking=False, centered=False, name='RMSProp',
+               max_fused_size=65536):
+    """Construct a new fused RMSProp optimizer.
+
+    Args:
+      learning_rate: A Tensor or a floating point value.  The learning rate.
+      decay: Discounting factor for the history/coming gradient
+      momentum: A scalar tensor.
+      epsilon: Small value to avoid zero denominator.
+      use_locking: If True use locks for update operation.
+      centered: If True, gradients are normalized by the estimated variance of
+        the gradient; if False, by the uncentered second moment.
+      name: Optional name prefix for the operations created when applying
+        gradients. Defaults to "RMSProp".
+      max_fused_size: The maximum number of elements of a fused variable.
+    """
+    super(FusedRMSPropOptimizer, self).__init__(
+        max_fused_size, learning_rate=learning_rate,
+        decay=decay, momentum=momentum, epsilon=epsilon,
+        use_locking=use_locking, centered=centered, name=name)
@@ -0,0 +1,150 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for optimizers with fused dense updates."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+from tensorflow.contrib.opt.python.training import fused_apply_optimizers
+from tensorflow.python.client import session
+from tensorflow.python.framework import ops
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import control_flow_ops
+from tensorflow.python.ops import embedding_ops
+from tensorflow.python.ops import math_ops
+from tensorflow.python.ops import resource_variable_ops
+from tensorflow.python.ops import variables
+from tensorflow.python.platform import test
+from tensorflow.python.training import adagrad
+from tensorflow.python.training import adam
+from tensorflow.python.training import momentum as momentum_opt
+from tensorflow.python.training import rmsprop
+
+_OPTIMIZERS = [
+    (adam.AdamOptimizer, fused_apply_optimizers.FusedAdamOptimizer,
+     dict(learning_rate=0.1)),
+    (momentum_opt.MomentumOptimizer,
+     fused_apply_optimizers.FusedMomentumOptimizer,
+     dict(learning_rate=0.1, momentum=0.9, use_nesterov=True)),
+    (adagrad.AdagradOptimizer, fused_apply_optimizers.FusedAdagradOptimizer,
+     dict(learning_rate=0.1)),
+    (rmsprop.RMSPropOptimizer, fused_apply_optimizers.FusedRMSPropOptimizer,
+     dict(learning_rate=0.1, momentum=0.5, centered=True)),
+]
+
+
+def _build_model(use_resource):
+  """Returns the variables and the loss of a model with small variables."""
+  make_variable = (resource_variable_ops.ResourceVariable if use_resource
+                   else variables.Variable)
+  rng = np.random.RandomState(0)
+  var_list = [
+      make_variable(np.asarray(rng.randn(*shape), np.float32),
+                    name='v%d' % i)
+      for i, shape in enumerate([[3], [2, 2], [], [4, 1], [5]])
+  ]
+  # An embedding whose gradient is sparse, and thus is never fused.
+  embedding = make_variable(rng.randn(4, 2).astype(np.float32), name='emb')
+  loss = math_ops.add_n([
+      math_ops.reduce_sum(math_ops.square(var - float(i)) * float(i + 1))
+      for i, var in enumerate(var_list)])
+  loss += math_ops.reduce_sum(
+      embedding_ops.embedding_lookup(embedding, [0, 2]))
+  return var_list + [embedding], loss
+
+
+class FusedApplyOptimizersTest(test.TestCase):
+
+  def _train(self, optimizer_fn, use_resource, num_steps=3):
+    with ops.Graph().as_default(), self.test_session() as sess:
+      var_list, loss = _build_model(use_resource)
+      opt = optimizer_fn()
+      train_op = opt.minimize(loss)
+      sess.run(variables.global_variables_initializer())
+      for _ in range(num_steps):
+        sess.run(train_op)
+      return sess.run(var_list), opt
+
+  def testMatchesBaseOptimizers(self):
+    for base_cls, fused_cls, kwargs in _OPTIMIZERS:
+      for use_resource in (False, True):
+        expected, _ = self._train(lambda: base_cls(**kwargs), use_resource)
+        actual, _ = self._train(lambda: fused_cls(**kwargs), use_resource)
+        for expected_val, actual_val in zip(expected, actual):
+          self.assertAllClose(expected_val, actual_val, rtol=1e-6, atol=1e-6)
+
+  def testSlots(self):
+    with ops.Graph().as_default():
+      var_list, loss = _build_model(use_resource=False)
+      opt = fused_apply_optimizers.FusedAdamOptimizer(max_fused_size=4)
+      opt.minimize(loss)
+      v0, v1, v2, v3, v4, embedding = var_list
+      # v4 is too large to be fused.
+      for var in (v4, embedding):
+        self.assertIsNotNone(opt.get_slot(var, 'm'))
+      for var in (v0, v1, v2, v3):
+        self.assertIsNone(opt.get_slot(var, 'm'))
+      delta = opt.get_slot(v0, 'fused_delta')
+      self.assertEqual([3 + 4 + 1 + 4], delta.get_shape().as_list())
+      self.assertEqual([12], opt.get_slot(delta, 'm').get_shape().as_list())
+
+      # A second step over the same variables reuses the buffers.
+      opt.minimize(loss)
+      self.assertIs(delta, opt.get_slot(v0, 'fused_delta'))
+      with self.assertRaisesRegexp(ValueError, 'different set of variables'):
+        opt.minimize(loss, var_list=[v1, v2, v3])
+
+  def testExtendWithFusedApply(self):
+    fused_cls = fused_apply_optimizers.extend_with_fused_apply(
+        momentum_opt.MomentumOptimizer)
+    expected, _ = self._train(
+        lambda: momentum_opt.MomentumOptimizer(0.1, 0.9), use_resource=False)
+    actual, opt = self._train(
+        lambda: fused_cls(0.1, momentum=0.9, max_fused_size=4),
+        use_resource=False)
+    self.assertEqual(4, opt._max_fused_size)
+    for expected_val, actual_val in zip(expected, actual):
+      self.assertAllClose(expected_val, actual_val, rtol=1e-6, atol=1e-6)
+
+
+class FusedApplyOptimizersBenchmark(test.Benchmark):
+  """Compares the step time of fused and per-variable updates."""
+
+  def _benchmark(self, optimizer_fn, name, num_vars=2000, var_size=16):
+    with ops.Graph().as_default(), session.Session() as sess:
+      var_list = [
+          variables.Variable(array_ops.ones([var_size]), name='v%d' % i)
+          for i in range(num_vars)
+      ]
+      # The gradients are constants so that the step time is dominated by the
+      # updates.
+      grads = [array_ops.ones([var_size]) for _ in var_list]
+      train_op = optimizer_fn().apply_gradients(zip(grads, var_list))
+      sess.run(variables.global_variables_initializer())
+      self.run_op_benchmark(
+          sess, control_flow_ops.group(train_op), min_iters=20,
+          name='%s_%d_vars_of_size_%d' % (name, num_vars, var_size))
+
+  def benchmarkManySmallVariables(self):
+    for base_cls, fused_cls, kwargs in _OPTIMIZERS:
+      self._benchmark(lambda: base_cls(**kwargs), base_cls.__name__)
+      self._benchmark(lambda: fused_cls(**kwargs), fused_cls.__name__)
+
+
+if __name__ == '__main__':
+  test.main()
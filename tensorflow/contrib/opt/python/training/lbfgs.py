@@ -0,0 +1,352 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""L-BFGS minimization that runs entirely in the TensorFlow graph."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+
+from tensorflow.python.framework import ops
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import control_flow_ops
+from tensorflow.python.ops import gradients
+from tensorflow.python.ops import math_ops
+from tensorflow.python.ops import variables
+
+__all__ = ['InGraphLBFGSOptimizer', 'LBFGSResults', 'lbfgs_minimize']
+
+
+LBFGSResults = collections.namedtuple('LBFGSResults', [
+    # Scalar boolean `Tensor`, whether the gradient tolerance was reached.
+    'converged',
+    # Scalar boolean `Tensor`, whether a line search failed to find a point
+    # that sufficiently decreases the objective.
+    'failed',
+    # Scalar int32 `Tensor`, the number of iterations of the algorithm.
+    'num_iterations',
+    # Scalar int32 `Tensor`, the number of evaluations of the objective.
+    'num_objective_evaluations',
+    # Rank-1 `Tensor`, the best position found.
+    'position',
+    # Scalar `Tensor`, the objective at `position`.
+    'objective_value',
+    # Rank-1 `Tensor`, the gradient of the objective at `position`.
+    'objective_gradient',
+])
+
+
+def _dot(x, y):
+  return math_ops.reduce_sum(x * y)
+
+
+def _search_direction(gradient, s_history, y_history, rho_history):
+  """Computes the L-BFGS direction with the two-loop recursion.
+
+  The history is ordered from the oldest to the newest correction pair. Empty
+  slots have `rho == 0` and do not contribute to the direction. The loops are
+  unrolled, since the number of pairs is small and known statically.
+
+  Args:
+    gradient: Rank-1 `Tensor`, the gradient at the current position.
+    s_history: `Tensor` of shape `[m, n]`, the position differences.
+    y_history: `Tensor` of shape `[m, n]`, the gradient differences.
+    rho_history: `Tensor` of shape `[m]`, the inverse curvatures `1 / y's`.
+
+  Returns:
+    The search direction, a rank-1 `Tensor`.
+  """
+  num_pairs = s_history.get_shape()[0].value
+  q = gradient
+  alphas = [None] * num_pairs
+  for i in reversed(range(num_pairs)):
+    alphas[i] = rho_history[i] * _dot(s_history[i], q)
+    q -= alphas[i] * y_history[i]
+
+  # Scale by the curvature of the newest pair. Without any pair, take a step
+  # of length at most one along the gradient.
+  s, y, rho = s_history[-1], y_history[-1], rho_history[-1]
+  gamma = array_ops.where(
+      rho > 0.,
+      _dot(s, y) / _dot(y, y),
+      1. / math_ops.maximum(1., math_ops.sqrt(_dot(gradient, gradient))))
+  r = gamma * q
+  for i in range(num_pairs):
+    beta = rho_history[i] * _dot(y_history[i], r)
+    r += (alphas[i] - beta) * s_history[i]
+  return -r
+
+
+def lbfgs_minimize(value_and_gradients_function,
+                   initial_position,
+                   num_correction_pairs=10,
+                   tolerance=1e-5,
+                   max_iterations=100,
+                   max_line_search_iterations=20,
+                   sufficient_decrease=1e-4,
+                   parallel_iterations=1,
+                   name=None):
+  """Minimizes a differentiable function with L-BFGS, in-graph.
+
+  Each iteration computes a search direction from the last
+  `num_correction_pairs` position and gradient differences, then takes a step
+  along it that satisfies the Armijo condition, found by backtracking. Pairs
+  with non-positive curvature are discarded so that the approximation of the
+  inverse Hessian stays positive definite.
+
+  All computations are graph operations inside a `tf.while_loop`, so the
+  minimization runs to completion within a single `Session.run` call.
+
+  Args:
+    value_and_gradients_function: A Python callable that accepts a rank-1
+      `Tensor` of the same shape and dtype as `initial_position` and returns a
+      tuple `(value, gradient)` of the objective and its gradient at that
+      point. It is called inside the loop body and must build new ops.
+    initial_position: Rank-1 floating point `Tensor`, the starting point.
+    num_correction_pairs: Python int, the number of correction pairs to keep.
+    tolerance: The algorithm stops once the largest absolute entry of the
+      gradient is at most this value.
+    max_iterations: The maximum number of iterations.
+    max_line_search_iterations: The maximum number of step halvings within one
+      line search. The minimization stops if a line search fails.
+    sufficient_decrease: The constant of the Armijo condition.
+    parallel_iterations: Passed to the `tf.while_loop`s.
+    name: Optional name scope for the created ops.
+
+  Returns:
+    An `LBFGSResults` tuple.
+
+  Raises:
+    ValueError: If `initial_position` is not a rank-1 `Tensor` with a static
+      number of elements, or if `num_correction_pairs` is less than 1.
+  """
+  if num_correction_pairs < 1:
+    raise ValueError('num_correction_pairs must be positive, got %d' %
+                     num_correction_pairs)
+  with ops.name_scope(name, 'lbfgs_minimize', [initial_position]):
+    initial_position = ops.convert_to_tensor(
+        initial_position, name='initial_position')
+    shape = initial_position.get_shape()
+    if shape.ndims != 1 or shape[0].value is None:
+      raise ValueError('initial_position must be a rank-1 Tensor with a '
+                       'known size, got shape %s' % shape)
+    dtype = initial_position.dtype.base_dtype
+    n = shape[0].value
+    tolerance = math_ops.cast(tolerance, dtype)
+    c1 = math_ops.cast(sufficient_decrease, dtype)
+
+    def _converged(gradient):
+      return math_ops.reduce_max(math_ops.abs(gradient)) <= tolerance
+
+    def _body(k, num_evaluations, unused_converged, unused_failed, x, f, g,
+              s_history, y_history, rho_history):
+      """One L-BFGS iteration."""
+      d = _search_direction(g, s_history, y_history, rho_history)
+      slope = _dot(g, d)
+      # Fall back to steepest descent if the direction doesn't decrease f.
+      is_descent = slope < 0.
+      d = array_ops.where(is_descent, d, -g)
+      slope = array_ops.where(is_descent, slope, -_dot(g, g))
+
+      def _sufficient_decrease(t, f_new):
+        return f_new <= f + c1 * t * slope
+
+      def _line_search_cond(i, t, f_new, unused_g_new):
+        return math_ops.logical_and(
+            i < max_line_search_iterations,
+            math_ops.logical_not(_sufficient_decrease(t, f_new)))
+
+      def _line_search_body(i, t, unused_f_new, unused_g_new):
+        t *= 0.5
+        f_new, g_new = value_and_gradients_function(x + t * d)
+        return i + 1, t, f_new, g_new
+
+      f_new, g_new = value_and_gradients_function(x + d)
+      i, t, f_new, g_new = control_flow_ops.while_loop(
+          _line_search_cond,
+          _line_search_body,
+          [0, array_ops.ones([], dtype), f_new, g_new],
+          parallel_iterations=parallel_iterations,
+          back_prop=False)
+      failed = math_ops.logical_not(_sufficient_decrease(t, f_new))
+
+      s = t * d
+      y = g_new - g
+      sy = _dot(s, y)
+      # Only accepted steps with positive curvature enter the history.
+      add_pair = math_ops.logical_and(math_ops.logical_not(failed), sy > 0.)
+      s_history, y_history, rho_history = control_flow_ops.cond(
+          add_pair,
+          lambda: (array_ops.concat([s_history[1:], [s]], 0),
+                   array_ops.concat([y_history[1:], [y]], 0),
+                   array_ops.concat([rho_history[1:], [1. / sy]], 0)),
+          lambda: (s_history, y_history, rho_history))
+
+      x, f, g = control_flow_ops.cond(
+          failed, lambda: (x, f, g), lambda: (x + s, f_new, g_new))
+      return (k + 1, num_evaluations + i + 1, _converged(g), failed, x, f, g,
+              s_history, y_history, rho_history)
+
+    def _cond(k, unused_num_evaluations, converged, failed, *unused_args):
+      return math_ops.logical_and(
+          k < max_iterations,
+          math_ops.logical_not(math_ops.logical_or(converged, failed)))
+
+    f0, g0 = value_and_gradients_function(initial_position)
+    loop_vars = [
+        0, 1, _converged(g0), False, initial_position, f0, g0,
+        array_ops.zeros([num_correction_pairs, n], dtype),
+        array_ops.zeros([num_correction_pairs, n], dtype),
+        array_ops.zeros([num_correction_pairs], dtype),
+    ]
+    (num_iterations, num_evaluations, converged, failed, position, value,
+     gradient, _, _, _) = control_flow_ops.while_loop(
+         _cond,
+         _body,
+         loop_vars,
+         parallel_iterations=parallel_iterations,
+         back_prop=False)
+    return LBFGSResults(
+        converged=converged,
+        failed=failed,
+        num_iterations=num_iterations,
+        num_objective_evaluations=num_evaluations,
+        position=position,
+        objective_value=value,
+        objective_gradient=gradient)
+
+
+class InGraphLBFGSOptimizer(object):
+  """Minimizes a loss over a set of variables with in-graph L-BFGS.
+
+  Unlike `ScipyOptimizerInterface`, no values leave the graph during the
+  minimization: the variables are packed into one flat vector, `lbfgs_minimize`
+  runs in a `tf.while_loop` and the result is assigned back to the variables.
+  Since the loss is evaluated at many positions within the loop, it is given
+  as a function of the variable values rather than as a `Tensor`.
+
+  Example:
+
+  ```python
+  vector = tf.Variable([7., 7.], 'vector')
+
+  def loss_fn(vector_value):
+    return tf.reduce_sum(tf.square(vector_value))
+
+  optimizer = InGraphLBFGSOptimizer(max_iterations=100)
+  minimize_op = optimizer.minimize(loss_fn, var_list=[vector])
+
+  with tf.Session() as session:
+    session.run(vector.initializer)
+    session.run(minimize_op)
+
+  # The value of vector should now be [0., 0.].
+  ```
+  """
+
+  def __init__(self,
+               num_correction_pairs=10,
+               tolerance=1e-5,
+               max_iterations=100,
+               max_line_search_iterations=20,
+               name='InGraphLBFGS'):
+    """Construct a new in-graph L-BFGS optimizer.
+
+    Args:
+      num_correction_pairs: The number of correction pairs to keep.
+      tolerance: The minimization stops once the largest absolute entry of the
+        gradient is at most this value.
+      max_iterations: The maximum number of iterations.
+      max_line_search_iterations: The maximum number of step halvings within
+        one line search.
+      name: Optional name prefix for the operations created.
+    """
+    self._num_correction_pairs = num_correction_pairs
+    self._tolerance = tolerance
+    self._max_iterations = max_iterations
+    self._max_line_search_iterations = max_line_search_iterations
+    self._name = name
+    self._results = None
+
+  @property
+  def results(self):
+    """The `LBFGSResults` of the last call to `minimize`, or None."""
+    return self._results
+
+  def minimize(self, loss_fn, var_list=None, name=None):
+    """Returns an op that minimizes `loss_fn` with respect to `var_list`.
+
+    Args:
+      loss_fn: A Python callable that takes one `Tensor` per variable in
+        `var_list`, holding candidate values of the variables, and returns the
+        scalar loss at these values.
+      var_list: Optional list of `Variable` objects of the same floating point
+        dtype and with fully defined shapes. Defaults to the list of variables
+        collected in the graph under the key `GraphKeys.TRAINABLE_VARIABLES`.
+      name: Optional name for the returned operation.
+
+    Returns:
+      An `Operation` that runs the minimization and assigns the best values
+      found to the variables.
+
+    Raises:
+      ValueError: If `var_list` is empty, or if the variables have different
+        dtypes or shapes that are not fully defined.
+    """
+    if var_list is None:
+      var_list = variables.trainable_variables()
+    var_list = list(var_list)
+    if not var_list:
+      raise ValueError('No variables to optimize.')
+    var_dtypes = set(var.dtype.base_dtype for var in var_list)
+    if len(var_dtypes) != 1 or not var_dtypes.pop().is_floating:
+      raise ValueError('All variables must have the same floating point '
+                       'dtype, got %s' % [var.dtype for var in var_list])
+    shapes = [var.get_shape() for var in var_list]
+    for var, shape in zip(var_list, shapes):
+      if not shape.is_fully_defined():
+        raise ValueError('The shape of %s is not fully defined: %s' %
+                         (var.name, shape))
+    sizes = [shape.num_elements() for shape in shapes]
+
+    def unpack(packed):
+      return [
+          array_ops.reshape(part, shape)
+          for part, shape in zip(array_ops.split(packed, sizes), shapes)
+      ]
+
+    def value_and_gradients(packed):
+      loss = loss_fn(*unpack(packed))
+      gradient = gradients.gradients(loss, packed)[0]
+      if gradient is None:
+        gradient = array_ops.zeros_like(packed)
+      return loss, gradient
+
+    with ops.name_scope(name, self._name, var_list) as scope:
+      initial_position = array_ops.concat(
+          [array_ops.reshape(var, [-1]) for var in var_list], 0)
+      self._results = lbfgs_minimize(
+          value_and_gradients,
+          initial_position,
+          num_correction_pairs=self._num_correction_pairs,
+          tolerance=self._tolerance,
+          max_iterations=self._max_iterations,
+          max_line_search_iterations=self._max_line_search_iterations)
+      assignments = [
+          var.assign(value)
+          for var, value in zip(var_list, unpack(self._results.position))
+      ]
+      return control_flow_ops.group(*assignments, name=scope)
@@ -0,0 +1,138 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for in-graph L-BFGS."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+from tensorflow.contrib.opt.python.training import lbfgs
+from tensorflow.python.framework import constant_op
+from tensorflow.python.framework import dtypes
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import gradients
+from tensorflow.python.ops import math_ops
+from tensorflow.python.ops import variables
+from tensorflow.python.platform import test
+
+
+def _rosenbrock(x):
+  return math_ops.reduce_sum(
+      100. * math_ops.square(x[1:] - math_ops.square(x[:-1])) +
+      math_ops.square(1. - x[:-1]))
+
+
+def _value_and_gradients(fn):
+
+  def value_and_gradients(x):
+    value = fn(x)
+    return value, gradients.gradients(value, x)[0]
+
+  return value_and_gradients
+
+
+class LBFGSMinimizeTest(test.TestCase):
+
+  def testQuadratic(self):
+    scales = np.array([1., 10., 100.])
+    minimum = np.array([1., -2., 3.])
+
+    def quadratic(x):
+      return math_ops.reduce_sum(scales * math_ops.square(x - minimum))
+
+    with self.test_session() as sess:
+      results = lbfgs.lbfgs_minimize(
+          _value_and_gradients(quadratic),
+          constant_op.constant([0., 0., 0.], dtype=dtypes.float64),
+          tolerance=1e-8)
+      results = sess.run(results)
+    self.assertTrue(results.converged)
+    self.assertFalse(results.failed)
+    self.assertAllClose(minimum, results.position)
+    self.assertAllClose(0., results.objective_value)
+    self.assertGreater(results.num_objective_evaluations,
+                       results.num_iterations)
+
+  def testRosenbrock(self):
+    with self.test_session() as sess:
+      results = lbfgs.lbfgs_minimize(
+          _value_and_gradients(_rosenbrock),
+          constant_op.constant([-1.2, 1., -1.2, 1.], dtype=dtypes.float64),
+          tolerance=1e-8,
+          max_iterations=200)
+      results = sess.run(results)
+    self.assertTrue(results.converged)
+    self.assertAllClose(np.ones(4), results.position, atol=1e-5)
+
+  def testMaxIterations(self):
+    with self.test_session() as sess:
+      results = lbfgs.lbfgs_minimize(
+          _value_and_gradients(_rosenbrock),
+          constant_op.constant([-1.2, 1.], dtype=dtypes.float64),
+          max_iterations=3)
+      results = sess.run(results)
+    self.assertFalse(results.converged)
+    self.assertEqual(3, results.num_iterations)
+
+  def testInvalidArguments(self):
+    with self.assertRaises(ValueError):
+      lbfgs.lbfgs_minimize(
+          _value_and_gradients(_rosenbrock), array_ops.zeros([2, 2]))
+    with self.assertRaises(ValueError):
+      lbfgs.lbfgs_minimize(
+          _value_and_gradients(_rosenbrock), array_ops.zeros([2]),
+          num_correction_pairs=0)
+
+
+class InGraphLBFGSOptimizerTest(test.TestCase):
+
+  def testMinimize(self):
+    vector = variables.Variable([7., -7.], name='vector')
+    matrix = variables.Variable(np.zeros([2, 3], np.float32), name='matrix')
+    target = np.arange(6, dtype=np.float32).reshape(2, 3)
+
+    def loss_fn(vector_value, matrix_value):
+      return (math_ops.reduce_sum(math_ops.square(vector_value - 1.)) +
+              math_ops.reduce_sum(math_ops.square(matrix_value - target)))
+
+    optimizer = lbfgs.InGraphLBFGSOptimizer(tolerance=1e-4)
+    minimize_op = optimizer.minimize(loss_fn, var_list=[vector, matrix])
+
+    with self.test_session() as sess:
+      sess.run(variables.global_variables_initializer())
+      sess.run(minimize_op)
+      self.assertAllClose([1., 1.], sess.run(vector), atol=1e-4)
+      self.assertAllClose(target, sess.run(matrix), atol=1e-4)
+      # The minimization ran in the graph, so its results are still available.
+      self.assertTrue(sess.run(optimizer.results.converged))
+
+  def testInvalidVariables(self):
+    optimizer = lbfgs.InGraphLBFGSOptimizer()
+    float_var = variables.Variable([1., 2.])
+    int_var = variables.Variable([1, 2])
+    double_var = variables.Variable(np.array([1., 2.]))
+    with self.assertRaises(ValueError):
+      optimizer.minimize(math_ops.reduce_sum, var_list=[])
+    with self.assertRaises(ValueError):
+      optimizer.minimize(math_ops.reduce_sum, var_list=[int_var])
+    with self.assertRaises(ValueError):
+      optimizer.minimize(lambda x, y: math_ops.reduce_sum(x + y),
+                         var_list=[float_var, double_var])
+
+
+if __name__ == '__main__':
+  test.main()
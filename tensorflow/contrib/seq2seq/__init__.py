@@ -45,6 +45,7 @@ _allowed_symbols = [
     "Helper",
     "CustomHelper",
     "FinalBeamSearchDecoderOutput",
+    "PackedBeamSearchDecoder",
     "gather_tree",
     "GreedyEmbeddingHelper",
     "InferenceHelper",
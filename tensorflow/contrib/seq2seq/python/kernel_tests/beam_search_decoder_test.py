@@ -19,22 +19,28 @@ from __future__ import division
 from __future__ import print_function
 # pylint: enable=unused-import
 
+import time
+
 import numpy as np
 
 from tensorflow.contrib.seq2seq.python.ops import attention_wrapper
 from tensorflow.contrib.seq2seq.python.ops import beam_search_decoder
 from tensorflow.contrib.seq2seq.python.ops import beam_search_ops
 from tensorflow.contrib.seq2seq.python.ops import decoder
+from tensorflow.python.client import session
 from tensorflow.python.framework import constant_op
 from tensorflow.python.framework import dtypes
 from tensorflow.python.framework import errors
 from tensorflow.python.framework import ops
+from tensorflow.python.framework import tensor_shape
 from tensorflow.python.layers import core as layers_core
 from tensorflow.python.ops import array_ops
 from tensorflow.python.ops import nn_ops
 from tensorflow.python.ops import rnn_cell
+from tensorflow.python.ops import tensor_array_ops
 from tensorflow.python.ops import variables
 from tensorflow.python.platform import test
+from tensorflow.python.util import nest
 
 # pylint: enable=g-import-not-at-top
 
@@ -521,5 +527,215 @@ class BeamSearchDecoderTest(test.TestCase):
         with_alignment_history=True)
 
 
+class _AccumulatingCell(rnn_cell.RNNCell):
+  """A cell whose outputs are its inputs, perturbed by the sum of its inputs.
+
+  Its state has several float32 tensors, which are packed, and an int32 step
+  counter, which isn't.
+  """
+
+  def __init__(self, depth):
+    super(_AccumulatingCell, self).__init__()
+    self._depth = depth
+
+  @property
+  def state_size(self):
+    return (self._depth, (tensor_shape.TensorShape([2, self._depth]),
+                          tensor_shape.TensorShape([1])))
+
+  @property
+  def output_size(self):
+    return self._depth
+
+  def initial_state(self, batch_size):
+    return (array_ops.zeros([batch_size, self._depth]),
+            (array_ops.zeros([batch_size, 2, self._depth]),
+             array_ops.zeros([batch_size, 1], dtypes.int32)))
+
+  def call(self, inputs, state):
+    inputs_sum, (scaled_inputs_sums, num_steps) = state
+    inputs_sum += inputs
+    scaled_inputs_sums += array_ops.stack([inputs, 2. * inputs], 1)
+    outputs = inputs + 1e-2 * inputs_sum + 1e-3 * scaled_inputs_sums[:, 1]
+    return outputs, (inputs_sum, (scaled_inputs_sums, num_steps + 1))
+
+
+class _TensorArrayStateCell(_AccumulatingCell):
+  """An `_AccumulatingCell` whose state also holds a `TensorArray`."""
+
+  @property
+  def state_size(self):
+    return (super(_TensorArrayStateCell, self).state_size, self._depth)
+
+
+class PackedBeamSearchDecoderTest(test.TestCase):
+
+  def _decode(self, decoder_cls, cell, initial_state, embedding, start_tokens,
+              end_token, beam_width, output_layer=None, **kwargs):
+    bsd = decoder_cls(
+        cell=cell,
+        embedding=embedding,
+        start_tokens=start_tokens,
+        end_token=end_token,
+        initial_state=initial_state,
+        beam_width=beam_width,
+        output_layer=output_layer,
+        length_penalty_weight=0.5,
+        **kwargs)
+    final_outputs, final_state, _ = decoder.dynamic_decode(
+        bsd, maximum_iterations=10)
+    return final_outputs, final_state
+
+  def _testMatchesBeamSearchDecoder(self, has_attention):
+    batch_size = 5
+    beam_width = 4
+    vocab_size = 20
+    cell_depth = 9
+    embedding = np.random.randn(vocab_size, 8).astype(np.float32)
+    start_tokens = array_ops.fill([batch_size], 0)
+    output_layer = layers_core.Dense(vocab_size, activation=None)
+
+    with self.test_session() as sess:
+      cell = rnn_cell.MultiRNNCell(
+          [rnn_cell.LSTMCell(cell_depth) for _ in range(3)])
+      if has_attention:
+        memory = beam_search_decoder.tile_batch(
+            np.random.randn(batch_size, 6, 7).astype(np.float32),
+            multiplier=beam_width)
+        cell = attention_wrapper.AttentionWrapper(
+            cell=cell,
+            attention_mechanism=attention_wrapper.LuongAttention(
+                num_units=cell_depth, memory=memory),
+            alignment_history=True)
+      initial_state = cell.zero_state(batch_size * beam_width, dtypes.float32)
+
+      expected = self._decode(
+          beam_search_decoder.BeamSearchDecoder, cell, initial_state,
+          embedding, start_tokens, vocab_size - 1, beam_width, output_layer)
+      packed_decoder_outputs = self._decode(
+          beam_search_decoder.PackedBeamSearchDecoder, cell, initial_state,
+          embedding, start_tokens, vocab_size - 1, beam_width, output_layer)
+      self.assertTrue(
+          isinstance(packed_decoder_outputs[1].cell_state,
+                     type(expected[1].cell_state)))
+
+      sess.run(variables.global_variables_initializer())
+      expected_, actual_ = sess.run((expected, packed_decoder_outputs))
+      for expected_t, actual_t in zip(nest.flatten(expected_),
+                                      nest.flatten(actual_)):
+        self.assertAllClose(expected_t, actual_t)
+
+  def testMatchesBeamSearchDecoder(self):
+    self._testMatchesBeamSearchDecoder(has_attention=False)
+
+  def testMatchesBeamSearchDecoderWithAttention(self):
+    self._testMatchesBeamSearchDecoder(has_attention=True)
+
+  def testPruneFinishedBatchEntries(self):
+    beam_width = 2
+    end_token = 5
+    # Each row holds the logits of the token that follows a token. The first
+    # batch entry starts with token 0 and its beams end after two steps, while
+    # those of the second one, which starts with token 1, take five steps.
+    embedding = np.array(
+        [[0, 0, 0, 0, 5, 10],
+         [0, 0, 10, 5, 0, 0],
+         [0, 0, 0, 10, 5, 0],
+         [0, 0, 0, 0, 10, 5],
+         [0, 0, 0, 0, 0, 10],
+         [0, 0, 0, 0, 0, 0]], dtype=np.float32)
+    start_tokens = constant_op.constant([0, 1])
+    cell = _AccumulatingCell(6)
+    initial_state = cell.initial_state(2 * beam_width)
+
+    with self.test_session() as sess:
+      expected = self._decode(
+          beam_search_decoder.BeamSearchDecoder, cell, initial_state,
+          embedding, start_tokens, end_token, beam_width)
+      actual = self._decode(
+          beam_search_decoder.PackedBeamSearchDecoder, cell, initial_state,
+          embedding, start_tokens, end_token, beam_width,
+          prune_finished_batch_entries=True)
+      expected_, actual_ = sess.run((expected, actual))
+
+    self.assertEqual(2, expected_[1].lengths[0].max())
+    self.assertGreater(expected_[1].lengths[1].max(), 2)
+    # The cell states of finished batch entries aren't updated anymore, so
+    # only the outputs and the beam search state are compared.
+    for expected_t, actual_t in zip(
+        nest.flatten(expected_[0]) + list(expected_[1][1:]),
+        nest.flatten(actual_[0]) + list(actual_[1][1:])):
+      self.assertAllClose(expected_t, actual_t)
+
+  def testInvalidCellStates(self):
+    cell = _TensorArrayStateCell(3)
+    initial_state = (cell.initial_state(4),
+                     tensor_array_ops.TensorArray(dtypes.float32, size=0))
+    with self.assertRaisesRegexp(ValueError, 'TensorArray'):
+      beam_search_decoder.PackedBeamSearchDecoder(
+          cell=cell,
+          embedding=array_ops.zeros([5, 3]),
+          start_tokens=[0, 0],
+          end_token=4,
+          initial_state=initial_state,
+          beam_width=2,
+          prune_finished_batch_entries=True)
+
+  def testPruneFinishedBatchEntriesRejectsAttention(self):
+    for cell_fn in (lambda cell: cell,
+                    lambda cell: rnn_cell.MultiRNNCell([cell])):
+      attention_cell = attention_wrapper.AttentionWrapper(
+          cell=rnn_cell.LSTMCell(3),
+          attention_mechanism=attention_wrapper.LuongAttention(
+              num_units=3, memory=array_ops.zeros([4, 2, 3])))
+      cell = cell_fn(attention_cell)
+      with self.assertRaisesRegexp(ValueError, 'AttentionWrapperState'):
+        beam_search_decoder.PackedBeamSearchDecoder(
+            cell=cell,
+            embedding=array_ops.zeros([5, 3]),
+            start_tokens=[0, 0],
+            end_token=4,
+            initial_state=cell.zero_state(4, dtypes.float32),
+            beam_width=2,
+            prune_finished_batch_entries=True)
+
+
+class BeamSearchDecoderBenchmark(test.Benchmark):
+  """Compares the decoding latency of the beam search decoders."""
+
+  def _benchmark(self, decoder_cls, name, num_layers=4, num_units=256,
+                 batch_size=16, beam_width=10, vocab_size=1000, num_iters=10,
+                 **kwargs):
+    with ops.Graph().as_default(), session.Session() as sess:
+      cell = rnn_cell.MultiRNNCell(
+          [rnn_cell.LSTMCell(num_units) for _ in range(num_layers)])
+      bsd = decoder_cls(
+          cell=cell,
+          embedding=np.random.randn(vocab_size, num_units).astype(np.float32),
+          start_tokens=array_ops.fill([batch_size], 0),
+          end_token=vocab_size - 1,
+          initial_state=cell.zero_state(batch_size * beam_width,
+                                        dtypes.float32),
+          beam_width=beam_width,
+          output_layer=layers_core.Dense(vocab_size),
+          **kwargs)
+      final_outputs, _, _ = decoder.dynamic_decode(
+          bsd, maximum_iterations=20)
+      sess.run(variables.global_variables_initializer())
+      sess.run(final_outputs.predicted_ids)
+      start = time.time()
+      for _ in range(num_iters):
+        sess.run(final_outputs.predicted_ids)
+      self.report_benchmark(
+          iters=num_iters, wall_time=(time.time() - start) / num_iters,
+          name='%s_%d_layers_beam_width_%d' % (name, num_layers, beam_width))
+
+  def benchmarkDeepLSTM(self):
+    self._benchmark(beam_search_decoder.BeamSearchDecoder, 'unpacked')
+    self._benchmark(beam_search_decoder.PackedBeamSearchDecoder, 'packed')
+    self._benchmark(beam_search_decoder.PackedBeamSearchDecoder,
+                    'packed_pruned', prune_finished_batch_entries=True)
+
+
 if __name__ == '__main__':
   test.main()
@@ -21,6 +21,7 @@ from __future__ import print_function
 import collections
 import numpy as np
 
+from tensorflow.contrib.seq2seq.python.ops import attention_wrapper
 from tensorflow.contrib.seq2seq.python.ops import beam_search_ops
 from tensorflow.contrib.seq2seq.python.ops import decoder
 from tensorflow.python.framework import dtypes
@@ -43,6 +44,7 @@ __all__ = [
     "BeamSearchDecoderState",
     "BeamSearchDecoder",
     "FinalBeamSearchDecoderOutput",
+    "PackedBeamSearchDecoder",
     "tile_batch",
 ]
 
@@ -670,6 +672,308 @@ class BeamSearchDecoder(decoder.Decoder):
     return (beam_search_output, beam_search_state, next_inputs, finished)
 
 
+class PackedBeamSearchDecoder(BeamSearchDecoder):
+  """BeamSearch sampling decoder that keeps the cell state in a packed buffer.
+
+  `BeamSearchDecoder` reorders every tensor of the cell state separately at
+  each step, which dominates the decoding time of deep cells with large beams.
+  This decoder concatenates the batched cell state tensors that share the
+  dtype of the first one into a single `[batch_size, beam_width, depth]`
+  buffer, so that they are reordered by a single gather. Other state tensors,
+  e.g. the scalar `time` of an `AttentionWrapperState`, are handled as in
+  `BeamSearchDecoder`. The state in `final_state` is unpacked, and the decoded
+  beams are the same as those of a `BeamSearchDecoder`.
+
+  With `prune_finished_batch_entries`, the cell and the output layer are only
+  run on the batch entries that still have an unfinished beam, which saves time
+  when the decoded sequences have very different lengths. This requires the
+  cell to not depend on batched tensors other than its inputs and state, so
+  cells whose state contains an `AttentionWrapperState` are rejected. The
+  decoded beams are still the same as those of a `BeamSearchDecoder`, but the
+  final state is not: the cell state of a batch entry stops being updated once
+  all its beams have finished, while `BeamSearchDecoder` keeps running the cell
+  on finished entries until the end of decoding.
+  """
+
+  def __init__(self,
+               cell,
+               embedding,
+               start_tokens,
+               end_token,
+               initial_state,
+               beam_width,
+               output_layer=None,
+               length_penalty_weight=0.0,
+               reorder_tensor_arrays=True,
+               prune_finished_batch_entries=False):
+    """Initialize the PackedBeamSearchDecoder.
+
+    Args:
+      cell: An `RNNCell` instance.
+      embedding: A callable that takes a vector tensor of `ids` (argmax ids),
+        or the `params` argument for `embedding_lookup`.
+      start_tokens: `int32` vector shaped `[batch_size]`, the start tokens.
+      end_token: `int32` scalar, the token that marks end of decoding.
+      initial_state: A (possibly nested tuple of...) tensors and TensorArrays.
+      beam_width:  Python integer, the number of beams.
+      output_layer: (Optional) An instance of `tf.layers.Layer`, i.e.,
+        `tf.layers.Dense`.  Optional layer to apply to the RNN output prior
+        to storing the result or sampling.
+      length_penalty_weight: Float weight to penalize length. Disabled with 0.0.
+      reorder_tensor_arrays: If `True`, `TensorArray`s' elements within the cell
+        state will be reordered according to the beam search path. See
+        `BeamSearchDecoder`.
+      prune_finished_batch_entries: If `True`, only runs the cell and the output
+        layer on the batch entries that have an unfinished beam.
+
+    Raises:
+      TypeError: if `cell` is not an instance of `RNNCell`,
+        or `output_layer` is not an instance of `tf.layers.Layer`.
+      ValueError: If `start_tokens` is not a vector or `end_token` is not a
+        scalar, if no cell state tensor can be packed, or if
+        `prune_finished_batch_entries` is `True` and the cell state contains
+        `TensorArray`s or an `AttentionWrapperState`.
+    """
+    super(PackedBeamSearchDecoder, self).__init__(
+        cell,
+        embedding,
+        start_tokens,
+        end_token,
+        initial_state,
+        beam_width,
+        output_layer=output_layer,
+        length_penalty_weight=length_penalty_weight,
+        reorder_tensor_arrays=reorder_tensor_arrays)
+    self._prune_finished_batch_entries = prune_finished_batch_entries
+    if (prune_finished_batch_entries and
+        _contains_attention_wrapper_state(self._cell.state_size)):
+      raise ValueError("prune_finished_batch_entries doesn't support cells "
+                       "whose state contains an AttentionWrapperState, e.g. "
+                       "an AttentionWrapper: the attention memory isn't "
+                       "pruned along with the cell state.")
+
+    flat_state = nest.flatten(self._initial_cell_state)
+    flat_state_size = nest.flatten(self._cell.state_size)
+    self._packed_indices = []
+    self._packed_shapes = []
+    packed_dtype = None
+    for i, t in enumerate(flat_state):
+      if isinstance(t, tensor_array_ops.TensorArray):
+        if prune_finished_batch_entries:
+          raise ValueError("prune_finished_batch_entries doesn't support "
+                           "TensorArrays in the cell state.")
+        continue
+      # The initial state has been split to [batch_size, beam_width] + s.
+      shape = t.shape[2:]
+      if t.shape.ndims < 2 or not shape.is_fully_defined():
+        continue
+      if packed_dtype is None:
+        packed_dtype = t.dtype
+      if t.dtype == packed_dtype:
+        self._packed_indices.append(i)
+        self._packed_shapes.append(shape)
+    if not self._packed_indices:
+      raise ValueError("None of the cell state tensors can be packed: they "
+                       "must have a fully defined depth shape.")
+    self._packed_depths = [
+        shape.num_elements() for shape in self._packed_shapes]
+    packed_indices = set(self._packed_indices)
+    self._other_state_sizes = [
+        s for i, s in enumerate(flat_state_size) if i not in packed_indices]
+
+  def _pack_cell_state(self, cell_state, leading_shape):
+    """Packs a cell state into a `(packed, other_0, other_1, ...)` tuple.
+
+    Args:
+      cell_state: A cell state, with tensors of shape `leading_shape + s`.
+      leading_shape: A list, either `[-1]` for a batch by beams or
+        `[batch_size, beam_width]` for a batch of beams.
+
+    Returns:
+      A tuple whose first element is the `leading_shape + [depth]` tensor in
+      which the packed state tensors are concatenated, followed by the other
+      state tensors.
+    """
+    flat_state = nest.flatten(cell_state)
+    packed_indices = set(self._packed_indices)
+    packed = array_ops.concat([
+        array_ops.reshape(flat_state[i], leading_shape + [depth])
+        for i, depth in zip(self._packed_indices, self._packed_depths)
+    ], -1)
+    others = [t for i, t in enumerate(flat_state) if i not in packed_indices]
+    return tuple([packed] + others)
+
+  def _unpack_cell_state(self, packed_cell_state, leading_shape):
+    """Inverse of `_pack_cell_state`."""
+    packed, others = packed_cell_state[0], list(packed_cell_state[1:])
+    parts = array_ops.split(packed, self._packed_depths, axis=-1)
+    flat_state = []
+    packed_parts = dict(zip(self._packed_indices, zip(parts,
+                                                      self._packed_shapes)))
+    for i in range(len(self._packed_indices) + len(others)):
+      if i in packed_parts:
+        part, shape = packed_parts[i]
+        flat_state.append(
+            array_ops.reshape(part, leading_shape + shape.as_list()))
+      else:
+        flat_state.append(others.pop(0))
+    return nest.pack_sequence_as(self._cell.state_size, flat_state)
+
+  def initialize(self, name=None):
+    """Initialize the decoder.
+
+    Args:
+      name: Name scope for any created operations.
+
+    Returns:
+      `(finished, start_inputs, initial_state)`.
+    """
+    finished, start_inputs, initial_state = super(
+        PackedBeamSearchDecoder, self).initialize(name=name)
+    packed_cell_state = self._pack_cell_state(
+        initial_state.cell_state, [self._batch_size, self._beam_width])
+    packed_cell_state[0].set_shape(
+        [tensor_util.constant_value(self._batch_size), self._beam_width,
+         sum(self._packed_depths)])
+    return (finished, start_inputs,
+            initial_state._replace(cell_state=packed_cell_state))
+
+  def finalize(self, outputs, final_state, sequence_lengths):
+    """Finalize and return the predicted_ids.
+
+    See `BeamSearchDecoder.finalize`. The cell state of `final_state` is
+    unpacked.
+    """
+    final_state = final_state._replace(cell_state=self._unpack_cell_state(
+        final_state.cell_state, [self._batch_size, self._beam_width]))
+    return super(PackedBeamSearchDecoder, self).finalize(
+        outputs, final_state, sequence_lengths)
+
+  def step(self, time, inputs, state, name=None):
+    """Perform a decoding step.
+
+    Args:
+      time: scalar `int32` tensor.
+      inputs: A (structure of) input tensors.
+      state: A (structure of) state tensors and TensorArrays.
+      name: Name scope for any created operations.
+
+    Returns:
+      `(outputs, next_state, next_inputs, finished)`.
+    """
+    batch_size = self._batch_size
+    beam_width = self._beam_width
+    packed_depth = sum(self._packed_depths)
+
+    with ops.name_scope(name, "PackedBeamSearchDecoderStep",
+                        (time, inputs, state)):
+      inputs = nest.map_structure(
+          lambda inp: self._merge_batch_beams(inp, s=inp.shape[2:]), inputs)
+      packed = self._merge_batch_beams(state.cell_state[0], s=[packed_depth])
+      others = [
+          self._maybe_merge_batch_beams(t, s)
+          for t, s in zip(state.cell_state[1:], self._other_state_sizes)
+      ]
+      packed_cell_state = tuple([packed] + others)
+
+      if self._prune_finished_batch_entries:
+        # The rows of the batch entries that have an unfinished beam.
+        active = math_ops.logical_not(
+            math_ops.reduce_all(state.finished, axis=1))
+        active_entries = math_ops.to_int32(
+            array_ops.reshape(array_ops.where(active), [-1]))
+        active_rows = array_ops.reshape(
+            array_ops.expand_dims(active_entries * beam_width, 1) +
+            math_ops.range(beam_width), [-1])
+        is_active_row = array_ops.reshape(
+            array_ops.tile(array_ops.expand_dims(active, 1), [1, beam_width]),
+            [-1])
+        inputs = nest.map_structure(
+            lambda t: array_ops.gather(t, active_rows), inputs)
+        packed_cell_state = nest.map_structure(
+            lambda t: _maybe_gather_rows(t, active_rows), packed_cell_state)
+
+      cell_state = self._unpack_cell_state(packed_cell_state, [-1])
+      cell_outputs, next_cell_state = self._cell(inputs, cell_state)
+      if self._output_layer is not None:
+        cell_outputs = self._output_layer(cell_outputs)
+      next_packed_cell_state = self._pack_cell_state(next_cell_state, [-1])
+
+      if self._prune_finished_batch_entries:
+        num_rows = batch_size * beam_width
+        # The outputs of finished batch entries don't matter, since they only
+        # continue with the end token.
+        cell_outputs = nest.map_structure(
+            lambda t: _scatter_rows(t, active_rows, num_rows), cell_outputs)
+        next_packed_cell_state = nest.map_structure(
+            lambda t, old_t: _maybe_scatter_rows(
+                t, active_rows, is_active_row, old_t),
+            next_packed_cell_state, tuple([packed] + others))
+
+      cell_outputs = nest.map_structure(
+          lambda out: self._split_batch_beams(out, out.shape[1:]), cell_outputs)
+      next_cell_state = tuple(
+          [self._split_batch_beams(next_packed_cell_state[0],
+                                   [packed_depth])] +
+          [self._maybe_split_batch_beams(t, s) for t, s in zip(
+              next_packed_cell_state[1:], self._other_state_sizes)])
+
+      beam_search_output, beam_search_state = _beam_search_step(
+          time=time,
+          logits=cell_outputs,
+          next_cell_state=next_cell_state,
+          beam_state=state,
+          batch_size=batch_size,
+          beam_width=beam_width,
+          end_token=self._end_token,
+          length_penalty_weight=self._length_penalty_weight)
+
+      finished = beam_search_state.finished
+      sample_ids = beam_search_output.predicted_ids
+      next_inputs = control_flow_ops.cond(
+          math_ops.reduce_all(finished), lambda: self._start_inputs,
+          lambda: self._embedding_fn(sample_ids))
+
+    return (beam_search_output, beam_search_state, next_inputs, finished)
+
+
+def _contains_attention_wrapper_state(structure):
+  """Returns whether a nested structure contains an `AttentionWrapperState`."""
+  if isinstance(structure, attention_wrapper.AttentionWrapperState):
+    return True
+  if isinstance(structure, dict):
+    structure = list(structure.values())
+  if isinstance(structure, (list, tuple)):
+    return any(_contains_attention_wrapper_state(s) for s in structure)
+  return False
+
+
+def _maybe_gather_rows(t, rows):
+  """Gathers `rows` of `t` if it is a batched tensor."""
+  if isinstance(t, tensor_array_ops.TensorArray) or t.shape.ndims < 1:
+    return t
+  return array_ops.gather(t, rows)
+
+
+def _scatter_rows(t, rows, num_rows):
+  """Scatters the rows of `t` to `rows` of a zero tensor of `num_rows` rows."""
+  output = array_ops.scatter_nd(
+      array_ops.expand_dims(rows, 1), t,
+      array_ops.concat([[num_rows], array_ops.shape(t)[1:]], 0))
+  output.set_shape(tensor_shape.TensorShape([None]).concatenate(t.shape[1:]))
+  return output
+
+
+def _maybe_scatter_rows(t, rows, is_row, old_t):
+  """Replaces `rows` of `old_t` with `t` if `old_t` is a batched tensor."""
+  if isinstance(t, tensor_array_ops.TensorArray) or t.shape.ndims < 1:
+    return t
+  output = array_ops.where(
+      is_row, _scatter_rows(t, rows, array_ops.shape(old_t)[0]), old_t)
+  output.set_shape(old_t.shape)
+  return output
+
+
 def _beam_search_step(time, logits, next_cell_state, beam_state, batch_size,
                       beam_width, end_token, length_penalty_weight):
   """Performs a single step of Beam Search Decoding.
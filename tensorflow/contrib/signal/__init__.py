@@ -25,6 +25,8 @@ See the @{$python/contrib.signal} guide.
 @@linear_to_mel_weight_matrix
 @@overlap_and_add
 @@stft
+@@streaming_inverse_stft
+@@streaming_stft
 
 [hamming]: https://en.wikipedia.org/wiki/Window_function#Hamming_window
 [hann]: https://en.wikipedia.org/wiki/Window_function#Hann_window
@@ -47,6 +49,8 @@ from tensorflow.contrib.signal.python.ops.shape_ops import frame as frames
 from tensorflow.contrib.signal.python.ops.spectral_ops import inverse_stft
 from tensorflow.contrib.signal.python.ops.spectral_ops import inverse_stft_window_fn
 from tensorflow.contrib.signal.python.ops.spectral_ops import stft
+from tensorflow.contrib.signal.python.ops.spectral_ops import streaming_inverse_stft
+from tensorflow.contrib.signal.python.ops.spectral_ops import streaming_stft
 from tensorflow.contrib.signal.python.ops.window_ops import hamming_window
 from tensorflow.contrib.signal.python.ops.window_ops import hann_window
 
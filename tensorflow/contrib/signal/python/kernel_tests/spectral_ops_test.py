@@ -18,11 +18,15 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import time
+
 import numpy as np
 
 from tensorflow.contrib.signal.python.ops import spectral_ops
 from tensorflow.contrib.signal.python.ops import window_ops
+from tensorflow.python.client import session
 from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import ops
 from tensorflow.python.ops import array_ops
 from tensorflow.python.ops import gradients_impl
 from tensorflow.python.ops import math_ops
@@ -267,6 +271,99 @@ class SpectralOpsTest(test.TestCase):
 
       self.assertAllClose(hann_window, inverse_window * 1.5)
 
+  def test_streaming_stft(self):
+    """Test that streaming_stft matches stft over the whole signal."""
+    # Tuples of (frame_length, frame_step, fft_length).
+    test_configs = [
+        (64, 32, 64),
+        (72, 64, 64),
+        (25, 15, 36),
+    ]
+    signal = np.random.random([2, 500]).astype(np.float32)
+
+    for frame_length, frame_step, fft_length in test_configs:
+      with spectral_ops_test_util.fft_kernel_label_map(), (
+          self.test_session(use_gpu=True)) as sess:
+        expected_stft = sess.run(spectral_ops.stft(
+            signal, frame_length, frame_step, fft_length))
+
+        chunk_ph = array_ops.placeholder(dtypes.float32, [2, None])
+        state_ph = array_ops.placeholder(dtypes.float32, [2, None])
+        chunk_stft, chunk_state = spectral_ops.streaming_stft(
+            chunk_ph, frame_length, frame_step, fft_length, state=state_ph)
+
+        # The chunks may be shorter or longer than the frames.
+        for chunk_size in [7, 100, 500]:
+          state = np.zeros([2, 0], dtype=np.float32)
+          actual_stft = []
+          for start in range(0, signal.shape[1], chunk_size):
+            stft, state = sess.run(
+                [chunk_stft, chunk_state],
+                feed_dict={chunk_ph: signal[:, start:start + chunk_size],
+                           state_ph: state})
+            actual_stft.append(stft)
+            self.assertLess(state.shape[1], frame_length)
+          self.assertAllClose(expected_stft, np.concatenate(actual_stft, 1),
+                              1e-4, 1e-4)
+
+  def test_streaming_inverse_stft(self):
+    """Test that streaming_inverse_stft matches inverse_stft over all frames."""
+    # Tuples of (frame_length, frame_step, fft_length).
+    test_configs = [
+        (64, 32, 64),
+        (72, 64, 64),
+        (25, 15, 36),
+    ]
+    signal = np.random.random([2, 500]).astype(np.float32)
+
+    for frame_length, frame_step, fft_length in test_configs:
+      window_fn = spectral_ops.inverse_stft_window_fn(frame_step)
+      with spectral_ops_test_util.fft_kernel_label_map(), (
+          self.test_session(use_gpu=True)) as sess:
+        stft = sess.run(spectral_ops.stft(
+            signal, frame_length, frame_step, fft_length))
+        expected_inverse_stft = sess.run(spectral_ops.inverse_stft(
+            stft, frame_length, frame_step, fft_length, window_fn=window_fn))
+
+        chunk_ph = array_ops.placeholder(dtypes.complex64, [2, None, None])
+        state_ph = array_ops.placeholder(dtypes.float32, [2, None])
+        first_inverse_stft, first_state = spectral_ops.streaming_inverse_stft(
+            chunk_ph, frame_length, frame_step, fft_length,
+            window_fn=window_fn)
+        chunk_inverse_stft, chunk_state = spectral_ops.streaming_inverse_stft(
+            chunk_ph, frame_length, frame_step, fft_length,
+            window_fn=window_fn, state=state_ph)
+
+        for chunk_size in [1, 3, 100]:
+          inverse_stft, state = sess.run(
+              [first_inverse_stft, first_state],
+              feed_dict={chunk_ph: stft[:, :chunk_size]})
+          actual_inverse_stft = [inverse_stft]
+          for start in range(chunk_size, stft.shape[1], chunk_size):
+            inverse_stft, state = sess.run(
+                [chunk_inverse_stft, chunk_state],
+                feed_dict={chunk_ph: stft[:, start:start + chunk_size],
+                           state_ph: state})
+            actual_inverse_stft.append(inverse_stft)
+          self.assertEqual(frame_length - frame_step, state.shape[1])
+          # The final state holds the end of the last frame.
+          actual_inverse_stft.append(state)
+          self.assertAllClose(expected_inverse_stft,
+                              np.concatenate(actual_inverse_stft, 1),
+                              1e-4, 1e-4)
+
+  def test_streaming_inverse_stft_rejects_frame_step_above_frame_length(self):
+    stft = np.zeros([2, 4, 33], dtype=np.complex64)
+    with self.test_session():
+      with self.assertRaisesRegexp(ValueError, "frame_step"):
+        spectral_ops.streaming_inverse_stft(stft, 32, 48, 64)
+
+      frame_step = array_ops.placeholder(dtypes.int32, [])
+      signals, _ = spectral_ops.streaming_inverse_stft(
+          stft, 32, frame_step, 64)
+      with self.assertRaisesOpError("frame_step"):
+        signals.eval(feed_dict={frame_step: 48})
+
   @staticmethod
   def _compute_stft_gradient(signal, frame_length=32, frame_step=16,
                              fft_length=32):
@@ -328,5 +425,67 @@ class SpectralOpsTest(test.TestCase):
         self.assertLess(inverse_stft_error, 5e-4)
 
 
+class SpectralOpsBenchmark(test.Benchmark):
+  """Compares whole-signal and streaming STFTs of an hour of 16kHz audio."""
+
+  _SAMPLE_RATE = 16000
+  _FRAME_LENGTH = 400
+  _FRAME_STEP = 160
+
+  def _report(self, name, start, num_iters=1):
+    self.report_benchmark(
+        iters=num_iters, wall_time=(time.time() - start) / num_iters,
+        name=name)
+
+  def benchmarkHourLongAudio(self):
+    signal = np.random.RandomState(0).uniform(
+        -1., 1., size=[3600 * self._SAMPLE_RATE]).astype(np.float32)
+    window_fn = spectral_ops.inverse_stft_window_fn(self._FRAME_STEP)
+
+    with ops.Graph().as_default(), session.Session() as sess:
+      signal_ph = array_ops.placeholder(dtypes.float32, [None])
+      stft = spectral_ops.stft(signal_ph, self._FRAME_LENGTH, self._FRAME_STEP)
+      stft_ph = array_ops.placeholder(dtypes.complex64, [None, None])
+      inverse_stft = spectral_ops.inverse_stft(
+          stft_ph, self._FRAME_LENGTH, self._FRAME_STEP, window_fn=window_fn)
+
+      start = time.time()
+      whole_stft = sess.run(stft, feed_dict={signal_ph: signal})
+      self._report("stft_hour", start)
+      start = time.time()
+      sess.run(inverse_stft, feed_dict={stft_ph: whole_stft})
+      self._report("inverse_stft_hour", start)
+
+      state_ph = array_ops.placeholder(dtypes.float32, [None])
+      chunk_stft, chunk_state = spectral_ops.streaming_stft(
+          signal_ph, self._FRAME_LENGTH, self._FRAME_STEP, state=state_ph)
+      chunk_inverse_stft, chunk_inverse_state = (
+          spectral_ops.streaming_inverse_stft(
+              stft_ph, self._FRAME_LENGTH, self._FRAME_STEP,
+              window_fn=window_fn, state=state_ph))
+
+      for chunk_seconds in [1, 10, 60]:
+        chunk_size = chunk_seconds * self._SAMPLE_RATE
+        start = time.time()
+        state = np.zeros([0], dtype=np.float32)
+        for chunk_start in range(0, len(signal), chunk_size):
+          _, state = sess.run([chunk_stft, chunk_state], feed_dict={
+              signal_ph: signal[chunk_start:chunk_start + chunk_size],
+              state_ph: state})
+        self._report("streaming_stft_hour_%ds_chunks" % chunk_seconds, start)
+
+        num_frames = chunk_size // self._FRAME_STEP
+        start = time.time()
+        state = np.zeros([self._FRAME_LENGTH - self._FRAME_STEP],
+                         dtype=np.float32)
+        for chunk_start in range(0, len(whole_stft), num_frames):
+          _, state = sess.run(
+              [chunk_inverse_stft, chunk_inverse_state], feed_dict={
+                  stft_ph: whole_stft[chunk_start:chunk_start + num_frames],
+                  state_ph: state})
+        self._report("streaming_inverse_stft_hour_%ds_chunks" % chunk_seconds,
+                     start)
+
+
 if __name__ == "__main__":
   test.main()
@@ -29,6 +29,8 @@ from tensorflow.python.framework import constant_op
 from tensorflow.python.framework import ops
 from tensorflow.python.framework import tensor_util
 from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import check_ops
+from tensorflow.python.ops import control_flow_ops
 from tensorflow.python.ops import math_ops
 from tensorflow.python.ops import spectral_ops
 
@@ -80,15 +82,82 @@ def stft(signals, frame_length, frame_step, fft_length=None,
 
     framed_signals = shape_ops.frame(
         signals, frame_length, frame_step, pad_end=pad_end)
+    return _windowed_rfft(framed_signals, frame_length, fft_length, window_fn)
 
-    # Optionally window the framed signals.
-    if window_fn is not None:
-      window = window_fn(frame_length, dtype=framed_signals.dtype)
-      framed_signals *= window
 
-    # spectral_ops.rfft produces the (fft_length/2 + 1) unique components of the
-    # FFT of the real windowed signals in framed_signals.
-    return spectral_ops.rfft(framed_signals, [fft_length])
+def streaming_stft(signals, frame_length, frame_step, fft_length=None,
+                   window_fn=functools.partial(window_ops.hann_window,
+                                               periodic=True),
+                   state=None, name=None):
+  """Computes the [Short-time Fourier Transform][stft] of a chunk of `signals`.
+
+  Long or online signals can be transformed chunk by chunk, so that only the
+  frames of one chunk are materialized at a time. The samples at the end of a
+  chunk that do not fill a whole frame are returned in `state`, and are
+  prepended to the next chunk. For example:
+
+  ```python
+  state = None
+  for chunk in chunks:
+    stfts, state = tf.contrib.signal.streaming_stft(
+        chunk, frame_length, frame_step, state=state)
+  ```
+
+  Concatenating the `stfts` of all the chunks gives the `stft` of the whole
+  signal with `pad_end=False`, regardless of how it was split into chunks.
+
+  Args:
+    signals: A `[..., samples]` `float32` `Tensor` of the next samples of
+      real-valued signals.
+    frame_length: An integer scalar `Tensor`. The window length in samples.
+    frame_step: An integer scalar `Tensor`. The number of samples to step.
+    fft_length: An integer scalar `Tensor`. The size of the FFT to apply.
+      If not provided, uses the smallest power of 2 enclosing `frame_length`.
+    window_fn: A callable that takes a window length and a `dtype` keyword
+      argument and returns a `[window_length]` `Tensor` of samples in the
+      provided datatype. If set to `None`, no windowing is used.
+    state: The `state` returned for the previous chunk of `signals`, or `None`
+      for the first chunk.
+    name: An optional name for the operation.
+
+  Returns:
+    A tuple `(stfts, state)`. `stfts` is a `[..., frames, fft_unique_bins]`
+    `Tensor` of `complex64` STFT values of the frames that end in this chunk.
+    `state` is a `[..., remaining_samples]` `Tensor` of the samples to prepend
+    to the next chunk, where `remaining_samples` is less than `frame_length`
+    if `frame_step` is at most `frame_length`.
+
+  Raises:
+    ValueError: If `signals` is not at least rank 1, `frame_length` is
+      not scalar, or `frame_step` is not scalar.
+
+  [stft]: https://en.wikipedia.org/wiki/Short-time_Fourier_transform
+  """
+  with ops.name_scope(name, 'streaming_stft', [signals, frame_length,
+                                               frame_step, state]):
+    signals = ops.convert_to_tensor(signals, name='signals')
+    signals.shape.with_rank_at_least(1)
+    frame_length = ops.convert_to_tensor(frame_length, name='frame_length')
+    frame_length.shape.assert_has_rank(0)
+    frame_step = ops.convert_to_tensor(frame_step, name='frame_step')
+    frame_step.shape.assert_has_rank(0)
+
+    if fft_length is None:
+      fft_length = _enclosing_power_of_two(frame_length)
+    else:
+      fft_length = ops.convert_to_tensor(fft_length, name='fft_length')
+
+    if state is not None:
+      state = ops.convert_to_tensor(state, dtype=signals.dtype, name='state')
+      signals = array_ops.concat([state, signals], -1)
+
+    framed_signals = shape_ops.frame(
+        signals, frame_length, frame_step, pad_end=False)
+    # Keep the samples from the start of the first frame that is not complete.
+    num_frames = array_ops.shape(framed_signals)[-2]
+    state = signals[..., num_frames * frame_step:]
+    return (_windowed_rfft(framed_signals, frame_length, fft_length, window_fn),
+            state)
 
 
 def inverse_stft_window_fn(frame_step,
@@ -226,55 +295,176 @@ def inverse_stft(stfts,
     frame_length.shape.assert_has_rank(0)
     frame_step = ops.convert_to_tensor(frame_step, name='frame_step')
     frame_step.shape.assert_has_rank(0)
+    # The overlap of consecutive frames is carried in `state`, which would
+    # silently hold the wrong samples if frames did not overlap.
+    frame_length_static = tensor_util.constant_value(frame_length)
+    frame_step_static = tensor_util.constant_value(frame_step)
+    if (frame_length_static is not None and frame_step_static is not None and
+        frame_step_static > frame_length_static):
+      raise ValueError(
+          'frame_step (%d) must be less than or equal to frame_length (%d).' %
+          (frame_step_static, frame_length_static))
+    frame_step = control_flow_ops.with_dependencies(
+        [check_ops.assert_less_equal(
+            frame_step, frame_length,
+            message='frame_step must be less than or equal to frame_length')],
+        frame_step)
     if fft_length is None:
       fft_length = _enclosing_power_of_two(frame_length)
     else:
       fft_length = ops.convert_to_tensor(fft_length, name='fft_length')
       fft_length.shape.assert_has_rank(0)
 
-    real_frames = spectral_ops.irfft(stfts, [fft_length])
+    real_frames = _windowed_irfft(stfts, frame_length, fft_length, window_fn)
 
-    # frame_length may be larger or smaller than fft_length, so we pad or
-    # truncate real_frames to frame_length.
-    frame_length_static = tensor_util.constant_value(frame_length)
-    # If we don't know the shape of real_frames's inner dimension, pad and
-    # truncate to frame_length.
-    if (frame_length_static is None or
-        real_frames.shape.ndims is None or
-        real_frames.shape[-1].value is None):
-      real_frames = real_frames[..., :frame_length]
-      real_frames_rank = array_ops.rank(real_frames)
-      real_frames_shape = array_ops.shape(real_frames)
-      paddings = array_ops.concat(
-          [array_ops.zeros([real_frames_rank - 1, 2],
-                           dtype=frame_length.dtype),
-           [[0, math_ops.maximum(0, frame_length - real_frames_shape[-1])]]], 0)
-      real_frames = array_ops.pad(real_frames, paddings)
-    # We know real_frames's last dimension and frame_length statically. If they
-    # are different, then pad or truncate real_frames to frame_length.
-    elif real_frames.shape[-1].value > frame_length_static:
-      real_frames = real_frames[..., :frame_length_static]
-    elif real_frames.shape[-1].value < frame_length_static:
-      pad_amount = frame_length_static - real_frames.shape[-1].value
-      real_frames = array_ops.pad(real_frames,
-                                  [[0, 0]] * (real_frames.shape.ndims - 1) +
-                                  [[0, pad_amount]])
-
-    # The above code pads the inner dimension of real_frames to frame_length,
-    # but it does so in a way that may not be shape-inference friendly.
-    # Restore shape information if we are able to.
-    if frame_length_static is not None and real_frames.shape.ndims is not None:
-      real_frames.set_shape([None] * (real_frames.shape.ndims - 1) +
-                            [frame_length_static])
-
-    # Optionally window and overlap-add the inner 2 dimensions of real_frames
-    # into a single [samples] dimension.
-    if window_fn is not None:
-      window = window_fn(frame_length, dtype=stfts.dtype.real_dtype)
-      real_frames *= window
+    # Overlap-add the inner 2 dimensions of real_frames into a single [samples]
+    # dimension.
     return reconstruction_ops.overlap_and_add(real_frames, frame_step)
 
 
+def streaming_inverse_stft(stfts,
+                           frame_length,
+                           frame_step,
+                           fft_length=None,
+                           window_fn=functools.partial(window_ops.hann_window,
+                                                       periodic=True),
+                           state=None,
+                           name=None):
+  """Computes the inverse [Short-time Fourier Transform][stft] of a chunk.
+
+  Long or online STFTs can be inverted chunk of frames by chunk of frames, by
+  overlap-adding each chunk incrementally, so that only the frames of one
+  chunk are materialized at a time. The samples at the end of a chunk that the
+  frames of the next chunk overlap are returned in `state`, and are added to
+  the start of the next chunk. For example:
+
+  ```python
+  state = None
+  for stfts in chunks:
+    signals, state = tf.contrib.signal.streaming_inverse_stft(
+        stfts, frame_length, frame_step,
+        window_fn=tf.contrib.signal.inverse_stft_window_fn(frame_step),
+        state=state)
+  ```
+
+  Concatenating the `signals` of all the chunks and the final `state` gives the
+  `inverse_stft` of the whole STFT, regardless of how it was split into chunks.
+
+  Args:
+    stfts: A `complex64` `[..., frames, fft_unique_bins]` `Tensor` of the next
+      STFT bins representing a batch of `fft_length`-point STFTs where
+      `fft_unique_bins` is `fft_length // 2 + 1`
+    frame_length: An integer scalar `Tensor`. The window length in samples.
+    frame_step: An integer scalar `Tensor`. The number of samples to step. Must
+      be less than or equal to `frame_length`.
+    fft_length: An integer scalar `Tensor`. The size of the FFT that produced
+      `stfts`. If not provided, uses the smallest power of 2 enclosing
+      `frame_length`.
+    window_fn: A callable that takes a window length and a `dtype` keyword
+      argument and returns a `[window_length]` `Tensor` of samples in the
+      provided datatype. If set to `None`, no windowing is used.
+    state: The `state` returned for the previous chunk of `stfts`, or `None`
+      for the first chunk.
+    name: An optional name for the operation.
+
+  Returns:
+    A tuple `(signals, state)`. `signals` is a `[..., frames * frame_step]`
+    `Tensor` of `float32` samples that no later frame overlaps. `state` is a
+    `[..., frame_length - frame_step]` `Tensor` of the overlap-added samples
+    that the frames of the next chunk overlap.
+
+  Raises:
+    ValueError: If `stfts` is not at least rank 2, `frame_length` is not scalar,
+      `frame_step` is not scalar, `fft_length` is not scalar, or `frame_step`
+      is statically known to be greater than `frame_length`.
+    InvalidArgumentError: If `frame_step` is greater than `frame_length` when
+      the graph is run.
+
+  [stft]: https://en.wikipedia.org/wiki/Short-time_Fourier_transform
+  """
+  with ops.name_scope(name, 'streaming_inverse_stft', [stfts, state]):
+    stfts = ops.convert_to_tensor(stfts, name='stfts')
+    stfts.shape.with_rank_at_least(2)
+    frame_length = ops.convert_to_tensor(frame_length, name='frame_length')
+    frame_length.shape.assert_has_rank(0)
+    frame_step = ops.convert_to_tensor(frame_step, name='frame_step')
+    frame_step.shape.assert_has_rank(0)
+    if fft_length is None:
+      fft_length = _enclosing_power_of_two(frame_length)
+    else:
+      fft_length = ops.convert_to_tensor(fft_length, name='fft_length')
+      fft_length.shape.assert_has_rank(0)
+
+    real_frames = _windowed_irfft(stfts, frame_length, fft_length, window_fn)
+    signals = reconstruction_ops.overlap_and_add(real_frames, frame_step)
+
+    # Add the overlapping samples of the previous chunk, which precede the
+    # [frames * frame_step] samples that are complete after this chunk.
+    overlap = frame_length - frame_step
+    if state is not None:
+      state = ops.convert_to_tensor(state, dtype=signals.dtype, name='state')
+      signals = array_ops.concat(
+          [signals[..., :overlap] + state, signals[..., overlap:]], -1)
+    num_samples = array_ops.shape(stfts)[-2] * frame_step
+    return signals[..., :num_samples], signals[..., num_samples:]
+
+
+def _windowed_rfft(framed_signals, frame_length, fft_length, window_fn):
+  """Returns the FFT of the optionally windowed `framed_signals`."""
+  # Optionally window the framed signals.
+  if window_fn is not None:
+    window = window_fn(frame_length, dtype=framed_signals.dtype)
+    framed_signals *= window
+
+  # spectral_ops.rfft produces the (fft_length/2 + 1) unique components of the
+  # FFT of the real windowed signals in framed_signals.
+  return spectral_ops.rfft(framed_signals, [fft_length])
+
+
+def _windowed_irfft(stfts, frame_length, fft_length, window_fn):
+  """Returns the optionally windowed `frame_length` inverse FFT of `stfts`."""
+  real_frames = spectral_ops.irfft(stfts, [fft_length])
+
+  # frame_length may be larger or smaller than fft_length, so we pad or
+  # truncate real_frames to frame_length.
+  frame_length_static = tensor_util.constant_value(frame_length)
+  # If we don't know the shape of real_frames's inner dimension, pad and
+  # truncate to frame_length.
+  if (frame_length_static is None or
+      real_frames.shape.ndims is None or
+      real_frames.shape[-1].value is None):
+    real_frames = real_frames[..., :frame_length]
+    real_frames_rank = array_ops.rank(real_frames)
+    real_frames_shape = array_ops.shape(real_frames)
+    paddings = array_ops.concat(
+        [array_ops.zeros([real_frames_rank - 1, 2],
+                         dtype=frame_length.dtype),
+         [[0, math_ops.maximum(0, frame_length - real_frames_shape[-1])]]], 0)
+    real_frames = array_ops.pad(real_frames, paddings)
+  # We know real_frames's last dimension and frame_length statically. If they
+  # are different, then pad or truncate real_frames to frame_length.
+  elif real_frames.shape[-1].value > frame_length_static:
+    real_frames = real_frames[..., :frame_length_static]
+  elif real_frames.shape[-1].value < frame_length_static:
+    pad_amount = frame_length_static - real_frames.shape[-1].value
+    real_frames = array_ops.pad(real_frames,
+                                [[0, 0]] * (real_frames.shape.ndims - 1) +
+                                [[0, pad_amount]])
+
+  # The above code pads the inner dimension of real_frames to frame_length,
+  # but it does so in a way that may not be shape-inference friendly.
+  # Restore shape information if we are able to.
+  if frame_length_static is not None and real_frames.shape.ndims is not None:
+    real_frames.set_shape([None] * (real_frames.shape.ndims - 1) +
+                          [frame_length_static])
+
+  # Optionally window real_frames.
+  if window_fn is not None:
+    window = window_fn(frame_length, dtype=stfts.dtype.real_dtype)
+    real_frames *= window
+  return real_frames
+
+
 def _enclosing_power_of_two(value):
   """Return 2**N for integer N such that 2**N >= value."""
   value_static = tensor_util.constant_value(value)
@@ -31,6 +31,38 @@ from tensorflow.python.ops import math_ops
 from tensorflow.python.ops import numerics
 
 
+def _gain_times_noise(kalman_gain_transposed, observation_noise):
+  """Multiplies the Kalman gain by (a square root of) observation noise.
+
+  Args:
+    kalman_gain_transposed: A [batch size x observation dimension x state
+        dimension] Tensor with the transposed Kalman gain.
+    observation_noise: A [batch size x observation dimension x observation
+        dimension] or [observation dimension x observation dimension] Tensor
+        (a two-dimensional input will be broadcast).
+  Returns:
+    kalman_gain * observation_noise, a [batch size x state dimension x
+    observation dimension] Tensor.
+  """
+  observation_noise = ops.convert_to_tensor(observation_noise)
+  def _batch_observation_noise():
+    return math_ops.matmul(
+        kalman_gain_transposed, observation_noise, adjoint_a=True)
+  def _matrix_observation_noise():
+    return math_utils.batch_times_matrix(
+        kalman_gain_transposed, observation_noise, adj_x=True)
+  if observation_noise.get_shape().ndims is None:
+    return control_flow_ops.cond(
+        math_ops.equal(array_ops.rank(observation_noise), 2),
+        _matrix_observation_noise, _batch_observation_noise)
+  # If static shape information exists, it gets checked in each cond()
+  # branch, so we need a special case to avoid graph-build-time
+  # exceptions.
+  if observation_noise.get_shape().ndims == 2:
+    return _matrix_observation_noise()
+  return _batch_observation_noise()
+
+
 # TODO(allenl): support for always-factored covariance matrices
 class KalmanFilter(object):
   """Inference on linear state models.
@@ -255,6 +287,30 @@ class KalmanFilter(object):
             array_ops.expand_dims(residual, -1),
             adjoint_a=True),
         axis=[-1])
+    posterior_state_var = self._posterior_state_var(
+        prior_state_var=prior_state_var,
+        kalman_gain_transposed=kalman_gain_transposed,
+        observation_model=observation_model,
+        observation_noise=observation_noise)
+    return posterior_state, posterior_state_var
+
+  def _posterior_state_var(self, prior_state_var, kalman_gain_transposed,
+                           observation_model, observation_noise):
+    """Compute a posterior state covariance given the Kalman gain.
+
+    Args:
+      prior_state_var: Prior state covariance [batch size x state dimension x
+          state dimension]
+      kalman_gain_transposed: The transposed Kalman gain [batch size x
+          observation dimension x state dimension]
+      observation_model: The [batch size x observation dimension x model state
+          dimension] observation model.
+      observation_noise: A [batch size x observation dimension x observation
+          dimension] or [observation dimension x observation dimension] Tensor
+          with observation noise covariance matrices.
+    Returns:
+      The posterior state covariance (dimensions matching `prior_state_var`).
+    """
     gain_obs = math_ops.matmul(
         kalman_gain_transposed, observation_model, adjoint_a=True)
     identity_extradim = linalg_ops.eye(
@@ -263,47 +319,24 @@ class KalmanFilter(object):
     if self._simplified_posterior_covariance_computation:
       # posterior covariance =
       #   (I - kalman_gain * observation_model) * prior_state_var
-      posterior_state_var = math_ops.matmul(identity_minus_factor,
-                                            prior_state_var)
-    else:
-      observation_noise = ops.convert_to_tensor(observation_noise)
-      # A Joseph form update, which provides better numeric stability than the
-      # simplified optimal Kalman gain update, at the cost of a few extra
-      # operations. Joseph form updates are valid for any gain (not just the
-      # optimal Kalman gain), and so are more forgiving of numerical errors in
-      # computing the optimal Kalman gain.
-      #
-      # posterior covariance =
-      #   (I - kalman_gain * observation_model) * prior_state_var
-      #     * (I - kalman_gain * observation_model)^T
-      #   + kalman_gain * observation_noise * kalman_gain^T
-      left_multiplied_state_var = math_ops.matmul(identity_minus_factor,
-                                                  prior_state_var)
-      multiplied_state_var = math_ops.matmul(
-          identity_minus_factor, left_multiplied_state_var, adjoint_b=True)
-      def _batch_observation_noise_update():
-        return (multiplied_state_var + math_ops.matmul(
-            math_ops.matmul(
-                kalman_gain_transposed, observation_noise, adjoint_a=True),
-            kalman_gain_transposed))
-      def _matrix_observation_noise_update():
-        return (multiplied_state_var + math_ops.matmul(
-            math_utils.batch_times_matrix(
-                kalman_gain_transposed, observation_noise, adj_x=True),
-            kalman_gain_transposed))
-      if observation_noise.get_shape().ndims is None:
-        posterior_state_var = control_flow_ops.cond(
-            math_ops.equal(array_ops.rank(observation_noise), 2),
-            _matrix_observation_noise_update, _batch_observation_noise_update)
-      else:
-        # If static shape information exists, it gets checked in each cond()
-        # branch, so we need a special case to avoid graph-build-time
-        # exceptions.
-        if observation_noise.get_shape().ndims == 2:
-          posterior_state_var = _matrix_observation_noise_update()
-        else:
-          posterior_state_var = _batch_observation_noise_update()
-    return posterior_state, posterior_state_var
+      return math_ops.matmul(identity_minus_factor, prior_state_var)
+    # A Joseph form update, which provides better numeric stability than the
+    # simplified optimal Kalman gain update, at the cost of a few extra
+    # operations. Joseph form updates are valid for any gain (not just the
+    # optimal Kalman gain), and so are more forgiving of numerical errors in
+    # computing the optimal Kalman gain.
+    #
+    # posterior covariance =
+    #   (I - kalman_gain * observation_model) * prior_state_var
+    #     * (I - kalman_gain * observation_model)^T
+    #   + kalman_gain * observation_noise * kalman_gain^T
+    left_multiplied_state_var = math_ops.matmul(identity_minus_factor,
+                                                prior_state_var)
+    multiplied_state_var = math_ops.matmul(
+        identity_minus_factor, left_multiplied_state_var, adjoint_b=True)
+    return multiplied_state_var + math_ops.matmul(
+        _gain_times_noise(kalman_gain_transposed, observation_noise),
+        kalman_gain_transposed)
 
   def observed_from_state(self, state_mean, state_var, observation_model,
                           observation_noise):
@@ -339,3 +372,245 @@ class KalmanFilter(object):
         adjoint_b=True)
     observed_var += observation_noise
     return observed_mean, observed_var
+
+
+class SquareRootKalmanFilter(KalmanFilter):
+  """Kalman filtering with posterior covariances updated in factored form.
+
+  The Joseph form posterior covariance
+
+    (I - K H) P (I - K H)^T + K R K^T
+
+  (K being the Kalman gain, H the observation model, P the prior state
+  covariance and R the observation noise covariance) is the Gram matrix of
+  [(I - K H) chol(P), K chol(R)]. Rather than multiplying out the terms, a QR
+  decomposition of this stacked square root gives a triangular factor U with
+  U^T U equal to the posterior covariance. Computed this way, posterior
+  covariances are symmetric positive semi-definite regardless of rounding
+  errors, which keeps long filtering runs stable in single precision.
+
+  Covariances are still passed between filtering steps as full matrices (see
+  the TODO on `KalmanFilter`), so the prior state and observation noise
+  covariances are factored at every step and must be positive definite.
+  """
+
+  def __init__(self, dtype=dtypes.float32):
+    """Initialize the square root Kalman filter.
+
+    Args:
+      dtype: The data type to use for floating point tensors.
+    """
+    super(SquareRootKalmanFilter, self).__init__(dtype=dtype)
+
+  def _posterior_state_var(self, prior_state_var, kalman_gain_transposed,
+                           observation_model, observation_noise):
+    gain_obs = math_ops.matmul(
+        kalman_gain_transposed, observation_model, adjoint_a=True)
+    identity_extradim = linalg_ops.eye(
+        array_ops.shape(gain_obs)[1], dtype=gain_obs.dtype)[None]
+    prior_state_var_root = linalg_ops.cholesky(
+        0.5 * (prior_state_var
+               + array_ops.matrix_transpose(prior_state_var)))
+    observation_noise = ops.convert_to_tensor(observation_noise)
+    observation_noise_root = linalg_ops.cholesky(
+        0.5 * (observation_noise
+               + array_ops.matrix_transpose(observation_noise)))
+    stacked_root = array_ops.concat(
+        [math_ops.matmul(identity_extradim - gain_obs, prior_state_var_root),
+         _gain_times_noise(kalman_gain_transposed, observation_noise_root)],
+        axis=-1)
+    _, posterior_state_var_root = linalg_ops.qr(
+        array_ops.matrix_transpose(stacked_root))
+    return math_ops.matmul(
+        posterior_state_var_root, posterior_state_var_root, adjoint_a=True)
+
+
+def _matvec(matrix, vector, adjoint_a=False):
+  return array_ops.squeeze(
+      math_ops.matmul(matrix, vector[..., None], adjoint_a=adjoint_a),
+      axis=[-1])
+
+
+def _symmetrize(matrix):
+  return 0.5 * (matrix + array_ops.matrix_transpose(matrix))
+
+
+def _combine_filtering_elements(earlier, later):
+  """Associative operator of the parallel scan in `parallel_filter`."""
+  earlier_a, earlier_b, earlier_c, earlier_eta, earlier_j = earlier
+  later_a, later_b, later_c, later_eta, later_j = later
+  identity = linalg_ops.eye(
+      array_ops.shape(earlier_a)[-1], dtype=earlier_a.dtype)
+  # (I + C_earlier J_later)^-1, applied with solves rather than an inverse.
+  coupling = identity + math_ops.matmul(earlier_c, later_j)
+  later_a_coupled = array_ops.matrix_transpose(linalg_ops.matrix_solve(
+      coupling, array_ops.matrix_transpose(later_a), adjoint=True))
+  earlier_a_coupled = linalg_ops.matrix_solve(coupling, earlier_a)
+  a = math_ops.matmul(later_a_coupled, earlier_a)
+  b = _matvec(later_a_coupled,
+              earlier_b + _matvec(earlier_c, later_eta)) + later_b
+  c = _symmetrize(math_ops.matmul(
+      math_ops.matmul(later_a_coupled, earlier_c), later_a,
+      adjoint_b=True) + later_c)
+  eta = _matvec(earlier_a_coupled, later_eta - _matvec(later_j, earlier_b),
+                adjoint_a=True) + earlier_eta
+  j = _symmetrize(math_ops.matmul(
+      earlier_a_coupled, math_ops.matmul(later_j, earlier_a),
+      adjoint_a=True) + earlier_j)
+  return a, b, c, eta, j
+
+
+def _inclusive_scan(combine_fn, elements):
+  """Inclusive scan over the second dimension of `elements`.
+
+  Uses the Hillis-Steele formulation: ceil(log2(window size)) sequential
+  steps, each of which combines all pairs of elements at a fixed distance in
+  one batched call to `combine_fn`.
+
+  Args:
+    combine_fn: An associative function taking two lists of Tensors (earlier
+        and later elements) and returning their combination.
+    elements: A list of Tensors with shapes [batch size x window size x ...].
+  Returns:
+    A list of Tensors matching `elements`, with the combination of all
+    elements up to and including each position in the window.
+  """
+  window_size = array_ops.shape(elements[0])[1]
+
+  def _run_condition(offset, *unused):
+    del unused  # not part of while loop run condition
+    return math_ops.less(offset, window_size)
+
+  def _scan_step(offset, *current):
+    combined = combine_fn(
+        [element[:, :window_size - offset] for element in current],
+        [element[:, offset:] for element in current])
+    updated = []
+    for element, combined_element in zip(current, combined):
+      updated_element = array_ops.concat(
+          [element[:, :offset], combined_element], axis=1)
+      updated_element.set_shape(element.get_shape())
+      updated.append(updated_element)
+    return [offset * 2] + updated
+
+  return control_flow_ops.while_loop(
+      cond=_run_condition,
+      body=_scan_step,
+      loop_vars=[array_ops.constant(1, dtype=dtypes.int32)]
+      + list(elements))[1:]
+
+
+def parallel_filter(prior_state, prior_state_var, transition_matrices,
+                    transition_noise_sums, observations, observation_model,
+                    observation_noise, name=None):
+  """Filters a window of observations with a parallel prefix scan.
+
+  Equivalent to alternating `KalmanFilter.predict_state_mean`/
+  `predict_state_var` and `KalmanFilter.posterior_from_prior_state` over the
+  window, but rather than taking one step at a time, each step is expressed
+  as an element of an associative operation (Sarkka and Garcia-Fernandez,
+  "Temporal Parallelization of Bayesian Smoothers", 2021) and the filtered
+  states are computed with an inclusive scan. The number of sequential steps
+  is logarithmic in the window size, and each of them is batched over the
+  whole window, at the cost of O(log(window size)) times more arithmetic.
+
+  Args:
+    prior_state: The state mean before the first step of the window [batch
+        size x state dimension]
+    prior_state_var: The state covariance before the first step of the window
+        [batch size x state dimension x state dimension]
+    transition_matrices: A [batch size x window size x state dimension x state
+        dimension] Tensor with the transition matrix into each step of the
+        window, raised to the number of time steps taken (see
+        `KalmanFilter.predict_state_mean`).
+    transition_noise_sums: A [batch size x window size x state dimension x
+        state dimension] Tensor with the transition noise into each step (see
+        `KalmanFilter.predict_state_var`).
+    observations: A [batch size x window size x observation dimension] Tensor
+        with observed values.
+    observation_model: A [batch size x window size x observation dimension x
+        state dimension] Tensor with the observation model of each step.
+    observation_noise: An [observation dimension x observation dimension]
+        observation noise covariance matrix, which must be positive definite.
+    name: A name for the operation (optional).
+  Returns:
+    filtered_state, filtered_state_var: The posterior state means [batch size
+        x window size x state dimension] and covariances [batch size x window
+        size x state dimension x state dimension] after each step.
+  """
+  with ops.name_scope(name, "parallel_filter", [
+      prior_state, prior_state_var, transition_matrices,
+      transition_noise_sums, observations, observation_model,
+      observation_noise]):
+    transition_matrices = ops.convert_to_tensor(transition_matrices)
+    transition_noise_sums = ops.convert_to_tensor(transition_noise_sums)
+    observations = ops.convert_to_tensor(observations)
+    observation_model = ops.convert_to_tensor(observation_model)
+    observation_noise = ops.convert_to_tensor(observation_noise)
+    identity = linalg_ops.eye(
+        array_ops.shape(transition_matrices)[-1],
+        dtype=transition_matrices.dtype)
+    # Every step after the first conditions the transition from an arbitrary
+    # previous state on its observation:
+    #   A = (I - K H) F, b = K y, C = (I - K H) Q,
+    #   eta = F^T H^T S^-1 y, J = F^T H^T S^-1 H F,
+    # with S = H Q H^T + R and K = Q H^T S^-1.
+    innovation_var = math_ops.matmul(
+        math_ops.matmul(observation_model, transition_noise_sums),
+        observation_model, adjoint_b=True) + observation_noise
+    kalman_gain_transposed = linalg_ops.matrix_solve(
+        matrix=innovation_var,
+        rhs=math_ops.matmul(observation_model, transition_noise_sums),
+        adjoint=True)
+    identity_minus_factor = identity - math_ops.matmul(
+        kalman_gain_transposed, observation_model, adjoint_a=True)
+    a = math_ops.matmul(identity_minus_factor, transition_matrices)
+    b = _matvec(kalman_gain_transposed, observations, adjoint_a=True)
+    c = _symmetrize(
+        math_ops.matmul(identity_minus_factor, transition_noise_sums))
+    observed_transition = math_ops.matmul(
+        observation_model, transition_matrices)
+    eta = _matvec(
+        observed_transition,
+        array_ops.squeeze(linalg_ops.matrix_solve(
+            innovation_var, observations[..., None]), axis=[-1]),
+        adjoint_a=True)
+    j = _symmetrize(math_ops.matmul(
+        observed_transition,
+        linalg_ops.matrix_solve(innovation_var, observed_transition),
+        adjoint_a=True))
+    # The first step conditions the transition from the prior on its
+    # observation, which does not depend on any previous step.
+    first_transition = transition_matrices[:, 0]
+    first_observation_model = observation_model[:, 0]
+    first_state = _matvec(first_transition, prior_state)
+    first_state_var = math_ops.matmul(
+        math_ops.matmul(first_transition, prior_state_var),
+        first_transition, adjoint_b=True) + transition_noise_sums[:, 0]
+    first_innovation_var = math_ops.matmul(
+        math_ops.matmul(first_observation_model, first_state_var),
+        first_observation_model, adjoint_b=True) + observation_noise
+    first_gain_transposed = linalg_ops.matrix_solve(
+        matrix=first_innovation_var,
+        rhs=math_ops.matmul(first_observation_model, first_state_var),
+        adjoint=True)
+    first_b = first_state + _matvec(
+        first_gain_transposed,
+        observations[:, 0] - _matvec(first_observation_model, first_state),
+        adjoint_a=True)
+    first_c = _symmetrize(math_ops.matmul(
+        identity - math_ops.matmul(
+            first_gain_transposed, first_observation_model, adjoint_a=True),
+        first_state_var))
+    elements = [
+        array_ops.concat([array_ops.zeros_like(a[:, :1]), a[:, 1:]], axis=1),
+        array_ops.concat([first_b[:, None], b[:, 1:]], axis=1),
+        array_ops.concat([first_c[:, None], c[:, 1:]], axis=1),
+        array_ops.concat([array_ops.zeros_like(eta[:, :1]), eta[:, 1:]],
+                         axis=1),
+        array_ops.concat([array_ops.zeros_like(j[:, :1]), j[:, 1:]], axis=1)]
+    for element, original in zip(elements, [a, b, c, eta, j]):
+      element.set_shape(original.get_shape())
+    _, filtered_state, filtered_state_var, _, _ = _inclusive_scan(
+        _combine_filtering_elements, elements)
+    return filtered_state, filtered_state_var
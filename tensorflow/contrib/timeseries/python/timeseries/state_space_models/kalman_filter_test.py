@@ -63,9 +63,13 @@ def _powers_and_sums_from_transition_matrix(
 class MultivariateTests(test.TestCase):
 
   def _multivariate_symmetric_covariance_test_template(
-      self, dtype, simplified_posterior_variance_computation):
+      self, dtype, simplified_posterior_variance_computation,
+      square_root=False):
     """Check that errors aren't building up asymmetries in covariances."""
-    kf = kalman_filter.KalmanFilter(dtype=dtype)
+    if square_root:
+      kf = kalman_filter.SquareRootKalmanFilter(dtype=dtype)
+    else:
+      kf = kalman_filter.KalmanFilter(dtype=dtype)
     observation_noise_covariance = constant_op.constant(
         [[1., 0.5], [0.5, 1.]], dtype=dtype)
     observation_model = constant_op.constant(
@@ -120,6 +124,11 @@ class MultivariateTests(test.TestCase):
     self._multivariate_symmetric_covariance_test_template(
         dtypes.float64, simplified_posterior_variance_computation=True)
 
+  def test_multivariate_symmetric_covariance_square_root_float32(self):
+    self._multivariate_symmetric_covariance_test_template(
+        dtypes.float32, simplified_posterior_variance_computation=False,
+        square_root=True)
+
 
 class KalmanFilterNonBatchTest(test.TestCase):
   """Single-batch KalmanFilter tests."""
@@ -421,5 +430,96 @@ class KalmanFilterBatchTest(test.TestCase):
       self.assertAllClose(var2.eval()[2], batch_eval[2])
 
 
+class SquareRootKalmanFilterTest(test.TestCase):
+
+  def test_posterior_matches_joseph_form(self):
+    state = constant_op.constant([[1.9, 1.], [0.5, -1.]])
+    state_var = constant_op.constant(
+        [[[1., 0.3], [0.3, 2.]], [[0.5, 0.], [0., 0.1]]])
+    observation = constant_op.constant([[1., 1.], [0.3, -0.8]])
+    observation_model = array_ops.tile(OBSERVATION_MODEL, [2, 1, 1])
+    posteriors = []
+    for kf in [kalman_filter.KalmanFilter(),
+               kalman_filter.SquareRootKalmanFilter()]:
+      predicted_observations = kf.observed_from_state(
+          state_mean=state, state_var=state_var,
+          observation_model=observation_model,
+          observation_noise=OBSERVATION_NOISE)
+      posteriors.append(kf.posterior_from_prior_state(
+          prior_state=state, prior_state_var=state_var,
+          observation=observation,
+          observation_model=observation_model,
+          predicted_observations=predicted_observations,
+          observation_noise=OBSERVATION_NOISE))
+    with self.test_session():
+      (joseph_state, joseph_state_var), (root_state, root_state_var) = (
+          [(mean.eval(), var.eval()) for mean, var in posteriors])
+    self.assertAllClose(joseph_state, root_state)
+    self.assertAllClose(joseph_state_var, root_state_var, atol=1e-5)
+
+
+class ParallelFilterTest(test.TestCase):
+
+  def test_matches_sequential_filtering(self):
+    dtype = dtypes.float64
+    kf = kalman_filter.KalmanFilter(dtype=dtype)
+    transition_fn, power_sum_fn = _powers_and_sums_from_transition_matrix(
+        state_transition=constant_op.constant(STATE_TRANSITION, dtype=dtype),
+        state_transition_noise_covariance=constant_op.constant(
+            STATE_TRANSITION_NOISE, dtype=dtype),
+        state_noise_transform=constant_op.constant(
+            STATE_NOISE_TRANSFORM, dtype=dtype),
+        max_gap=3)
+    # Number of time steps taken into each step of a window of 7, for a batch
+    # of 2.
+    gaps = numpy.array([[1, 1, 3, 1, 2, 1, 1], [2, 1, 1, 1, 1, 3, 1]])
+    numpy.random.seed(0)
+    observations = constant_op.constant(
+        numpy.cumsum(numpy.random.normal(size=[2, 7, 2]), axis=1))
+    observation_model = constant_op.constant(
+        numpy.tile(OBSERVATION_MODEL, [2, 1, 1]), dtype=dtype)
+    observation_noise = constant_op.constant(
+        [[0.1, 0.02], [0.02, 0.2]], dtype=dtype)
+    prior_state = constant_op.constant([[1., 0.], [-1., 0.5]], dtype=dtype)
+    prior_state_var = constant_op.constant(
+        [[[1., 0.], [0., 1.]], [[2., 0.5], [0.5, 1.]]], dtype=dtype)
+    state = prior_state
+    state_var = prior_state_var
+    sequential_states = []
+    sequential_state_vars = []
+    for step in range(7):
+      state = kf.predict_state_mean(state, transition_fn(gaps[:, step]))
+      state_var = kf.predict_state_var(
+          state_var, transition_fn(gaps[:, step]),
+          power_sum_fn(gaps[:, step]))
+      predicted_observations = kf.observed_from_state(
+          state_mean=state, state_var=state_var,
+          observation_model=observation_model,
+          observation_noise=observation_noise)
+      state, state_var = kf.posterior_from_prior_state(
+          prior_state=state, prior_state_var=state_var,
+          observation=observations[:, step],
+          observation_model=observation_model,
+          predicted_observations=predicted_observations,
+          observation_noise=observation_noise)
+      sequential_states.append(state)
+      sequential_state_vars.append(state_var)
+    parallel_state, parallel_state_var = kalman_filter.parallel_filter(
+        prior_state=prior_state,
+        prior_state_var=prior_state_var,
+        transition_matrices=array_ops.reshape(
+            transition_fn(gaps.reshape([-1])), [2, 7, 2, 2]),
+        transition_noise_sums=power_sum_fn(gaps),
+        observations=observations,
+        observation_model=array_ops.tile(
+            observation_model[:, None], [1, 7, 1, 1]),
+        observation_noise=observation_noise)
+    with self.test_session():
+      self.assertAllClose(array_ops.stack(sequential_states, axis=1).eval(),
+                          parallel_state.eval())
+      self.assertAllClose(
+          array_ops.stack(sequential_state_vars, axis=1).eval(),
+          parallel_state_var.eval())
+
 if __name__ == "__main__":
   test.main()
@@ -43,6 +43,10 @@ from tensorflow.python.ops import math_ops
 from tensorflow.python.ops import variable_scope
 
 
+SEQUENTIAL_FILTERING = "sequential"
+PARALLEL_SCAN_FILTERING = "parallel_scan"
+
+
 class StateSpaceModelConfiguration(
     collections.namedtuple(
         typename="StateSpaceModelConfiguration",
@@ -55,7 +59,8 @@ class StateSpaceModelConfiguration(
             "filtering_maximum_posterior_variance_ratio",
             "filtering_minimum_posterior_variance",
             "transition_covariance_initial_log_scale_bias",
-            "static_unrolling_window_size_threshold"])):
+            "static_unrolling_window_size_threshold",
+            "filtering_method", "square_root_filtering"])):
   """Configuration options for StateSpaceModels."""
 
   def __new__(
@@ -74,7 +79,9 @@ class StateSpaceModelConfiguration(
       filtering_maximum_posterior_variance_ratio=1e6,
       filtering_minimum_posterior_variance=0.,
       transition_covariance_initial_log_scale_bias=-5.,
-      static_unrolling_window_size_threshold=None):
+      static_unrolling_window_size_threshold=None,
+      filtering_method=SEQUENTIAL_FILTERING,
+      square_root_filtering=False):
     """Configuration options for StateSpaceModels.
 
     Args:
@@ -155,9 +162,32 @@ class StateSpaceModelConfiguration(
           unrolling is performed) based on the window size (windows with this
           size and smaller will have their graphs unrolled statically). See the
           SequentialTimeSeriesModel constructor for details.
+      filtering_method: Only relevant for the top-level StateSpaceModel in an
+          ensemble; how training and evaluation windows are filtered.
+          SEQUENTIAL_FILTERING (default) takes one filtering step at a time.
+          PARALLEL_SCAN_FILTERING computes the filtered states of a whole
+          window with a parallel prefix scan (see
+          `kalman_filter.parallel_filter`), which takes a number of sequential
+          steps logarithmic in the window size and is faster for long windows.
+          It requires observation noise, and does not support exogenous
+          features or a filtering_postprocessor. Covariance clipping
+          (filtering_maximum_posterior_variance_ratio and
+          filtering_minimum_posterior_variance) is applied to one-step-ahead
+          predictions but not within the scan. Prediction is always sequential.
+      square_root_filtering: If True, posterior state covariances are
+          computed in factored form (see `kalman_filter.SquareRootKalmanFilter`)
+          which keeps them positive semi-definite despite rounding errors, at
+          the cost of Cholesky and QR decompositions at every step. Requires
+          observation noise and positive definite state covariances (see
+          filtering_minimum_posterior_variance).
     Returns:
       A StateSpaceModelConfiguration object.
+    Raises:
+      ValueError: If `filtering_method` is not supported.
     """
+    if filtering_method not in (SEQUENTIAL_FILTERING, PARALLEL_SCAN_FILTERING):
+      raise ValueError("Unknown filtering_method {}, expected {} or {}".format(
+          filtering_method, SEQUENTIAL_FILTERING, PARALLEL_SCAN_FILTERING))
     if exogenous_feature_columns is None:
       exogenous_feature_columns = []
     return super(StateSpaceModelConfiguration, cls).__new__(
@@ -169,7 +199,8 @@ class StateSpaceModelConfiguration(
         filtering_maximum_posterior_variance_ratio,
         filtering_minimum_posterior_variance,
         transition_covariance_initial_log_scale_bias,
-        static_unrolling_window_size_threshold)
+        static_unrolling_window_size_threshold,
+        filtering_method, square_root_filtering)
 
 
 class StateSpaceModel(model.SequentialTimeSeriesModel):
@@ -220,7 +251,17 @@ class StateSpaceModel(model.SequentialTimeSeriesModel):
 
     Args:
       configuration: A StateSpaceModelConfiguration object.
+    Raises:
+      ValueError: If `configuration` requests parallel scan filtering together
+        with exogenous features or a filtering postprocessor.
     """
+    if configuration.filtering_method == PARALLEL_SCAN_FILTERING:
+      if configuration.exogenous_feature_columns:
+        raise ValueError("Parallel scan filtering does not support exogenous "
+                         "features.")
+      if configuration.filtering_postprocessor is not None:
+        raise ValueError("Parallel scan filtering does not support a "
+                         "filtering_postprocessor.")
     self._configuration = configuration
     if configuration.filtering_postprocessor is not None:
       filtering_postprocessor_names = (
@@ -428,6 +469,113 @@ class StateSpaceModel(model.SequentialTimeSeriesModel):
           outputs=predictions)
     return (filtered_state, predictions)
 
+  def per_step_batch_loss(self, features, mode, state):
+    """Computes predictions, losses, and filtered states for a window.
+
+    Uses a parallel prefix scan if the configuration's `filtering_method` is
+    PARALLEL_SCAN_FILTERING, and the sequential filtering loop of
+    `SequentialTimeSeriesModel` otherwise.
+
+    Args:
+      features: A dictionary with times and values. See `define_loss`.
+      mode: The tf.estimator.ModeKeys mode to use (TRAIN, EVAL, INFER).
+      state: A tuple of (mean, covariance, previous_times) having shapes
+          mean; [batch size x state dimension]
+          covariance; [batch size x state dimension x state dimension]
+          previous_times; [batch size]
+    Returns:
+      A tuple of (loss, filtered_states, predictions), see
+      `SequentialTimeSeriesModel.per_step_batch_loss`.
+    """
+    if self._configuration.filtering_method != PARALLEL_SCAN_FILTERING:
+      return super(StateSpaceModel, self).per_step_batch_loss(
+          features, mode, state)
+    self._check_graph_initialized()
+    times = math_ops.cast(features[TrainEvalFeatures.TIMES], dtype=dtypes.int64)
+    values = math_ops.cast(features[TrainEvalFeatures.VALUES], dtype=self.dtype)
+    if self._normalize_features:
+      values = self._scale_data(values)
+    start_mean, start_covariance, start_times = state
+    self._window_initializer(times, state)
+    batch_size = array_ops.shape(times)[0]
+    window_size = array_ops.shape(times)[1]
+
+    def _unflatten(flat):
+      return array_ops.reshape(
+          flat,
+          array_ops.concat([[batch_size, window_size],
+                            array_ops.shape(flat)[1:]], axis=0))
+
+    def _flatten(windowed):
+      return array_ops.reshape(
+          windowed,
+          array_ops.concat([[-1], array_ops.shape(windowed)[2:]], axis=0))
+
+    previous_times = array_ops.concat(
+        [start_times[:, None], times[:, :-1]], axis=1)
+    # Ignore negative imputation intervals due to transient start time
+    # estimates, as in _imputation_step.
+    flat_times = array_ops.reshape(times, [-1])
+    flat_catchup_times = math_ops.maximum(
+        flat_times - array_ops.reshape(previous_times, [-1]), 0)
+    flat_transition_matrices, flat_transition_noise_sums = (  # pylint: disable=unbalanced-tuple-unpacking
+        self._cached_transition_powers_and_sums(flat_catchup_times))
+    flat_observation_model = self.get_broadcasted_observation_model(flat_times)
+    filtered_state, filtered_state_covariance = kalman_filter.parallel_filter(
+        prior_state=start_mean,
+        prior_state_var=start_covariance,
+        transition_matrices=_unflatten(flat_transition_matrices),
+        transition_noise_sums=_unflatten(flat_transition_noise_sums),
+        observations=values,
+        observation_model=_unflatten(flat_observation_model),
+        observation_noise=self._observation_noise_covariance)
+    # With the filtered states of all steps known, the one-step-ahead
+    # predictions and their log likelihoods are computed for the whole window
+    # at once, using the same filter as sequential filtering.
+    estimated_state = self._kalman_filter.predict_state_mean(
+        _flatten(array_ops.concat(
+            [start_mean[:, None], filtered_state[:, :-1]], axis=1)),
+        flat_transition_matrices)
+    estimated_state_covariance = self._kalman_filter.predict_state_var(
+        _flatten(array_ops.concat(
+            [start_covariance[:, None], filtered_state_covariance[:, :-1]],
+            axis=1)),
+        flat_transition_matrices, flat_transition_noise_sums)
+    # As in _prediction_step followed by _filtering_step, the predictions use
+    # the unclipped covariance, which is only clipped for the filtering update.
+    predicted_obs, predicted_obs_var = self._kalman_filter.observed_from_state(
+        state_mean=estimated_state,
+        state_var=estimated_state_covariance,
+        observation_model=flat_observation_model,
+        observation_noise=self._observation_noise_covariance)
+    estimated_state_covariance = math_utils.clip_covariance(
+        estimated_state_covariance,
+        self._configuration.filtering_maximum_posterior_variance_ratio,
+        self._configuration.filtering_minimum_posterior_variance)
+    (filtered_state, filtered_state_covariance,
+     log_prob) = self._kalman_filter.do_filter(
+         estimated_state=estimated_state,
+         estimated_state_covariance=estimated_state_covariance,
+         predicted_observation=predicted_obs,
+         predicted_observation_covariance=predicted_obs_var,
+         observation=_flatten(values),
+         observation_model=flat_observation_model,
+         observation_noise=self._observation_noise_covariance)
+    log_prob = array_ops.reshape(log_prob, array_ops.shape(times))
+    log_prob.set_shape(times.get_shape())
+    outputs = {
+        "mean": _unflatten(predicted_obs),
+        "covariance": _unflatten(predicted_obs_var),
+        "log_likelihood": log_prob}
+    filtered_states = (_unflatten(filtered_state),
+                       _unflatten(filtered_state_covariance),
+                       times)
+    per_observation_loss = -math_ops.reduce_mean(log_prob)
+    per_observation_loss += self._loss_additions(times, values, mode)
+    if self._normalize_features:
+      outputs = self._scale_back_predictions(outputs)
+    return per_observation_loss, filtered_states, outputs
+
   def _scale_back_predictions(self, predictions):
     """Return a window of predictions to input scale."""
     predictions["mean"] = self._scale_back_data(predictions["mean"])
@@ -685,13 +833,25 @@ class StateSpaceModel(model.SequentialTimeSeriesModel):
       input_statistics: A math_utils.InputStatistics object containing input
           statistics. If None, data-independent defaults are used, which may
           result in longer or unstable training.
+    Raises:
+      ValueError: If parallel scan or square root filtering is requested
+        without observation noise.
     """
+    if (not self._configuration.use_observation_noise
+        and (self._configuration.filtering_method == PARALLEL_SCAN_FILTERING
+             or self._configuration.square_root_filtering)):
+      raise ValueError("Parallel scan and square root filtering require "
+                       "use_observation_noise=True.")
     self._set_input_statistics(input_statistics=input_statistics)
     self._define_parameters()
     with variable_scope.variable_scope(self._variable_scope):
       self._observation_noise_covariance = ops.convert_to_tensor(
           self.get_observation_noise_covariance(), dtype=self.dtype)
-    self._kalman_filter = kalman_filter.KalmanFilter(dtype=self.dtype)
+    if self._configuration.square_root_filtering:
+      self._kalman_filter = kalman_filter.SquareRootKalmanFilter(
+          dtype=self.dtype)
+    else:
+      self._kalman_filter = kalman_filter.KalmanFilter(dtype=self.dtype)
     (self.prior_state_mean,
      self.prior_state_var) = self._make_priors()
 
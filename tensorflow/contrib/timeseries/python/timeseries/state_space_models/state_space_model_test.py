@@ -19,6 +19,7 @@ from __future__ import division
 from __future__ import print_function
 
 import collections
+import time
 
 import numpy
 
@@ -33,6 +34,7 @@ from tensorflow.contrib.timeseries.python.timeseries import state_management
 from tensorflow.contrib.timeseries.python.timeseries import test_utils
 from tensorflow.contrib.timeseries.python.timeseries.state_space_models import state_space_model
 
+from tensorflow.python.client import session as session_lib
 from tensorflow.python.estimator import estimator_lib
 from tensorflow.python.framework import constant_op
 from tensorflow.python.framework import dtypes
@@ -40,6 +42,7 @@ from tensorflow.python.framework import ops
 from tensorflow.python.framework import random_seed
 from tensorflow.python.framework import tensor_shape
 from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import gradients_impl
 from tensorflow.python.ops import linalg_ops
 from tensorflow.python.ops import math_ops
 from tensorflow.python.ops import variable_scope
@@ -752,5 +755,126 @@ class MultivariateTests(test.TestCase):
       sess.run([initializer])
       outputs.loss.eval()
 
+
+class FilteringMethodTests(test.TestCase):
+
+  def _filtering_outputs(self, times, values, reuse, **configuration_kwargs):
+    # The same seed gives every model the same noise transform and observation
+    # model, and variables are shared between models.
+    numpy.random.seed(5)
+    with variable_scope.variable_scope("model", reuse=reuse):
+      model = StubStateSpaceModel(
+          transition=PosteriorTests._adder_transition,
+          state_noise_dimension=2,
+          configuration=state_space_model.StateSpaceModelConfiguration(
+              **configuration_kwargs))
+    model.initialize_graph()
+    loss, filtered_states, outputs = model.per_step_batch_loss(
+        features={
+            feature_keys.TrainEvalFeatures.TIMES: times,
+            feature_keys.TrainEvalFeatures.VALUES: values
+        },
+        mode=estimator_lib.ModeKeys.EVAL,
+        state=math_utils.replicate_state(
+            start_state=model.get_start_state(), batch_size=2))
+    return loss, filtered_states, outputs
+
+  def test_filtering_methods_match(self):
+    times = constant_op.constant([[1, 2, 4, 5, 6, 9, 10, 11],
+                                  [3, 4, 5, 7, 8, 9, 10, 14]], dtypes.int64)
+    numpy.random.seed(3)
+    values = constant_op.constant(
+        numpy.cumsum(numpy.random.normal(size=[2, 8, 1]), axis=1),
+        dtypes.float32)
+    sequential = self._filtering_outputs(times, values, reuse=False)
+    parallel_scan = self._filtering_outputs(
+        times, values, reuse=True,
+        filtering_method=state_space_model.PARALLEL_SCAN_FILTERING)
+    square_root = self._filtering_outputs(
+        times, values, reuse=True, square_root_filtering=True)
+    with self.test_session() as session:
+      variables.global_variables_initializer().run()
+      (sequential, parallel_scan, square_root) = session.run(
+          [sequential, parallel_scan, square_root])
+    for other in [parallel_scan, square_root]:
+      sequential_loss, sequential_states, sequential_outputs = sequential
+      other_loss, other_states, other_outputs = other
+      self.assertAllClose(sequential_loss, other_loss, rtol=1e-4)
+      for sequential_state, other_state in zip(sequential_states,
+                                               other_states):
+        self.assertAllClose(sequential_state, other_state,
+                            rtol=1e-3, atol=1e-4)
+      for key in ["mean", "covariance", "log_likelihood"]:
+        self.assertAllClose(sequential_outputs[key], other_outputs[key],
+                            rtol=1e-3, atol=1e-4)
+
+  def test_parallel_scan_unsupported_configurations(self):
+    with self.assertRaisesRegexp(ValueError, "exogenous"):
+      StubStateSpaceModel(
+          transition=PosteriorTests._adder_transition,
+          state_noise_dimension=2,
+          configuration=state_space_model.StateSpaceModelConfiguration(
+              filtering_method=state_space_model.PARALLEL_SCAN_FILTERING,
+              exogenous_feature_columns=[
+                  layers.real_valued_column("exogenous")]))
+    model = StubStateSpaceModel(
+        transition=PosteriorTests._adder_transition,
+        state_noise_dimension=2,
+        configuration=state_space_model.StateSpaceModelConfiguration(
+            filtering_method=state_space_model.PARALLEL_SCAN_FILTERING,
+            use_observation_noise=False))
+    with self.assertRaisesRegexp(ValueError, "use_observation_noise"):
+      model.initialize_graph()
+    with self.assertRaisesRegexp(ValueError, "Unknown filtering_method"):
+      state_space_model.StateSpaceModelConfiguration(filtering_method="other")
+
+
+class FilteringBenchmark(test.Benchmark):
+  """Compares the training step time of filtering methods."""
+
+  def _benchmark_filtering(self, filtering_method, window_size, iters=5):
+    with ops.Graph().as_default():
+      numpy.random.seed(5)
+      model = StubStateSpaceModel(
+          transition=PosteriorTests._adder_transition,
+          state_noise_dimension=2,
+          configuration=state_space_model.StateSpaceModelConfiguration(
+              filtering_method=filtering_method))
+      model.initialize_graph()
+      loss, _, _ = model.per_step_batch_loss(
+          features={
+              feature_keys.TrainEvalFeatures.TIMES:
+                  numpy.arange(window_size)[None],
+              feature_keys.TrainEvalFeatures.VALUES:
+                  numpy.cumsum(numpy.random.normal(size=[1, window_size, 1]),
+                               axis=1)
+          },
+          mode=estimator_lib.ModeKeys.TRAIN,
+          state=math_utils.replicate_state(
+              start_state=model.get_start_state(), batch_size=1))
+      gradients = gradients_impl.gradients(
+          loss, variables.trainable_variables())
+      with session_lib.Session() as session:
+        session.run(variables.global_variables_initializer())
+        session.run([loss, gradients])
+        start = time.time()
+        for _ in range(iters):
+          session.run([loss, gradients])
+        wall_time = (time.time() - start) / iters
+    name = "state_space_filtering_%s_window_%d" % (filtering_method,
+                                                  window_size)
+    self.report_benchmark(iters=iters, wall_time=wall_time, name=name)
+
+  def benchmark_sequential_filtering(self):
+    for window_size in [100, 1000, 10000]:
+      self._benchmark_filtering(state_space_model.SEQUENTIAL_FILTERING,
+                                window_size)
+
+  def benchmark_parallel_scan_filtering(self):
+    for window_size in [100, 1000, 10000]:
+      self._benchmark_filtering(state_space_model.PARALLEL_SCAN_FILTERING,
+                                window_size)
+
+
 if __name__ == "__main__":
   test.main()
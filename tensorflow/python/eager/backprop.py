@@ -613,10 +613,24 @@ def _zeros(shape, dtype):
   return cached
 
 
+_ones_cache = context._TensorCache()  # pylint: disable=protected-access
+
+
 def _ones(shape, dtype):
-  if shape == ():  # pylint: disable=g-explicit-bool-comparison
-    return constant_op.constant(1, dtype=dtype)
-  return _fast_fill(1, shape, dtype)
+  """Returns ones of the given shape and dtype, cached when executing eagerly."""
+  if not context.executing_eagerly():
+    if shape == ():  # pylint: disable=g-explicit-bool-comparison
+      return constant_op.constant(1, dtype=dtype)
+    return _fast_fill(1, shape, dtype)
+  cache_key = shape, dtype, context.context().device_name
+  cached = _ones_cache.get(cache_key)
+  if cached is None:
+    if shape == ():  # pylint: disable=g-explicit-bool-comparison
+      cached = constant_op.constant(1, dtype=dtype)
+    else:
+      cached = _fast_fill(1, shape, dtype)
+    _ones_cache.put(cache_key, cached)
+  return cached
 
 
 _default_vspace = imperative_grad.VSpace(
@@ -566,6 +566,33 @@ class BackpropTest(test.TestCase):
     self.assertEqual(self.evaluate(dy_dx), 2 * 3)
     del g
 
+  @test_util.run_in_graph_and_eager_modes()
+  def testGradientTapePrunesOpsNotReachableFromSources(self):
+    backward_calls = []
+
+    @custom_gradient.custom_gradient
+    def f(x):
+
+      def grad(dy):
+        backward_calls.append(dy)
+        return dy
+
+      return array_ops.identity(x), grad
+
+    x = constant_op.constant(3.0)
+    y = constant_op.constant(2.0)
+    with backprop.GradientTape(persistent=True) as g:
+      g.watch(x)
+      g.watch(y)
+      z = f(y) + 2 * x
+    dz_dx = g.gradient(z, [x])[0]
+    self.assertEqual(self.evaluate(dz_dx), 2.0)
+    self.assertEqual(len(backward_calls), 0)
+    dz_dy = g.gradient(z, [y])[0]
+    self.assertEqual(self.evaluate(dz_dy), 1.0)
+    self.assertEqual(len(backward_calls), 1)
+    del g
+
   @test_util.assert_no_new_tensors
   @test_util.run_in_graph_and_eager_modes()
   def testHigherOrderGradient(self):
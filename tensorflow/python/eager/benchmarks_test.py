@@ -542,6 +542,44 @@ class MicroBenchmarks(test.Benchmark):
       self._benchmark_read_variable_with_tape(
           m, num_iters=self._num_iters_2_by_2)
 
+  def _benchmark_tape_gradient_few_of_many_variables(self, num_variables,
+                                                     num_iters):
+    """Gradient with respect to one of many variables recorded on the tape."""
+    variables = [
+        resource_variable_ops.ResourceVariable(self._m_2_by_2)
+        for _ in xrange(num_variables)
+    ]
+
+    def f():
+      with backprop.GradientTape() as tape:
+        loss = math_ops.add_n(
+            [math_ops.reduce_sum(math_ops.matmul(v, v)) for v in variables])
+      return tape.gradient(loss, variables[:1])
+
+    self._run(f, num_iters)
+
+  def _benchmark_tape_gradient_reused_variable(self, num_uses, num_iters):
+    """Gradient with respect to a variable used many times."""
+    v = resource_variable_ops.ResourceVariable(self._m_2_by_2)
+
+    def f():
+      with backprop.GradientTape() as tape:
+        x = v
+        for _ in xrange(num_uses):
+          x = math_ops.matmul(x, v)
+      return tape.gradient(x, [v])
+
+    self._run(f, num_iters)
+
+  def benchmark_tape_gradient_1_of_100_variables_CPU(self):
+    with context.device(CPU):
+      self._benchmark_tape_gradient_few_of_many_variables(
+          num_variables=100, num_iters=100)
+
+  def benchmark_tape_gradient_variable_reused_50_times_CPU(self):
+    with context.device(CPU):
+      self._benchmark_tape_gradient_reused_variable(num_uses=50, num_iters=100)
+
 
 if __name__ == "__main__":
   test.main()
@@ -0,0 +1,161 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Benchmarks for the cost of constructing representative graphs.
+
+Each benchmark builds a fresh graph several times and reports the median wall
+time of a build, together with the number of ops created. Set the environment
+variable `TF_PROFILE_GRAPH_BUILD=1` to also print where the build time is
+spent, as attributed by `GraphBuildProfiler`.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import time
+
+import numpy as np
+
+from tensorflow.python.feature_column import feature_column
+from tensorflow.python.framework import constant_op
+from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import ops
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import control_flow_ops
+from tensorflow.python.ops import gradients_impl
+from tensorflow.python.ops import init_ops
+from tensorflow.python.ops import math_ops
+from tensorflow.python.ops import nn_ops
+from tensorflow.python.ops import rnn_cell_impl
+from tensorflow.python.ops import variable_scope
+from tensorflow.python.ops import variables
+from tensorflow.python.platform import test
+from tensorflow.python.profiler import graph_build_profiler
+
+
+def _build_deep_mlp(depth=50, width=64):
+  """A deep fully connected network with its gradients."""
+  x = array_ops.placeholder(dtypes.float32, [None, width])
+  h = x
+  for i in range(depth):
+    with variable_scope.variable_scope("layer_%d" % i):
+      w = variable_scope.get_variable(
+          "w", [width, width], initializer=init_ops.glorot_uniform_initializer())
+      b = variable_scope.get_variable(
+          "b", [width], initializer=init_ops.zeros_initializer())
+      h = nn_ops.relu(nn_ops.bias_add(math_ops.matmul(h, w), b))
+  loss = math_ops.reduce_sum(h)
+  gradients_impl.gradients(loss, variables.trainable_variables())
+
+
+def _build_unrolled_rnn(num_steps=50, num_units=32):
+  """A statically unrolled LSTM with its gradients."""
+  cell = rnn_cell_impl.BasicLSTMCell(num_units)
+  inputs = [
+      array_ops.placeholder(dtypes.float32, [8, num_units])
+      for _ in range(num_steps)
+  ]
+  state = cell.zero_state(8, dtypes.float32)
+  outputs = []
+  with variable_scope.variable_scope("rnn") as scope:
+    for i, inp in enumerate(inputs):
+      if i > 0:
+        scope.reuse_variables()
+      output, state = cell(inp, state)
+      outputs.append(output)
+  gradients_impl.gradients(math_ops.add_n(outputs), inputs)
+
+
+def _build_wide_feature_columns(num_columns=100):
+  """A wide model with many hashed categorical and numeric features."""
+  features = {}
+  columns = []
+  for i in range(num_columns):
+    key = "categorical_%d" % i
+    features[key] = array_ops.placeholder(dtypes.string, [None, 1])
+    columns.append(
+        feature_column.embedding_column(
+            feature_column.categorical_column_with_hash_bucket(key, 1000), 8))
+    key = "numeric_%d" % i
+    features[key] = array_ops.placeholder(dtypes.float32, [None, 1])
+    columns.append(feature_column.numeric_column(key))
+  feature_column.input_layer(features, columns)
+
+
+def _build_while_loops(num_loops=20, num_nested=3):
+  """Many sequential, nested while loops with their gradients."""
+  x = constant_op.constant(np.ones([4, 4], dtype=np.float32))
+
+  def _nested_loop(v, depth):
+    if depth == 0:
+      return math_ops.tanh(v)
+    return control_flow_ops.while_loop(
+        lambda i, _: i < 3,
+        lambda i, y: (i + 1, _nested_loop(y, depth - 1)),
+        [constant_op.constant(0), v])[1]
+
+  y = x
+  for _ in range(num_loops):
+    y = _nested_loop(y, num_nested)
+  gradients_impl.gradients(y, x)
+
+
+class GraphBuildingBenchmark(test.Benchmark):
+  """Benchmarks graph construction."""
+
+  def _run_build(self, name, build_fn, num_iters=5):
+    """Builds a graph `num_iters` times and reports the median build time."""
+    profile = os.environ.get("TF_PROFILE_GRAPH_BUILD") == "1"
+    times = []
+    num_ops = 0
+    for _ in range(num_iters):
+      graph = ops.Graph()
+      with graph.as_default():
+        start = time.time()
+        build_fn()
+        times.append(time.time() - start)
+      num_ops = len(graph.get_operations())
+    if profile:
+      graph = ops.Graph()
+      with graph.as_default():
+        with graph_build_profiler.GraphBuildProfiler() as prof:
+          build_fn()
+      print(prof.format_report())
+    wall_time = np.median(times)
+    print("%s: %d ops, %.3f s/build, %.1f us/op" %
+          (name, num_ops, wall_time, wall_time / num_ops * 1e6))
+    self.report_benchmark(
+        name="graph_building_" + name,
+        iters=num_iters,
+        wall_time=wall_time,
+        extras={"num_ops": num_ops,
+                "us_per_op": wall_time / num_ops * 1e6})
+
+  def benchmark_deep_mlp(self):
+    self._run_build("deep_mlp", _build_deep_mlp)
+
+  def benchmark_unrolled_rnn(self):
+    self._run_build("unrolled_rnn", _build_unrolled_rnn)
+
+  def benchmark_wide_feature_columns(self):
+    self._run_build("wide_feature_columns", _build_wide_feature_columns)
+
+  def benchmark_while_loops(self):
+    self._run_build("while_loops", _build_while_loops)
+
+
+if __name__ == "__main__":
+  test.main()
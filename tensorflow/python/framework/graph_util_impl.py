@@ -18,15 +18,14 @@
 from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
-import copy
-import re
+import collections
 import six
 
-from tensorflow.core.framework import attr_value_pb2
 from tensorflow.core.framework import graph_pb2
 from tensorflow.core.framework import node_def_pb2
 from tensorflow.python.framework import dtypes
 from tensorflow.python.framework import ops
+from tensorflow.python.framework import tensor_shape
 from tensorflow.python.framework import tensor_util
 from tensorflow.python.platform import tf_logging as logging
 from tensorflow.python.util.tf_export import tf_export
@@ -44,6 +43,11 @@ _VARIABLE_OPS = {
     "VariableV2",
 }
 
+# Upper bound on the number of bytes of variable values fetched by a single
+# `Session.run` call in `convert_variables_to_constants`. Variables whose size
+# cannot be determined statically are fetched on their own.
+_MAX_FETCH_BYTES = 1 << 28
+
 
 def _is_variable_op(op):
   """Returns true if 'op' refers to a Variable node."""
@@ -137,18 +141,64 @@ def _bfs_for_reachable_nodes(target_nodes, name_to_input_name):
   """Breadth first search for reachable nodes from target nodes."""
   nodes_to_keep = set()
   # Breadth first search to find all the nodes that we should keep.
-  next_to_visit = target_nodes[:]
+  next_to_visit = collections.deque(target_nodes)
   while next_to_visit:
-    n = next_to_visit[0]
-    del next_to_visit[0]
+    n = next_to_visit.popleft()
     if n in nodes_to_keep:
       # Already visited this node.
       continue
     nodes_to_keep.add(n)
-    next_to_visit += name_to_input_name[n]
+    next_to_visit.extend(name_to_input_name[n])
   return nodes_to_keep
 
 
+class _GraphDefIndex(object):
+  """Name-keyed index over the nodes of a GraphDef.
+
+  The index is built in a single pass over `graph_def.node`. Sub-graph
+  extraction then only walks the reachable nodes and yields references to the
+  original NodeDefs, so callers decide when (and whether) to copy them.
+
+  An index can be shared by several passes over the same GraphDef, as long as
+  the GraphDef is not modified in between, e.g. by `freeze_graph` which checks
+  the output nodes before converting the variables.
+  """
+
+  def __init__(self, graph_def):
+    self.graph_def = graph_def
+    (self.name_to_input_name, self.name_to_node,
+     self.name_to_seq_num) = _extract_graph_summary(graph_def)
+
+  def missing_nodes(self, node_names):
+    """Returns the names in `node_names` that are not nodes of the graph."""
+    return [n for n in node_names if n not in self.name_to_node]
+
+  def reachable_nodes(self, dest_nodes):
+    """Returns the set of node names that can reach any of `dest_nodes`."""
+    _assert_nodes_are_present(self.name_to_node, dest_nodes)
+    return _bfs_for_reachable_nodes(dest_nodes, self.name_to_input_name)
+
+  def sub_graph_nodes(self, dest_nodes):
+    """Yields the NodeDefs reaching `dest_nodes`, in their original order."""
+    nodes_to_keep = self.reachable_nodes(dest_nodes)
+    for seq, node in enumerate(self.graph_def.node):
+      n = _node_name(node.name)
+      # Only the last definition of a duplicated name is kept, matching the
+      # behavior of the name maps.
+      if n in nodes_to_keep and self.name_to_seq_num[n] == seq:
+        yield node
+
+
+def _extract_sub_graph(graph_index, dest_nodes):
+  """Builds the sub-graph of an indexed graph that reaches `dest_nodes`."""
+  out = graph_pb2.GraphDef()
+  # `extend` copies the nodes, so the input graph is never aliased.
+  out.node.extend(graph_index.sub_graph_nodes(dest_nodes))
+  out.library.CopyFrom(graph_index.graph_def.library)
+  out.versions.CopyFrom(graph_index.graph_def.versions)
+  return out
+
+
 @tf_export("graph_util.extract_sub_graph")
 def extract_sub_graph(graph_def, dest_nodes):
   """Extract the subgraph that can reach any of the nodes in 'dest_nodes'.
@@ -169,22 +219,7 @@ def extract_sub_graph(graph_def, dest_nodes):
   if isinstance(dest_nodes, six.string_types):
     raise TypeError("dest_nodes must be a list.")
 
-  name_to_input_name, name_to_node, name_to_seq_num = _extract_graph_summary(
-      graph_def)
-  _assert_nodes_are_present(name_to_node, dest_nodes)
-
-  nodes_to_keep = _bfs_for_reachable_nodes(dest_nodes, name_to_input_name)
-
-  nodes_to_keep_list = sorted(
-      list(nodes_to_keep), key=lambda n: name_to_seq_num[n])
-  # Now construct the output GraphDef
-  out = graph_pb2.GraphDef()
-  for n in nodes_to_keep_list:
-    out.node.extend([copy.deepcopy(name_to_node[n])])
-  out.library.CopyFrom(graph_def.library)
-  out.versions.CopyFrom(graph_def.versions)
-
-  return out
+  return _extract_sub_graph(_GraphDefIndex(graph_def), dest_nodes)
 
 
 @tf_export("graph_util.tensor_shape_from_node_def_name")
@@ -227,14 +262,27 @@ def convert_variables_to_constants(sess,
   Returns:
     GraphDef containing a simplified version of the original.
   """
+  return _convert_variables_to_constants(
+      sess, _GraphDefIndex(input_graph_def), output_node_names,
+      variable_names_whitelist, variable_names_blacklist)
+
+
+def _convert_variables_to_constants(sess,
+                                    graph_index,
+                                    output_node_names,
+                                    variable_names_whitelist=None,
+                                    variable_names_blacklist=None):
+  """Implements `convert_variables_to_constants` for an indexed GraphDef.
+
+  Callers that already indexed the GraphDef, such as `freeze_graph`, pass
+  their `_GraphDefIndex` so that the graph is not indexed again.
+  """
   # This graph only includes the nodes needed to evaluate the output nodes, and
   # removes unneeded nodes like those involved in saving and assignment.
-  inference_graph = extract_sub_graph(input_graph_def, output_node_names)
+  inference_nodes = list(graph_index.sub_graph_nodes(output_node_names))
 
-  found_variables = {}
-  variable_names = []
-  variable_dict_names = []
-  for node in inference_graph.node:
+  converted_variable_names = set()
+  for node in inference_nodes:
     if node.op in ["Variable", "VariableV2", "VarHandleOp"]:
       variable_name = node.name
       if ((variable_names_whitelist is not None and
@@ -242,35 +290,28 @@ def convert_variables_to_constants(sess,
           (variable_names_blacklist is not None and
            variable_name in variable_names_blacklist)):
         continue
-      variable_dict_names.append(variable_name)
-      if node.op == "VarHandleOp":
-        variable_names.append(variable_name + "/Read/ReadVariableOp:0")
-      else:
-        variable_names.append(variable_name + ":0")
-  if variable_names:
-    returned_variables = sess.run(variable_names)
-  else:
-    returned_variables = []
-  found_variables = dict(zip(variable_dict_names, returned_variables))
-  logging.info("Froze %d variables.", len(returned_variables))
+      converted_variable_names.add(variable_name)
 
+  # The output graph is written in a single pass. Variables are first emitted
+  # as Const nodes without a value; their values are then fetched in chunks of
+  # bounded size and written directly into the output proto, so at most one
+  # chunk of variable values is held in memory besides the output itself.
   output_graph_def = graph_pb2.GraphDef()
-  how_many_converted = 0
-  for input_node in inference_graph.node:
-    output_node = node_def_pb2.NodeDef()
-    if input_node.name in found_variables:
+  variables_to_fetch = []
+  for input_node in inference_nodes:
+    output_node = output_graph_def.node.add()
+    if input_node.name in converted_variable_names:
       output_node.op = "Const"
       output_node.name = input_node.name
-      dtype = input_node.attr["dtype"]
-      data = found_variables[input_node.name]
-      output_node.attr["dtype"].CopyFrom(dtype)
-      output_node.attr["value"].CopyFrom(
-          attr_value_pb2.AttrValue(
-              tensor=tensor_util.make_tensor_proto(
-                  data, dtype=dtype.type, shape=data.shape)))
-      how_many_converted += 1
+      output_node.attr["dtype"].CopyFrom(input_node.attr["dtype"])
+      if input_node.op == "VarHandleOp":
+        fetch_name = input_node.name + "/Read/ReadVariableOp:0"
+      else:
+        fetch_name = input_node.name + ":0"
+      variables_to_fetch.append((len(output_graph_def.node) - 1, fetch_name,
+                                 _variable_num_bytes(input_node)))
     elif input_node.op == "ReadVariableOp" and (
-        input_node.input[0] in found_variables):
+        input_node.input[0] in converted_variable_names):
       # The preceding branch converts all VarHandleOps of ResourceVariables to
       # constants, so we need to convert the associated ReadVariableOps to
       # Identity ops.
@@ -282,13 +323,69 @@ def convert_variables_to_constants(sess,
         output_node.attr["_class"].CopyFrom(input_node.attr["_class"])
     else:
       output_node.CopyFrom(input_node)
-    output_graph_def.node.extend([output_node])
 
-  output_graph_def.library.CopyFrom(inference_graph.library)
+  how_many_converted = 0
+  for chunk in _chunk_variable_fetches(variables_to_fetch, _MAX_FETCH_BYTES):
+    values = sess.run([fetch_name for _, fetch_name, _ in chunk])
+    for (node_index, _, _), data in zip(chunk, values):
+      output_node = output_graph_def.node[node_index]
+      output_node.attr["value"].tensor.CopyFrom(
+          tensor_util.make_tensor_proto(
+              data, dtype=output_node.attr["dtype"].type, shape=data.shape))
+      how_many_converted += 1
+    del values
+  logging.info("Froze %d variables.", how_many_converted)
+
+  output_graph_def.library.CopyFrom(graph_index.graph_def.library)
   logging.info("Converted %d variables to const ops.", how_many_converted)
   return output_graph_def
 
 
+def _variable_num_bytes(node):
+  """Returns the size in bytes of a variable node's value, or None."""
+  if "shape" not in node.attr:
+    return None
+  shape = tensor_shape.TensorShape(node.attr["shape"].shape)
+  if not shape.is_fully_defined():
+    return None
+  return shape.num_elements() * dtypes.as_dtype(node.attr["dtype"].type).size
+
+
+def _chunk_variable_fetches(variables_to_fetch, max_fetch_bytes):
+  """Groups `(node_index, fetch_name, num_bytes)` tuples into fetch chunks.
+
+  Consecutive variables are grouped as long as the total size of a chunk stays
+  within `max_fetch_bytes`. Variables of unknown size, or larger than the
+  limit, are fetched on their own.
+
+  Args:
+    variables_to_fetch: A list of `(node_index, fetch_name, num_bytes)`
+      tuples, where `num_bytes` may be None if the size is unknown.
+    max_fetch_bytes: Maximum number of bytes to fetch in a single chunk.
+
+  Yields:
+    Non-empty lists of `(node_index, fetch_name, num_bytes)` tuples.
+  """
+  chunk = []
+  chunk_bytes = 0
+  for variable in variables_to_fetch:
+    num_bytes = variable[2]
+    if chunk and (num_bytes is None or
+                  chunk_bytes + num_bytes > max_fetch_bytes):
+      yield chunk
+      chunk = []
+      chunk_bytes = 0
+    chunk.append(variable)
+    if num_bytes is None:
+      yield chunk
+      chunk = []
+      chunk_bytes = 0
+    else:
+      chunk_bytes += num_bytes
+  if chunk:
+    yield chunk
+
+
 @tf_export("graph_util.remove_training_nodes")
 def remove_training_nodes(input_graph, protected_nodes=None):
   """Prunes out nodes that aren't needed for inference.
@@ -311,6 +408,7 @@ def remove_training_nodes(input_graph, protected_nodes=None):
   """
   if not protected_nodes:
     protected_nodes = []
+  protected_nodes = set(protected_nodes)
 
   types_to_remove = {"CheckNumerics": True}
 
@@ -320,51 +418,52 @@ def remove_training_nodes(input_graph, protected_nodes=None):
     if node.op in types_to_remove and node.name not in protected_nodes:
       names_to_remove[node.name] = True
 
-  nodes_after_removal = []
+  # Inputs of each surviving node once the removed nodes are dropped. Nodes are
+  # only copied once, when the output graph is built.
+  inputs_after_removal = {}
   for node in input_nodes:
     if node.name in names_to_remove:
       continue
-    new_node = node_def_pb2.NodeDef()
-    new_node.CopyFrom(node)
-    input_before_removal = node.input
-    del new_node.input[:]
-    for full_input_name in input_before_removal:
-      input_name = re.sub(r"^\^", "", full_input_name)
-      if input_name in names_to_remove:
-        continue
-      new_node.input.append(full_input_name)
-    nodes_after_removal.append(new_node)
+    inputs_after_removal[node.name] = [
+        full_input_name for full_input_name in node.input
+        if _strip_control_prefix(full_input_name) not in names_to_remove
+    ]
 
   types_to_splice = {"Identity": True}
   names_to_splice = {}
-  for node in nodes_after_removal:
+  for node in input_nodes:
+    if node.name in names_to_remove:
+      continue
     if node.op in types_to_splice and node.name not in protected_nodes:
       # We don't want to remove nodes that have control edge inputs, because
       # they might be involved in subtle dependency issues that removing them
       # will jeopardize.
+      node_inputs = inputs_after_removal[node.name]
       has_control_edge = False
-      for input_name in node.input:
-        if re.match(r"^\^", input_name):
+      for input_name in node_inputs:
+        if input_name.startswith("^"):
           has_control_edge = True
       if not has_control_edge:
-        names_to_splice[node.name] = node.input[0]
+        names_to_splice[node.name] = node_inputs[0]
 
-  nodes_after_splicing = []
-  for node in nodes_after_removal:
-    if node.name in names_to_splice:
+  output_graph = graph_pb2.GraphDef()
+  for node in input_nodes:
+    if node.name in names_to_remove or node.name in names_to_splice:
       continue
-    new_node = node_def_pb2.NodeDef()
+    new_node = output_graph.node.add()
     new_node.CopyFrom(node)
-    input_before_removal = node.input
     del new_node.input[:]
-    for full_input_name in input_before_removal:
-      input_name = re.sub(r"^\^", "", full_input_name)
+    for full_input_name in inputs_after_removal[node.name]:
+      input_name = _strip_control_prefix(full_input_name)
       while input_name in names_to_splice:
         full_input_name = names_to_splice[input_name]
-        input_name = re.sub(r"^\^", "", full_input_name)
+        input_name = _strip_control_prefix(full_input_name)
       new_node.input.append(full_input_name)
-    nodes_after_splicing.append(new_node)
-
-  output_graph = graph_pb2.GraphDef()
-  output_graph.node.extend(nodes_after_splicing)
   return output_graph
+
+
+def _strip_control_prefix(input_name):
+  """Removes the leading "^" of a control input name, if any."""
+  if input_name.startswith("^"):
+    return input_name[1:]
+  return input_name
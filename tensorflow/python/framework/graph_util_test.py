@@ -26,6 +26,7 @@ from tensorflow.python.framework import constant_op
 from tensorflow.python.framework import dtypes
 from tensorflow.python.framework import function
 from tensorflow.python.framework import graph_util
+from tensorflow.python.framework import graph_util_impl
 from tensorflow.python.framework import importer
 from tensorflow.python.framework import ops
 from tensorflow.python.framework import tensor_util
@@ -298,6 +299,65 @@ class DeviceFunctionsTest(test.TestCase):
         output = sess.run(output_node)
         self.assertNear(2.0, output, 0.00001)
 
+  def testConvertVariablesToConstsInChunks(self):
+    with ops.Graph().as_default():
+      variable_nodes = [
+          variables.Variable([float(i), float(i) + 0.5], name="variable_%d" % i)
+          for i in range(3)
+      ]
+      output_node = math_ops_lib.add_n(variable_nodes, name="output_node")
+      with session.Session() as sess:
+        sess.run(variables.global_variables_initializer())
+        variable_graph_def = sess.graph.as_graph_def()
+        # Each variable holds 8 bytes, so every variable is fetched in its own
+        # chunk.
+        with test.mock.patch.object(graph_util_impl, "_MAX_FETCH_BYTES", 12):
+          constant_graph_def = graph_util.convert_variables_to_constants(
+              sess, variable_graph_def, ["output_node"])
+        expected_output = sess.run(output_node)
+
+    with ops.Graph().as_default():
+      _ = importer.import_graph_def(constant_graph_def, name="")
+      for node in constant_graph_def.node:
+        self.assertNotIn(node.op, ["Variable", "VariableV2"])
+      with session.Session() as sess:
+        output_node = sess.graph.get_tensor_by_name("output_node:0")
+        self.assertAllClose(expected_output, sess.run(output_node))
+
+  def testConvertVariablesToConstsWithSharedIndex(self):
+    # pylint: disable=protected-access
+    with ops.Graph().as_default():
+      variable_node = variables.Variable(1.0, name="variable_node")
+      _ = variables.Variable(1.0, name="unused_variable_node")
+      _ = math_ops_lib.multiply(variable_node, 2.0, name="output_node")
+      with session.Session() as sess:
+        sess.run(variables.global_variables_initializer())
+        variable_graph_def = sess.graph.as_graph_def()
+        graph_index = graph_util_impl._GraphDefIndex(variable_graph_def)
+        self.assertEqual(["missing_node"], graph_index.missing_nodes(
+            ["output_node", "missing_node"]))
+        sub_graph = graph_util_impl._extract_sub_graph(
+            graph_index, ["output_node"])
+        constant_graph_def = graph_util_impl._convert_variables_to_constants(
+            sess, graph_index, ["output_node"])
+        # pylint: enable=protected-access
+
+    self.assertEqual([node.name for node in sub_graph.node],
+                     [node.name for node in constant_graph_def.node])
+    self.assertNotIn("unused_variable_node",
+                     [node.name for node in constant_graph_def.node])
+    for node in constant_graph_def.node:
+      if node.name == "variable_node":
+        self.assertEqual("Const", node.op)
+
+  def testChunkVariableFetches(self):
+    variables_to_fetch = [(0, "a:0", 4), (1, "b:0", 4), (2, "c:0", None),
+                          (3, "d:0", 16), (4, "e:0", 2), (5, "f:0", 6)]
+    chunks = list(
+        graph_util_impl._chunk_variable_fetches(variables_to_fetch, 8))
+    self.assertEqual([["a:0", "b:0"], ["c:0"], ["d:0"], ["e:0", "f:0"]],
+                     [[name for _, name, _ in chunk] for chunk in chunks])
+
   def create_node_def(self, op, name, inputs):
     new_node = node_def_pb2.NodeDef()
     new_node.op = op
@@ -18,6 +18,7 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
 import random
 
 import numpy as np
@@ -27,6 +28,68 @@ from tensorflow.python.keras.utils.data_utils import Sequence
 from tensorflow.python.util.tf_export import tf_export
 
 
+class RaggedSequences(
+    collections.namedtuple('RaggedSequences', ['values', 'row_splits'])):
+  """A compact representation of a batch of variable-length sequences.
+
+  All sequences are concatenated in `values`; sequence `i` is
+  `values[row_splits[i]:row_splits[i + 1]]`.
+
+  Attributes:
+      values: 1D Numpy array holding the concatenated sequences.
+      row_splits: 1D int64 Numpy array of length `num_sequences + 1`, starting
+          at 0, holding the offsets of the sequences in `values`.
+  """
+
+  __slots__ = ()
+
+  def __len__(self):
+    return len(self.row_splits) - 1
+
+  @property
+  def lengths(self):
+    return np.diff(self.row_splits)
+
+  def to_list(self):
+    """Returns the sequences as a list of lists."""
+    values = self.values.tolist()
+    splits = self.row_splits.tolist()
+    return [values[start:end] for start, end in zip(splits[:-1], splits[1:])]
+
+
+def _pad_ragged_sequences(sequences, maxlen, dtype, padding, truncating,
+                          value):
+  """Vectorized `pad_sequences` for `RaggedSequences`."""
+  if truncating not in ('pre', 'post'):
+    raise ValueError('Truncating type "%s" not understood' % truncating)
+  if padding not in ('pre', 'post'):
+    raise ValueError('Padding type "%s" not understood' % padding)
+  row_splits = np.asarray(sequences.row_splits, dtype=np.int64)
+  values = np.asarray(sequences.values)
+  lengths = np.diff(row_splits)
+  num_samples = len(lengths)
+  if maxlen is None:
+    maxlen = int(np.max(lengths)) if num_samples else 0
+
+  kept = np.minimum(lengths, maxlen)
+  if truncating == 'pre':
+    starts = row_splits[1:] - kept
+  else:
+    starts = row_splits[:-1]
+  # Position of every kept element within its row.
+  row_ids = np.repeat(np.arange(num_samples), kept)
+  kept_offsets = np.cumsum(kept) - kept
+  positions = np.arange(int(np.sum(kept))) - np.repeat(kept_offsets, kept)
+  if padding == 'post':
+    columns = positions
+  else:
+    columns = positions + np.repeat(maxlen - kept, kept)
+
+  x = np.full((num_samples, maxlen), value, dtype=dtype)
+  x[row_ids, columns] = values[np.repeat(starts, kept) + positions]
+  return x
+
+
 @tf_export('keras.preprocessing.sequence.pad_sequences')
 def pad_sequences(sequences,
                   maxlen=None,
@@ -53,7 +116,10 @@ def pad_sequences(sequences,
   Pre-padding is the default.
 
   Arguments:
-      sequences: List of lists, where each element is a sequence.
+      sequences: List of lists, where each element is a sequence, or a
+          `RaggedSequences` (as returned by
+          `Tokenizer.texts_to_ragged_sequences`), which is padded without
+          iterating over the sequences in Python.
       maxlen: Int, maximum length of all sequences.
       dtype: Type of the output sequences.
       padding: String, 'pre' or 'post':
@@ -70,6 +136,9 @@ def pad_sequences(sequences,
       ValueError: In case of invalid values for `truncating` or `padding`,
           or in case of invalid shape for a `sequences` entry.
   """
+  if isinstance(sequences, RaggedSequences):
+    return _pad_ragged_sequences(sequences, maxlen, dtype, padding, truncating,
+                                 value)
   if not hasattr(sequences, '__len__'):
     raise ValueError('`sequences` must be iterable.')
   lengths = []
@@ -49,6 +49,24 @@ class TestSequence(test.TestCase):
     b = keras.preprocessing.sequence.pad_sequences(a, maxlen=3, value=1)
     self.assertAllClose(b, [[1, 1, 1], [1, 1, 2], [1, 2, 3]])
 
+  def test_pad_ragged_sequences(self):
+    a = [[1], [], [1, 2], [1, 2, 3, 4]]
+    ragged = keras.preprocessing.sequence.RaggedSequences(
+        values=np.array([1, 1, 2, 1, 2, 3, 4], dtype=np.int32),
+        row_splits=np.array([0, 1, 1, 3, 7], dtype=np.int64))
+    self.assertEqual(ragged.to_list(), a)
+
+    for maxlen in (None, 2, 5):
+      for padding in ('pre', 'post'):
+        for truncating in ('pre', 'post'):
+          expected = keras.preprocessing.sequence.pad_sequences(
+              a, maxlen=maxlen, padding=padding, truncating=truncating,
+              value=-1)
+          b = keras.preprocessing.sequence.pad_sequences(
+              ragged, maxlen=maxlen, padding=padding, truncating=truncating,
+              value=-1)
+          self.assertAllEqual(b, expected)
+
   def test_pad_sequences_vector(self):
     a = [[[1, 1]], [[2, 1], [2, 2]], [[3, 1], [3, 2], [3, 3]]]
 
@@ -19,7 +19,10 @@ from __future__ import division
 from __future__ import print_function
 
 from collections import OrderedDict
+import functools
 from hashlib import md5
+import itertools
+import multiprocessing
 import string
 import sys
 
@@ -27,6 +30,7 @@ import numpy as np
 from six.moves import range  # pylint: disable=redefined-builtin
 from six.moves import zip  # pylint: disable=redefined-builtin
 
+from tensorflow.python.keras.preprocessing.sequence import RaggedSequences
 from tensorflow.python.platform import tf_logging as logging
 from tensorflow.python.util.tf_export import tf_export
 
@@ -149,6 +153,117 @@ def hashing_trick(text,
   return [(hash_function(w) % (n - 1) + 1) for w in seq]
 
 
+# Number of texts processed by a worker process at a time when `workers > 1`.
+_PARALLEL_CHUNK_SIZE = 10000
+
+# Tokenizer configuration of a worker process, set by `_init_worker`.
+_worker_config = None
+
+
+def _init_worker(config):
+  global _worker_config
+  _worker_config = config
+
+
+def _apply_with_worker_config(fn, texts):
+  return fn(texts, _worker_config)
+
+
+def _chunks(iterable, size):
+  """Yields lists of at most `size` consecutive items of `iterable`."""
+  iterator = iter(iterable)
+  while True:
+    chunk = list(itertools.islice(iterator, size))
+    if not chunk:
+      return
+    yield chunk
+
+
+def _map_chunks(fn, texts, workers, config):
+  """Applies `fn(chunk, config)` to chunks of `texts`, in order.
+
+  With more than one worker, the chunks are processed in a pool of `workers`
+  processes, each of which receives `config` once when it starts.
+  """
+  chunks = _chunks(texts, _PARALLEL_CHUNK_SIZE)
+  if workers <= 1:
+    for chunk in chunks:
+      yield fn(chunk, config)
+    return
+  pool = multiprocessing.Pool(
+      workers, initializer=_init_worker, initargs=(config,))
+  completed = False
+  try:
+    for result in pool.imap(functools.partial(_apply_with_worker_config, fn),
+                            chunks):
+      yield result
+    completed = True
+  finally:
+    # Only stop the workers abruptly if the results are not all consumed.
+    if completed:
+      pool.close()
+    else:
+      pool.terminate()
+    pool.join()
+
+
+def _text_to_tokens(text, config):
+  if config['char_level'] or isinstance(text, list):
+    return text
+  return text_to_word_sequence(text, config['filters'], config['lower'],
+                               config['split'])
+
+
+def _count_words(texts, config):
+  """Counts words and documents in `texts` with the tokenizer `config`.
+
+  Returns:
+      A tuple `(document_count, word_counts, word_docs)`, where `word_counts`
+      is an `OrderedDict` listing words in order of first occurrence.
+  """
+  word_counts = OrderedDict()
+  word_docs = {}
+  for text in texts:
+    seq = _text_to_tokens(text, config)
+    for w in seq:
+      if w in word_counts:
+        word_counts[w] += 1
+      else:
+        word_counts[w] = 1
+    for w in set(seq):
+      if w in word_docs:
+        word_docs[w] += 1
+      else:
+        word_docs[w] = 1
+  return len(texts), word_counts, word_docs
+
+
+def _texts_to_ids(texts, config):
+  """Maps `texts` to word indices with the tokenizer `config`.
+
+  Returns:
+      A tuple `(values, lengths)` of int32 Numpy arrays, holding the
+      concatenated word indices and the number of indices of every text.
+  """
+  word_index = config['word_index']
+  num_words = config['num_words']
+  oov_index = config['oov_index']
+  values = []
+  lengths = np.zeros(len(texts), dtype=np.int32)
+  for n, text in enumerate(texts):
+    start = len(values)
+    for w in _text_to_tokens(text, config):
+      i = word_index.get(w)
+      if i is not None:
+        if num_words and i >= num_words:
+          continue
+        values.append(i)
+      elif oov_index is not None:
+        values.append(oov_index)
+    lengths[n] = len(values) - start
+  return np.array(values, dtype=np.int32), lengths
+
+
 @tf_export('keras.preprocessing.text.Tokenizer')
 class Tokenizer(object):
   """Text tokenization utility class.
@@ -206,7 +321,7 @@ class Tokenizer(object):
     self.oov_token = oov_token
     self.index_docs = {}
 
-  def fit_on_texts(self, texts):
+  def fit_on_texts(self, texts, workers=1):
     """Updates internal vocabulary based on a list of texts.
 
     In the case where texts contains lists, we assume each entry of the lists
@@ -218,24 +333,52 @@ class Tokenizer(object):
         texts: can be a list of strings,
             a generator of strings (for memory-efficiency),
             or a list of list of strings.
+        workers: number of processes used to count words. With more than one
+            worker, texts are tokenized in chunks in a process pool and the
+            counts of the chunks are merged in order, so the resulting
+            vocabulary is the same as with a single worker.
     """
-    for text in texts:
-      self.document_count += 1
-      if self.char_level or isinstance(text, list):
-        seq = text
+    for document_count, word_counts, word_docs in _map_chunks(
+        _count_words, texts, workers, self._get_config()):
+      self._merge_counts(document_count, word_counts, word_docs)
+    self._build_word_index()
+
+  def merge(self, other):
+    """Merges the word counts of another `Tokenizer` into this one.
+
+    This allows fitting tokenizers on shards of a corpus independently (e.g.
+    on different machines) and combining them afterwards. The word index is
+    rebuilt from the merged counts.
+
+    Arguments:
+        other: a `Tokenizer` fit on other texts.
+    """
+    self._merge_counts(other.document_count, other.word_counts,
+                       other.word_docs)
+    self._build_word_index()
+
+  def _get_config(self):
+    return {
+        'filters': self.filters,
+        'lower': self.lower,
+        'split': self.split,
+        'char_level': self.char_level,
+    }
+
+  def _merge_counts(self, document_count, word_counts, word_docs):
+    self.document_count += document_count
+    for w, c in word_counts.items():
+      if w in self.word_counts:
+        self.word_counts[w] += c
       else:
-        seq = text_to_word_sequence(text, self.filters, self.lower, self.split)
-      for w in seq:
-        if w in self.word_counts:
-          self.word_counts[w] += 1
-        else:
-          self.word_counts[w] = 1
-      for w in set(seq):
-        if w in self.word_docs:
-          self.word_docs[w] += 1
-        else:
-          self.word_docs[w] = 1
+        self.word_counts[w] = c
+    for w, c in word_docs.items():
+      if w in self.word_docs:
+        self.word_docs[w] += c
+      else:
+        self.word_docs[w] = c
 
+  def _build_word_index(self):
     wcounts = list(self.word_counts.items())
     wcounts.sort(key=lambda x: x[1], reverse=True)
     sorted_voc = [wc[0] for wc in wcounts]
@@ -305,6 +448,9 @@ class Tokenizer(object):
         Yields individual sequences.
     """
     num_words = self.num_words
+    oov_index = None
+    if self.oov_token is not None:
+      oov_index = self.word_index.get(self.oov_token)
     for text in texts:
       if self.char_level or isinstance(text, list):
         seq = text
@@ -318,12 +464,43 @@ class Tokenizer(object):
             continue
           else:
             vect.append(i)
-        elif self.oov_token is not None:
-          i = self.word_index.get(self.oov_token)
-          if i is not None:
-            vect.append(i)
+        elif oov_index is not None:
+          vect.append(oov_index)
       yield vect
 
+  def texts_to_ragged_sequences(self, texts, workers=1):
+    """Transforms texts into a compact `RaggedSequences` of word indices.
+
+    This is equivalent to `texts_to_sequences`, but all sequences are stored
+    in a single int32 Numpy array plus row offsets instead of one Python list
+    per text. The result can be passed directly to `pad_sequences`.
+
+    Arguments:
+        texts: A list or generator of texts (strings), or of lists of tokens.
+        workers: number of processes used to tokenize the texts.
+
+    Returns:
+        A `RaggedSequences`.
+    """
+    config = self._get_config()
+    config['word_index'] = self.word_index
+    config['num_words'] = self.num_words
+    config['oov_index'] = None
+    if self.oov_token is not None:
+      config['oov_index'] = self.word_index.get(self.oov_token)
+    values = []
+    lengths = []
+    for chunk_values, chunk_lengths in _map_chunks(_texts_to_ids, texts,
+                                                   workers, config):
+      values.append(chunk_values)
+      lengths.append(chunk_lengths)
+    row_splits = np.zeros(sum(len(l) for l in lengths) + 1, dtype=np.int64)
+    if lengths:
+      np.cumsum(np.concatenate(lengths), out=row_splits[1:])
+    values = (np.concatenate(values) if values
+              else np.zeros([0], dtype=np.int32))
+    return RaggedSequences(values=values, row_splits=row_splits)
+
   def texts_to_matrix(self, texts, mode='binary'):
     """Convert a list of texts to a Numpy matrix.
 
@@ -138,6 +138,83 @@ class TestText(test.TestCase):
 
     self.assertEqual(len(tokenizer.word_counts), 5)
 
+  def test_tokenizer_parallel_fit_matches_serial(self):
+    texts = ['The cat sat on the mat.', 'The dog sat on the log.',
+             'Dogs and cats living together.'] * 7
+    serial = keras.preprocessing.text.Tokenizer(oov_token='<unk>')
+    serial.fit_on_texts(texts)
+    parallel = keras.preprocessing.text.Tokenizer(oov_token='<unk>')
+    with test.mock.patch.object(
+        keras.preprocessing.text, '_PARALLEL_CHUNK_SIZE', 4):
+      parallel.fit_on_texts(iter(texts), workers=2)
+
+    self.assertEqual(serial.document_count, parallel.document_count)
+    self.assertEqual(list(serial.word_counts.items()),
+                     list(parallel.word_counts.items()))
+    self.assertEqual(serial.word_docs, parallel.word_docs)
+    self.assertEqual(serial.word_index, parallel.word_index)
+    self.assertEqual(serial.index_docs, parallel.index_docs)
+
+  def test_tokenizer_interleaved_fits(self):
+    texts = ['The cat sat on the mat.', 'The dog sat on the log.']
+    words = keras.preprocessing.text.Tokenizer()
+    chars = keras.preprocessing.text.Tokenizer(char_level=True)
+
+    def texts_fitting_chars():
+      for text in texts:
+        # Fits the other tokenizer while this one is between chunks.
+        chars.fit_on_texts([text])
+        yield text
+
+    with test.mock.patch.object(
+        keras.preprocessing.text, '_PARALLEL_CHUNK_SIZE', 1):
+      words.fit_on_texts(texts_fitting_chars())
+
+    expected_words = keras.preprocessing.text.Tokenizer()
+    expected_words.fit_on_texts(texts)
+    expected_chars = keras.preprocessing.text.Tokenizer(char_level=True)
+    expected_chars.fit_on_texts(texts)
+    self.assertEqual(expected_words.word_index, words.word_index)
+    self.assertEqual(expected_chars.word_index, chars.word_index)
+
+  def test_tokenizer_merge(self):
+    texts = ['The cat sat on the mat.', 'The dog sat on the log.',
+             'Dogs and cats living together.']
+    full = keras.preprocessing.text.Tokenizer()
+    full.fit_on_texts(texts)
+    first = keras.preprocessing.text.Tokenizer()
+    first.fit_on_texts(texts[:2])
+    second = keras.preprocessing.text.Tokenizer()
+    second.fit_on_texts(texts[2:])
+    first.merge(second)
+
+    self.assertEqual(full.document_count, first.document_count)
+    self.assertEqual(full.word_counts, first.word_counts)
+    self.assertEqual(full.word_docs, first.word_docs)
+    self.assertEqual(full.word_index, first.word_index)
+
+  def test_texts_to_ragged_sequences(self):
+    texts = ['The cat sat on the mat.', '', 'The dog sat on the log.',
+             'Dogs and cats living together.']
+    tokenizer = keras.preprocessing.text.Tokenizer(num_words=8,
+                                                   oov_token='<unk>')
+    tokenizer.fit_on_texts(texts)
+    sequences = tokenizer.texts_to_sequences(texts)
+
+    ragged = tokenizer.texts_to_ragged_sequences(texts)
+    self.assertEqual(ragged.values.dtype, np.int32)
+    self.assertEqual(len(ragged), len(texts))
+    self.assertEqual(ragged.to_list(), sequences)
+
+    with test.mock.patch.object(
+        keras.preprocessing.text, '_PARALLEL_CHUNK_SIZE', 3):
+      ragged = tokenizer.texts_to_ragged_sequences(texts, workers=2)
+    self.assertEqual(ragged.to_list(), sequences)
+
+    self.assertAllEqual(
+        keras.preprocessing.sequence.pad_sequences(ragged, maxlen=5),
+        keras.preprocessing.sequence.pad_sequences(sequences, maxlen=5))
+
 
 if __name__ == '__main__':
   test.main()
@@ -23,7 +23,9 @@ import abc
 import numpy as np
 import six
 
+from tensorflow.python.eager import context
 from tensorflow.python.framework import constant_op
+from tensorflow.python.framework import ops
 from tensorflow.python.framework import test_util
 from tensorflow.python.ops import array_ops
 from tensorflow.python.ops import math_ops
@@ -201,6 +203,75 @@ class BijectorCachingTest(BijectorCachingTestBase, test.TestCase):
     return BrokenBijector
 
 
+@test_util.run_all_in_graph_and_eager_modes
+class BijectorCacheInfoTest(test.TestCase):
+
+  def testCountsHitsAndMisses(self):
+    broken_bijector = BrokenBijector()
+    x = constant_op.constant(1.1)
+    y = broken_bijector.forward(x)
+    broken_bijector.forward_log_det_jacobian(x, event_ndims=0)
+    broken_bijector.inverse(y)
+    broken_bijector.inverse_log_det_jacobian(y, event_ndims=0)
+    broken_bijector.forward_log_det_jacobian(x, event_ndims=0)
+    broken_bijector.forward_log_det_jacobian(x, event_ndims=1)
+    cache_info = broken_bijector.cache_info()
+    self.assertEqual(3, cache_info.hits)
+    self.assertEqual(3, cache_info.misses)
+    self.assertEqual(1, cache_info.size)
+
+
+class BijectorCacheSizeTest(test.TestCase):
+
+  def testCacheIsBoundedInEagerMode(self):
+    with context.eager_mode():
+      broken_bijector = BrokenBijector()
+      max_size = broken_bijector.cache_info().max_size
+      xs = [constant_op.constant(float(i)) for i in range(max_size + 10)]
+      # The results are kept alive, so that their mappings stay cached.
+      ys = [broken_bijector.forward(x) for x in xs]
+      self.assertEqual(max_size, broken_bijector.cache_info().size)
+      # The least recently used mappings were dropped.
+      broken_bijector.inverse(ys[-1])
+      broken_bijector.inverse(ys[0])
+      cache_info = broken_bijector.cache_info()
+      self.assertEqual(1, cache_info.hits)
+      self.assertEqual(max_size + 11, cache_info.misses)
+
+  def testCacheIsNotBoundedInGraphMode(self):
+    with ops.Graph().as_default():
+      broken_bijector = BrokenBijector()
+      max_size = broken_bijector.cache_info().max_size
+      xs = [constant_op.constant(float(i)) for i in range(max_size + 10)]
+      ys = [broken_bijector.forward(x) for x in xs]
+      self.assertEqual(max_size + 10, broken_bijector.cache_info().size)
+      # No mapping was dropped, so inverting the first result adds no op.
+      num_ops = len(ops.get_default_graph().get_operations())
+      self.assertIs(xs[0], broken_bijector.inverse(ys[0]))
+      self.assertEqual(
+          num_ops, len(ops.get_default_graph().get_operations()))
+      cache_info = broken_bijector.cache_info()
+      self.assertEqual(1, cache_info.hits)
+      self.assertEqual(max_size + 10, cache_info.misses)
+
+  def testCacheDoesNotKeepResultsAlive(self):
+    with context.eager_mode():
+      broken_bijector = BrokenBijector()
+      for i in range(10):
+        broken_bijector.forward(constant_op.constant(float(i)))
+      self.assertEqual(0, broken_bijector.cache_info().size)
+
+      x = constant_op.constant(1.1)
+      y = broken_bijector.forward(x)
+      del x
+      # The input is kept alive while its result is.
+      self.assertEqual(1, broken_bijector.cache_info().size)
+      self.assertAllClose(1.1, broken_bijector.inverse(y))
+      self.assertEqual(1, broken_bijector.cache_info().hits)
+      del y
+      self.assertEqual(0, broken_bijector.cache_info().size)
+
+
 class ExpOnlyJacobian(bijector.Bijector):
   """Only used for jacobian calculations."""
 
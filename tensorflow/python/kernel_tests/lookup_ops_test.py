@@ -18,6 +18,8 @@ from __future__ import division
 from __future__ import print_function
 
 import os
+import time
+
 import numpy as np
 
 from tensorflow.python.client import session
@@ -502,6 +504,120 @@ class IndexTableFromFile(test.TestCase):
           vocabulary_file=vocabulary_file, num_oov_buckets=0)
       self.assertIsNotNone(table.table_ref)
 
+  def test_index_table_from_file_with_num_shards(self):
+    vocabulary_file = self._createVocabFile(
+        "f2i_vocab11.txt", values=("a", "b", "c", "d", "e", "f", "g"))
+    with self.test_session():
+      table = lookup_ops.index_table_from_file(
+          vocabulary_file=vocabulary_file, num_oov_buckets=1, num_shards=3,
+          report_load_time=True)
+      ids = table.lookup(constant_op.constant(["g", "a", "d", "tarkus"]))
+
+      lookup_ops.tables_initializer().run()
+      self.assertAllEqual((6, 0, 3, 7), ids.eval())
+
+  def test_index_table_from_multicolumn_file_with_num_shards(self):
+    vocabulary_file = self._createVocabFile(
+        "f2i_vocab12.txt", values=("brain\t300", "salad\t20", "surgery\t1"))
+    with self.test_session():
+      table = lookup_ops.index_table_from_file(
+          vocabulary_file=vocabulary_file,
+          key_column_index=0,
+          value_column_index=1,
+          key_dtype=dtypes.string,
+          num_shards=2)
+      ids = table.lookup(constant_op.constant(["salad", "surgery", "tarkus"]))
+
+      lookup_ops.tables_initializer().run()
+      self.assertAllEqual((20, 1, -1), ids.eval())
+
+  def test_index_table_from_file_with_num_shards_and_vocab_size(self):
+    vocabulary_file = self._createVocabFile("f2i_vocab13.txt")
+    with self.test_session():
+      table = lookup_ops.index_table_from_file(
+          vocabulary_file=vocabulary_file, vocab_size=2, num_shards=2)
+      ids = table.lookup(constant_op.constant(["salad", "surgery", "tarkus"]))
+
+      lookup_ops.tables_initializer().run()
+      self.assertAllEqual((1, -1, -1), ids.eval())
+
+    with ops.Graph().as_default(), self.test_session():
+      table = lookup_ops.index_table_from_file(
+          vocabulary_file=vocabulary_file, vocab_size=4, num_shards=2)
+      self.assertRaisesOpError("Invalid vocab_size", table.init.run)
+
+  def test_index_table_from_file_with_num_shards_fails_with_empty_line(self):
+    vocabulary_file = self._createVocabFile(
+        "f2i_vocab14.txt", values=("brain", "", "surgery"))
+    with self.test_session():
+      table = lookup_ops.index_table_from_file(
+          vocabulary_file=vocabulary_file, num_shards=2)
+      self.assertRaisesOpError("empty line found", table.init.run)
+
+  def test_index_table_from_file_with_more_shards_than_lines(self):
+    vocabulary_file = os.path.join(self.get_temp_dir(), "f2i_vocab17.txt")
+    # The last line is not followed by a newline.
+    with open(vocabulary_file, "w") as f:
+      f.write("brain\nsalad\nsurgery")
+    with self.test_session():
+      table = lookup_ops.index_table_from_file(
+          vocabulary_file=vocabulary_file, num_shards=5)
+      ids = table.lookup(
+          constant_op.constant(["surgery", "brain", "salad", "tarkus"]))
+
+      lookup_ops.tables_initializer().run()
+      self.assertAllEqual((2, 0, 1, -1), ids.eval())
+
+  def test_index_table_from_crlf_file_with_num_shards(self):
+    vocabulary_file = os.path.join(self.get_temp_dir(), "f2i_vocab18.txt")
+    with open(vocabulary_file, "wb") as f:
+      f.write(b"brain\r\nsalad\r\nsurgery\r\n")
+    # Carriage returns are stripped like by the default initializer.
+    for num_shards in (None, 2):
+      with ops.Graph().as_default(), self.test_session():
+        table = lookup_ops.index_table_from_file(
+            vocabulary_file=vocabulary_file, num_shards=num_shards)
+        ids = table.lookup(
+            constant_op.constant(["surgery", "brain", "salad", "tarkus"]))
+
+        lookup_ops.tables_initializer().run()
+        self.assertAllEqual((2, 0, 1, -1), ids.eval())
+
+    with open(vocabulary_file, "wb") as f:
+      f.write(b"brain\r\n\r\nsurgery\r\n")
+    with ops.Graph().as_default(), self.test_session():
+      table = lookup_ops.index_table_from_file(
+          vocabulary_file=vocabulary_file, num_shards=2)
+      self.assertRaisesOpError("empty line found", table.init.run)
+
+  def test_index_table_from_file_with_cache(self):
+    vocabulary_file = self._createVocabFile("f2i_vocab15.txt")
+    cache_prefix = os.path.join(self.get_temp_dir(), "f2i_vocab15_cache")
+    with self.test_session():
+      table = lookup_ops.index_table_from_file(
+          vocabulary_file=vocabulary_file, cache_prefix=cache_prefix)
+      ids = table.lookup(constant_op.constant(["salad", "surgery", "tarkus"]))
+
+      lookup_ops.tables_initializer().run()
+      self.assertAllEqual((1, 2, -1), ids.eval())
+    self.assertTrue(os.path.exists(cache_prefix + ".index"))
+
+    # The cache is used instead of the file once it exists.
+    os.remove(vocabulary_file)
+    with ops.Graph().as_default(), self.test_session():
+      table = lookup_ops.index_table_from_file(
+          vocabulary_file=vocabulary_file, cache_prefix=cache_prefix)
+      ids = table.lookup(constant_op.constant(["salad", "surgery", "tarkus"]))
+
+      lookup_ops.tables_initializer().run()
+      self.assertAllEqual((1, 2, -1), ids.eval())
+
+  def test_index_table_from_file_fails_with_invalid_num_shards(self):
+    vocabulary_file = self._createVocabFile("f2i_vocab16.txt")
+    with self.assertRaisesRegexp(ValueError, "Invalid num_shards"):
+      lookup_ops.index_table_from_file(
+          vocabulary_file=vocabulary_file, num_shards=0)
+
 
 class KeyValueTensorInitializerTest(test.TestCase):
 
@@ -711,6 +827,17 @@ class IndexToStringTableFromFileTest(test.TestCase):
       lookup_ops.tables_initializer().run()
       self.assertAllEqual((b"salad", b"surgery", b"UNK"), features.eval())
 
+  def test_index_to_string_table_with_num_shards(self):
+    vocabulary_file = self._createVocabFile("i2f_vocab2.txt")
+    with self.test_session():
+      table = lookup_ops.index_to_string_table_from_file(
+          vocabulary_file=vocabulary_file, num_shards=2)
+      features = table.lookup(constant_op.constant([1, 2, 0, 4], dtypes.int64))
+
+      lookup_ops.tables_initializer().run()
+      self.assertAllEqual((b"salad", b"surgery", b"brain", b"UNK"),
+                          features.eval())
+
 
 class IndexToStringTableFromTensorTest(test.TestCase):
 
@@ -1455,5 +1582,36 @@ class IdTableWithHashBucketsTest(test.TestCase):
       table = lookup_ops.IdTableWithHashBuckets(None, num_oov_buckets=1)
       self.assertIsNone(table.table_ref)
 
+
+class TextFileInitializerBenchmark(test.Benchmark):
+
+  def _createVocabFile(self, num_lines):
+    vocabulary_file = os.path.join(test.get_temp_dir(),
+                                   "vocab_%d.txt" % num_lines)
+    with open(vocabulary_file, "w") as f:
+      for i in range(num_lines):
+        f.write("word%d\n" % i)
+    return vocabulary_file
+
+  def _benchmarkInitialize(self, vocabulary_file, name, num_shards=None,
+                           iters=5):
+    wall_time = 0.
+    for _ in range(iters):
+      with ops.Graph().as_default(), session.Session() as sess:
+        table = lookup_ops.index_table_from_file(
+            vocabulary_file=vocabulary_file, num_shards=num_shards)
+        start = time.time()
+        sess.run(table.init)
+        wall_time += time.time() - start
+    self.report_benchmark(iters=iters, wall_time=wall_time / iters, name=name)
+
+  def benchmarkInitializeLargeVocabulary(self):
+    vocabulary_file = self._createVocabFile(2000000)
+    self._benchmarkInitialize(vocabulary_file, "line_by_line")
+    for num_shards in (1, 4, 16):
+      self._benchmarkInitialize(vocabulary_file, "num_shards_%d" % num_shards,
+                                num_shards=num_shards)
+
+
 if __name__ == "__main__":
   test.main()
@@ -22,10 +22,12 @@ import abc
 import collections
 import contextlib
 import re
+import weakref
 
 import numpy as np
 import six
 
+from tensorflow.python.eager import context
 from tensorflow.python.framework import dtypes
 from tensorflow.python.framework import ops
 from tensorflow.python.framework import tensor_shape
@@ -40,6 +42,12 @@ __all__ = [
     "Bijector",
 ]
 
+# Maximum number of `_Mapping`s cached by every `Bijector` in eager mode.
+_MAX_CACHE_SIZE = 256
+
+BijectorCacheInfo = collections.namedtuple(
+    "BijectorCacheInfo", ["hits", "misses", "max_size", "size"])
+
 
 class _Mapping(collections.namedtuple(
     "_Mapping", ["x", "y", "ildj_map", "kwargs"])):
@@ -64,12 +72,15 @@ class _Mapping(collections.namedtuple(
   @property
   def x_key(self):
     """Returns key used for caching Y=g(X)."""
-    return (self.x,) + self._deep_tuple(tuple(sorted(self.kwargs.items())))
+    # Keys use the id of the tensor so that they do not keep it alive.
+    return (id(self.x),) + self._deep_tuple(
+        tuple(sorted(self.kwargs.items())))
 
   @property
   def y_key(self):
     """Returns key used for caching X=g^{-1}(Y)."""
-    return (self.y,) + self._deep_tuple(tuple(sorted(self.kwargs.items())))
+    return (id(self.y),) + self._deep_tuple(
+        tuple(sorted(self.kwargs.items())))
 
   def merge(self, x=None, y=None, ildj_map=None, kwargs=None, mapping=None):
     """Returns new _Mapping with args merged with self.
@@ -129,6 +140,174 @@ class _Mapping(collections.namedtuple(
             if isinstance(x, (list, tuple)) else x)
 
 
+class _StrongRef(object):
+  """Holds an object strongly, with the interface of `weakref.ref`."""
+
+  __slots__ = ["_referent"]
+
+  def __init__(self, referent):
+    self._referent = referent
+
+  def __call__(self):
+    return self._referent
+
+
+class _CacheEntry(object):
+  """A `_Mapping` stored in a `_MappingCache`, with `x` and `y` as refs."""
+
+  __slots__ = ["x_ref", "y_ref", "ildj_map", "kwargs"]
+
+  def __init__(self, x_ref, y_ref, ildj_map, kwargs):
+    self.x_ref = x_ref
+    self.y_ref = y_ref
+    self.ildj_map = ildj_map
+    self.kwargs = kwargs
+
+  def mapping(self):
+    return _Mapping(
+        x=None if self.x_ref is None else self.x_ref(),
+        y=None if self.y_ref is None else self.y_ref(),
+        ildj_map=dict(self.ildj_map),
+        kwargs=self.kwargs)
+
+
+class _MappingCache(object):
+  """Bounded cache of `_Mapping`s which does not keep their tensors alive.
+
+  A tensor returned by `forward` or `inverse` is held by weak reference, while
+  the input it was computed from is held strongly, so that the result can
+  still be inverted once the caller released the input. The `x` or `y` of a
+  mapping which only caches log det Jacobians is held by weak reference as
+  well. A mapping is dropped as soon as one of its weakly held tensors is
+  garbage collected, since such a tensor can not be passed in again.
+
+  When executing eagerly, at most `max_size` mappings are kept, dropping the
+  least recently used ones first, since inputs held strongly would otherwise
+  accumulate. In graph mode the cache is not bounded: the graph keeps its
+  tensors alive anyway, and evicting a mapping would make a later call add
+  duplicate ops to the graph.
+  """
+
+  def __init__(self, max_size=_MAX_CACHE_SIZE):
+    self.max_size = max_size
+    self.hits = 0
+    self.misses = 0
+    # Entries in least recently used order, and their keys.
+    self._entries = collections.OrderedDict()
+    self._from_x = {}
+    self._from_y = {}
+
+  def __len__(self):
+    return len(self._entries)
+
+  def count(self, hit):
+    """Records a cache hit or miss of a `Bijector` method."""
+    if hit:
+      self.hits += 1
+    else:
+      self.misses += 1
+
+  def lookup(self, x=None, y=None, kwargs=None):
+    """Returns the cached mapping of `x`, or else of `y`, if any."""
+    mapping = _Mapping(x=x, y=y, kwargs=kwargs)
+    # Since insert stores the mapping under both x and y, we only need to do
+    # one cache lookup.
+    if mapping.x is not None:
+      entry = self._find(self._from_x, mapping.x_key, mapping.x, "x_ref")
+    elif mapping.y is not None:
+      entry = self._find(self._from_y, mapping.y_key, mapping.y, "y_ref")
+    else:
+      entry = None
+    if entry is None:
+      return mapping
+    self._entries[entry] = self._entries.pop(entry)
+    return entry.mapping()
+
+  def insert(self, mapping, computed=None):
+    """Stores `mapping`, merged with the cached mappings of its `x` and `y`.
+
+    Args:
+      mapping: a `_Mapping` with at least one of `x` and `y`.
+      computed: "x" or "y" if that member of `mapping` was just computed from
+        the other one, else `None`.
+
+    Raises:
+      ValueError: if neither `mapping.x` nor `mapping.y` is known.
+    """
+    if mapping.x is None and mapping.y is None:
+      raise ValueError("Caching expects at least one of (x,y) to be known, "
+                       "i.e., not None.")
+    old_x_entry = old_y_entry = None
+    if mapping.x is not None:
+      old_x_entry = self._find(
+          self._from_x, mapping.x_key, mapping.x, "x_ref")
+    if mapping.y is not None:
+      old_y_entry = self._find(
+          self._from_y, mapping.y_key, mapping.y, "y_ref")
+    # Merging the cached mappings is an added check that we're not
+    # overwriting anything which is not None.
+    for old_entry in [old_x_entry, old_y_entry]:
+      if old_entry is not None:
+        mapping = mapping.merge(mapping=old_entry.mapping())
+    entry = _CacheEntry(None, None, mapping.ildj_map or {}, mapping.kwargs)
+    if mapping.x is not None:
+      entry.x_ref = self._ref(
+          mapping.x, self._is_weak(computed, "x", old_x_entry, "x_ref"),
+          entry)
+      self._from_x[mapping.x_key] = entry
+    if mapping.y is not None:
+      entry.y_ref = self._ref(
+          mapping.y, self._is_weak(computed, "y", old_y_entry, "y_ref"),
+          entry)
+      self._from_y[mapping.y_key] = entry
+    for old_entry in set([old_x_entry, old_y_entry]) - set([None]):
+      self._remove(old_entry)
+    self._entries[entry] = (
+        mapping.x_key if mapping.x is not None else None,
+        mapping.y_key if mapping.y is not None else None)
+    if context.executing_eagerly():
+      while len(self._entries) > self.max_size:
+        self._remove(next(iter(self._entries)))
+
+  def _find(self, index, key, tensor, ref_name):
+    """Returns the entry of `tensor` in `index`, or `None`."""
+    entry = index.get(key)
+    # Ids of collected tensors can be reused, so compare the tensors too.
+    if entry is None or getattr(entry, ref_name)() is not tensor:
+      return None
+    return entry
+
+  def _is_weak(self, computed, name, old_entry, ref_name):
+    """Returns whether to hold the `name` member of a mapping weakly."""
+    if computed is not None:
+      # Results are held weakly, and the inputs they were computed from
+      # strongly.
+      return computed == name
+    if old_entry is not None:
+      return isinstance(getattr(old_entry, ref_name), weakref.ref)
+    return True
+
+  def _ref(self, tensor, weak, entry):
+    """Returns a weak or strong reference to `tensor`."""
+    if weak:
+      try:
+        return weakref.ref(tensor, lambda _: self._remove(entry))
+      except TypeError:
+        pass  # Not weakly referenceable.
+    return _StrongRef(tensor)
+
+  def _remove(self, entry):
+    """Removes `entry` from the cache, if it is cached."""
+    keys = self._entries.pop(entry, None)
+    if keys is None:
+      return
+    x_key, y_key = keys
+    if x_key is not None and self._from_x.get(x_key) is entry:
+      del self._from_x[x_key]
+    if y_key is not None and self._from_y.get(y_key) is entry:
+      del self._from_y[y_key]
+
+
 @six.add_metaclass(abc.ABCMeta)
 class Bijector(object):
   r"""Interface for transformations of a `Distribution` sample.
@@ -567,8 +746,7 @@ class Bijector(object):
     self._constant_ildj_map = {}
     self._validate_args = validate_args
     self._dtype = dtype
-    self._from_y = {}
-    self._from_x = {}
+    self._mapping_cache = _MappingCache()
     if name:
       self._name = name
     else:
@@ -740,10 +918,11 @@ class Bijector(object):
       if not self._is_injective:  # No caching for non-injective
         return self._forward(x, **kwargs)
       mapping = self._lookup(x=x, kwargs=kwargs)
+      self._mapping_cache.count(hit=mapping.y is not None)
       if mapping.y is not None:
         return mapping.y
       mapping = mapping.merge(y=self._forward(x, **kwargs))
-      self._cache(mapping)
+      self._cache(mapping, computed="y")
       return mapping.y
 
   def forward(self, x, name="forward"):
@@ -774,10 +953,11 @@ class Bijector(object):
       if not self._is_injective:  # No caching for non-injective
         return self._inverse(y, **kwargs)
       mapping = self._lookup(y=y, kwargs=kwargs)
+      self._mapping_cache.count(hit=mapping.x is not None)
       if mapping.x is not None:
         return mapping.x
       mapping = mapping.merge(x=self._inverse(y, **kwargs))
-      self._cache(mapping)
+      self._cache(mapping, computed="x")
       return mapping.x
 
   def inverse(self, y, name="inverse"):
@@ -830,7 +1010,10 @@ class Bijector(object):
               y, ildj, self.inverse_min_event_ndims, event_ndims)
                        for ildj in ildjs)
         mapping = self._lookup(y=y, kwargs=kwargs)
-        if mapping.ildj_map is not None and event_ndims in mapping.ildj_map:
+        cached = (mapping.ildj_map is not None and
+                  event_ndims in mapping.ildj_map)
+        self._mapping_cache.count(hit=cached)
+        if cached:
           return mapping.ildj_map[event_ndims]
         try:
           x = None  # Not needed; leave cache as is.
@@ -847,8 +1030,9 @@ class Bijector(object):
           except NotImplementedError:
             raise original_exception
 
+        computed = "x" if x is not None and mapping.x is None else None
         mapping = mapping.merge(x=x, ildj_map={event_ndims: ildj})
-        self._cache(mapping)
+        self._cache(mapping, computed=computed)
         if self.is_constant_jacobian:
           self._constant_ildj_map[event_ndims] = ildj
         return ildj
@@ -923,7 +1107,10 @@ class Bijector(object):
               x, fldj, self.forward_min_event_ndims, event_ndims)
                        for fldj in fldjs)
         mapping = self._lookup(x=x, kwargs=kwargs)
-        if mapping.ildj_map is not None and event_ndims in mapping.ildj_map:
+        cached = (mapping.ildj_map is not None and
+                  event_ndims in mapping.ildj_map)
+        self._mapping_cache.count(hit=cached)
+        if cached:
           return -mapping.ildj_map[event_ndims]
         try:
           y = None  # Not needed; leave cache as is.
@@ -939,8 +1126,9 @@ class Bijector(object):
                 y, ildj, self.inverse_min_event_ndims, event_ndims)
           except NotImplementedError:
             raise original_exception
+        computed = "y" if y is not None and mapping.y is None else None
         mapping = mapping.merge(y=y, ildj_map={event_ndims: ildj})
-        self._cache(mapping)
+        self._cache(mapping, computed=computed)
         if self.is_constant_jacobian:
           self._constant_ildj_map[event_ndims] = ildj
         return -ildj
@@ -971,6 +1159,25 @@ class Bijector(object):
     """
     return self._call_forward_log_det_jacobian(x, event_ndims, name)
 
+  def cache_info(self):
+    """Returns statistics of the cache of forward and inverse evaluations.
+
+    Results of `forward`, `inverse` and of the log det Jacobians for every
+    `event_ndims` are cached by the identity of their input, so that e.g.
+    `inverse(forward(x))` returns `x` without evaluating the inverse.
+
+    Returns:
+      A `BijectorCacheInfo` namedtuple with the number of `hits` and `misses`
+      of the cache over all calls so far, its `max_size` when executing
+      eagerly (the cache is unbounded in graph mode) and its current `size`,
+      i.e. the number of cached mappings between `x` and `y`.
+    """
+    return BijectorCacheInfo(
+        hits=self._mapping_cache.hits,
+        misses=self._mapping_cache.misses,
+        max_size=self._mapping_cache.max_size,
+        size=len(self._mapping_cache))
+
   @contextlib.contextmanager
   def _name_scope(self, name=None, values=None):
     """Helper function to standardize op scope."""
@@ -985,28 +1192,13 @@ class Bijector(object):
       raise TypeError("Input had dtype %s but expected %s." %
                       (self.dtype, x.dtype))
 
-  def _cache(self, mapping):
-    """Helper which stores mapping info in forward/inverse dicts."""
-    # Merging from lookup is an added check that we're not overwriting anything
-    # which is not None.
-    mapping = mapping.merge(mapping=self._lookup(
-        mapping.x, mapping.y, mapping.kwargs))
-    if mapping.x is None and mapping.y is None:
-      raise ValueError("Caching expects at least one of (x,y) to be known, "
-                       "i.e., not None.")
-    self._from_x[mapping.x_key] = mapping
-    self._from_y[mapping.y_key] = mapping
+  def _cache(self, mapping, computed=None):
+    """Helper which stores mapping info in the forward/inverse cache."""
+    self._mapping_cache.insert(mapping, computed)
 
   def _lookup(self, x=None, y=None, kwargs=None):
-    """Helper which retrieves mapping info from forward/inverse dicts."""
-    mapping = _Mapping(x=x, y=y, kwargs=kwargs)
-    # Since _cache requires both x,y to be set, we only need to do one cache
-    # lookup since the mapping is always in both or neither.
-    if mapping.x is not None:
-      return self._from_x.get(mapping.x_key, mapping)
-    if mapping.y is not None:
-      return self._from_y.get(mapping.y_key, mapping)
-    return mapping
+    """Helper which retrieves mapping info from the forward/inverse cache."""
+    return self._mapping_cache.lookup(x, y, kwargs)
 
   def _reduce_jacobian_det_over_event(
       self, y, ildj, min_event_ndims, event_ndims):
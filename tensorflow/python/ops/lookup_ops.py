@@ -32,6 +32,9 @@ from tensorflow.python.framework import tensor_util
 from tensorflow.python.ops import array_ops
 from tensorflow.python.ops import control_flow_ops
 from tensorflow.python.ops import gen_lookup_ops
+from tensorflow.python.ops import gen_parsing_ops
+from tensorflow.python.ops import io_ops
+from tensorflow.python.ops import logging_ops
 from tensorflow.python.ops import math_ops
 from tensorflow.python.ops import string_ops
 # go/tf-wildcard-import
@@ -434,6 +437,14 @@ class TextFileInitializer(TableInitializerBase):
   ...
   table.init.run()
   ```
+
+  By default the file is read line by line by a single op. For large files,
+  `num_shards` instead reads the whole file at once, locates the lines in its
+  bytes and splits and parses `num_shards` contiguous byte ranges of lines
+  with independent ops, which run in parallel on the inter-op thread pool.
+  With `cache_prefix`, the parsed keys and values are written to a tensor
+  bundle the first time the table is initialized, and are read from it
+  instead of parsing the file afterwards.
   """
 
   def __init__(self,
@@ -444,7 +455,10 @@ class TextFileInitializer(TableInitializerBase):
                value_index,
                vocab_size=None,
                delimiter="\t",
-               name=None):
+               name=None,
+               num_shards=None,
+               cache_prefix=None,
+               report_load_time=False):
     """Constructs a table initializer object to populate from a text file.
 
     It generates one key-value pair per line. The type of table key and
@@ -472,10 +486,21 @@ class TextFileInitializer(TableInitializerBase):
       vocab_size: The number of elements in the file, if known.
       delimiter: The delimiter to separate fields in a line.
       name: A name for the operation (optional).
+      num_shards: If set, the number of ranges of lines of the file that are
+        parsed in parallel. The whole file is then held in memory while the
+        table is initialized.
+      cache_prefix: If set, the prefix of a tensor bundle that caches the
+        parsed keys and values, e.g. on local disk. The file is parsed (with
+        `num_shards` ranges, or one if not set) and the bundle is written only
+        if it does not exist yet. The bundle is not invalidated when the file
+        changes. May be a scalar `Tensor`.
+      report_load_time: Whether to log the time it took to initialize the
+        table, in seconds, to stderr.
 
     Raises:
-      ValueError: when the filename is empty, or when the table key and value
-      data types do not match the expected data types.
+      ValueError: when the filename is empty, when the table key and value
+      data types do not match the expected data types, or when `num_shards`
+      is not positive.
     """
     if not isinstance(filename, ops.Tensor) and not filename:
       raise ValueError("Filename required for %s." % name)
@@ -507,12 +532,18 @@ class TextFileInitializer(TableInitializerBase):
     if (vocab_size is not None) and (vocab_size <= 0):
       raise ValueError("Invalid vocab_size %s." % vocab_size)
 
+    if (num_shards is not None) and (num_shards <= 0):
+      raise ValueError("Invalid num_shards %s." % num_shards)
+
     self._filename = filename
     self._key_index = key_index
     self._value_index = value_index
     self._vocab_size = vocab_size
     self._delimiter = delimiter
     self._name = name
+    self._num_shards = num_shards
+    self._cache_prefix = cache_prefix
+    self._report_load_time = report_load_time
 
     super(TextFileInitializer, self).__init__(key_dtype, value_dtype)
 
@@ -534,14 +565,31 @@ class TextFileInitializer(TableInitializerBase):
                         (table.table_ref,)) as scope:
       filename = ops.convert_to_tensor(
           self._filename, dtypes.string, name="asset_filepath")
-      init_op = gen_lookup_ops.initialize_table_from_text_file_v2(
-          table.table_ref,
-          filename,
-          self._key_index,
-          self._value_index,
-          -1 if self._vocab_size is None else self._vocab_size,
-          self._delimiter,
-          name=scope)
+      dependencies = []
+      if self._report_load_time:
+        start_time = logging_ops.timestamp(name="start_time")
+        dependencies.append(start_time)
+      with ops.control_dependencies(dependencies):
+        if self._num_shards is None and self._cache_prefix is None:
+          init_op = gen_lookup_ops.initialize_table_from_text_file_v2(
+              table.table_ref,
+              filename,
+              self._key_index,
+              self._value_index,
+              -1 if self._vocab_size is None else self._vocab_size,
+              self._delimiter,
+              name=scope)
+        else:
+          keys, values = self._load(filename)
+          init_op = gen_lookup_ops.initialize_table_v2(
+              table.table_ref, keys, values, name=scope)
+      if self._report_load_time:
+        with ops.control_dependencies([init_op]):
+          load_time = logging_ops.timestamp(name="end_time") - start_time
+        load_time = logging_ops.Print(
+            load_time, [filename, load_time],
+            message="Initialized table from file in seconds: ")
+        init_op = control_flow_ops.group(load_time, name="report_load_time")
     ops.add_to_collection(ops.GraphKeys.TABLE_INITIALIZERS, init_op)
     # If the filename tensor is anything other than a string constant (e.g., if
     # it is a placeholder) then it does not make sense to track it as an asset.
@@ -549,6 +597,145 @@ class TextFileInitializer(TableInitializerBase):
       ops.add_to_collection(ops.GraphKeys.ASSET_FILEPATHS, filename)
     return init_op
 
+  def _load(self, filename):
+    """Returns the keys and values of the file, from the cache if it exists."""
+    if self._cache_prefix is None:
+      return self._parse(filename)
+    cache_prefix = ops.convert_to_tensor(
+        self._cache_prefix, dtypes.string, name="cache_prefix")
+    tensor_names = ["keys", "values"]
+    shape_and_slices = ["", ""]
+
+    def _restore():
+      return io_ops.restore_v2(cache_prefix, tensor_names, shape_and_slices,
+                               [self.key_dtype, self.value_dtype])
+
+    def _parse_and_save():
+      keys, values = self._parse(filename)
+      save_op = io_ops.save_v2(cache_prefix, tensor_names, shape_and_slices,
+                               [keys, values])
+      with ops.control_dependencies([save_op]):
+        return [array_ops.identity(keys), array_ops.identity(values)]
+
+    cache_files = io_ops.matching_files(
+        string_ops.string_join([cache_prefix, ".index"]))
+    return control_flow_ops.cond(
+        math_ops.greater(array_ops.size(cache_files), 0), _restore,
+        _parse_and_save)
+
+  def _parse(self, filename):
+    """Parses the keys and values of the file in `num_shards` ranges."""
+    with ops.name_scope("parse"):
+      contents = io_ops.read_file(filename)
+      # Finds where the lines end with a single vectorized pass over the bytes
+      # of the file, so that splitting the file into strings, which is the
+      # costly part, is done by each shard for its own byte range.
+      file_bytes = gen_parsing_ops.decode_raw(contents, dtypes.uint8)
+      file_size = array_ops.size(file_bytes)
+      line_ends = math_ops.to_int32(array_ops.reshape(
+          array_ops.where(math_ops.equal(file_bytes, ord("\n"))), [-1]))
+      # A last line without a trailing newline ends with the file, unless it
+      # is a lone carriage return, which the kernel drops at the end of file.
+      last_end = array_ops.concat([[-1], line_ends], 0)[-1]
+      num_remaining = file_size - 1 - last_end
+      unterminated = math_ops.to_int32(math_ops.logical_or(
+          math_ops.greater(num_remaining, 1),
+          math_ops.logical_and(
+              math_ops.equal(num_remaining, 1),
+              math_ops.reduce_any(
+                  math_ops.not_equal(file_bytes[-1:], ord("\r"))))))
+      line_ends = array_ops.concat(
+          [line_ends, array_ops.reshape(file_size, [1])[:unterminated]], 0)
+      # The offset at which each line starts, and the offset one past the end
+      # of the file.
+      line_starts = array_ops.concat([[0], line_ends + 1], 0)
+      num_lines = array_ops.size(line_ends)
+      # Like the kernel, lines do not include a trailing carriage return.
+      line_lengths = line_ends - line_starts[:-1]
+      ends_with_cr = math_ops.logical_and(
+          math_ops.greater(line_lengths, 0),
+          math_ops.equal(
+              array_ops.gather(file_bytes,
+                               math_ops.maximum(line_ends - 1, 0)),
+              ord("\r")))
+      line_lengths -= math_ops.to_int32(ends_with_cr)
+      strip_cr = math_ops.reduce_any(ends_with_cr)
+      checks = []
+      if self._vocab_size is not None:
+        checks.append(control_flow_ops.Assert(
+            math_ops.greater_equal(num_lines, self._vocab_size),
+            ["Invalid vocab_size", self._vocab_size, "for", filename,
+             "with lines:", num_lines]))
+        num_lines = math_ops.minimum(num_lines, self._vocab_size)
+      checks.append(control_flow_ops.Assert(
+          math_ops.reduce_all(math_ops.greater(line_lengths[:num_lines], 0)),
+          ["Invalid content in", filename, ": empty line found"]))
+      with ops.control_dependencies(checks):
+        contents = array_ops.identity(contents)
+
+      num_shards = self._num_shards or 1
+      keys = []
+      values = []
+      for i in range(num_shards):
+        start = num_lines * i // num_shards
+        end = num_lines * (i + 1) // num_shards
+        lines = self._read_lines(contents, file_size, line_starts, start, end,
+                                 strip_cr)
+        shard_keys, shard_values = self._parse_shard(
+            lines, start, end, filename)
+        keys.append(shard_keys)
+        values.append(shard_values)
+      return array_ops.concat(keys, 0), array_ops.concat(values, 0)
+
+  def _read_lines(self, contents, file_size, line_starts, start, end,
+                  strip_cr):
+    """Splits the lines `start` to `end` out of the `contents` of the file.
+
+    Trailing carriage returns are removed from the lines if `strip_cr`.
+    """
+    offset = math_ops.minimum(line_starts[start], file_size)
+    # Excludes the newline ending the last line.
+    length = math_ops.maximum(line_starts[end] - 1 - offset, 0)
+    lines = string_ops.string_split(
+        [string_ops.substr(contents, offset, length)], "\n",
+        skip_empty=False).values
+    # An empty range of lines still splits into one empty line.
+    lines = lines[:end - start]
+    return control_flow_ops.cond(
+        strip_cr,
+        lambda: string_ops.regex_replace(lines, "\r$", "",
+                                         replace_global=False),
+        lambda: lines)
+
+  def _parse_shard(self, lines, start, end, filename):
+    """Parses the keys and values of the lines `start` to `end`."""
+    columns = None
+    if self._key_index >= 0 or self._value_index >= 0:
+      columns = string_ops.string_split(
+          lines, self._delimiter, skip_empty=False)
+    return (self._parse_column(lines, start, end, columns, self._key_index,
+                               self.key_dtype, filename),
+            self._parse_column(lines, start, end, columns, self._value_index,
+                               self.value_dtype, filename))
+
+  def _parse_column(self, lines, start, end, columns, index, dtype, filename):
+    """Returns the content given by `index` of `lines`, as `dtype`."""
+    if index == TextFileIndex.LINE_NUMBER:
+      return math_ops.to_int64(math_ops.range(start, end))
+    if index == TextFileIndex.WHOLE_LINE:
+      column = lines
+    else:
+      column = array_ops.boolean_mask(
+          columns.values, math_ops.equal(columns.indices[:, 1], index))
+      check = control_flow_ops.Assert(
+          math_ops.equal(array_ops.size(column), array_ops.size(lines)),
+          ["Invalid number of columns in", filename, "for index", index])
+      with ops.control_dependencies([check]):
+        column = array_ops.identity(column)
+    if dtype == dtypes.string:
+      return column
+    return gen_parsing_ops.string_to_number(column, out_type=dtype)
+
 
 class TextFileStringTableInitializer(TextFileInitializer):
   """Table initializer for `int64` IDs to string tables from a text file."""
@@ -559,7 +746,10 @@ class TextFileStringTableInitializer(TextFileInitializer):
                value_column_index=TextFileIndex.WHOLE_LINE,
                vocab_size=None,
                delimiter="\t",
-               name="text_file_string_table_init"):
+               name="text_file_string_table_init",
+               num_shards=None,
+               cache_prefix=None,
+               report_load_time=False):
     """Constructs an initializer for an id-to-string table from a text file.
 
     It populates a table that its key and value types are int64 and string,
@@ -585,6 +775,12 @@ class TextFileStringTableInitializer(TextFileInitializer):
       vocab_size: The number of elements in the file, if known.
       delimiter: The delimiter to separate fields in a line.
       name: Optional name for the op.
+      num_shards: If set, the number of ranges of lines of the file that are
+        parsed in parallel, see `TextFileInitializer`.
+      cache_prefix: If set, the prefix of a tensor bundle that caches the
+        parsed ids and strings, see `TextFileInitializer`.
+      report_load_time: Whether to log the time it took to initialize the
+        table.
 
     Raises:
       TypeError: when the filename is empty, or when the table key and value
@@ -598,7 +794,10 @@ class TextFileStringTableInitializer(TextFileInitializer):
         value_column_index,
         vocab_size=vocab_size,
         delimiter=delimiter,
-        name=name)
+        name=name,
+        num_shards=num_shards,
+        cache_prefix=cache_prefix,
+        report_load_time=report_load_time)
 
 
 class TextFileIdTableInitializer(TextFileInitializer):
@@ -611,7 +810,10 @@ class TextFileIdTableInitializer(TextFileInitializer):
                vocab_size=None,
                delimiter="\t",
                name="text_file_id_table_init",
-               key_dtype=dtypes.string):
+               key_dtype=dtypes.string,
+               num_shards=None,
+               cache_prefix=None,
+               report_load_time=False):
     """Constructs an initializer for an string-to-id table from a text file.
 
     It populates a table that its key and value types are string and int64,
@@ -637,6 +839,12 @@ class TextFileIdTableInitializer(TextFileInitializer):
       vocab_size: The number of elements in the file, if known.
       delimiter: The delimiter to separate fields in a line.
       name: Optional name for the op.
+      num_shards: If set, the number of ranges of lines of the file that are
+        parsed in parallel, see `TextFileInitializer`.
+      cache_prefix: If set, the prefix of a tensor bundle that caches the
+        parsed ids and strings, see `TextFileInitializer`.
+      report_load_time: Whether to log the time it took to initialize the
+        table.
       key_dtype: The `key` data type.
 
     Raises:
@@ -651,7 +859,10 @@ class TextFileIdTableInitializer(TextFileInitializer):
         value_column_index,
         vocab_size=vocab_size,
         delimiter=delimiter,
-        name=name)
+        name=name,
+        num_shards=num_shards,
+        cache_prefix=cache_prefix,
+        report_load_time=report_load_time)
 
 
 class HasherSpec(collections.namedtuple("HasherSpec", ["hasher", "key"])):
@@ -907,7 +1118,10 @@ def index_table_from_file(vocabulary_file=None,
                           name=None,
                           key_column_index=TextFileIndex.WHOLE_LINE,
                           value_column_index=TextFileIndex.LINE_NUMBER,
-                          delimiter="\t"):
+                          delimiter="\t",
+                          num_shards=None,
+                          cache_prefix=None,
+                          report_load_time=False):
   """Returns a lookup table that converts a string tensor into int64 IDs.
 
   This operation constructs a lookup table to convert tensor of strings into
@@ -970,6 +1184,12 @@ def index_table_from_file(vocabulary_file=None,
     value_column_index: The column index from the text file to get the `value`
       values from. The default is to use the line number, starting from zero.
     delimiter: The delimiter to separate fields in a line.
+    num_shards: If set, the number of ranges of lines of the vocabulary file
+      that are parsed in parallel when the table is initialized, see
+      `TextFileInitializer`.
+    cache_prefix: If set, the prefix of a tensor bundle that caches the parsed
+      vocabulary, see `TextFileInitializer`.
+    report_load_time: Whether to log the time it took to initialize the table.
 
   Returns:
     The lookup table to map a `key_dtype` `Tensor` to index `int64` `Tensor`.
@@ -1017,7 +1237,10 @@ def index_table_from_file(vocabulary_file=None,
           name="table_init",
           key_column_index=key_column_index,
           value_column_index=value_column_index,
-          delimiter=delimiter)
+          delimiter=delimiter,
+          num_shards=num_shards,
+          cache_prefix=cache_prefix,
+          report_load_time=report_load_time)
 
       table = HashTable(
           init, default_value, shared_name=shared_name, name=hash_table_scope)
@@ -1142,7 +1365,10 @@ def index_to_string_table_from_file(vocabulary_file,
                                     name=None,
                                     key_column_index=TextFileIndex.LINE_NUMBER,
                                     value_column_index=TextFileIndex.WHOLE_LINE,
-                                    delimiter="\t"):
+                                    delimiter="\t",
+                                    num_shards=None,
+                                    cache_prefix=None,
+                                    report_load_time=False):
   """Returns a lookup table that maps a `Tensor` of indices into strings.
 
   This operation constructs a lookup table to map int64 indices into string
@@ -1197,6 +1423,12 @@ def index_to_string_table_from_file(vocabulary_file,
     value_column_index: The column index from the text file to get the `value`
       values from. The default is to use the whole line content.
     delimiter: The delimiter to separate fields in a line.
+    num_shards: If set, the number of ranges of lines of the vocabulary file
+      that are parsed in parallel when the table is initialized, see
+      `TextFileInitializer`.
+    cache_prefix: If set, the prefix of a tensor bundle that caches the parsed
+      vocabulary, see `TextFileInitializer`.
+    report_load_time: Whether to log the time it took to initialize the table.
 
   Returns:
     The lookup table to map a string values associated to a given index `int64`
@@ -1231,7 +1463,10 @@ def index_to_string_table_from_file(vocabulary_file,
         name="table_init",
         key_column_index=key_column_index,
         value_column_index=value_column_index,
-        delimiter=delimiter)
+        delimiter=delimiter,
+        num_shards=num_shards,
+        cache_prefix=cache_prefix,
+        report_load_time=report_load_time)
 
     # TODO(yleon): Use a more effienct structure.
     return HashTable(init, default_value, shared_name=shared_name, name=scope)
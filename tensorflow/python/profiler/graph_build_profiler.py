@@ -0,0 +1,235 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Opt-in profiler attributing graph construction time to ops and call sites.
+
+Usage:
+
+```python
+with graph_build_profiler.GraphBuildProfiler() as prof:
+  build_model()
+print(prof.format_report())
+```
+
+While active, the profiler wraps `OpDefLibrary._apply_op_helper`,
+`Graph.create_op` and `Graph._create_op_from_tf_operation`. The time spent in
+the outermost of these calls is attributed to the type of the op being created
+and to the first Python frame outside of this module and of the ignored path
+prefixes (by default the `tensorflow/python` package), i.e. the user code that
+asked for the op.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import collections
+import functools
+import os
+import sys
+import threading
+import time
+
+from tensorflow.python.framework import op_def_library
+from tensorflow.python.framework import ops
+
+_TF_PYTHON_DIR = os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))
+
+# Guards the installation of the wrappers: only one profiler may be active.
+_active_profiler_lock = threading.Lock()
+_active_profiler = None
+
+
+class OpBuildStats(object):
+  """Accumulated graph construction statistics for a single key."""
+
+  __slots__ = ["count", "total_time"]
+
+  def __init__(self):
+    self.count = 0
+    self.total_time = 0.0
+
+  @property
+  def mean_time(self):
+    return self.total_time / self.count if self.count else 0.0
+
+
+class GraphBuildProfiler(object):
+  """Context manager recording where graph construction time is spent."""
+
+  def __init__(self, ignored_path_prefixes=None):
+    """Creates a GraphBuildProfiler.
+
+    Args:
+      ignored_path_prefixes: Optional list of file path prefixes. Frames whose
+        file starts with one of these prefixes are skipped when looking up the
+        call site that created an op. Defaults to the `tensorflow/python`
+        package directory.
+    """
+    if ignored_path_prefixes is None:
+      ignored_path_prefixes = [_TF_PYTHON_DIR]
+    self._ignored_path_prefixes = tuple(
+        os.path.abspath(p) for p in ignored_path_prefixes)
+    self._lock = threading.Lock()
+    self._local = threading.local()
+    self._by_op_type = collections.defaultdict(OpBuildStats)
+    self._by_call_site = collections.defaultdict(OpBuildStats)
+    self._originals = None
+    self._start_time = None
+    self.wall_time = 0.0
+
+  @property
+  def op_type_stats(self):
+    """Dict from op type to `OpBuildStats`."""
+    return dict(self._by_op_type)
+
+  @property
+  def call_site_stats(self):
+    """Dict from "file:line (function)" call sites to `OpBuildStats`."""
+    return dict(self._by_call_site)
+
+  @property
+  def num_ops(self):
+    return sum(s.count for s in self._by_op_type.values())
+
+  @property
+  def op_creation_time(self):
+    """Total time spent creating ops, in seconds."""
+    return sum(s.total_time for s in self._by_op_type.values())
+
+  def __enter__(self):
+    global _active_profiler
+    with _active_profiler_lock:
+      if _active_profiler is not None:
+        raise RuntimeError("Only one GraphBuildProfiler can be active.")
+      _active_profiler = self
+    self._install()
+    self._start_time = time.time()
+    return self
+
+  def __exit__(self, exec_type, exec_value, exec_tb):
+    global _active_profiler
+    self.wall_time += time.time() - self._start_time
+    self._uninstall()
+    with _active_profiler_lock:
+      _active_profiler = None
+
+  def _install(self):
+    """Wraps the op creation entry points with timing code."""
+    # Read the plain functions from the class dicts so they can be restored
+    # as-is.
+    apply_op_helper = vars(op_def_library.OpDefLibrary)["_apply_op_helper"]
+    create_op = vars(ops.Graph)["create_op"]
+    create_op_from_tf_operation = vars(ops.Graph)[
+        "_create_op_from_tf_operation"]
+    self._originals = (apply_op_helper, create_op,
+                       create_op_from_tf_operation)
+
+    @functools.wraps(apply_op_helper)
+    def _profiled_apply_op_helper(library, op_type_name, name=None, **kw):
+      return self._timed(op_type_name, apply_op_helper, library, op_type_name,
+                         name=name, **kw)
+
+    @functools.wraps(create_op)
+    def _profiled_create_op(graph, op_type, *args, **kwargs):
+      return self._timed(op_type, create_op, graph, op_type, *args, **kwargs)
+
+    @functools.wraps(create_op_from_tf_operation)
+    def _profiled_create_op_from_tf_operation(graph, *args, **kwargs):
+      return self._timed(None, create_op_from_tf_operation, graph, *args,
+                         **kwargs)
+
+    # pylint: disable=protected-access
+    op_def_library.OpDefLibrary._apply_op_helper = _profiled_apply_op_helper
+    ops.Graph.create_op = _profiled_create_op
+    ops.Graph._create_op_from_tf_operation = (
+        _profiled_create_op_from_tf_operation)
+    # pylint: enable=protected-access
+
+  def _uninstall(self):
+    (apply_op_helper, create_op,
+     create_op_from_tf_operation) = self._originals
+    # pylint: disable=protected-access
+    op_def_library.OpDefLibrary._apply_op_helper = apply_op_helper
+    ops.Graph.create_op = create_op
+    ops.Graph._create_op_from_tf_operation = create_op_from_tf_operation
+    # pylint: enable=protected-access
+    self._originals = None
+
+  def _timed(self, op_type, fn, *args, **kwargs):
+    """Calls `fn`, recording its duration if it is the outermost call."""
+    depth = getattr(self._local, "depth", 0)
+    if depth:
+      return fn(*args, **kwargs)
+    self._local.depth = 1
+    start = time.time()
+    try:
+      ret = fn(*args, **kwargs)
+    finally:
+      duration = time.time() - start
+      self._local.depth = 0
+    if op_type is None:
+      op_type = _op_type(ret)
+    call_site = self._call_site()
+    with self._lock:
+      stats = self._by_op_type[op_type]
+      stats.count += 1
+      stats.total_time += duration
+      stats = self._by_call_site[call_site]
+      stats.count += 1
+      stats.total_time += duration
+    return ret
+
+  def _call_site(self):
+    """Returns the first frame outside of this module and the ignored paths."""
+    frame = sys._getframe(1)  # pylint: disable=protected-access
+    while frame is not None:
+      # The wrappers installed by the profiler are always skipped, even if the
+      # ignored path prefixes don't cover this module.
+      if frame.f_globals is globals():
+        frame = frame.f_back
+        continue
+      filename = os.path.abspath(frame.f_code.co_filename)
+      if not filename.startswith(self._ignored_path_prefixes):
+        return "%s:%d (%s)" % (filename, frame.f_lineno, frame.f_code.co_name)
+      frame = frame.f_back
+    return "<unknown>"
+
+  def format_report(self, max_rows=20):
+    """Returns a human readable summary of the recorded statistics.
+
+    Args:
+      max_rows: Maximum number of op types and call sites to list.
+
+    Returns:
+      A string.
+    """
+    lines = ["Graph build: %d ops, %.3f s creating ops, %.3f s wall time." %
+             (self.num_ops, self.op_creation_time, self.wall_time)]
+    for title, stats in (("op type", self._by_op_type),
+                         ("call site", self._by_call_site)):
+      lines.append("")
+      lines.append("%-12s %10s %12s  %s" % ("total (ms)", "count",
+                                            "mean (us)", title))
+      rows = sorted(stats.items(), key=lambda kv: -kv[1].total_time)
+      for key, s in rows[:max_rows]:
+        lines.append("%-12.3f %10d %12.1f  %s" % (s.total_time * 1e3, s.count,
+                                                  s.mean_time * 1e6, key))
+    return "\n".join(lines)
+
+
+def _op_type(op):
+  if isinstance(op, ops.Operation):
+    return op.type
+  return "<unknown>"
@@ -0,0 +1,78 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+
+from tensorflow.python.framework import constant_op
+from tensorflow.python.framework import ops
+from tensorflow.python.ops import math_ops
+from tensorflow.python.platform import test
+from tensorflow.python.profiler import graph_build_profiler
+
+_FRAMEWORK_DIR = os.path.dirname(os.path.abspath(ops.__file__))
+_OPS_DIR = os.path.dirname(os.path.abspath(math_ops.__file__))
+
+
+def _build_ops():
+  a = constant_op.constant(1.0)
+  b = constant_op.constant(2.0)
+  return math_ops.add(a, b)
+
+
+class GraphBuildProfilerTest(test.TestCase):
+
+  def testCountsOpsByType(self):
+    with ops.Graph().as_default():
+      with graph_build_profiler.GraphBuildProfiler(
+          ignored_path_prefixes=[_FRAMEWORK_DIR, _OPS_DIR]) as prof:
+        _build_ops()
+    stats = prof.op_type_stats
+    self.assertEqual(2, stats["Const"].count)
+    self.assertEqual(1, stats["Add"].count)
+    self.assertEqual(3, prof.num_ops)
+    self.assertGreaterEqual(prof.wall_time, prof.op_creation_time)
+
+  def testAttributesCallSites(self):
+    with ops.Graph().as_default():
+      with graph_build_profiler.GraphBuildProfiler(
+          ignored_path_prefixes=[_FRAMEWORK_DIR, _OPS_DIR]) as prof:
+        _build_ops()
+    call_sites = prof.call_site_stats
+    self.assertEqual(3, sum(s.count for s in call_sites.values()))
+    for call_site in call_sites:
+      self.assertIn("graph_build_profiler_test.py", call_site)
+      self.assertIn("_build_ops", call_site)
+    self.assertIn("_build_ops", prof.format_report())
+
+  def testRestoresOpCreation(self):
+    create_op = vars(ops.Graph)["create_op"]
+    with ops.Graph().as_default():
+      with graph_build_profiler.GraphBuildProfiler():
+        self.assertIsNot(create_op, vars(ops.Graph)["create_op"])
+      self.assertIs(create_op, vars(ops.Graph)["create_op"])
+      _build_ops()
+
+  def testOnlyOneActiveProfiler(self):
+    with graph_build_profiler.GraphBuildProfiler():
+      with self.assertRaisesRegexp(RuntimeError, "Only one"):
+        with graph_build_profiler.GraphBuildProfiler():
+          pass
+
+
+if __name__ == "__main__":
+  test.main()
@@ -18,11 +18,14 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
 import contextlib
+import math
 import os
 import random
 import sys
 import threading
+import time
 
 from tensorflow.core.protobuf import config_pb2
 from tensorflow.python import pywrap_tensorflow as print_mdl
@@ -36,6 +39,9 @@ from tensorflow.python.util import compat
 WARMUP_STEPS = 10
 MAX_TRACED_STEPS = 100
 
+SampledOpStats = collections.namedtuple(
+    'SampledOpStats', ['node_name', 'num_samples', 'total_micros'])
+
 
 def _profiled_init(self, target='', graph=None, config=None):
   """Overwrites the session.__init__."""
@@ -78,6 +84,9 @@ def _profiled_run(self,
         self.profile_context.profiler._graph = self.graph
         self.profile_context.profiler.add_step(step, run_metadata)
         options.trace_level = old_trace_level
+      elif self.profile_context._sampler:
+        ret = self.profile_context._sampler.run(
+            self, step, fetches, feed_dict, options, run_metadata)
       else:
         ret = self._profiler_run_internal(fetches, feed_dict, options)
 
@@ -107,6 +116,137 @@ def _profiled_run(self,
   # pylint: enable=protected-access
 
 
+def _moving_average(average, value, decay=0.9):
+  if average is None:
+    return value
+  return decay * average + (1 - decay) * value
+
+
+class _OpStatsSampler(object):
+  """Traces a random fraction of steps and keeps per-node statistics.
+
+  The gaps between sampled steps are drawn from a geometric distribution, so
+  that unsampled steps only compare the step counter. The step before a
+  sampled step is timed without tracing when possible, and the sampling rate
+  is lowered whenever the estimated overhead of tracing and aggregating
+  exceeds `max_overhead`.
+
+  Only the per-node statistics of the last `window_size` sampled steps are
+  kept, so that memory use does not grow with the number of steps.
+  """
+
+  def __init__(self, rate, trace_level, window_size, max_overhead, rng):
+    if not 0 < rate <= 1:
+      raise ValueError('sampling_rate must be in (0, 1], got %s.\n' % rate)
+    if window_size < 1:
+      raise ValueError('sampling_window must be positive.\n')
+    self._max_rate = rate
+    self.rate = rate
+    self._trace_level = trace_level
+    self._max_overhead = max_overhead
+    self._rng = rng
+    self._window = collections.deque(maxlen=window_size)
+    # Maps node names to [num_samples, total_micros] over the window.
+    self._totals = {}
+    self._traced_seconds = None
+    self._untraced_seconds = None
+    self._schedule(WARMUP_STEPS)
+
+  @property
+  def overhead(self):
+    """Estimated relative increase of the average step time, or None."""
+    if self._traced_seconds is None or not self._untraced_seconds:
+      return None
+    extra = max(self._traced_seconds - self._untraced_seconds, 0.)
+    return self.rate * extra / self._untraced_seconds
+
+  @property
+  def num_samples(self):
+    return len(self._window)
+
+  def is_slow_path(self, step):
+    return step >= self._next_step or step == self._control_step
+
+  def op_stats(self):
+    """Returns `SampledOpStats` of the window, most expensive first."""
+    stats = [SampledOpStats(name, n, micros)
+             for name, (n, micros) in self._totals.items()]
+    return sorted(stats, key=lambda s: s.total_micros, reverse=True)
+
+  def run(self, sess, step, fetches, feed_dict, options, run_metadata):
+    """Runs a step of `sess`, tracing it if it is sampled."""
+    # pylint: disable=protected-access
+    if step < self._next_step:
+      start = time.time()
+      ret = sess._profiler_run_internal(
+          fetches, feed_dict, options, run_metadata)
+      if step == self._control_step:
+        self._untraced_seconds = _moving_average(
+            self._untraced_seconds, time.time() - start)
+      return ret
+
+    start = time.time()
+    if not run_metadata:
+      run_metadata = config_pb2.RunMetadata()
+    if not options:
+      options = config_pb2.RunOptions(trace_level=self._trace_level)
+      old_trace_level = options.trace_level
+    else:
+      old_trace_level = options.trace_level
+      options.trace_level = self._trace_level
+    ret = sess._profiler_run_internal(
+        fetches, feed_dict, options, run_metadata)
+    options.trace_level = old_trace_level
+    self._add(run_metadata.step_stats)
+    self._traced_seconds = _moving_average(
+        self._traced_seconds, time.time() - start)
+    self._adapt_rate()
+    self._schedule(step)
+    return ret
+    # pylint: enable=protected-access
+
+  def _add(self, step_stats):
+    """Adds the node times of a step to the window."""
+    micros = collections.defaultdict(int)
+    for dev_stats in step_stats.dev_stats:
+      for node_stats in dev_stats.node_stats:
+        micros[node_stats.node_name] += node_stats.all_end_rel_micros
+    if len(self._window) == self._window.maxlen:
+      for name, m in self._window[0].items():
+        total = self._totals[name]
+        total[0] -= 1
+        total[1] -= m
+        if not total[0]:
+          del self._totals[name]
+    self._window.append(micros)
+    for name, m in micros.items():
+      total = self._totals.setdefault(name, [0, 0])
+      total[0] += 1
+      total[1] += m
+
+  def _adapt_rate(self):
+    if self._untraced_seconds is None:
+      return
+    extra = self._traced_seconds - self._untraced_seconds
+    if extra <= 0:
+      self.rate = self._max_rate
+    else:
+      self.rate = min(self._max_rate,
+                      self._max_overhead * self._untraced_seconds / extra)
+
+  def _schedule(self, step):
+    """Draws the next sampled step after `step`."""
+    if self.rate >= 1:
+      gap = 0
+    else:
+      gap = int(math.log(1. - self._rng.random()) / math.log(1. - self.rate))
+    if self._untraced_seconds is None:
+      # Overhead can only be estimated after timing an untraced step.
+      gap = max(gap, 1)
+    self._next_step = step + 1 + gap
+    self._control_step = self._next_step - 1 if gap else None
+
+
 class ProfileContext(object):
   """A Context that captures RunMetadata and performs profiling.
 
@@ -133,6 +273,14 @@ class ProfileContext(object):
       pctx.trace_next_step()
       _ = session.run(train_op)
       pctx.profiler.profile_operations(options=opts)
+
+    # Sample 1% of the steps, keeping the tracing overhead below 0.5%.
+    with tf.contrib.tfprof.ProfileContext('/tmp/train_dir',
+                                          sampling_rate=0.01,
+                                          max_sampling_overhead=0.005) as pctx:
+      train_loop().
+      for s in pctx.sampled_op_stats()[:10]:
+        print(s.node_name, s.total_micros / s.num_samples)
   ```
 
   Args:
@@ -145,6 +293,15 @@ class ProfileContext(object):
         user to only enable profiling when needed.
     debug: If true, also dumps the raw trace RunMetadata text file to
         profile_dir. And print debugging message. Useful for bug report.
+    sampling_rate: If set, traces this fraction of the steps after the warm up
+        steps, chosen at random, instead of the pre-defined steps. Sampled
+        steps are not added to `profiler`; their per-node statistics are
+        available from `sampled_op_stats`.
+    sampling_trace_level: The `RunOptions` trace level of sampled steps.
+    sampling_window: Number of most recent sampled steps whose statistics are
+        kept.
+    max_sampling_overhead: The sampling rate is lowered if tracing is
+        estimated to make the average step more than this fraction slower.
   """
 
   def __init__(self,
@@ -152,7 +309,11 @@ class ProfileContext(object):
                trace_steps=None,
                dump_steps=None,
                enabled=True,
-               debug=False):
+               debug=False,
+               sampling_rate=None,
+               sampling_trace_level=config_pb2.RunOptions.SOFTWARE_TRACE,
+               sampling_window=100,
+               max_sampling_overhead=0.01):
     self._enabled = enabled
     if not self._enabled:
       return
@@ -162,9 +323,17 @@ class ProfileContext(object):
       raise ValueError('Must have a directory for profile.\n')
     self._profiler_dir = profile_dir
 
+    self._rng = random.Random(111)
+    if sampling_rate is None:
+      self._sampler = None
+    else:
+      self._sampler = _OpStatsSampler(sampling_rate, sampling_trace_level,
+                                      sampling_window, max_sampling_overhead,
+                                      self._rng)
+
     if trace_steps is None:
       self._trace_steps = set()
-      self._auto_tracing = True
+      self._auto_tracing = self._sampler is None
     else:
       if len(trace_steps) > MAX_TRACED_STEPS:
         raise ValueError('Only support tracing up to 100 steps.\n')
@@ -172,11 +341,13 @@ class ProfileContext(object):
       self._auto_tracing = False
 
     if dump_steps is None:
-      self._dump_steps = set([MAX_TRACED_STEPS])
+      if self._sampler is None:
+        self._dump_steps = set([MAX_TRACED_STEPS])
+      else:
+        self._dump_steps = set()
     else:
       self._dump_steps = set(dump_steps[:])
 
-    self._rng = random.Random(111)
     self._fetched = set()
     self._slow_path_steps = self._dump_steps | self._trace_steps
     self._trace_next_step = False
@@ -212,6 +383,27 @@ class ProfileContext(object):
       self._profiler = model_analyzer.Profiler(ops.get_default_graph())
     return self._profiler
 
+  def sampled_op_stats(self):
+    """Returns the statistics of the sampled steps, see `sampling_rate`.
+
+    Returns:
+      A list of `SampledOpStats`, most expensive node first. `num_samples` is
+      the number of sampled steps in the window that ran the node, and
+      `total_micros` the time of the node in these steps, summed over
+      devices. None if sampling is not enabled.
+    """
+    if not self._enabled or not self._sampler:
+      return None
+    with self._lock:
+      return self._sampler.op_stats()
+
+  @property
+  def sampling_overhead(self):
+    """Estimated relative step time overhead of sampling, or None."""
+    if not self._enabled or not self._sampler:
+      return None
+    return self._sampler.overhead
+
   def trace_next_step(self):
     """Enables tracing and adds traces to profiler at next step."""
     if not self._enabled:
@@ -229,6 +421,8 @@ class ProfileContext(object):
   def _is_fast_path(self, step):
     if step in self._slow_path_steps:
       return False
+    if self._sampler and self._sampler.is_slow_path(step):
+      return False
     # When user doesn't set the tracing steps explicitly, auto decide it.
     if (self._auto_tracing and step > WARMUP_STEPS and
         self._traced_steps <= MAX_TRACED_STEPS):
@@ -18,7 +18,9 @@ from __future__ import division
 from __future__ import print_function
 
 import os
+import random
 
+from tensorflow.core.protobuf import config_pb2
 from tensorflow.python.client import session
 from tensorflow.python.framework import ops
 from tensorflow.python.ops import variables
@@ -88,6 +90,48 @@ class ProfilerContextTest(test.TestCase):
         for f in gfile.ListDirectory(test.get_temp_dir()):
           self.assertFalse("run_meta" in f)
 
+  def testSampling(self):
+    ops.reset_default_graph()
+    x = lib.BuildFullModel()
+
+    with profile_context.ProfileContext(test.get_temp_dir(),
+                                        sampling_rate=1.0,
+                                        sampling_window=5,
+                                        max_sampling_overhead=1e9) as pctx:
+      with session.Session() as sess:
+        sess.run(variables.global_variables_initializer())
+        for _ in range(profile_context.WARMUP_STEPS):
+          sess.run(x)
+        self.assertEqual([], pctx.sampled_op_stats())
+        for _ in range(20):
+          sess.run(x)
+      # Only the last steps are kept, and nothing is added to the profiler.
+      self.assertEqual(5, pctx._sampler.num_samples)
+      stats = pctx.sampled_op_stats()
+      self.assertTrue(stats)
+      self.assertEqual(
+          sorted(stats, key=lambda s: s.total_micros, reverse=True), stats)
+      for s in stats:
+        self.assertGreater(s.num_samples, 0)
+        self.assertLessEqual(s.num_samples, 5)
+      self.assertGreaterEqual(pctx.sampling_overhead, 0)
+      self.assertEqual(1.0, pctx._sampler.rate)
+      self.assertEqual(0, pctx._traced_steps)
+
+  def testSamplingRateOverheadBudget(self):
+    sampler = profile_context._OpStatsSampler(
+        0.5, config_pb2.RunOptions.SOFTWARE_TRACE, window_size=10,
+        max_overhead=0.01, rng=random.Random(0))
+    sampler._untraced_seconds = 1.0
+    sampler._traced_seconds = 2.0
+    sampler._adapt_rate()
+    self.assertAllClose(0.01, sampler.rate)
+    self.assertAllClose(0.01, sampler.overhead)
+    sampler._traced_seconds = 1.001
+    sampler._adapt_rate()
+    self.assertEqual(0.5, sampler.rate)
+    self.assertAllClose(0.0005, sampler.overhead)
+
   def testDisabled(self):
     ops.reset_default_graph()
     x = lib.BuildFullModel()
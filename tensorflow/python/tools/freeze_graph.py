@@ -47,7 +47,7 @@ from tensorflow.core.protobuf import saver_pb2
 from tensorflow.core.protobuf.meta_graph_pb2 import MetaGraphDef
 from tensorflow.python import pywrap_tensorflow
 from tensorflow.python.client import session
-from tensorflow.python.framework import graph_util
+from tensorflow.python.framework import graph_util_impl
 from tensorflow.python.framework import importer
 from tensorflow.python.platform import app
 from tensorflow.python.platform import gfile
@@ -95,6 +95,20 @@ def freeze_graph_with_def_protos(input_graph_def,
       for node in input_graph_def.node:
         node.device = ""
 
+  output_node_names = output_node_names.replace(" ", "").split(",")
+  # The graph is indexed once, both to check the output nodes before loading
+  # the checkpoint and to extract the inference graph when freezing it.
+  # pylint: disable=protected-access
+  graph_index = graph_util_impl._GraphDefIndex(
+      input_meta_graph_def.graph_def if input_meta_graph_def
+      else input_graph_def)
+  # pylint: enable=protected-access
+  missing_nodes = graph_index.missing_nodes(output_node_names)
+  if missing_nodes:
+    print("Output nodes " + ", ".join(missing_nodes) +
+          " are not in the graph!")
+    return -1
+
   if input_graph_def:
     _ = importer.import_graph_def(input_graph_def, name="")
   with session.Session() as sess:
@@ -137,20 +151,14 @@ def freeze_graph_with_def_protos(input_graph_def,
         variable_names_blacklist.replace(" ", "").split(",")
         if variable_names_blacklist else None)
 
-    if input_meta_graph_def:
-      output_graph_def = graph_util.convert_variables_to_constants(
-          sess,
-          input_meta_graph_def.graph_def,
-          output_node_names.replace(" ", "").split(","),
-          variable_names_whitelist=variable_names_whitelist,
-          variable_names_blacklist=variable_names_blacklist)
-    else:
-      output_graph_def = graph_util.convert_variables_to_constants(
-          sess,
-          input_graph_def,
-          output_node_names.replace(" ", "").split(","),
-          variable_names_whitelist=variable_names_whitelist,
-          variable_names_blacklist=variable_names_blacklist)
+    # pylint: disable=protected-access
+    output_graph_def = graph_util_impl._convert_variables_to_constants(
+        sess,
+        graph_index,
+        output_node_names,
+        variable_names_whitelist=variable_names_whitelist,
+        variable_names_blacklist=variable_names_blacklist)
+    # pylint: enable=protected-access
 
   # Write GraphDef to file if output path has been given.
   if output_graph:
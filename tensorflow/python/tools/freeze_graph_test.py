@@ -157,6 +157,24 @@ class FreezeGraphTest(test_util.TensorFlowTestCase):
             },)
         builder.save(as_text=True)
 
+  def testFreezeGraphWithMissingOutputNode(self):
+    checkpoint_prefix = os.path.join(self.get_temp_dir(), "saved_checkpoint")
+    input_graph_name = "input_graph.pb"
+    with ops.Graph().as_default():
+      variable_node = variables.Variable(1.0, name="variable_node")
+      _ = math_ops.multiply(variable_node, 2.0, name="output_node")
+      with session.Session() as sess:
+        sess.run(variables.global_variables_initializer())
+        checkpoint_path = saver_lib.Saver().save(sess, checkpoint_prefix)
+        graph_io.write_graph(sess.graph, self.get_temp_dir(), input_graph_name)
+
+    input_graph_path = os.path.join(self.get_temp_dir(), input_graph_name)
+    output_graph_path = os.path.join(self.get_temp_dir(), "output_graph.pb")
+    freeze_graph.freeze_graph(input_graph_path, "", False, checkpoint_path,
+                              "output_node,missing_node", "save/restore_all",
+                              "save/Const:0", output_graph_path, False, "")
+    self.assertFalse(os.path.exists(output_graph_path))
+
   def testFreezeGraphV1(self):
     self._testFreezeGraph(saver_pb2.SaverDef.V1)
 
@@ -0,0 +1,139 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+r"""Reports which modules dominate the time it takes to import a module.
+
+Usage:
+
+  python import_time_report.py --module=tensorflow --top=30
+
+Every module that gets imported for the first time while importing `--module`
+is listed with its cumulative import time (including the modules it imports)
+and its self time (excluding them).
+
+Only the Python standard library is used here, so that the tool does not
+import any part of TensorFlow before starting the measurement.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import argparse
+import sys
+import time
+
+try:
+  import builtins  # pylint: disable=g-import-not-at-top
+except ImportError:
+  import __builtin__ as builtins  # pylint: disable=g-import-not-at-top
+
+
+class ImportTimer(object):
+  """Records the import time of every module imported while it is active."""
+
+  def __init__(self):
+    self.cumulative_time = {}
+    self.self_time = {}
+    # Stack of [module name, time spent in nested imports].
+    self._stack = []
+    self._original_import = None
+
+  def __enter__(self):
+    self._original_import = builtins.__import__
+    builtins.__import__ = self._timed_import
+    return self
+
+  def __exit__(self, exec_type, exec_value, exec_tb):
+    builtins.__import__ = self._original_import
+
+  def _timed_import(self, name, globals=None, locals=None, fromlist=(),  # pylint: disable=redefined-builtin
+                    level=0):
+    full_name = _absolute_name(name, globals, level)
+    if full_name in sys.modules:
+      return self._original_import(name, globals, locals, fromlist, level)
+    self._stack.append([full_name, 0.0])
+    start = time.time()
+    try:
+      return self._original_import(name, globals, locals, fromlist, level)
+    finally:
+      elapsed = time.time() - start
+      _, nested_time = self._stack.pop()
+      if self._stack:
+        self._stack[-1][1] += elapsed
+      if full_name in sys.modules and full_name not in self.cumulative_time:
+        self.cumulative_time[full_name] = elapsed
+        self.self_time[full_name] = elapsed - nested_time
+
+  def format_report(self, top=30, sort_by="self"):
+    """Returns the `top` slowest modules as a printable table."""
+    times = self.self_time if sort_by == "self" else self.cumulative_time
+    names = sorted(times, key=lambda n: -times[n])[:top]
+    lines = ["%12s %12s  %s" % ("self (ms)", "cumul. (ms)", "module")]
+    for name in names:
+      lines.append("%12.1f %12.1f  %s" % (self.self_time[name] * 1e3,
+                                          self.cumulative_time[name] * 1e3,
+                                          name))
+    return "\n".join(lines)
+
+
+def _absolute_name(name, module_globals, level):
+  """Resolves a possibly relative import of `name` to an absolute name."""
+  if level <= 0 or not module_globals:
+    return name
+  package = module_globals.get("__package__")
+  if not package:
+    package = module_globals.get("__name__", "")
+    if "__path__" not in module_globals:
+      package = package.rpartition(".")[0]
+  for _ in range(level - 1):
+    package = package.rpartition(".")[0]
+  return "%s.%s" % (package, name) if name else package
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument(
+      "--module",
+      type=str,
+      default="tensorflow",
+      help="The module whose import is measured.")
+  parser.add_argument(
+      "--top",
+      type=int,
+      default=30,
+      help="Number of modules to list.")
+  parser.add_argument(
+      "--sort_by",
+      type=str,
+      default="self",
+      choices=["self", "cumulative"],
+      help="Whether to rank modules by self or cumulative import time.")
+  flags = parser.parse_args()
+
+  if flags.module in sys.modules:
+    print("Module %s is already imported." % flags.module)
+    return 1
+  start = time.time()
+  with ImportTimer() as timer:
+    __import__(flags.module)
+  total = time.time() - start
+  print("Imported %s in %.3f s (%d new modules)." %
+        (flags.module, total, len(timer.cumulative_time)))
+  print(timer.format_report(top=flags.top, sort_by=flags.sort_by))
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
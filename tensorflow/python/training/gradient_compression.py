@@ -0,0 +1,204 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Compression of gradients sent between devices or tasks.
+
+A `GradientCompressor` turns a dense gradient into a smaller representation on
+the device that computed it (`compress`), and turns that representation back
+into a dense gradient on the device that aggregates it (`decompress`). Only
+the compressed representation crosses the device boundary.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+from tensorflow.python.framework import constant_op
+from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import ops
+from tensorflow.python.framework import tensor_shape
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import math_ops
+from tensorflow.python.ops import nn_ops
+from tensorflow.python.ops import state_ops
+from tensorflow.python.ops import variables
+
+
+class GradientCompressor(object):
+  """Base class for gradient compressors."""
+
+  def compress(self, grad, name=None):
+    """Compresses a dense gradient.
+
+    Args:
+      grad: a dense `Tensor`.
+      name: optional name for the operations created.
+
+    Returns:
+      a `Tensor` or `IndexedSlices` to send instead of `grad`.
+    """
+    raise NotImplementedError(
+        "compress method must be implemented in descendants.")
+
+  def decompress(self, compressed, shape, dtype, name=None):
+    """Reconstructs a dense gradient from the output of `compress`.
+
+    The output of `compress` may have been summed or averaged across devices
+    (for `IndexedSlices`, by concatenation) before it is decompressed.
+
+    Args:
+      compressed: a `Tensor` or `IndexedSlices` returned by `compress`.
+      shape: the `TensorShape` of the original gradient.
+      dtype: the `DType` of the original gradient.
+      name: optional name for the operations created.
+
+    Returns:
+      a dense `Tensor` of shape `shape` and type `dtype`.
+    """
+    raise NotImplementedError(
+        "decompress method must be implemented in descendants.")
+
+
+class Float16GradientCompressor(GradientCompressor):
+  """Sends gradients as float16, halving the bytes of float32 gradients.
+
+  Gradients are multiplied by `scale` before the cast to avoid underflow of
+  small values, and divided by it after the cast back. Finite values beyond
+  the float16 range saturate at the largest float16 value instead of becoming
+  infinite, while non-finite values are sent unchanged, so that dynamic loss
+  scaling can still detect overflows in the original gradients.
+  """
+
+  def __init__(self, scale=1.0):
+    """Creates a Float16GradientCompressor.
+
+    Args:
+      scale: factor applied to the gradients while they are in float16.
+
+    Raises:
+      ValueError: if `scale` is not positive.
+    """
+    if scale <= 0:
+      raise ValueError("scale must be positive: %s" % scale)
+    self._scale = scale
+
+  def compress(self, grad, name=None):
+    with ops.name_scope(name, "Float16Compress", [grad]):
+      grad = ops.convert_to_tensor(grad)
+      if self._scale != 1.0:
+        grad *= math_ops.cast(self._scale, grad.dtype)
+      max_value = math_ops.cast(np.finfo(np.float16).max, grad.dtype)
+      saturated = math_ops.maximum(math_ops.minimum(grad, max_value),
+                                   -max_value)
+      grad = array_ops.where(math_ops.is_finite(grad), saturated, grad)
+      return math_ops.cast(grad, dtypes.float16)
+
+  def decompress(self, compressed, shape, dtype, name=None):
+    with ops.name_scope(name, "Float16Decompress", [compressed]):
+      grad = math_ops.cast(compressed, dtype)
+      if self._scale != 1.0:
+        grad /= math_ops.cast(self._scale, dtype)
+      return grad
+
+
+class TopKGradientCompressor(GradientCompressor):
+  """Sends only the largest entries of gradients, as `IndexedSlices`.
+
+  For a gradient with `n` elements, only the `max(1, int(ratio * n))` entries
+  with the largest absolute values are sent, together with their flat
+  indices. With `error_feedback`, the entries that were not sent are kept in
+  a local residual variable and added to the gradient of the next step, so
+  that every update is eventually applied.
+
+  A non-trainable residual variable is created in the `LOCAL_VARIABLES`
+  collection by every call to `compress`, colocated with the gradient, so this
+  is meant for graph construction, where `compress` is called once per
+  gradient on each device. The residual is created directly rather than
+  through `tf.get_variable` or a `DistributionStrategy`, so that it stays a
+  separate accumulator of the device that computed the gradient even when
+  `compress` is called in cross-tower context.
+  """
+
+  def __init__(self, ratio=0.01, error_feedback=True):
+    """Creates a TopKGradientCompressor.
+
+    Args:
+      ratio: the fraction of the entries of each gradient to send.
+      error_feedback: whether to accumulate the entries that are not sent and
+        add them to the next gradient.
+
+    Raises:
+      ValueError: if `ratio` is not in (0, 1].
+    """
+    if not 0 < ratio <= 1:
+      raise ValueError("ratio must be in (0, 1]: %s" % ratio)
+    self._ratio = ratio
+    self._error_feedback = error_feedback
+
+  def compress(self, grad, name=None):
+    with ops.name_scope(name, "TopKCompress", [grad]):
+      grad = ops.convert_to_tensor(grad)
+      if not grad.shape.is_fully_defined():
+        raise ValueError(
+            "TopKGradientCompressor requires a fully defined shape, got %s "
+            "for %s" % (grad.shape, grad))
+      num_elements = grad.shape.num_elements()
+      k = max(1, int(self._ratio * num_elements))
+      if self._error_feedback:
+        with ops.colocate_with(grad):
+          residual = variables.Variable(
+              lambda: array_ops.zeros(grad.shape, dtype=grad.dtype),
+              trainable=False,
+              collections=[ops.GraphKeys.LOCAL_VARIABLES],
+              name="residual")
+        grad += residual
+      flat_grad = array_ops.reshape(grad, [-1])
+      _, indices = nn_ops.top_k(math_ops.abs(flat_grad), k, sorted=False)
+      values = array_ops.gather(flat_grad, indices)
+      if self._error_feedback:
+        sent = array_ops.scatter_nd(
+            array_ops.expand_dims(indices, 1), values, [num_elements])
+        update_residual = state_ops.assign(
+            residual, array_ops.reshape(flat_grad - sent, grad.shape))
+        with ops.control_dependencies([update_residual]):
+          values = array_ops.identity(values)
+      return ops.IndexedSlices(values, indices,
+                               dense_shape=constant_op.constant([num_elements]))
+
+  def decompress(self, compressed, shape, dtype, name=None):
+    with ops.name_scope(name, "TopKDecompress", [compressed]):
+      shape = tensor_shape.as_shape(shape)
+      flat_grad = math_ops.unsorted_segment_sum(
+          compressed.values, compressed.indices, shape.num_elements())
+      return math_ops.cast(array_ops.reshape(flat_grad, shape), dtype)
+
+
+def compressed_num_bytes(compressed):
+  """Returns a scalar int64 `Tensor` with the size of `compressed` in bytes.
+
+  Args:
+    compressed: a `Tensor` or `IndexedSlices`, e.g. returned by
+      `GradientCompressor.compress`.
+
+  Returns:
+    The number of bytes of the values, and for `IndexedSlices` the indices,
+    that are sent for `compressed`.
+  """
+  if isinstance(compressed, ops.IndexedSlices):
+    return (compressed_num_bytes(compressed.values) +
+            compressed_num_bytes(compressed.indices))
+  compressed = ops.convert_to_tensor(compressed)
+  return (math_ops.to_int64(array_ops.size(compressed)) *
+          compressed.dtype.base_dtype.size)
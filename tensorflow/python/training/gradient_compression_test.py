@@ -0,0 +1,149 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests and benchmarks for gradient_compression.py."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import time
+
+import numpy as np
+
+from tensorflow.python.client import session as session_lib
+from tensorflow.python.framework import constant_op
+from tensorflow.python.framework import dtypes
+from tensorflow.python.framework import ops
+from tensorflow.python.ops import array_ops
+from tensorflow.python.ops import control_flow_ops
+from tensorflow.python.ops import random_ops
+from tensorflow.python.ops import variables
+from tensorflow.python.platform import test
+from tensorflow.python.training import gradient_compression
+
+
+class Float16GradientCompressorTest(test.TestCase):
+
+  def testRoundTrip(self):
+    compressor = gradient_compression.Float16GradientCompressor(scale=4.0)
+    grad = constant_op.constant([[1.5, -2.25], [0.125, 1e-6]])
+    compressed = compressor.compress(grad)
+    self.assertEqual(dtypes.float16, compressed.dtype)
+    decompressed = compressor.decompress(compressed, grad.shape, grad.dtype)
+    self.assertEqual(dtypes.float32, decompressed.dtype)
+    with self.test_session():
+      self.assertAllClose(grad.eval(), decompressed.eval(), atol=1e-6)
+      self.assertEqual(8, gradient_compression.compressed_num_bytes(
+          compressed).eval())
+
+  def testSaturatesFiniteAndKeepsNonFiniteValues(self):
+    compressor = gradient_compression.Float16GradientCompressor()
+    grad = constant_op.constant([1e6, -1e6, np.inf, np.nan])
+    decompressed = compressor.decompress(
+        compressor.compress(grad), grad.shape, grad.dtype)
+    with self.test_session():
+      result = decompressed.eval()
+    max_value = np.finfo(np.float16).max
+    self.assertAllEqual([max_value, -max_value, np.inf], result[:3])
+    self.assertTrue(np.isnan(result[3]))
+
+
+class TopKGradientCompressorTest(test.TestCase):
+
+  def testSendsLargestEntries(self):
+    compressor = gradient_compression.TopKGradientCompressor(
+        ratio=0.5, error_feedback=False)
+    grad = constant_op.constant([[0.1, -4.0], [3.0, 0.2]])
+    compressed = compressor.compress(grad)
+    self.assertIsInstance(compressed, ops.IndexedSlices)
+    decompressed = compressor.decompress(compressed, grad.shape, grad.dtype)
+    with self.test_session():
+      self.assertAllClose([[0., -4.], [3., 0.]], decompressed.eval())
+      # Two float32 values and two int32 indices.
+      self.assertEqual(
+          16, gradient_compression.compressed_num_bytes(compressed).eval())
+
+  def testErrorFeedback(self):
+    compressor = gradient_compression.TopKGradientCompressor(ratio=0.25)
+    grad = constant_op.constant([4.0, 3.0, 2.0, 1.0])
+    decompressed = compressor.decompress(
+        compressor.compress(grad), grad.shape, grad.dtype)
+    with self.test_session():
+      variables.local_variables_initializer().run()
+      # Entries that are not sent accumulate until they are the largest.
+      self.assertAllClose([4., 0., 0., 0.], decompressed.eval())
+      self.assertAllClose([0., 6., 0., 0.], decompressed.eval())
+      self.assertAllClose([8., 0., 0., 0.], decompressed.eval())
+      self.assertAllClose([0., 0., 8., 0.], decompressed.eval())
+
+  def testInvalidRatio(self):
+    with self.assertRaises(ValueError):
+      gradient_compression.TopKGradientCompressor(ratio=0.)
+    with self.assertRaises(ValueError):
+      gradient_compression.TopKGradientCompressor(ratio=1.5)
+
+
+class GradientCompressionBenchmark(test.Benchmark):
+  """Measures sending gradients from a worker to a parameter server."""
+
+  def _benchmark_compressor(self, compressor, name, shape=(1024, 1024),
+                            iters=20):
+    workers, _ = test.create_local_cluster(num_workers=1, num_ps=1)
+    with ops.Graph().as_default():
+      with ops.device("/job:worker/task:0"):
+        grad = random_ops.random_normal(shape)
+        if compressor is None:
+          compressed = grad
+        else:
+          compressed = compressor.compress(grad)
+        num_bytes = gradient_compression.compressed_num_bytes(compressed)
+      with ops.device("/job:ps/task:0"):
+        if compressor is None:
+          received = array_ops.identity(compressed)
+        else:
+          received = compressor.decompress(compressed, grad.shape, grad.dtype)
+        step = control_flow_ops.group(received)
+      with session_lib.Session(workers[0].target) as sess:
+        variables.local_variables_initializer().run()
+        bytes_sent = sess.run(num_bytes)
+        sess.run(step)
+        start = time.time()
+        for _ in range(iters):
+          sess.run(step)
+        step_time = (time.time() - start) / iters
+    print("%s: %d bytes sent, %.3f ms per step" %
+          (name, bytes_sent, step_time * 1e3))
+    self.report_benchmark(
+        iters=iters,
+        wall_time=step_time,
+        extras={"bytes_sent": bytes_sent},
+        name=name)
+
+  def benchmark_uncompressed(self):
+    self._benchmark_compressor(None, "gradient_compression_none")
+
+  def benchmark_float16(self):
+    self._benchmark_compressor(
+        gradient_compression.Float16GradientCompressor(),
+        "gradient_compression_float16")
+
+  def benchmark_top_k(self):
+    self._benchmark_compressor(
+        gradient_compression.TopKGradientCompressor(ratio=0.01),
+        "gradient_compression_top_k_1_percent")
+
+
+if __name__ == "__main__":
+  test.main()
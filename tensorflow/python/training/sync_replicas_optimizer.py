@@ -142,7 +142,8 @@ class SyncReplicasOptimizer(optimizer.Optimizer):
                variable_averages=None,
                variables_to_average=None,
                use_locking=False,
-               name="sync_replicas"):
+               name="sync_replicas",
+               gradient_compressor=None):
     """Construct a sync_replicas optimizer.
 
     Args:
@@ -163,6 +164,11 @@ class SyncReplicasOptimizer(optimizer.Optimizer):
         needed if variable_averages is passed in.
       use_locking: If True use locks for update operation.
       name: string. Optional name of the returned operation.
+      gradient_compressor: Optional `GradientCompressor` (see
+        `tensorflow/python/training/gradient_compression.py`). If set, dense
+        gradients are compressed on the replica and decompressed on the device
+        of their variable before they are pushed into the accumulators, so
+        only the compressed gradients are sent to the parameter servers.
     """
     if total_num_replicas is None:
       total_num_replicas = replicas_to_aggregate
@@ -177,6 +183,7 @@ class SyncReplicasOptimizer(optimizer.Optimizer):
     self._variable_averages = variable_averages
     self._variables_to_average = variables_to_average
     self._total_num_replicas = total_num_replicas
+    self._gradient_compressor = gradient_compressor
     self._tokens_per_step = max(total_num_replicas, replicas_to_aggregate)
     self._global_step = None
     self._sync_token_queue = None
@@ -267,6 +274,8 @@ class SyncReplicasOptimizer(optimizer.Optimizer):
             aggregated_grad.append(None)  # pass-through.
             continue
           elif isinstance(grad, ops.Tensor):
+            if self._gradient_compressor is not None:
+              grad = self._compress_and_decompress(grad, var)
             grad_accum = data_flow_ops.ConditionalAccumulator(
                 grad.dtype,
                 shape=var.get_shape(),
@@ -342,6 +351,15 @@ class SyncReplicasOptimizer(optimizer.Optimizer):
       self._gradients_applied = True
       return train_op
 
+  def _compress_and_decompress(self, grad, var):
+    """Moves `grad` to the device of `var` in compressed form."""
+    with ops.colocate_with(grad, ignore_existing=True):
+      compressed = self._gradient_compressor.compress(
+          grad, name=var.op.name + "/compress")
+    return self._gradient_compressor.decompress(
+        compressed, var.get_shape(), grad.dtype,
+        name=var.op.name + "/decompress")
+
   def get_chief_queue_runner(self):
     """Returns the QueueRunner for the chief to execute.
 
@@ -26,12 +26,14 @@ from tensorflow.python.framework.test_util import create_local_cluster
 from tensorflow.python.ops import variables
 from tensorflow.python.platform import test
 from tensorflow.python.training import adam
+from tensorflow.python.training import gradient_compression
 from tensorflow.python.training import gradient_descent
 from tensorflow.python.training import training
 
 
 # Creates the workers and return their sessions, graphs, train_ops.
-def get_workers(num_workers, replicas_to_aggregate, workers):
+def get_workers(num_workers, replicas_to_aggregate, workers,
+                gradient_compressor=None):
   sessions = []
   graphs = []
   train_ops = []
@@ -59,7 +61,8 @@ def get_workers(num_workers, replicas_to_aggregate, workers):
         sync_rep_opt = training.SyncReplicasOptimizer(
             sgd_opt,
             replicas_to_aggregate=replicas_to_aggregate,
-            total_num_replicas=num_workers)
+            total_num_replicas=num_workers,
+            gradient_compressor=gradient_compressor)
         train_op = [
             sync_rep_opt.apply_gradients(
                 zip([grads_0, grads_1, grads_sparse],
@@ -176,6 +179,35 @@ class SyncReplicasOptimizerTest(test.TestCase):
     self.assertAllClose(1 - 2 * (0.9 + 1.1) / 2 * 2.0,
                         sessions[1].run(var_1_g_1))
 
+  def test2WorkersWithFloat16GradientCompression(self):
+    num_workers = 2
+    replicas_to_aggregate = 2
+    num_ps = 2
+    workers, _ = create_local_cluster(num_workers=num_workers, num_ps=num_ps)
+
+    sessions, graphs, train_ops = get_workers(
+        num_workers, replicas_to_aggregate, workers,
+        gradient_compressor=(
+            gradient_compression.Float16GradientCompressor()))
+
+    var_0_g_1 = graphs[1].get_tensor_by_name("v0:0")
+    var_1_g_1 = graphs[1].get_tensor_by_name("v1:0")
+    var_sparse_g_1 = graphs[1].get_tensor_by_name("v_sparse:0")
+    global_step = graphs[1].get_tensor_by_name("global_step:0")
+
+    sessions[0].run(train_ops[0])
+    sessions[1].run(train_ops[1])
+    while sessions[1].run(global_step) != 1:
+      time.sleep(0.01)
+
+    # Dense gradients went through float16, sparse ones are not compressed.
+    self.assertAllClose(0 - (0.1 + 0.3) / 2 * 2.0, sessions[1].run(var_0_g_1),
+                        atol=1e-3)
+    self.assertAllClose(1 - (0.9 + 1.1) / 2 * 2.0, sessions[1].run(var_1_g_1),
+                        atol=1e-3)
+    self.assertAllClose([[3.0], [4.0 - (0.1 + 0.3) / 2 * 2.0]],
+                        sessions[1].run(var_sparse_g_1))
+
   # 3 workers and one of them is backup.
   def test3Workers1Backup(self):
     num_workers = 3
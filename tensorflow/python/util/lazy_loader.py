@@ -20,6 +20,7 @@ from __future__ import division
 from __future__ import print_function
 
 import importlib
+import sys
 import types
 
 
@@ -56,3 +57,102 @@ class LazyLoader(types.ModuleType):
   def __dir__(self):
     module = self._load()
     return dir(module)
+
+
+class LazyAPIModule(types.ModuleType):
+  """A module whose public attributes are imported on first access.
+
+  Generated API modules (e.g. `tf.keras.layers`) map each public name to the
+  module and symbol it is exported from. Instead of importing all of them when
+  the API module is imported, a `LazyAPIModule` records that mapping and
+  resolves each name the first time it is looked up. Resolved names are stored
+  in the module's `__dict__`, so later lookups are plain attribute lookups.
+
+  `dir()` lists resolved and unresolved names alike, and `__all__` lists the
+  public ones so that `from module import *` keeps working.
+  """
+
+  def __init__(self, name, lazy_attrs, doc=None):
+    """Creates a LazyAPIModule.
+
+    Args:
+      name: Full name of the module.
+      lazy_attrs: Dict mapping attribute names to `(module_name, symbol_name)`
+        tuples. If `module_name` is `"."`, `symbol_name` is a submodule of this
+        module. If `module_name` is empty, `symbol_name` is the full name of a
+        module to import.
+      doc: Docstring of the module.
+    """
+    super(LazyAPIModule, self).__init__(name, doc)
+    self._lazy_attrs = dict(lazy_attrs)
+    self.__all__ = sorted(n for n in self._lazy_attrs if not n.startswith("_"))
+
+  def _resolve(self, item):
+    module_name, symbol_name = self._lazy_attrs[item]
+    if module_name == ".":
+      value = importlib.import_module(self.__name__ + "." + symbol_name)
+    elif not module_name:
+      value = importlib.import_module(symbol_name)
+    else:
+      value = getattr(importlib.import_module(module_name), symbol_name)
+    setattr(self, item, value)
+    return value
+
+  def __getattr__(self, item):
+    # Only called when `item` is not yet in the module's `__dict__`.
+    # Dunders such as `__version__` may be lazy attributes too, so they are
+    # only rejected when they are not.
+    if item not in self.__dict__.get("_lazy_attrs", ()):
+      raise AttributeError("module '%s' has no attribute '%s'" %
+                           (self.__name__, item))
+    return self._resolve(item)
+
+  def __dir__(self):
+    return sorted(set(self.__dict__) | set(self._lazy_attrs))
+
+  def add_lazy_attr(self, item, module_name, symbol_name):
+    """Adds an attribute, resolved like the ones passed to the constructor.
+
+    Args:
+      item: Name of the attribute.
+      module_name: Name of the module the attribute is imported from, see
+        `lazy_attrs` in the constructor.
+      symbol_name: Name of the attribute in `module_name`.
+    """
+    self._lazy_attrs[item] = (module_name, symbol_name)
+
+
+def install_lazy_api_module(name, module_globals, lazy_attrs):
+  """Replaces the module `name` in `sys.modules` with a `LazyAPIModule`.
+
+  This is meant to be called at the very end of a generated API `__init__.py`:
+
+  ```python
+  _lazy_loader.install_lazy_api_module(__name__, globals(), {
+      'add': ('tensorflow.python.ops.math_ops', 'add'),
+      'layers': ('.', 'layers'),
+  })
+  ```
+
+  Attributes already defined in `module_globals` (e.g. `__path__` and
+  `__file__`) are carried over, except for private names.
+
+  Args:
+    name: Full name of the module to replace.
+    module_globals: The `globals()` of the module being replaced.
+    lazy_attrs: Dict mapping attribute names to `(module_name, symbol_name)`
+      tuples, see `LazyAPIModule`.
+
+  Returns:
+    The new `LazyAPIModule`.
+  """
+  module = LazyAPIModule(name, lazy_attrs, doc=module_globals.get("__doc__"))
+  for key, value in module_globals.items():
+    if key.startswith("__") or not key.startswith("_"):
+      if key != "__all__":
+        module.__dict__[key] = value
+  # Keep the original module alive: on Python 2, module objects clear their
+  # globals when they are garbage collected.
+  module.__dict__["_original_module"] = sys.modules.get(name)
+  sys.modules[name] = module
+  return module
@@ -0,0 +1,79 @@
+# Copyright 2018 The TensorFlow Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+"""Tests for lazy_loader."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import sys
+
+from tensorflow.python.platform import test
+from tensorflow.python.util import lazy_loader
+
+_MODULE_NAME = 'tensorflow.python.util.lazy_loader_test_module'
+
+
+class LazyAPIModuleTest(test.TestCase):
+
+  def setUp(self):
+    module_globals = {'__name__': _MODULE_NAME, '__doc__': 'Test module.',
+                      'eager_symbol': 1, '_private_symbol': 2}
+    self.module = lazy_loader.install_lazy_api_module(
+        _MODULE_NAME, module_globals, {
+            'join': ('os.path', 'join'),
+            'path': ('', 'os.path'),
+            '_hidden': ('os.path', 'basename'),
+            '__version__': ('os.path', 'sep'),
+        })
+
+  def tearDown(self):
+    del sys.modules[_MODULE_NAME]
+
+  def testInstalledInSysModules(self):
+    self.assertIs(self.module, sys.modules[_MODULE_NAME])
+    self.assertEqual('Test module.', self.module.__doc__)
+    self.assertEqual(1, self.module.eager_symbol)
+    self.assertFalse(hasattr(self.module, '_private_symbol'))
+
+  def testResolvesOnFirstAccess(self):
+    self.assertNotIn('join', self.module.__dict__)
+    self.assertIs(os.path.join, self.module.join)
+    self.assertIs(os.path.join, self.module.__dict__['join'])
+    self.assertIs(os.path, self.module.path)
+    self.assertIs(os.path.basename, self.module._hidden)
+    self.assertEqual(os.path.sep, self.module.__version__)
+
+  def testAddLazyAttr(self):
+    self.module.add_lazy_attr('dirname', 'os.path', 'dirname')
+    self.assertNotIn('dirname', self.module.__dict__)
+    self.assertIs(os.path.dirname, self.module.dirname)
+
+  def testDirAndAll(self):
+    self.assertIn('join', dir(self.module))
+    self.assertIn('_hidden', dir(self.module))
+    self.assertIn('eager_symbol', dir(self.module))
+    self.assertEqual(['join', 'path'], self.module.__all__)
+    self.assertNotIn('join', self.module.__dict__)
+
+  def testMissingAttribute(self):
+    with self.assertRaises(AttributeError):
+      _ = self.module.does_not_exist
+    self.assertFalse(hasattr(self.module, '__wrapped__'))
+
+
+if __name__ == '__main__':
+  test.main()
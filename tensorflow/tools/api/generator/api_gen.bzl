@@ -119,16 +119,20 @@ def gen_api_init_files(name,
                        root_init_template=None,
                        srcs=[],
                        api_name="tensorflow",
-                       package="tensorflow.python"):
+                       package="tensorflow.python",
+                       lazy_loading=False):
   root_init_template_flag = ""
   if root_init_template:
     root_init_template_flag = "--root_init_template=$(location " + root_init_template + ")"
+  lazy_loading_flag = ""
+  if lazy_loading:
+    lazy_loading_flag = "--lazy_loading "
   native.genrule(
       name = name,
       outs = output_files,
       cmd = (
           "$(location //tensorflow/tools/api/generator:create_python_api) " +
-          root_init_template_flag + " --apidir=$(@D) --apiname=" + api_name + " --package=" + package + " $(OUTS)"),
+          root_init_template_flag + " " + lazy_loading_flag + "--apidir=$(@D) --apiname=" + api_name + " --package=" + package + " $(OUTS)"),
       srcs = srcs,
       tools = ["//tensorflow/tools/api/generator:create_python_api"],
       visibility = ["//tensorflow:__pkg__"],
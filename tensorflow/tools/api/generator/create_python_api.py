@@ -46,6 +46,13 @@ from __future__ import print_function
 
 """
 _GENERATED_FILE_FOOTER = "\n\ndel print_function\n"
+# Appended to lazily loaded modules, after _GENERATED_FILE_FOOTER.
+# The lazy root module loads the lazy loader without importing the
+# tensorflow.python package, which importing it by name would do.
+_LAZY_FILE_FOOTER = """
+from tensorflow import _api_lazy_loader as _lazy_loader
+_lazy_loader.install_lazy_api_module(__name__, globals(), _LAZY_ATTRS)
+"""
 
 
 class SymbolExposedTwiceError(Exception):
@@ -86,6 +93,8 @@ class _ModuleInitCodeBuilder(object):
     self._dest_import_to_id = collections.defaultdict(int)
     # Names that start with underscore in the root module.
     self._underscore_names_in_root = []
+    # Maps import statements to (source_module_name, source_name, dest_name).
+    self._import_sources = {}
 
   def add_import(
       self, symbol_id, dest_module_name, source_module_name, source_name,
@@ -124,10 +133,17 @@ class _ModuleInitCodeBuilder(object):
     # We store all possible ways of importing this symbol and later pick just
     # one.
     self.module_imports[dest_module_name][full_api_name].add(import_str)
+    self._import_sources[import_str] = (
+        source_module_name, source_name, dest_name)
 
-  def build(self):
+  def build(self, lazy_loading=False):
     """Get a map from destination module to __init__.py code for that module.
 
+    Args:
+      lazy_loading: If True, modules map their symbols to their sources in a
+        `_LAZY_ATTRS` dict, to resolve them on first attribute access instead
+        of importing them eagerly.
+
     Returns:
       A dictionary where
         key: (string) destination module (for e.g. tf or tf.consts).
@@ -140,7 +156,10 @@ class _ModuleInitCodeBuilder(object):
       imports_list = [
           sorted(imports)[0]
           for _, imports in dest_name_to_imports.items()]
-      module_text_map[dest_module] = '\n'.join(sorted(imports_list))
+      if lazy_loading:
+        module_text_map[dest_module] = self._lazy_module_text(imports_list)
+      else:
+        module_text_map[dest_module] = '\n'.join(sorted(imports_list))
 
     # Expose exported symbols with underscores in root module
     # since we import from it using * import.
@@ -149,7 +168,15 @@ class _ModuleInitCodeBuilder(object):
     # We will always generate a root __init__.py file to let us handle *
     # imports consistently. Be sure to have a root __init__.py file listed in
     # the script outputs.
-    module_text_map[''] = module_text_map.get('', '') + '''
+    if lazy_loading:
+      # Nothing is imported yet, so list the names that will be resolved.
+      module_text_map[''] = module_text_map.get('', '_LAZY_ATTRS = {}') + '''
+_names_with_underscore = [%s]
+__all__ = sorted(_s for _s in _LAZY_ATTRS if not _s.startswith('_'))
+__all__.extend([_s for _s in _names_with_underscore])
+''' % underscore_names_str
+    else:
+      module_text_map[''] = module_text_map.get('', '') + '''
 _names_with_underscore = [%s]
 __all__ = [_s for _s in dir() if not _s.startswith('_')]
 __all__.extend([_s for _s in _names_with_underscore])
@@ -158,14 +185,28 @@ __all__.remove('print_function')
 
     return module_text_map
 
+  def _lazy_module_text(self, imports_list):
+    """Returns __init__.py code listing the sources of the given imports."""
+    lines = ['_LAZY_ATTRS = {']
+    for import_str in sorted(imports_list):
+      source_module_name, source_name, dest_name = (
+          self._import_sources[import_str])
+      lines.append('    %r: (%r, %r),' % (
+          dest_name, source_module_name, source_name))
+    lines.append('}')
+    return '\n'.join(lines)
 
-def get_api_init_text(package, api_name):
+
+def get_api_init_text(package, api_name, lazy_loading=False):
   """Get a map from destination module to __init__.py code for that module.
 
   Args:
     package: Base python package containing python with target tf_export
       decorators.
     api_name: API you want to generate (e.g. `tensorflow` or `estimator`).
+    lazy_loading: If True, modules map their symbols to their sources in a
+      `_LAZY_ATTRS` dict, to resolve them on first attribute access instead of
+      importing them eagerly.
 
   Returns:
     A dictionary where
@@ -233,7 +274,7 @@ def get_api_init_text(package, api_name):
           -1, parent_module, import_from,
           module_split[submodule_index], module_split[submodule_index])
 
-  return module_code_builder.build()
+  return module_code_builder.build(lazy_loading=lazy_loading)
 
 
 def get_module(dir_path, relative_to_dir):
@@ -294,7 +335,8 @@ def get_module_docstring(module_name, package, api_name):
 
 
 def create_api_files(
-    output_files, package, root_init_template, output_dir, api_name):
+    output_files, package, root_init_template, output_dir, api_name,
+    lazy_loading=False):
   """Creates __init__.py files for the Python API.
 
   Args:
@@ -307,10 +349,17 @@ def create_api_files(
       with imports.
     output_dir: output API root directory.
     api_name: API you want to generate (e.g. `tensorflow` or `estimator`).
+    lazy_loading: If True, modules resolve their symbols lazily on first
+      attribute access instead of importing them eagerly. The
+      `root_init_template`, if any, must then resolve the `_LAZY_ATTRS` of the
+      root module itself and provide the `_api_lazy_loader` module to the
+      other modules, like `api_template_lazy.__init__.py` does.
 
   Raises:
     ValueError: if an output file is not under api/ directory,
-      or output_files list is missing a required file.
+      output_files list is missing a required file, or root_init_template
+      does not resolve _LAZY_ATTRS or provide _api_lazy_loader with
+      lazy_loading.
   """
   module_name_to_file_path = {}
   for output_file in output_files:
@@ -323,7 +372,7 @@ def create_api_files(
       os.makedirs(os.path.dirname(file_path))
     open(file_path, 'a').close()
 
-  module_text_map = get_api_init_text(package, api_name)
+  module_text_map = get_api_init_text(package, api_name, lazy_loading)
 
   # Add imports to output files.
   missing_output_files = []
@@ -340,10 +389,18 @@ def create_api_files(
           _GENERATED_FILE_HEADER %
           get_module_docstring(module, package, api_name) +
           text + _GENERATED_FILE_FOOTER)
+      if lazy_loading:
+        contents += _LAZY_FILE_FOOTER
     else:
       # Read base init file
       with open(root_init_template, 'r') as root_init_template_file:
         contents = root_init_template_file.read()
+        if lazy_loading and ('_LAZY_ATTRS' not in contents or
+                             '_api_lazy_loader' not in contents):
+          raise ValueError(
+              'Root init template %s does not resolve _LAZY_ATTRS or does '
+              'not provide _api_lazy_loader, so it can not be used with lazy '
+              'loading.' % root_init_template)
         contents = contents.replace('# API IMPORTS PLACEHOLDER', text)
     with open(module_name_to_file_path[module], 'w') as fp:
       fp.write(contents)
@@ -381,6 +438,10 @@ def main():
       '--apiname', required=True, type=str,
       choices=API_ATTRS.keys(),
       help='The API you want to generate.')
+  parser.add_argument(
+      '--lazy_loading', default=False, action='store_true',
+      help='Resolve symbols of API submodules on first attribute access '
+           'instead of importing them when the submodule is imported.')
 
   args = parser.parse_args()
 
@@ -395,7 +456,7 @@ def main():
   # Populate `sys.modules` with modules containing tf_export().
   importlib.import_module(args.package)
   create_api_files(outputs, args.package, args.root_init_template,
-                   args.apidir, args.apiname)
+                   args.apidir, args.apiname, args.lazy_loading)
 
 
 if __name__ == '__main__':
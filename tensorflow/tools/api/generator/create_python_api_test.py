@@ -19,9 +19,13 @@ from __future__ import division
 from __future__ import print_function
 
 import imp
+import importlib
+import os
+import shutil
 import sys
 
 from tensorflow.python.platform import test
+from tensorflow.python.util import lazy_loader
 from tensorflow.python.util.tf_export import tf_export
 from tensorflow.tools.api.generator import create_python_api
 
@@ -91,6 +95,54 @@ class CreatePythonApiTest(test.TestCase):
     self.assertTrue(expected in str(imports),
                     msg='%s not in %s' % (expected, str(imports)))
 
+  def testLazyLoadingModuleText(self):
+    imports = create_python_api.get_api_init_text(
+        package=create_python_api._DEFAULT_PACKAGE,
+        api_name='tensorflow',
+        lazy_loading=True)
+    # Modules map names to their sources instead of importing them.
+    expected = '%r: (%r, %r),' % (
+        '_TEST_CONSTANT', 'tensorflow.python.test_module', '_TEST_CONSTANT')
+    self.assertIn(expected, imports['consts'])
+    self.assertNotIn('import _TEST_CONSTANT', imports['consts'])
+    # So does the root module, including for its submodules.
+    expected = '%r: (%r, %r),' % (
+        'test_op', 'tensorflow.python.test_module', 'test_op')
+    self.assertIn(expected, imports[''])
+    self.assertIn('%r: (%r, %r),' % ('consts', '.', 'consts'), imports[''])
+    self.assertNotIn('from tensorflow.python.test_module import', imports[''])
+    self.assertIn('__all__ = sorted(', imports[''])
+
+  def testLazyRootModuleResolvesVersion(self):
+    # Builds a root package from the lazy template, which loads the lazy loader
+    # from python/util/lazy_loader.py under the package.
+    package_name = 'lazy_root_test'
+    package_dir = os.path.join(self.get_temp_dir(), package_name)
+    loader_dir = os.path.join(package_dir, 'python', 'util')
+    os.makedirs(loader_dir)
+    shutil.copy(os.path.splitext(lazy_loader.__file__)[0] + '.py',
+                os.path.join(loader_dir, 'lazy_loader.py'))
+    with open(test.test_src_dir_path('api_template_lazy.__init__.py')) as f:
+      template = f.read()
+    with open(os.path.join(package_dir, '__init__.py'), 'w') as f:
+      f.write(template.replace(
+          '# API IMPORTS PLACEHOLDER',
+          '_LAZY_ATTRS = {%r: (%r, %r)}' % (
+              '__version__', _MODULE_NAME, '_TEST_CONSTANT')))
+
+    setattr(sys.modules[_MODULE_NAME], '_TEST_CONSTANT', _TEST_CONSTANT)
+    sys.path.insert(0, self.get_temp_dir())
+    try:
+      module = importlib.import_module(package_name)
+      self.assertEqual(_TEST_CONSTANT, module.__version__)
+      with self.assertRaises(AttributeError):
+        _ = module.__git_version__
+    finally:
+      sys.path.remove(self.get_temp_dir())
+      for name in list(sys.modules):
+        if name == package_name or name.startswith(package_name + '.'):
+          del sys.modules[name]
+
 
 if __name__ == '__main__':
   test.main()